@@ -0,0 +1,113 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+# Micro-benchmark of camlib.AppRTreeStorage (array backed, bulk loaded, tombstone removal) against the
+# previous implementation that inserted and deleted the points one at a time.
+# Run it from the application folder: python Utils/rtree_benchmark.py [nr_of_points ...]
+
+import os
+import sys
+import time
+
+import numpy as np
+from rtree import index as rtindex
+from shapely import LineString
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from camlib import AppRTreeStorage     # noqa: E402
+
+
+class LegacyAppRTreeStorage:
+    """
+    The AppRTreeStorage class as it was before being array backed.
+    """
+
+    def __init__(self):
+        self.rti = rtindex.Index()
+        self.obj2points = []
+        self.points2obj = []
+        self.get_points = lambda go: go.coords
+        self.objects = []
+        self.indexes = {}
+
+    def insert(self, obj):
+        self.objects.append(obj)
+        objid = len(self.objects) - 1
+        self.indexes[id(obj)] = objid
+
+        for i in range(len(self.obj2points), objid + 1):
+            self.obj2points.append([])
+        self.obj2points[objid] = []
+        for pt in self.get_points(obj):
+            self.rti.insert(len(self.points2obj), (pt[0], pt[1], pt[0], pt[1]), obj=objid)
+            self.obj2points[objid].append(len(self.points2obj))
+            self.points2obj.append(objid)
+
+    def remove(self, obj):
+        objid = self.indexes[id(obj)]
+        self.objects[objid] = None
+        for i, pt in enumerate(self.get_points(obj)):
+            try:
+                self.rti.delete(self.obj2points[objid][i], (pt[0], pt[1], pt[0], pt[1]))
+            except IndexError:
+                pass
+
+    def get_objects(self):
+        return (o for o in self.objects if o is not None)
+
+    def nearest(self, pt):
+        tidx = next(self.rti.nearest(pt, objects=True))
+        return (tidx.bbox[0], tidx.bbox[1]), self.objects[tidx.object]
+
+
+def get_pts(o):
+    return [o.coords[0], o.coords[-1]]
+
+
+def run(storage_class, paths, nr_chained):
+    storage = storage_class()
+    storage.get_points = get_pts
+
+    t0 = time.perf_counter()
+    for path in paths:
+        storage.insert(path)
+    # the first query builds the index for the array backed storage
+    pt, geo = storage.nearest((0, 0))
+    t_build = time.perf_counter() - t0
+
+    # nearest neighbour chaining, as done by the G-Code generators
+    t0 = time.perf_counter()
+    current_pt = (0, 0)
+    for __ in range(nr_chained):
+        pt, geo = storage.nearest(current_pt)
+        storage.remove(geo)
+        current_pt = geo.coords[-1]
+    t_chain = time.perf_counter() - t0
+
+    return t_build, t_chain
+
+
+def main(sizes):
+    rng = np.random.default_rng(0)
+    nr_chained = 10000
+
+    for nr_points in sizes:
+        # each path has two indexed points
+        starts = rng.random((nr_points // 2, 2)) * 1000.0
+        ends = starts + rng.normal(scale=2.0, size=starts.shape)
+        paths = [LineString([tuple(s), tuple(e)]) for s, e in zip(starts.tolist(), ends.tolist())]
+        chained = min(nr_chained, len(paths))
+
+        print("%d points, %d chained nearest/remove:" % (nr_points, chained))
+        for name, storage_class in (("legacy", LegacyAppRTreeStorage), ("array", AppRTreeStorage)):
+            t_build, t_chain = run(storage_class, paths, chained)
+            print("    %-8s build: %8.3f s    chain: %8.3f s" % (name, t_build, t_chain))
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000])
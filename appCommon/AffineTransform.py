@@ -0,0 +1,232 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import math
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class AffineTransform:
+    """
+    A 2D affine transformation held as a 3x3 matrix, applied to many Shapely geometry elements at once.
+
+    The transformations made with the methods of this class (translate, scale, mirror, rotate, skew) are the same as
+    the ones made by the functions in the shapely.affinity module, with the same parameters. Chained transformations
+    are fused into a single matrix so the coordinates are visited only once.
+
+    The geometry of an object is usually stored in (nested) lists and in dictionaries. The apply() method gathers all
+    the Shapely geometry elements found in a number of such containers into one flat array, transforms all their
+    coordinates with one vectorized call and then puts the results back into containers with the same structure.
+    Anything that is not a Shapely geometry element is kept as it is.
+
+    The class does not use the app, therefore it can be used in a worker process.
+
+    Usage:
+    transform = AffineTransform().translate(10, 0).rotate(90, origin=(10, 0))
+    solid_geometry, follow_geometry = transform.apply(solid_geometry, follow_geometry)
+    """
+
+    # Number of geometry elements transformed at once; the progress is reported after each chunk
+    chunk_size = 100000
+
+    def __init__(self, matrix=None):
+        """
+
+        :param matrix:  3x3 affine matrix; if None the identity transformation is used
+        :type matrix:   np.ndarray | list | None
+        """
+        self.matrix = np.identity(3) if matrix is None else np.array(matrix, dtype=float).reshape(3, 3)
+
+    def __repr__(self):
+        return "AffineTransform(%s)" % str(self.params)
+
+    def __matmul__(self, other):
+        """
+        The transformation 'self @ other' applies first 'other' and then 'self'.
+        """
+        return AffineTransform(self.matrix @ other.matrix)
+
+    def then(self, other):
+        """
+        :param other:   the transformation to be done after this one
+        :type other:    AffineTransform
+        :return:        a new transformation that does this transformation and then the 'other' one
+        :rtype:         AffineTransform
+        """
+        return other @ self
+
+    @property
+    def params(self):
+        """
+        The [a, b, d, e, xoff, yoff] parameters of the transformation, as used by shapely.affinity.affine_transform()
+        """
+        m = self.matrix
+        return [m[0, 0], m[0, 1], m[1, 0], m[1, 1], m[0, 2], m[1, 2]]
+
+    def is_identity(self):
+        return bool(np.array_equal(self.matrix, np.identity(3)))
+
+    # ######################################################################################
+    # Chained transformations. Each returns a new transformation that does the transformation
+    # held by this one followed by the new one.
+    # ######################################################################################
+    def translate(self, xoff=0.0, yoff=0.0):
+        return self._chain([[1.0, 0.0, xoff],
+                            [0.0, 1.0, yoff]])
+
+    def scale(self, xfact=1.0, yfact=1.0, origin=(0, 0)):
+        x0, y0 = origin
+        return self._chain([[xfact, 0.0, x0 - x0 * xfact],
+                            [0.0, yfact, y0 - y0 * yfact]])
+
+    def mirror(self, axis, origin=(0, 0)):
+        """
+        :param axis:    "X" or "Y", the axis around which to mirror
+        :type axis:     str
+        :param origin:  a point on the mirror axis
+        :type origin:   tuple
+        """
+        xfact, yfact = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
+        return self.scale(xfact, yfact, origin=origin)
+
+    def rotate(self, angle, origin=(0, 0), use_radians=False):
+        if not use_radians:
+            angle = math.radians(angle)
+        cos_p = math.cos(angle)
+        sin_p = math.sin(angle)
+        x0, y0 = origin
+        return self._chain([[cos_p, -sin_p, x0 - x0 * cos_p + y0 * sin_p],
+                            [sin_p, cos_p, y0 - x0 * sin_p - y0 * cos_p]])
+
+    def skew(self, xs=0.0, ys=0.0, origin=(0, 0), use_radians=False):
+        if not use_radians:
+            xs = math.radians(xs)
+            ys = math.radians(ys)
+        tan_x = math.tan(xs)
+        tan_y = math.tan(ys)
+        x0, y0 = origin
+        return self._chain([[1.0, tan_x, -y0 * tan_x],
+                            [tan_y, 1.0, -x0 * tan_y]])
+
+    def _chain(self, rows):
+        step = np.identity(3)
+        step[:2, :] = rows
+        return AffineTransform(step @ self.matrix)
+
+    # ######################################################################################
+    # Applying the transformation
+    # ######################################################################################
+    def transform_coords(self, coords):
+        """
+        :param coords:  (N, 2) array of coordinates
+        :type coords:   np.ndarray
+        :return:        the transformed coordinates
+        :rtype:         np.ndarray
+        """
+        m = self.matrix
+        return coords @ m[:2, :2].T + m[:2, 2]
+
+    def transform_array(self, geo_arr, progress=None):
+        """
+        Transforms a flat array of geometry elements.
+
+        :param geo_arr:     1D NumPy object array of Shapely geometry elements (or None)
+        :type geo_arr:      np.ndarray
+        :param progress:    callable that is called with the percentage of the work done, an int from 0 to 100
+        :type progress:     callable | None
+        :return:            a new array with the transformed elements
+        :rtype:             np.ndarray
+        """
+        result = np.empty(len(geo_arr), dtype=object)
+        if len(geo_arr) == 0:
+            return result
+
+        def transform_z(coords):
+            # only X and Y are transformed, Z is kept
+            new_coords = coords.copy()
+            new_coords[:, :2] = self.transform_coords(coords[:, :2])
+            return new_coords
+
+        for start in range(0, len(geo_arr), self.chunk_size):
+            stop = min(start + self.chunk_size, len(geo_arr))
+            chunk = geo_arr[start:stop]
+            has_z = shapely.has_z(chunk)
+            if has_z.any():
+                result[start:stop][~has_z] = shapely.transform(chunk[~has_z], self.transform_coords)
+                result[start:stop][has_z] = shapely.transform(chunk[has_z], transform_z, include_z=True)
+            else:
+                result[start:stop] = shapely.transform(chunk, self.transform_coords)
+
+            if progress is not None:
+                progress(int(100 * stop / len(geo_arr)))
+        return result
+
+    def apply(self, *containers, progress=None):
+        """
+        Transforms all the Shapely geometry elements found in the containers, at once.
+
+        :param containers:  Shapely geometry elements or (nested) lists, tuples and dictionaries holding them
+        :param progress:    callable that is called with the percentage of the work done, an int from 0 to 100
+        :type progress:     callable | None
+        :return:            the transformed containers, with the same structure as the ones given; a single
+                            container if only one was given, else a tuple
+        """
+        leaves = []
+        for container in containers:
+            self.gather(container, leaves)
+
+        geo_arr = np.empty(len(leaves), dtype=object)
+        geo_arr[:] = leaves
+        transformed = iter(self.transform_array(geo_arr, progress=progress))
+
+        result = tuple(self.scatter(container, transformed) for container in containers)
+        return result[0] if len(result) == 1 else result
+
+    @staticmethod
+    def gather(container, leaves):
+        """
+        Appends to the 'leaves' list all the Shapely geometry elements found in the container, depth first.
+
+        :param container:   a Shapely geometry element or a (nested) list, tuple or dictionary
+        :param leaves:      list where the geometry elements are added
+        :type leaves:       list
+        :return:            None
+        """
+        if isinstance(container, BaseGeometry):
+            leaves.append(container)
+        elif isinstance(container, (list, tuple)):
+            for item in container:
+                AffineTransform.gather(item, leaves)
+        elif isinstance(container, dict):
+            for item in container.values():
+                AffineTransform.gather(item, leaves)
+
+    @staticmethod
+    def scatter(container, transformed):
+        """
+        Rebuilds a container visited by gather(), taking the geometry elements from an iterator, in the same order.
+
+        :param container:   the container given to gather()
+        :param transformed: iterator of the geometry elements to be used instead of the ones in the container
+        :return:            a new container; the dictionaries are updated in place
+        """
+        if isinstance(container, BaseGeometry):
+            return next(transformed)
+        elif isinstance(container, list):
+            return [AffineTransform.scatter(item, transformed) for item in container]
+        elif isinstance(container, tuple):
+            return tuple(AffineTransform.scatter(item, transformed) for item in container)
+        elif isinstance(container, dict):
+            for key, item in container.items():
+                container[key] = AffineTransform.scatter(item, transformed)
+        return container
@@ -0,0 +1,109 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import numpy as np
+
+import logging
+
+log = logging.getLogger('base')
+
+# Upper limit of the number of segments used for a full circle when the segments are chosen by the chord error;
+# it keeps a very small tolerance (or a huge radius) from exploding the number of points
+MAX_STEPS_PER_CIRCLE = 4096
+
+
+def arc_tolerance(app, units):
+    """
+    The maximum distance allowed between an arc and the chords that replace it, as set in Preferences, in the
+    given units. The value in Preferences is in millimeters.
+
+    :param app:     the application; it can be None (e.g. in a worker process)
+    :param units:   the units of the coordinates of the arcs, "MM" or "IN"
+    :type units:    str
+    :return:        the tolerance or None if the arcs are to be made with a fixed number of steps per circle
+    :rtype:         float | None
+    """
+    if app is None:
+        return None
+
+    try:
+        tolerance = float(app.options["global_arc_tolerance"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if tolerance <= 0.0:
+        return None
+    return tolerance / 25.4 if str(units).upper() == 'IN' else tolerance
+
+
+def arc_steps(sweeps, radii, steps_per_circ, tolerance=None):
+    """
+    Number of straight line segments used for each arc.
+
+    With a tolerance, each arc gets the smallest number of segments that keeps the chord error (the sagitta,
+    r * (1 - cos(step / 2))) within the tolerance, so big arcs stay smooth and tiny arcs get few points. Without a
+    tolerance, a full circle is made of steps_per_circ segments.
+
+    :param sweeps:          the angle swept by each arc, in radians (the sign is ignored)
+    :type sweeps:           np.ndarray | list | float
+    :param radii:           the radius of each arc
+    :type radii:            np.ndarray | list | float
+    :param steps_per_circ:  number of segments of a full circle, used when there is no tolerance
+    :type steps_per_circ:   int
+    :param tolerance:       the maximum chord error, in the units of the radii; None or 0 to use steps_per_circ
+    :type tolerance:        float | None
+    :return:                number of segments of each arc, at least 2
+    :rtype:                 np.ndarray
+    """
+    sweeps = np.abs(np.asarray(sweeps, dtype=float))
+    turns = sweeps / (2 * np.pi)
+
+    if tolerance is None or tolerance <= 0.0:
+        steps = np.ceil(turns * steps_per_circ)
+    else:
+        radii = np.abs(np.asarray(radii, dtype=float))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            max_step = 2 * np.arccos(np.clip(1.0 - tolerance / radii, -1.0, 1.0))
+        # a degenerate radius (NaN) gets the minimum number of steps
+        max_step = np.where(np.isnan(max_step) | (max_step <= 0.0), 2 * np.pi, max_step)
+        steps = np.minimum(np.ceil(sweeps / max_step), np.ceil(turns * MAX_STEPS_PER_CIRCLE))
+
+    return np.maximum(steps, 2).astype(np.int64)
+
+
+def arc_points(centers, radii, starts, sweeps, steps):
+    """
+    Makes the points of many arcs at once: each arc is split in 'steps' equal segments, therefore it has steps + 1
+    points, the first one at the start angle and the last one at start + sweep.
+
+    :param centers:     coordinates of the centers, shape (N, 2)
+    :type centers:      np.ndarray | list
+    :param radii:       radius of each arc
+    :type radii:        np.ndarray | list
+    :param starts:      start angle of each arc, in radians
+    :type starts:       np.ndarray | list
+    :param sweeps:      the signed angle swept by each arc, in radians; positive is counter-clockwise
+    :type sweeps:       np.ndarray | list
+    :param steps:       number of segments of each arc, as returned by arc_steps()
+    :type steps:        np.ndarray | list
+    :return:            the points of all the arcs concatenated in a (M, 2) array and the number of points of each arc
+    :rtype:             tuple
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    radii = np.asarray(radii, dtype=float).reshape(-1)
+    starts = np.asarray(starts, dtype=float).reshape(-1)
+    sweeps = np.asarray(sweeps, dtype=float).reshape(-1)
+    steps = np.asarray(steps, dtype=np.int64).reshape(-1)
+
+    counts = steps + 1
+    arc_idx = np.repeat(np.arange(len(counts)), counts)
+    step_idx = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    theta = starts[arc_idx] + (sweeps / steps)[arc_idx] * step_idx
+
+    points = np.column_stack((centers[arc_idx, 0] + radii[arc_idx] * np.cos(theta),
+                              centers[arc_idx, 1] + radii[arc_idx] * np.sin(theta)))
+    return points, counts
@@ -0,0 +1,275 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+from collections import OrderedDict
+import hashlib
+import math
+
+import numpy as np
+import shapely
+
+import logging
+
+log = logging.getLogger('base')
+
+# the Shapely join style for the round corners
+JOIN_ROUND = 1
+
+
+class BufferCache:
+    """
+    Cache of the buffered geometry made by Geometry.isolation_geometry(), kept by each object. Isolating again with
+    other passes, overlap or milling direction buffers the geometry with offsets already used, therefore the buffered
+    geometry is taken from the cache.
+
+    The key is (offset, join style, iso_type, steps per circle), for the geometry that was buffered. The geometry is
+    identified by a hash of its WKB, so a cached entry is never used for geometry that changed (transformed, edited
+    or buffered); the objects also drop all the entries when they change their geometry (invalidate()).
+    The iso_type None is for the fused buffered geometry, before the exteriors or the interiors are taken out of it.
+
+    With the round join, the fused buffered geometry for a bigger offset can be made by buffering the fused geometry of
+    a smaller offset in the cache with the difference of the offsets (the buffer with a round join of the buffered
+    geometry is the buffer with the sum of the distances), therefore a pass of a multi-pass isolation is made from a
+    previous pass. This is done only for the positive offsets; for the negative ones each polygon is buffered on its
+    own, and the polygons are not fused before that.
+    Each made geometry adds to the error of the one it is made from (see derive_error()), so the cache keeps for each
+    entry its estimated error and a geometry is made from a cached one only while the summed error stays within the
+    arc tolerance set in Preferences (see appCommon.Arcs.arc_tolerance()); else the geometry is buffered directly.
+
+    The cache is limited by the number of entries and by the number of vertices of the geometry it holds.
+
+    Usage:
+    cache = BufferCache()
+    geo_hash = cache.geometry_hash(polygons)
+    geo = cache.get(geo_hash, (offset, join, iso_type, steps))
+    if geo is None:
+        base_offset, base_geo, error = cache.nearest_base(geo_hash, offset, join, steps, tolerance)
+        ...
+        cache.put(geo_hash, (offset, join, iso_type, steps), geo, error)
+    """
+
+    # the maximum number of entries; the least recently used are dropped
+    max_entries = 64
+    # the maximum number of vertices of all the cached geometry; the least recently used entries are dropped
+    max_vertices = 2000000
+    # GEOS simplifies the geometry it buffers with this fraction of the buffer distance
+    buffer_simplify_factor = 0.01
+
+    def __init__(self):
+        # key is (geometry hash, offset, join, iso_type, steps),
+        # value is (buffered geometry, estimated error, number of vertices)
+        self._entries = OrderedDict()
+        self.nr_vertices = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.derived = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __deepcopy__(self, memo):
+        # a copy of an object starts with an empty cache
+        return BufferCache()
+
+    @staticmethod
+    def count_vertices(geometry):
+        """
+        :param geometry:    Shapely geometry or a list of Shapely geometry elements
+        :return:            the number of vertices
+        :rtype:             int
+        """
+        if not isinstance(geometry, (list, tuple)):
+            geometry = [geometry]
+        geo_arr = np.empty(len(geometry), dtype=object)
+        geo_arr[:] = geometry
+        return int(np.sum(shapely.get_num_coordinates(geo_arr)))
+
+    @staticmethod
+    def arc_error(offset, steps):
+        """
+        :param offset:  the buffer distance
+        :type offset:   float
+        :param steps:   steps per circle
+        :type steps:    int
+        :return:        the maximum distance between the arcs of a buffer and the chords that replace them
+        :rtype:         float
+        """
+        return abs(offset) * (1 - math.cos(math.pi / (4 * max(int(steps), 1))))
+
+    @classmethod
+    def derive_error(cls, base_error, base_offset, offset, steps):
+        """
+        The estimated error of the geometry made by derive(): the error of the base geometry, plus the simplification
+        done by GEOS for the buffer with the difference of the offsets, plus the simplification done by derive().
+
+        :param base_error:  the estimated error of the base geometry (0.0 for a directly buffered one)
+        :type base_error:   float
+        :param base_offset: the offset of the base geometry
+        :type base_offset:  float
+        :param offset:      the buffer distance
+        :type offset:       float
+        :param steps:       steps per circle
+        :type steps:        int
+        :return:            the estimated error
+        :rtype:             float
+        """
+        return base_error + cls.buffer_simplify_factor * (offset - base_offset) + cls.arc_error(offset, steps)
+
+    @staticmethod
+    def geometry_hash(geometry):
+        """
+        :param geometry:    the list of the Shapely geometry elements that are buffered
+        :type geometry:     list
+        :return:            a hash of the geometry WKB
+        :rtype:             bytes
+        """
+        geo_arr = np.empty(len(geometry), dtype=object)
+        geo_arr[:] = geometry
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(len(geo_arr)).encode())
+        for wkb in shapely.to_wkb(geo_arr):
+            digest.update(wkb)
+        return digest.digest()
+
+    def get(self, geo_hash, key):
+        """
+        :param geo_hash:    as returned by geometry_hash()
+        :param key:         (offset, join style, iso_type, steps per circle)
+        :type key:          tuple
+        :return:            the cached buffered geometry or None if it is not in the cache
+        """
+        full_key = (geo_hash, ) + tuple(key)
+        entry = self._entries.get(full_key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(full_key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, geo_hash, key, geometry, error=0.0):
+        """
+        :param geo_hash:    as returned by geometry_hash()
+        :param key:         (offset, join style, iso_type, steps per circle)
+        :type key:          tuple
+        :param geometry:    the buffered geometry
+        :param error:       the estimated error of the geometry, 0.0 if it was buffered directly (see derive_error())
+        :type error:        float
+        :return:            None
+        """
+        full_key = (geo_hash, ) + tuple(key)
+        old_entry = self._entries.pop(full_key, None)
+        if old_entry is not None:
+            self.nr_vertices -= old_entry[2]
+
+        nr_vertices = self.count_vertices(geometry)
+        self._entries[full_key] = (geometry, float(error), nr_vertices)
+        self.nr_vertices += nr_vertices
+        while self._entries and (len(self._entries) > self.max_entries or self.nr_vertices > self.max_vertices):
+            __, (__, __, dropped_vertices) = self._entries.popitem(last=False)
+            self.nr_vertices -= dropped_vertices
+            self.evictions += 1
+
+    def nearest_base(self, geo_hash, offset, join, steps, tolerance=None):
+        """
+        The fused buffered geometry from which the one for the offset can be made by buffering it with the difference
+        of the offsets, such that the estimated error of the made geometry is within the tolerance.
+
+        :param geo_hash:    as returned by geometry_hash()
+        :param offset:      the buffer distance
+        :type offset:       float
+        :param join:        the Shapely join style
+        :type join:         int
+        :param steps:       steps per circle
+        :type steps:        int
+        :param tolerance:   the maximum estimated error of the made geometry, as returned by
+                            appCommon.Arcs.arc_tolerance(); it is never less than the arc error of the offset and,
+                            with None, nothing is made from a cached geometry
+        :type tolerance:    float | None
+        :return:            (offset, fused buffered geometry, estimated error of the geometry made from it) for the
+                            biggest cached offset smaller than the offset that can be used, or (None, None, None)
+        :rtype:             tuple
+        """
+        if join != JOIN_ROUND or offset <= 0 or tolerance is None:
+            return None, None, None
+
+        max_error = max(tolerance, self.arc_error(offset, steps))
+        found_offset = None
+        found_geo = None
+        found_error = None
+        for (e_hash, e_offset, e_join, e_iso_type, e_steps), (geometry, e_error, __) in self._entries.items():
+            if e_hash != geo_hash or e_iso_type is not None or e_join != join or e_steps != steps:
+                continue
+            if not 0 < e_offset < offset or (found_offset is not None and e_offset <= found_offset):
+                continue
+            error = self.derive_error(e_error, e_offset, offset, steps)
+            if error <= max_error:
+                found_offset = e_offset
+                found_geo = geometry
+                found_error = error
+
+        if found_geo is not None:
+            self.derived += 1
+        return found_offset, found_geo, found_error
+
+    @staticmethod
+    def derive(base_geo, base_offset, offset, steps):
+        """
+        Makes the fused buffered geometry for an offset from the one for a smaller offset (round join).
+
+        Buffering the buffered geometry adds vertices to the arcs that were already approximated, therefore the result
+        is simplified with the tolerance of the arc approximation for the offset.
+
+        :param base_geo:    the fused buffered geometry, as returned by nearest_base()
+        :param base_offset: the offset of the base_geo
+        :type base_offset:  float
+        :param offset:      the buffer distance
+        :type offset:       float
+        :param steps:       steps per circle
+        :type steps:        int
+        :return:            the fused buffered geometry or None if it could not be made
+        """
+        geometry = base_geo.buffer(offset - base_offset, int(steps), join_style=JOIN_ROUND)
+        geometry = geometry.simplify(BufferCache.arc_error(offset, steps), preserve_topology=False)
+        if geometry.is_empty or not geometry.is_valid:
+            return None
+        return geometry
+
+    def invalidate(self):
+        """
+        Drops all the entries. Called when the geometry of the object changes.
+
+        :return:    None
+        """
+        if self._entries:
+            self._entries.clear()
+            self.nr_vertices = 0
+            self.invalidations += 1
+
+    def stats(self):
+        """
+        :return:    the cache counters: hits, misses, derived (made from a smaller offset), invalidations, evictions and
+                    the number of entries
+        :rtype:     dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'derived': self.derived,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'vertices': self.nr_vertices
+        }
+
+    def log_stats(self, name=''):
+        log.debug("%s buffer cache -> hits: %d, misses: %d, derived: %d, invalidations: %d, evictions: %d, "
+                  "entries: %d, vertices: %d" % (name, self.hits, self.misses, self.derived, self.invalidations,
+                                                 self.evictions, len(self._entries), self.nr_vertices))
@@ -12,15 +12,18 @@
 # ##########################################################
 from PyQt6 import QtCore
 
-from shapely import Polygon, Point, LineString
+import shapely
+from shapely import Polygon
 from shapely.ops import unary_union
+from shapely.strtree import STRtree
 
 from appGUI.VisPyVisuals import ShapeCollection
 from appTool import AppTool
+from appCommon.ExclusionRouting import ExclusionRouter
 
-from copy import deepcopy
 import collections
 from datetime import datetime
+import hashlib
 
 import numpy as np
 # from voronoi import Voronoi
@@ -275,6 +278,15 @@ class ExclusionAreas(QtCore.QObject):
         '''
         self.exclusion_areas_storage = []
 
+        # travel routers that avoid the exclusion areas, one for each buffer distance (tool diameter); they are made
+        # again when the exclusion areas change
+        self.routers = {}
+        self.routers_signature = None
+
+        # the union of the exclusion areas, prepared; made again when the exclusion areas change
+        # (areas signature, union)
+        self.areas_union_cache = (None, None)
+
         self.mouse_is_dragging = False
 
         self.solid_geometry = []
@@ -390,6 +402,7 @@ class ExclusionAreas(QtCore.QObject):
                         "overz":    self.over_z_button.get_value()
                     }
                     self.exclusion_areas_storage.append(new_el)
+                    self.invalidate_areas()
 
                     if self.obj_type == 'excellon':
                         color = "#FF7400"
@@ -454,6 +467,7 @@ class ExclusionAreas(QtCore.QObject):
                                 "overz":    self.over_z_button.get_value()
                             }
                             self.exclusion_areas_storage.append(new_el)
+                            self.invalidate_areas()
 
                             if self.obj_type == 'excellon':
                                 color = "#FF7400"
@@ -542,6 +556,7 @@ class ExclusionAreas(QtCore.QObject):
         self.points = []
         self.poly_drawn = False
         self.exclusion_areas_storage = []
+        self.invalidate_areas()
 
         AppTool.delete_moving_selection_shape(self)
         # AppTool.delete_tool_selection_shape(self, shapes_storage=self.exclusion_shapes)
@@ -654,6 +669,7 @@ class ExclusionAreas(QtCore.QObject):
         if self.exclusion_areas_storage:
             self.app.inform.emit('%s' % _("All exclusion zones deleted."))
         self.exclusion_areas_storage.clear()
+        self.invalidate_areas()
         AppTool.delete_moving_selection_shape(self)
         self.app.delete_selection_shape()
         AppTool.delete_tool_selection_shape(self, shapes_storage=self.exclusion_shapes)
@@ -672,6 +688,7 @@ class ExclusionAreas(QtCore.QObject):
         # delete shapes
         for idx in sorted(idxs, reverse=True):
             del self.exclusion_areas_storage[idx]
+        self.invalidate_areas()
 
         # re-add what's left after deletion in first step
         if self.obj_type == 'excellon':
@@ -718,175 +735,98 @@ class ExclusionAreas(QtCore.QObject):
         :return:                A list of x,y tuples that describe the avoiding path
         :rtype:                 list
         """
+        if not self.exclusion_areas_storage:
+            return [[None, end_point]]
 
-        ret_list = []
+        return self.get_router(tooldia).route(start_point, end_point)
 
-        # Travel lines: rapids. Should not pass through Exclusion areas
-        travel_line = LineString([start_point, end_point])
-        origin_point = Point(start_point)
+    def get_router(self, tooldia):
+        """
+        The routers are made once for each tool diameter and are made again only when the Exclusion Areas change.
 
-        buffered_storage = []
+        :param tooldia:         The tool diameter used and which generates the travel lines
+        :type tooldia           float
+        :return:                The router that avoids the Exclusion Areas, buffered for the tool diameter
+        :rtype:                 ExclusionRouter
+        """
         # add a little something to the half diameter, to make sure that we really don't enter the exclusion zones
-        buffered_distance = (tooldia / 2.0) + (0.1 if self.app.app_units == 'MM' else 0.00393701)
-
-        for area in self.exclusion_areas_storage:
-            new_area = deepcopy(area)
-            new_area['shape'] = area['shape'].buffer(buffered_distance, join_style=2)
-            buffered_storage.append(new_area)
-
-        # sort the Exclusion areas from the closest to the start_point to the farthest
-        tmp = []
-        for area in buffered_storage:
-            dist = Point(start_point).distance(area['shape'])
-            tmp.append((dist, area))
-        tmp.sort(key=lambda k: k[0])
-
-        sorted_area_storage = [k[1] for k in tmp]
-
-        # process the ordered exclusion areas list
-        for area in sorted_area_storage:
-            outline = area['shape'].exterior
-            if travel_line.intersects(outline):
-                intersection_pts = travel_line.intersection(outline)
-
-                if isinstance(intersection_pts, Point):
-                    # it's just a touch, continue
-                    continue
-
-                entry_pt = nearest_point(origin_point, intersection_pts)
-                exit_pt = farthest_point(origin_point, intersection_pts)
-
-                if area['strategy'] == 'around':
-                    full_vertex_points = [Point(x) for x in list(outline.coords)]
-
-                    # the last coordinate in outline, a LinearRing, is the closing one
-                    # therefore a duplicate of the first one; discard it
-                    vertex_points = full_vertex_points[:-1]
-
-                    # dist_from_entry = [(entry_pt.distance(vt), vertex_points.index(vt)) for vt in vertex_points]
-                    # closest_point_entry = nsmallest(1, dist_from_entry, key=lambda x: x[0])
-                    # start_idx = closest_point_entry[0][1]
-                    #
-                    # dist_from_exit = [(exit_pt.distance(vt), vertex_points.index(vt)) for vt in vertex_points]
-                    # closest_point_exit = nsmallest(1, dist_from_exit, key=lambda x: x[0])
-                    # end_idx = closest_point_exit[0][1]
-
-                    # pts_line_entry = None
-                    # pts_line_exit = None
-                    # for i in range(len(full_vertex_points)):
-                    #     try:
-                    #         line = LineString(
-                    #             [
-                    #                 (full_vertex_points[i].x, full_vertex_points[i].y),
-                    #                 (full_vertex_points[i + 1].x, full_vertex_points[i + 1].y)
-                    #             ]
-                    #         )
-                    #     except IndexError:
-                    #         continue
-                    #
-                    #     if entry_pt.within(line) or entry_pt.equals(Point(line.coords[0])) or \
-                    #             entry_pt.equals(Point(line.coords[1])):
-                    #         pts_line_entry = [Point(x) for x in line.coords]
-                    #
-                    #     if exit_pt.within(line) or exit_pt.equals(Point(line.coords[0])) or \
-                    #             exit_pt.equals(Point(line.coords[1])):
-                    #         pts_line_exit = [Point(x) for x in line.coords]
-                    #
-                    # closest_point_entry = nearest_point(entry_pt, pts_line_entry)
-                    # start_idx = vertex_points.index(closest_point_entry)
-                    #
-                    # closest_point_exit = nearest_point(exit_pt, pts_line_exit)
-                    # end_idx = vertex_points.index(closest_point_exit)
-
-                    # find all vertexes for which a line from start_point does not cross the Exclusion area polygon
-                    # the same for end_point
-                    # we don't need closest points for which the path leads to crosses of the Exclusion area
-
-                    close_start_points = []
-                    close_end_points = []
-                    for i in range(len(vertex_points)):
-                        try:
-                            start_line = LineString(
-                                [
-                                    start_point,
-                                    (vertex_points[i].x, vertex_points[i].y)
-                                ]
-                            )
-                            end_line = LineString(
-                                [
-                                    end_point,
-                                    (vertex_points[i].x, vertex_points[i].y)
-                                ]
-                            )
-                        except IndexError:
-                            continue
-
-                        if not start_line.crosses(area['shape']):
-                            close_start_points.append(vertex_points[i])
-                        if not end_line.crosses(area['shape']):
-                            close_end_points.append(vertex_points[i])
-
-                    closest_point_entry = nearest_point(entry_pt, close_start_points)
-                    closest_point_exit = nearest_point(exit_pt, close_end_points)
-
-                    start_idx = vertex_points.index(closest_point_entry)
-                    end_idx = vertex_points.index(closest_point_exit)
-
-                    # calculate possible paths: one clockwise the other counterclockwise on the exterior of the
-                    # exclusion area outline (Polygon.exterior)
-                    vp_len = len(vertex_points)
-                    if end_idx > start_idx:
-                        path_1 = vertex_points[start_idx:(end_idx + 1)]
-                        path_2 = [vertex_points[start_idx]]
-                        idx = start_idx
-                        for __ in range(vp_len):
-                            idx = idx - 1 if idx > 0 else (vp_len - 1)
-                            path_2.append(vertex_points[idx])
-                            if idx == end_idx:
-                                break
-                    else:
-                        path_1 = vertex_points[end_idx:(start_idx + 1)]
-                        path_2 = [vertex_points[end_idx]]
-                        idx = end_idx
-                        for __ in range(vp_len):
-                            idx = idx - 1 if idx > 0 else (vp_len - 1)
-                            path_2.append(vertex_points[idx])
-                            if idx == start_idx:
-                                break
-                        path_1.reverse()
-                        path_2.reverse()
-
-                    # choose the one with the lesser length
-                    length_path_1 = 0
-                    for i in range(len(path_1)):
-                        try:
-                            length_path_1 += path_1[i].distance(path_1[i + 1])
-                        except IndexError:
-                            pass
-
-                    length_path_2 = 0
-                    for i in range(len(path_2)):
-                        try:
-                            length_path_2 += path_2[i].distance(path_2[i + 1])
-                        except IndexError:
-                            pass
-
-                    path = path_1 if length_path_1 < length_path_2 else path_2
-
-                    # transform the list of Points into a list of Points coordinates
-                    path_coords = [[None, (p.x, p.y)] for p in path]
-                    ret_list += path_coords
+        buffered_distance = (float(tooldia) / 2.0) + (0.1 if self.app.app_units == 'MM' else 0.00393701)
 
-                else:
-                    path_coords = [[float(area['overz']), (entry_pt.x, entry_pt.y)], [None, (exit_pt.x, exit_pt.y)]]
-                    ret_list += path_coords
+        areas_signature = self.areas_signature()
+        if areas_signature != self.routers_signature:
+            self.routers.clear()
+            self.routers_signature = areas_signature
+
+        try:
+            return self.routers[buffered_distance]
+        except KeyError:
+            router = ExclusionRouter(self.exclusion_areas_storage, buffered_distance)
+            self.routers[buffered_distance] = router
+            return router
+
+    def invalidate_areas(self):
+        """
+        Drops what was made from the Exclusion Areas. Called when Exclusion Areas are added or deleted.
 
-                # create a new LineString to test again for possible other Exclusion zones
-                last_pt_in_path = path_coords[-1][1]
-                travel_line = LineString([last_pt_in_path, end_point])
+        :return:    None
+        """
+        self.routers.clear()
+        self.routers_signature = None
+        self.areas_union_cache = (None, None)
+
+    def areas_signature(self):
+        """
+        The signature is made from the content of the Exclusion Areas and not from the ids of the shapes, because the
+        ids of the deleted shapes are reused for the new ones. It changes also when the areas are changed in place.
+
+        :return:    A value that changes when the Exclusion Areas change
+        :rtype:     bytes
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        shapes_arr = np.empty(len(self.exclusion_areas_storage), dtype=object)
+        shapes_arr[:] = [area['shape'] for area in self.exclusion_areas_storage]
+        for area, wkb in zip(self.exclusion_areas_storage, shapely.to_wkb(shapes_arr)):
+            digest.update(wkb)
+            digest.update(('%s|%s;' % (str(area['strategy']), str(area['overz']))).encode())
+        return digest.digest()
+
+    def areas_union(self):
+        """
+        The union of the Exclusion Areas is made once and is made again only when the Exclusion Areas change. It is
+        prepared, so it can be used in many predicates.
+
+        :return:    The union of the Exclusion Areas or None if there are no Exclusion Areas
+        :rtype:     shapely.geometry.base.BaseGeometry | None
+        """
+        if not self.exclusion_areas_storage:
+            return None
+
+        areas_signature = self.areas_signature()
+        cached_signature, union = self.areas_union_cache
+        if cached_signature != areas_signature:
+            union = unary_union([area['shape'] for area in self.exclusion_areas_storage])
+            shapely.prepare(union)
+            self.areas_union_cache = (areas_signature, union)
+        return union
+
+    def points_in_areas(self, points, distance=0.0):
+        """
+        Finds the points that are inside the Exclusion Areas or closer to them than a distance, at once.
+
+        :param points:      Sequence of Shapely Points, e.g. the drills of a tool
+        :type points:       list | np.ndarray
+        :param distance:    The points found are within this distance from the Exclusion Areas, e.g. the tool radius
+        :type distance:     float
+        :return:            The sorted indexes of the points that are found
+        :rtype:             np.ndarray
+        """
+        union = self.areas_union()
+        if union is None or len(points) == 0:
+            return np.empty(0, dtype=np.int64)
 
-        ret_list.append([None, end_point])
-        return ret_list
+        points_arr = np.empty(len(points), dtype=object)
+        points_arr[:] = list(points)
+        return np.sort(STRtree(points_arr).query(union, predicate='dwithin', distance=float(distance)))
 
 
 class AppLogging:
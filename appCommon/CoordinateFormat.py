@@ -0,0 +1,308 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import numpy as np
+import shapely
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class CoordinateFormatter:
+    """
+    Formats arrays of coordinates as the fixed point numbers used by the Gerber and the Excellon files.
+
+    The values are scaled to integers (value * factor * 10 ^ fract) with NumPy and all the strings are made at once
+    from the integers: the digits are zero padded on the left, the sign is added for the negative values and, for the
+    decimal format, the decimal point is inserted.
+
+    - pad_whole is True:    the whole part is padded to 'whole' digits (the leading zeros are kept)
+                            1.5 -> 015000 for the 3:4 format
+    - pad_whole is False:   only the fractional part is padded to 'fract' digits (the leading zeros are omitted)
+                            1.5 -> 15000 for the 3:4 format
+    - decimal_point is True: the values are formatted with a decimal point
+                            1.5 -> 1.5000 for the 3:4 format
+
+    Usage:
+    formatter = CoordinateFormatter(whole=3, fract=4, factor=1.0, pad_whole=True)
+    x_strings = formatter.format(x_values)
+    xy_strings = formatter.xy(coords)
+    """
+
+    def __init__(self, whole, fract, factor=1.0, pad_whole=True, decimal_point=False):
+        """
+
+        :param whole:           number of digits of the whole part
+        :type whole:            int
+        :param fract:           number of digits of the fractional part
+        :type fract:            int
+        :param factor:          the values are multiplied by this factor (units conversion)
+        :type factor:           float
+        :param pad_whole:       if True the whole part is padded with zeros on the left to 'whole' digits
+        :type pad_whole:        bool
+        :param decimal_point:   if True the values are formatted with a decimal point
+        :type decimal_point:    bool
+        """
+        self.whole = int(whole)
+        self.fract = int(fract)
+        self.factor = float(factor)
+        self.pad_whole = pad_whole
+        self.decimal_point = decimal_point
+
+    def to_int(self, values):
+        """
+        :param values:  array of values
+        :type values:   np.ndarray | list
+        :return:        the values scaled by the factor and by 10 ^ fract, rounded to integers
+        :rtype:         np.ndarray
+        """
+        return np.rint(np.asarray(values, dtype=float) * (self.factor * 10 ** self.fract)).astype(np.int64)
+
+    def format(self, values):
+        """
+        :param values:  1D array of values
+        :type values:   np.ndarray | list
+        :return:        array of strings, the formatted values
+        :rtype:         np.ndarray
+        """
+        int_values = self.to_int(values)
+        abs_values = np.abs(int_values)
+
+        if self.decimal_point and self.fract > 0:
+            scale = 10 ** self.fract
+            whole_str = (abs_values // scale).astype(str)
+            fract_str = np.char.zfill((abs_values % scale).astype(str), self.fract)
+            digits = np.char.add(np.char.add(whole_str, '.'), fract_str)
+        else:
+            width = self.whole + self.fract if self.pad_whole and not self.decimal_point else self.fract + 1
+            digits = np.char.zfill(abs_values.astype(str), width)
+
+        return np.where(int_values < 0, np.char.add('-', digits), digits)
+
+    def xy(self, coords):
+        """
+        :param coords:  (N, 2) array of coordinates
+        :type coords:   np.ndarray
+        :return:        array of strings like 'X012345Y012345'
+        :rtype:         np.ndarray
+        """
+        coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        if len(coords) == 0:
+            return np.array([], dtype=str)
+        return np.char.add(np.char.add('X', self.format(coords[:, 0])), np.char.add('Y', self.format(coords[:, 1])))
+
+
+class CoordinateWriter:
+    """
+    Writes lines with coordinates, formatted by a CoordinateFormatter, and text into a stream (a file or an in-memory
+    io.StringIO buffer).
+
+    The coordinates are collected and are formatted in batches of about 'chunk_size' coordinates; each batch is
+    formatted at once and then written in the stream, in order with the text.
+
+    Each coordinate makes a line: prefix + 'X...Y...' + suffix. The prefix and the suffix can be a string or a tuple
+    of strings that is repeated along the coordinates (e.g. ('G00', 'G01') for pairs of start and stop points).
+    The first coordinate of a group can have a different prefix and suffix.
+
+    Usage:
+    writer = CoordinateWriter(stream, CoordinateFormatter(2, 4))
+    writer.write('G36*\\n')
+    writer.coords(polygon.exterior.coords, suffix='D01*\\n', first_suffix='D02*\\n')
+    writer.write('D02*\\nG37*\\n')
+    writer.flush()
+    """
+
+    # Number of coordinates formatted at once
+    chunk_size = 100000
+
+    def __init__(self, stream, formatter):
+        """
+
+        :param stream:      where the text is written; it needs a write() method
+        :type stream:       io.TextIOBase
+        :param formatter:   the formatter of the coordinates
+        :type formatter:    CoordinateFormatter
+        """
+        self.stream = stream
+        self.formatter = formatter
+
+        # the prefixes and the suffixes are stored as indexes in a table of strings
+        self.codes_table = []
+        self.codes = {}
+
+        self.pending_coords = []
+        # for each array of coordinates: (mask of the first coordinates of the groups, first prefix, prefix pattern,
+        # first suffix, suffix pattern)
+        self.pending_codes = []
+        # text to be written before the coordinate with the index: (index, text)
+        self.pending_text = []
+        self.nr_pending = 0
+
+    def code(self, text):
+        """
+        :param text:    a prefix or a suffix
+        :type text:     str
+        :return:        the index of the text in the table of strings
+        :rtype:         int
+        """
+        try:
+            return self.codes[text]
+        except KeyError:
+            self.codes_table.append(text)
+            self.codes[text] = len(self.codes_table) - 1
+            return self.codes[text]
+
+    def write(self, text):
+        """
+        Writes text after the coordinates added so far.
+
+        :param text:    the text
+        :type text:     str
+        :return:        None
+        """
+        if self.nr_pending == 0 and not self.pending_text:
+            self.stream.write(text)
+        else:
+            self.pending_text.append((self.nr_pending, text))
+
+    def coords(self, coords, suffix='\n', first_suffix=None, prefix='', first_prefix=None, dedupe=False):
+        """
+        Adds a group of coordinates.
+
+        :param coords:          (N, 2) array of coordinates or a sequence of (x, y) tuples; Z is ignored
+        :param suffix:          the text after each coordinate, a string or a tuple of strings repeated along
+                                the coordinates
+        :type suffix:           str | tuple
+        :param first_suffix:    the text after the first coordinate; if None the suffix is used
+        :type first_suffix:     str | None
+        :param prefix:          the text before each coordinate, a string or a tuple of strings repeated along
+                                the coordinates
+        :type prefix:           str | tuple
+        :param first_prefix:    the text before the first coordinate; if None the prefix is used
+        :type first_prefix:     str | None
+        :param dedupe:          if True, the coordinates equal with the previous one are dropped
+        :type dedupe:           bool
+        :return:                None
+        """
+        coords = np.asarray(coords, dtype=float)
+        if coords.size == 0:
+            return
+        coords = coords.reshape(len(coords), -1)[:, :2]
+
+        first = np.zeros(len(coords), dtype=bool)
+        first[0] = True
+        self.add(coords, first, suffix, first_suffix, prefix, first_prefix, dedupe)
+
+    def geometry_coords(self, geometry, **kwargs):
+        """
+        Adds the coordinates of a Shapely geometry element (a Point, a LineString or a LinearRing) as a group.
+
+        :param geometry:    Shapely geometry element
+        :param kwargs:      the parameters of the coords() method
+        :return:            None
+        """
+        self.coords(shapely.get_coordinates(geometry), **kwargs)
+
+    def geometry_array_coords(self, geometry, suffix='\n', first_suffix=None, prefix='', first_prefix=None,
+                              dedupe=False):
+        """
+        Adds the coordinates of many Shapely geometry elements (Points, LineStrings or LinearRings) at once, each
+        element as a group.
+
+        :param geometry:        sequence of Shapely geometry elements
+        :param suffix:          see coords()
+        :param first_suffix:    the text after the first coordinate of each element; see coords()
+        :param prefix:          see coords()
+        :param first_prefix:    the text before the first coordinate of each element; see coords()
+        :param dedupe:          if True, the coordinates equal with the previous one of the same element are dropped
+        :return:                None
+        """
+        coords, index = shapely.get_coordinates(geometry, return_index=True)
+        if len(coords) == 0:
+            return
+
+        first = np.ones(len(coords), dtype=bool)
+        first[1:] = index[1:] != index[:-1]
+        self.add(coords, first, suffix, first_suffix, prefix, first_prefix, dedupe)
+
+    def add(self, coords, first, suffix, first_suffix, prefix, first_prefix, dedupe):
+        """
+        Adds coordinates to the pending ones.
+
+        :param coords:          (N, 2) array of coordinates
+        :type coords:           np.ndarray
+        :param first:           boolean mask of the coordinates that start a group
+        :type first:            np.ndarray
+        :return:                None
+
+        For the other parameters see coords().
+        """
+        if dedupe and len(coords) > 1:
+            keep = first.copy()
+            keep[1:] |= np.any(coords[1:] != coords[:-1], axis=1)
+            coords = coords[keep]
+            first = first[keep]
+
+        prefix = (prefix, ) if isinstance(prefix, str) else tuple(prefix)
+        suffix = (suffix, ) if isinstance(suffix, str) else tuple(suffix)
+        prefix_codes = [self.code(p) for p in prefix]
+        suffix_codes = [self.code(s) for s in suffix]
+        first_prefix_code = prefix_codes[0] if first_prefix is None else self.code(first_prefix)
+        first_suffix_code = suffix_codes[0] if first_suffix is None else self.code(first_suffix)
+
+        self.pending_coords.append(coords)
+        self.pending_codes.append((first, first_prefix_code, prefix_codes, first_suffix_code, suffix_codes))
+        self.nr_pending += len(coords)
+
+        if self.nr_pending >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Formats the pending coordinates and writes them, and the pending text, into the stream.
+
+        :return:    None
+        """
+        if self.nr_pending == 0:
+            if self.pending_text:
+                self.stream.write(''.join(text for __, text in self.pending_text))
+                self.pending_text = []
+            return
+
+        coords = np.concatenate(self.pending_coords)
+
+        prefix_idx = np.empty(len(coords), dtype=np.int64)
+        suffix_idx = np.empty(len(coords), dtype=np.int64)
+        start = 0
+        for group_coords, (first, first_prefix, prefix, first_suffix, suffix) in zip(self.pending_coords,
+                                                                                     self.pending_codes):
+            stop = start + len(group_coords)
+            group_prefix = prefix_idx[start:stop]
+            group_suffix = suffix_idx[start:stop]
+            group_prefix[:] = prefix[0] if len(prefix) == 1 else np.resize(prefix, stop - start)
+            group_suffix[:] = suffix[0] if len(suffix) == 1 else np.resize(suffix, stop - start)
+            group_prefix[first] = first_prefix
+            group_suffix[first] = first_suffix
+            start = stop
+
+        table = np.array(self.codes_table, dtype=str)
+        lines = np.char.add(np.char.add(table[prefix_idx], self.formatter.xy(coords)), table[suffix_idx]).tolist()
+
+        out = []
+        start = 0
+        for index, text in self.pending_text:
+            out.append(''.join(lines[start:index]))
+            out.append(text)
+            start = index
+        out.append(''.join(lines[start:]))
+        self.stream.write(''.join(out))
+
+        self.pending_coords = []
+        self.pending_codes = []
+        self.pending_text = []
+        self.nr_pending = 0
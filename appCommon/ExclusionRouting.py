@@ -0,0 +1,322 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import numpy as np
+import shapely
+from shapely import LineString
+from shapely.strtree import STRtree
+
+from collections import OrderedDict
+import heapq
+import time
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class ExclusionRouter:
+    """
+    Routes the travel (rapid) moves such that they avoid the Exclusion Areas.
+
+    The router is made once for a set of Exclusion Areas and a buffer distance (which depends on the tool diameter):
+    - the buffered areas are kept in STRtree's; a travel line that does not touch an area (the usual case) is found
+    with a bounding box check and a single tree query
+    - for the areas with the 'around' strategy, a visibility graph is made over the vertices of the buffered area
+    outlines; two vertices are connected when the line between them does not enter any area. The graph edges of a
+    vertex are found (vectorized) the first time they are needed and the shortest paths from a vertex to all the others
+    (Dijkstra) are cached, therefore a travel that has to go around the areas costs, after the first ones, only the
+    visibility checks of its two ends
+    - for the areas with the 'over' strategy the travel line is lifted to the area Z where it crosses the area
+
+    The route is a list of [z, (x, y)] moves, like: [[None, (x0, y0)], [over_z, (x1, y1)], ..., [None, end_point]],
+    where z is None for moves at the travel Z.
+
+    Usage:
+    router = ExclusionRouter(exclusion_areas_storage, buffer_distance=0.5)
+    moves = router.route(start_point=(0, 0), end_point=(10, 10))
+    """
+
+    # Number of the vertices sources whose shortest paths are kept
+    max_cached_paths = 4096
+    # Number of the travel points whose visible nodes are kept
+    max_cached_points = 64
+
+    def __init__(self, areas, buffer_distance):
+        """
+
+        :param areas:               list of Exclusion Areas, dicts with the 'shape', 'strategy' and 'overz' keys
+        :type areas:                list
+        :param buffer_distance:     distance used to buffer the areas (half of the tool diameter plus a margin)
+        :type buffer_distance:      float
+        """
+        t0 = time.time()
+
+        around_geo = []
+        over_geo = []
+        over_z = []
+        for area in areas:
+            buffered = area['shape'].buffer(buffer_distance, join_style=2)
+            for poly in shapely.get_parts(buffered):
+                if poly.is_empty:
+                    continue
+                if area['strategy'] == 'around':
+                    around_geo.append(poly)
+                else:
+                    over_geo.append(poly)
+                    over_z.append(float(area['overz']))
+
+        self.around_geo = np.array(around_geo, dtype=object)
+        shapely.prepare(self.around_geo)
+        self.over_geo = np.array(over_geo, dtype=object)
+        self.over_z = over_z
+        self.around_tree = STRtree(self.around_geo)
+        self.over_tree = STRtree(self.over_geo)
+
+        all_geo = np.concatenate((self.around_geo, self.over_geo))
+        self.nr_areas = len(all_geo)
+        self.bounds = shapely.total_bounds(all_geo) if self.nr_areas else None
+
+        # the graph nodes are the vertices of the 'around' areas outlines, without the closing vertex
+        nodes = [shapely.get_coordinates(poly.exterior)[:-1] for poly in self.around_geo]
+        self.nodes = np.concatenate(nodes) if nodes else np.empty((0, 2))
+        self.nr_nodes = len(self.nodes)
+
+        # graph edges as (neighbours indexes, distances) for each node, made on demand
+        self._edges = {}
+        # shortest paths from a node to all the others as (distances, predecessors), made on demand
+        self._paths = OrderedDict()
+        # the nodes visible from the last travel points
+        self._visible = OrderedDict()
+
+        log.debug("ExclusionRouter -> %d areas (%d around, %d over), %d graph nodes, made in %.4f s" %
+                  (self.nr_areas, len(self.around_geo), len(self.over_geo), self.nr_nodes, time.time() - t0))
+
+    def route(self, start_point, end_point):
+        """
+        :param start_point:     X,Y coordinates for the start point of the travel line
+        :type start_point:      tuple
+        :param end_point:       X,Y coordinates for the destination point of the travel line
+        :type end_point:        tuple
+        :return:                A list of [z, (x, y)] moves that describe the avoiding path; z is None for moves
+                                done at the travel Z
+        :rtype:                 list
+        """
+        if self.nr_areas == 0:
+            return [[None, end_point]]
+
+        # fast check with the bounding boxes
+        xmin, ymin, xmax, ymax = self.bounds
+        if max(start_point[0], end_point[0]) < xmin or min(start_point[0], end_point[0]) > xmax or \
+                max(start_point[1], end_point[1]) < ymin or min(start_point[1], end_point[1]) > ymax:
+            return [[None, end_point]]
+
+        travel_line = LineString([start_point, end_point])
+
+        if len(self.around_geo) and len(self.around_tree.query(travel_line, predicate='intersects')):
+            path = [tuple(start_point)] + self.around_path(start_point, end_point, travel_line) + [tuple(end_point)]
+        elif len(self.over_geo) and len(self.over_tree.query(travel_line, predicate='intersects')):
+            path = [tuple(start_point), tuple(end_point)]
+        else:
+            return [[None, end_point]]
+
+        ret_list = []
+        for seg_start, seg_end in zip(path[:-1], path[1:]):
+            ret_list += self.over_moves(seg_start, seg_end)
+            ret_list.append([None, seg_end])
+        # keep the destination as it was given
+        ret_list[-1] = [None, end_point]
+        return ret_list
+
+    def around_path(self, start_point, end_point, travel_line):
+        """
+        :param start_point:     X,Y coordinates for the start point of the travel line
+        :type start_point:      tuple
+        :param end_point:       X,Y coordinates for the destination point of the travel line
+        :type end_point:        tuple
+        :param travel_line:     the travel line
+        :type travel_line:      LineString
+        :return:                The shortest list of the area vertices, from the start to the end, that goes around
+                                the 'around' areas; an empty list if the travel line does not enter them or if there
+                                is no such path
+        :rtype:                 list
+        """
+        # the areas that hold the start or the end point can't be avoided
+        ignored = set(self.around_tree.query(shapely.points([start_point, end_point]), predicate='intersects')[1])
+
+        if not self.blocked(np.array([travel_line], dtype=object), ignored)[0]:
+            return []
+
+        start_idx, start_dist = self.visible_nodes(start_point, ignored)
+        end_idx, end_dist = self.visible_nodes(end_point, ignored)
+        if len(start_idx) == 0 or len(end_idx) == 0:
+            log.debug("ExclusionRouter.around_path() -> no path around the areas from %s to %s" %
+                      (str(start_point), str(end_point)))
+            return []
+
+        # total length of the paths: start -> first node -> ... -> last node -> end
+        dist_matrix = np.array([self.shortest_paths(i)[0][end_idx] for i in start_idx])
+        total = start_dist[:, None] + dist_matrix + end_dist[None, :]
+        best = np.argmin(total)
+        if not np.isfinite(total.flat[best]):
+            log.debug("ExclusionRouter.around_path() -> no path around the areas from %s to %s" %
+                      (str(start_point), str(end_point)))
+            return []
+        first, last = start_idx[best // len(end_idx)], end_idx[best % len(end_idx)]
+
+        predecessors = self.shortest_paths(first)[1]
+        node_path = [last]
+        while node_path[-1] != first:
+            node_path.append(predecessors[node_path[-1]])
+        node_path.reverse()
+
+        return [tuple(pt) for pt in self.nodes[node_path].tolist()]
+
+    def over_moves(self, seg_start, seg_end):
+        """
+        :param seg_start:       X,Y coordinates for the start point of the travel segment
+        :type seg_start:        tuple
+        :param seg_end:         X,Y coordinates for the end point of the travel segment
+        :type seg_end:          tuple
+        :return:                The moves that lift the travel over the 'over' areas crossed by the segment, as
+                                [over_z, entry point], [None, exit point] pairs, in the travel order
+        :rtype:                 list
+        """
+        if len(self.over_geo) == 0:
+            return []
+
+        segment = LineString([seg_start, seg_end])
+        crossings = []
+        for idx in self.over_tree.query(segment, predicate='intersects'):
+            intersection = segment.intersection(self.over_geo[idx].exterior)
+            pts = shapely.get_coordinates(intersection)
+            # it's just a touch, or the segment starts or ends inside the area
+            if len(pts) < 2:
+                continue
+            proj = shapely.line_locate_point(segment, shapely.points(pts))
+            entry, exit_ = np.argmin(proj), np.argmax(proj)
+            if proj[entry] == proj[exit_]:
+                continue
+            pts = pts.tolist()
+            crossings.append((proj[entry], proj[exit_], tuple(pts[entry]), tuple(pts[exit_]), self.over_z[idx]))
+
+        moves = []
+        position = -1.0
+        for entry_d, exit_d, entry_pt, exit_pt, z in sorted(crossings):
+            if exit_d <= position:
+                # inside an area that was already lifted over
+                continue
+            moves += [[z, entry_pt], [None, exit_pt]]
+            position = exit_d
+        return moves
+
+    def blocked(self, lines, ignored=()):
+        """
+        :param lines:       array of LineStrings
+        :type lines:        np.ndarray
+        :param ignored:     indexes of the 'around' areas that are not considered
+        :type ignored:      set | tuple
+        :return:            for each line, True if the line enters (the interior of) an 'around' area
+        :rtype:             np.ndarray
+        """
+        result = np.zeros(len(lines), dtype=bool)
+        line_idx, area_idx = self.around_tree.query(lines, predicate='intersects')
+        if ignored:
+            mask = ~np.isin(area_idx, list(ignored))
+            line_idx, area_idx = line_idx[mask], area_idx[mask]
+        if len(line_idx) == 0:
+            return result
+
+        # the lines already intersect the areas; a line that only touches an area does not enter it
+        enters = ~shapely.touches(self.around_geo[area_idx], lines[line_idx])
+        result[line_idx[enters]] = True
+        return result
+
+    def visible_nodes(self, point, ignored=()):
+        """
+        :param point:       X,Y coordinates
+        :type point:        tuple
+        :param ignored:     indexes of the 'around' areas that are not considered
+        :type ignored:      set | tuple
+        :return:            indexes of the nodes that can be reached from the point in a straight line and the
+                            distances to them
+        :rtype:             tuple
+        """
+        # the end of a travel is the start of the next one
+        key = (float(point[0]), float(point[1]), frozenset(ignored))
+        try:
+            return self._visible[key]
+        except KeyError:
+            pass
+
+        point = np.asarray(point, dtype=float)[:2]
+        lines = shapely.linestrings(np.stack((np.broadcast_to(point, self.nodes.shape), self.nodes), axis=1))
+        visible = np.flatnonzero(~self.blocked(lines, ignored))
+        result = visible, np.hypot(*(self.nodes[visible] - point).T)
+
+        self._visible[key] = result
+        if len(self._visible) > self.max_cached_points:
+            self._visible.popitem(last=False)
+        return result
+
+    def node_edges(self, node):
+        """
+        :param node:    index of a graph node
+        :type node:     int
+        :return:        indexes of the nodes connected to the node and the distances to them
+        :rtype:         tuple
+        """
+        try:
+            return self._edges[node]
+        except KeyError:
+            pass
+
+        others = np.flatnonzero(np.arange(self.nr_nodes) != node)
+        others = others[np.any(self.nodes[others] != self.nodes[node], axis=1)]
+        lines = shapely.linestrings(
+            np.stack((np.broadcast_to(self.nodes[node], (len(others), 2)), self.nodes[others]), axis=1))
+        visible = others[~self.blocked(lines)]
+        edges = (visible.tolist(), np.hypot(*(self.nodes[visible] - self.nodes[node]).T).tolist())
+        self._edges[node] = edges
+        return edges
+
+    def shortest_paths(self, source):
+        """
+        :param source:  index of a graph node
+        :type source:   int
+        :return:        the distances along the graph from the source node to all the nodes (inf for the nodes that
+                        can't be reached) and the predecessor of each node on the shortest path from the source
+        :rtype:         tuple
+        """
+        try:
+            self._paths.move_to_end(source)
+            return self._paths[source]
+        except KeyError:
+            pass
+
+        dist = np.full(self.nr_nodes, np.inf)
+        pred = np.full(self.nr_nodes, -1, dtype=np.int64)
+        done = np.zeros(self.nr_nodes, dtype=bool)
+        dist[source] = 0.0
+
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if done[node]:
+                continue
+            done[node] = True
+            for neighbour, length in zip(*self.node_edges(node)):
+                new_d = d + length
+                if new_d < dist[neighbour]:
+                    dist[neighbour] = new_d
+                    pred[neighbour] = node
+                    heapq.heappush(heap, (new_d, neighbour))
+
+        self._paths[source] = (dist, pred)
+        if len(self._paths) > self.max_cached_paths:
+            self._paths.popitem(last=False)
+        return dist, pred
@@ -0,0 +1,188 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class MinimumDistanceEngine:
+    """
+    Finds the smallest gaps between the polygons of a set, without computing the distance between each two of them.
+
+    The distances are rounded to a number of decimals and the result is a dictionary keyed by the rounded distance,
+    holding, for each distance, the list of the locations (pairs of nearest points) where it is found. Only the
+    smallest 'nr_distances' distances are kept.
+
+    The search is done with an STRtree:
+    - the nearest neighbour of each polygon gives the first bound for the distances that are searched
+    - the pairs of polygons within the bound are found with 'dwithin' queries, done in chunks of polygons; the bound
+    is lowered after each chunk, as smaller distances are found, so the next queries return fewer pairs
+    - if fewer than 'nr_distances' distances are within the bound (there are fewer distinct nearest neighbour
+    distances), the bound is widened and the search is done again, until enough distances are found or the bound
+    covers all the pairs of polygons
+
+    The engine does not use the app, therefore it can be used in a worker process.
+
+    Usage:
+    engine = MinimumDistanceEngine(polygons, decimals=4)
+    min_dict = engine.find(nr_distances=10)
+    min_dist = min(min_dict)
+    """
+
+    # Number of polygons queried at once
+    chunk_size = 10000
+
+    def __init__(self, geometry, decimals=4, check_abort=None, progress=None):
+        """
+
+        :param geometry:        sequence of Shapely geometry elements (usually Polygons); empty elements are ignored
+        :type geometry:         list | np.ndarray
+        :param decimals:        number of decimals used to round the distances and the locations
+        :type decimals:         int
+        :param check_abort:     callable that is called periodically; it should raise in order to abort the work
+        :type check_abort:      callable | None
+        :param progress:        callable that is called with the percentage of the work done, an int from 0 to 100
+        :type progress:         callable | None
+        """
+        geo_arr = np.empty(len(geometry), dtype=object)
+        geo_arr[:] = list(geometry)
+        if len(geo_arr):
+            geo_arr = geo_arr[~shapely.is_empty(geo_arr)]
+        self.geometry = geo_arr
+        self.decimals = decimals
+        self.check_abort = check_abort
+        self.progress = progress
+
+    def find(self, nr_distances=1, locations=True):
+        """
+        Finds the smallest distances between the polygons.
+
+        :param nr_distances:    how many of the smallest (rounded) distances are returned
+        :type nr_distances:     int
+        :param locations:       if True the locations of each distance are computed, else the lists of locations hold
+                                only the indexes of the polygons, as (i, j) tuples
+        :type locations:        bool
+        :return:                dictionary with the rounded distances as keys, sorted ascending, and the lists of
+                                locations ((x0, y0), (x1, y1)) as values; empty if there are less than two polygons
+        :rtype:                 dict
+        """
+        geo = self.geometry
+        nr_geo = len(geo)
+        nr_distances = max(1, int(nr_distances))
+        if nr_geo < 2:
+            return {}
+
+        tree = STRtree(geo)
+
+        # the distance from each polygon to the nearest other polygon gives the first bound
+        __, nn_dist = tree.query_nearest(geo, exclusive=True, return_distance=True, all_matches=False)
+        nn_keys = np.unique(self.round(nn_dist))
+        bound = nn_keys[min(nr_distances, len(nn_keys)) - 1]
+
+        # no two polygons are farther apart than the diagonal of their bounding box
+        xmin, ymin, xmax, ymax = shapely.total_bounds(geo)
+        max_bound = float(self.round(np.hypot(xmax - xmin, ymax - ymin))) + 10 ** -self.decimals
+
+        while True:
+            found = self.search(tree, bound, nr_distances)
+            if len(found) >= nr_distances or bound >= max_bound:
+                break
+            # some distances are larger than the bound; widen it and search again
+            bound = min(max(2 * bound, 10 ** -self.decimals), max_bound)
+
+        min_dict = {key: found[key] for key in sorted(found)}
+        if locations:
+            for key, pairs in min_dict.items():
+                min_dict[key] = self.pair_locations(pairs)
+        return min_dict
+
+    def search(self, tree, bound, nr_distances):
+        """
+        :param tree:            the STRtree of the polygons
+        :type tree:             STRtree
+        :param bound:           the largest (rounded) distance that is searched
+        :type bound:            float
+        :param nr_distances:    how many of the smallest (rounded) distances are kept
+        :type nr_distances:     int
+        :return:                dictionary with the rounded distances within the bound as keys and the lists of the
+                                pairs of polygons, as (i, j) tuples, as values
+        :rtype:                 dict
+        """
+        geo = self.geometry
+        nr_geo = len(geo)
+        # pairs whose distance is rounded to the bound value have to be found, too
+        tolerance = 0.5 * 10 ** -self.decimals
+
+        found = {}
+        for start in range(0, nr_geo, self.chunk_size):
+            if self.check_abort is not None:
+                self.check_abort()
+
+            stop = min(start + self.chunk_size, nr_geo)
+            q_idx, t_idx = tree.query(geo[start:stop], predicate='dwithin', distance=bound + tolerance)
+            q_idx = q_idx + start
+            # each pair is found twice; keep it once. If the pair was found from the polygon with the smaller index
+            # the bound used then was larger or equal than the current one
+            mask = q_idx < t_idx
+            q_idx = q_idx[mask]
+            t_idx = t_idx[mask]
+
+            keys = self.round(shapely.distance(geo[q_idx], geo[t_idx]))
+            mask = keys <= bound
+            for key, i, j in zip(keys[mask].tolist(), q_idx[mask].tolist(), t_idx[mask].tolist()):
+                try:
+                    found[key].append((i, j))
+                except KeyError:
+                    found[key] = [(i, j)]
+
+            # lower the bound for the next queries
+            if len(found) >= nr_distances:
+                sorted_keys = sorted(found)
+                bound = sorted_keys[nr_distances - 1]
+                for key in sorted_keys[nr_distances:]:
+                    found.pop(key)
+
+            if self.progress is not None:
+                self.progress(int(100 * stop / nr_geo))
+        return found
+
+    def pair_locations(self, pairs):
+        """
+        :param pairs:   list of (i, j) tuples with the indexes of two polygons
+        :type pairs:    list
+        :return:        list of the nearest points between the polygons of each pair, rounded,
+                        as ((x0, y0), (x1, y1)) tuples
+        :rtype:         list
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        lines = shapely.shortest_line(self.geometry[pairs[:, 0]], self.geometry[pairs[:, 1]])
+        coords = self.round(shapely.get_coordinates(lines)).reshape(-1, 2, 2).tolist()
+        return [((p0[0], p0[1]), (p1[0], p1[1])) for p0, p1 in coords]
+
+    def round(self, values):
+        return np.round(np.asarray(values, dtype=float), self.decimals)
+
+    @staticmethod
+    def minimum_distance(geometry, decimals=4):
+        """
+        :param geometry:    sequence of Shapely geometry elements
+        :type geometry:     list
+        :param decimals:    number of decimals used to round the distance
+        :type decimals:     int
+        :return:            the smallest (rounded) distance between the geometry elements or None if there are
+                            less than two elements
+        :rtype:             float | None
+        """
+        min_dict = MinimumDistanceEngine(geometry, decimals=decimals).find(nr_distances=1, locations=False)
+        if not min_dict:
+            return None
+        return next(iter(min_dict))
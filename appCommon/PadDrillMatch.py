@@ -0,0 +1,236 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import weakref
+
+import numpy as np
+import shapely
+from shapely import Point, STRtree
+from shapely.geometry.base import BaseGeometry
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class PadDrillIndex:
+    """
+    Matches the pads of a Gerber object with the drills of an Excellon object.
+
+    The pads are indexed with a Shapely STRtree and the tree is queried with all the drills at once, therefore the
+    pairs (pad, drill) are found without testing each drill against each pad.
+
+    The pads and the drills are stored in arrays, in the order they were given; a pair is a position in the pads
+    array and a position in the drills array. Each pad and each drill can have a key (e.g. (aperture code, index of
+    the geometry element) for the pads and (tool, index of the drill) for the drills).
+
+    Usage:
+    index = PadDrillIndex.from_tools(gerber_obj.tools, excellon_obj.tools)
+    pad_pos, drill_pos = index.pairs()
+    drills_in_pads = index.pad_drills()
+    pads = index.pads_at((x, y))
+
+    or, cached for the pair of objects until one of them changes:
+    index = pad_drill_index(gerber_obj, excellon_obj)
+    """
+
+    def __init__(self, pads, drills, pad_keys=None, drill_keys=None):
+        """
+
+        :param pads:        the pads geometry
+        :type pads:         list | np.ndarray
+        :param drills:      the drills geometry, usually the drill centers
+        :type drills:       list | np.ndarray
+        :param pad_keys:    a key for each pad; if None the position of the pad is the key
+        :type pad_keys:     list | None
+        :param drill_keys:  a key for each drill; if None the position of the drill is the key
+        :type drill_keys:   list | None
+        """
+        self.pads = self.geometry_array(pads)
+        self.drills = self.geometry_array(drills)
+        self.pad_keys = list(range(len(self.pads))) if pad_keys is None else list(pad_keys)
+        self.drill_keys = list(range(len(self.drills))) if drill_keys is None else list(drill_keys)
+
+        valid = ~(shapely.is_missing(self.pads) | shapely.is_empty(self.pads))
+        self._tree_pos = np.flatnonzero(valid)
+        self._tree = STRtree(self.pads[self._tree_pos]) if len(self._tree_pos) else None
+
+        # the result of pairs() for the default predicate
+        self._pairs = None
+
+    @staticmethod
+    def geometry_array(geometry):
+        arr = np.empty(len(geometry), dtype=object)
+        arr[:] = list(geometry)
+        return arr
+
+    @staticmethod
+    def gerber_pads(tools, apertures=None):
+        """
+        The pads of a Gerber object: the geometry elements that are flashes (the 'follow' geometry is a Point) and
+        have a 'solid' geometry.
+
+        :param tools:       the apertures dict of the Gerber object
+        :type tools:        dict
+        :param apertures:   if not None, only the pads of these apertures
+        :type apertures:    list | set | None
+        :return:            the keys of the pads, as (aperture code, index of the geometry element), and the solid
+                            geometry of the pads
+        :rtype:             tuple
+        """
+        keys = []
+        pads = []
+        for apid, ap_val in tools.items():
+            if apertures is not None and apid not in apertures:
+                continue
+            for idx, elem in enumerate(ap_val.get('geometry', [])):
+                if isinstance(elem.get('follow'), Point) and isinstance(elem.get('solid'), BaseGeometry):
+                    keys.append((apid, idx))
+                    pads.append(elem['solid'])
+        return keys, pads
+
+    @staticmethod
+    def excellon_drills(tools):
+        """
+        :param tools:   the tools dict of the Excellon object
+        :type tools:    dict
+        :return:        the keys of the drills, as (tool, index of the drill), and the drill centers
+        :rtype:         tuple
+        """
+        keys = []
+        drills = []
+        for tool, tool_val in tools.items():
+            for idx, drill_pt in enumerate(tool_val.get('drills', [])):
+                keys.append((tool, idx))
+                drills.append(drill_pt)
+        return keys, drills
+
+    @classmethod
+    def from_tools(cls, gerber_tools, excellon_tools=None):
+        """
+        :param gerber_tools:    the apertures dict of the Gerber object
+        :type gerber_tools:     dict
+        :param excellon_tools:  the tools dict of the Excellon object; if None, only the pads are indexed
+        :type excellon_tools:   dict | None
+        :return:                the index of the flashes (pads) of the Gerber and the drills of the Excellon
+        :rtype:                 PadDrillIndex
+        """
+        pad_keys, pads = cls.gerber_pads(gerber_tools)
+        drill_keys, drills = cls.excellon_drills(excellon_tools) if excellon_tools is not None else ([], [])
+        return cls(pads, drills, pad_keys=pad_keys, drill_keys=drill_keys)
+
+    def pairs(self, predicate='within', distance=None):
+        """
+        The pairs (pad, drill) for which the predicate is True.
+
+        :param predicate:   a predicate of STRtree.query(), evaluated as predicate(drill, pad); by default the
+                            drills that are within the pads
+        :type predicate:    str
+        :param distance:    the distance for the 'dwithin' predicate
+        :type distance:     float | None
+        :return:            the positions of the pads and the positions of the drills, sorted by the pad position and
+                            then by the drill position
+        :rtype:             tuple
+        """
+        default = predicate == 'within' and distance is None
+        if default and self._pairs is not None:
+            return self._pairs
+
+        if self._tree is None or len(self.drills) == 0:
+            found = (np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+        else:
+            drills_pos = np.flatnonzero(~(shapely.is_missing(self.drills) | shapely.is_empty(self.drills)))
+            if predicate == 'dwithin':
+                drill_idx, tree_idx = self._tree.query(self.drills[drills_pos], predicate='dwithin',
+                                                       distance=distance)
+            else:
+                drill_idx, tree_idx = self._tree.query(self.drills[drills_pos], predicate=predicate)
+            pad_pos = self._tree_pos[tree_idx]
+            drill_pos = drills_pos[drill_idx]
+            order = np.lexsort((drill_pos, pad_pos))
+            found = (pad_pos[order], drill_pos[order])
+
+        if default:
+            self._pairs = found
+        return found
+
+    def pad_drills(self):
+        """
+        :return:    for each pad that has drills in it, the keys of the drills; the key is the key of the pad
+        :rtype:     dict
+        """
+        result = {}
+        for pad_pos, drill_pos in zip(*self.pairs()):
+            result.setdefault(self.pad_keys[pad_pos], []).append(self.drill_keys[drill_pos])
+        return result
+
+    def pads_at(self, point):
+        """
+        :param point:   the (x, y) coordinates or a Shapely Point
+        :type point:    tuple | Point
+        :return:        the positions of the pads that have the point within them, sorted
+        :rtype:         np.ndarray
+        """
+        if self._tree is None:
+            return np.array([], dtype=np.int64)
+        pt = point if isinstance(point, Point) else Point(point[0], point[1])
+        return np.sort(self._tree_pos[self._tree.query(pt, predicate='within')])
+
+    def same_geometry(self, pads, drills):
+        """
+        :param pads:    the pads geometry
+        :param drills:  the drills geometry
+        :return:        True if the index was made from the same geometry objects, in the same order
+        :rtype:         bool
+        """
+        if len(pads) != len(self.pads) or len(drills) != len(self.drills):
+            return False
+        return all(a is b for a, b in zip(pads, self.pads)) and all(a is b for a, b in zip(drills, self.drills))
+
+
+# key is the Gerber object, value is a dict: key is id() of the Excellon object (None for no Excellon object) and the
+# value is (weak reference to the Excellon object, the PadDrillIndex)
+_index_cache = weakref.WeakKeyDictionary()
+
+
+def pad_drill_index(gerber_obj, excellon_obj=None):
+    """
+    The PadDrillIndex of a Gerber object and an Excellon object. The index is kept for the pair of objects and it is
+    reused until the pads of the Gerber object or the drills of the Excellon object change. The geometry is never
+    modified in place (the Shapely geometry is immutable), therefore the index is made again only when the geometry
+    objects are not the same as the ones in the index.
+
+    :param gerber_obj:      the Gerber object
+    :param excellon_obj:    the Excellon object; if None only the pads are indexed
+    :return:                the index
+    :rtype:                 PadDrillIndex
+    """
+    pad_keys, pads = PadDrillIndex.gerber_pads(gerber_obj.tools)
+    if excellon_obj is not None:
+        drill_keys, drills = PadDrillIndex.excellon_drills(excellon_obj.tools)
+    else:
+        drill_keys, drills = [], []
+
+    try:
+        obj_cache = _index_cache.setdefault(gerber_obj, {})
+    except TypeError:
+        # the object can not be weak referenced
+        obj_cache = {}
+
+    key = None if excellon_obj is None else id(excellon_obj)
+    cached = obj_cache.get(key)
+    if cached is not None:
+        exc_ref, index = cached
+        exc_alive = (exc_ref is None and excellon_obj is None) or (exc_ref is not None and exc_ref() is excellon_obj)
+        if exc_alive and index.same_geometry(pads, drills) and index.pad_keys == pad_keys and \
+                index.drill_keys == drill_keys:
+            return index
+
+    index = PadDrillIndex(pads, drills, pad_keys=pad_keys, drill_keys=drill_keys)
+    exc_ref = None if excellon_obj is None else weakref.ref(excellon_obj)
+    obj_cache[key] = (exc_ref, index)
+    return index
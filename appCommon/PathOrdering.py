@@ -0,0 +1,344 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import numpy as np
+import math
+import time
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class PathOrderingEngine:
+    """
+    Orders a set of paths (or points) such that the travel (non-cutting) distance between them is minimized.
+
+    The paths are given only by their endpoints, as NumPy arrays. The ordering is done with a greedy
+    nearest-endpoint search that uses a uniform grid (spatial hash) and deletion masks instead of a
+    tree that has to be updated one element at a time. The greedy result can be refined with a windowed,
+    vectorized 2-opt pass.
+
+    The result is an index permutation of the paths and, for each position in the permutation, a flag
+    that is True when the path has to be traversed from its end to its start.
+
+    Usage:
+    engine = PathOrderingEngine(starts=[(0, 0), (5, 5)], ends=[(1, 0), (4, 5)])
+    order, reverse = engine.order(origin=(0, 0), refine_time=1.0)
+    """
+
+    # Average number of endpoints stored in one cell of the grid
+    cell_load = 2.0
+
+    # The grid is rebuilt when the number of endpoints still alive drops under this fraction of the
+    # endpoints that were used to build it, so the searches do not walk too many empty cells
+    rebuild_fraction = 0.25
+
+    def __init__(self, starts, ends=None, check_abort=None):
+        """
+
+        :param starts:          sequence of (x, y) start points of the paths; for drill points this is the only
+                                parameter required
+        :type starts:           list | np.ndarray
+        :param ends:            sequence of (x, y) end points of the paths; None if the paths are points
+        :type ends:             list | np.ndarray | None
+        :param check_abort:     callable that is called periodically; it should raise in order to abort the work
+        :type check_abort:      callable | None
+        """
+        self.starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        self.reversible = ends is not None
+        self.ends = np.asarray(ends, dtype=float).reshape(-1, 2) if self.reversible else self.starts
+        self.nr_paths = len(self.starts)
+        self.check_abort = check_abort
+
+        # endpoint 'e' belongs to the path 'e % nr_paths'; endpoints with e >= nr_paths are path ends
+        self.points = np.vstack((self.starts, self.ends)) if self.reversible else self.starts
+
+        # grid data
+        self._xmin = 0.0
+        self._ymin = 0.0
+        self._cell = 1.0
+        self._nx = 1
+        self._ny = 1
+        self._cell_points = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._alive_count = np.zeros((1, 1), dtype=np.int64)
+        self._point_cell = np.full(len(self.points), -1, dtype=np.int64)
+        self._alive = np.ones(len(self.points), dtype=bool)
+
+    def order(self, origin=(0, 0), refine_time=0.0, window=32):
+        """
+        Greedy ordering followed by an optional 2-opt refinement.
+
+        :param origin:          the (x, y) location from where the travel starts
+        :type origin:           tuple
+        :param refine_time:     maximum time in seconds spent in the 2-opt refinement; 0 disables the refinement
+        :type refine_time:      float
+        :param window:          maximum length of a reversed block in the 2-opt refinement
+        :type window:           int
+        :return:                (order, reverse) tuple of NumPy arrays
+        :rtype:                 tuple
+        """
+        order, reverse = self.greedy_order(origin=origin)
+        if refine_time and refine_time > 0 and self.nr_paths > 2:
+            order, reverse = self.two_opt(order, reverse, origin=origin, window=window, time_limit=refine_time)
+        return order, reverse
+
+    def travel_length(self, order=None, reverse=None, origin=(0, 0)):
+        """
+        Calculate the travel distance from the origin through all the paths in the given order.
+        When no order is given, the paths are traveled in the order they were given, not reversed.
+
+        :param order:       index permutation of the paths
+        :type order:        np.ndarray | None
+        :param reverse:     reversal flags of the paths, one for each position in the order
+        :type reverse:      np.ndarray | None
+        :param origin:      the (x, y) location from where the travel starts
+        :type origin:       tuple
+        :return:            the travel distance
+        :rtype:             float
+        """
+        if self.nr_paths == 0:
+            return 0.0
+        if order is None:
+            order = np.arange(self.nr_paths)
+        if reverse is None:
+            reverse = np.zeros(len(order), dtype=bool)
+
+        entry, leave = self._entry_exit(order, reverse)
+        previous = np.vstack((np.asarray(origin, dtype=float).reshape(1, 2), leave[:-1]))
+        return float(np.hypot(entry[:, 0] - previous[:, 0], entry[:, 1] - previous[:, 1]).sum())
+
+    def greedy_order(self, origin=(0, 0)):
+        """
+        Nearest neighbour ordering: from the current location always go to the nearest endpoint of the paths
+        that were not yet visited and leave the path through the opposite endpoint.
+
+        :param origin:      the (x, y) location from where the travel starts
+        :type origin:       tuple
+        :return:            (order, reverse) tuple of NumPy arrays
+        :rtype:             tuple
+        """
+        n = self.nr_paths
+        order = np.empty(n, dtype=np.int64)
+        reverse = np.zeros(n, dtype=bool)
+        if n == 0:
+            return order, reverse
+
+        self._alive[:] = True
+        self._build_grid(np.arange(len(self.points)))
+        built_count = len(self.points)
+        alive_count = built_count
+
+        current = np.asarray(origin, dtype=float)
+        for k in range(n):
+            if self.check_abort is not None and k % 1000 == 0:
+                self.check_abort()
+
+            e = self._nearest(current)
+            path = e % n
+            is_end = e >= n
+            # prefer the start point when the path is closed
+            if is_end and self.starts[path][0] == self.ends[path][0] and self.starts[path][1] == self.ends[path][1]:
+                is_end = False
+
+            order[k] = path
+            reverse[k] = is_end
+
+            self._kill(path)
+            current = self.starts[path] if is_end else self.ends[path]
+
+            alive_count -= 2 if self.reversible else 1
+            if 0 < alive_count < built_count * self.rebuild_fraction:
+                self._build_grid(np.flatnonzero(self._alive))
+                built_count = alive_count
+
+        return order, reverse
+
+    def two_opt(self, order, reverse, origin=(0, 0), window=32, time_limit=1.0, max_passes=100):
+        """
+        Windowed 2-opt refinement of an ordering. Reversing a block of consecutive paths also reverses the
+        direction of each path in the block so only the two links at the block margins change.
+        All the candidate moves of one pass are evaluated vectorized and the non-overlapping improving moves
+        are applied together.
+
+        :param order:       index permutation of the paths
+        :type order:        np.ndarray
+        :param reverse:     reversal flags of the paths, one for each position in the order
+        :type reverse:      np.ndarray
+        :param origin:      the (x, y) location from where the travel starts
+        :type origin:       tuple
+        :param window:      maximum length of a reversed block
+        :type window:       int
+        :param time_limit:  maximum time in seconds spent here
+        :type time_limit:   float
+        :param max_passes:  maximum number of passes
+        :type max_passes:   int
+        :return:            (order, reverse) tuple of NumPy arrays
+        :rtype:             tuple
+        """
+        order = np.array(order, dtype=np.int64)
+        reverse = np.array(reverse, dtype=bool)
+        n = len(order)
+        if n < 2:
+            return order, reverse
+
+        # a path can not be reversed when it is a point
+        can_reverse = self.reversible
+        origin = np.asarray(origin, dtype=float).reshape(1, 2)
+        start_time = time.time()
+
+        for __ in range(max_passes):
+            if self.check_abort is not None:
+                self.check_abort()
+
+            entry, leave = self._entry_exit(order, reverse)
+            # position 0 is the origin, the paths are at positions 1 ... n
+            a = np.vstack((origin, entry))
+            b = np.vstack((origin, leave))
+
+            moves_i = []
+            moves_j = []
+            moves_gain = []
+            min_k = 1 if can_reverse else 2
+            for k in range(min_k, min(window, n) + 1):
+                i = np.arange(0, n + 1 - k)
+                j = i + k
+                has_next = j < n
+                j_next = np.where(has_next, j + 1, j)
+
+                new_cost = np.hypot(b[i, 0] - b[j, 0], b[i, 1] - b[j, 1])
+                old_cost = np.hypot(b[i, 0] - a[i + 1, 0], b[i, 1] - a[i + 1, 1])
+                new_cost += np.where(
+                    has_next, np.hypot(a[i + 1, 0] - a[j_next, 0], a[i + 1, 1] - a[j_next, 1]), 0.0)
+                old_cost += np.where(
+                    has_next, np.hypot(b[j, 0] - a[j_next, 0], b[j, 1] - a[j_next, 1]), 0.0)
+
+                gain = old_cost - new_cost
+                improving = np.flatnonzero(gain > 1e-9)
+                if len(improving):
+                    moves_i.append(i[improving])
+                    moves_j.append(j[improving])
+                    moves_gain.append(gain[improving])
+
+            if not moves_i:
+                break
+
+            moves_i = np.concatenate(moves_i)
+            moves_j = np.concatenate(moves_j)
+            moves_gain = np.concatenate(moves_gain)
+
+            touched = np.zeros(n + 2, dtype=bool)
+            for m in np.argsort(-moves_gain):
+                i = moves_i[m]
+                j = moves_j[m]
+                if touched[i:j + 2].any():
+                    continue
+                touched[i:j + 2] = True
+                # positions i + 1 ... j are order indexes i ... j - 1
+                order[i:j] = order[i:j][::-1]
+                reverse[i:j] = ~reverse[i:j][::-1]
+
+            if time.time() - start_time > time_limit:
+                break
+
+        if not can_reverse:
+            reverse[:] = False
+        return order, reverse
+
+    def _entry_exit(self, order, reverse):
+        rev = reverse[:, None]
+        entry = np.where(rev, self.ends[order], self.starts[order])
+        leave = np.where(rev, self.starts[order], self.ends[order])
+        return entry, leave
+
+    def _build_grid(self, point_idx):
+        pts = self.points[point_idx]
+        xmin, ymin = pts.min(axis=0)
+        xmax, ymax = pts.max(axis=0)
+        width = xmax - xmin
+        height = ymax - ymin
+
+        cells_wanted = max(len(point_idx) / self.cell_load, 1.0)
+        if width > 0 and height > 0:
+            cell = math.sqrt((width * height) / cells_wanted)
+        else:
+            cell = max(width, height) / cells_wanted
+        if cell <= 0:
+            cell = 1.0
+
+        nx = int(width / cell) + 1
+        ny = int(height / cell) + 1
+        cx = np.minimum(((pts[:, 0] - xmin) / cell).astype(np.int64), nx - 1)
+        cy = np.minimum(((pts[:, 1] - ymin) / cell).astype(np.int64), ny - 1)
+        cell_id = cx * ny + cy
+
+        sorted_idx = np.argsort(cell_id, kind='stable')
+        counts = np.bincount(cell_id, minlength=nx * ny)
+
+        self._xmin = xmin
+        self._ymin = ymin
+        self._cell = cell
+        self._nx = nx
+        self._ny = ny
+        self._cell_points = point_idx[sorted_idx]
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._alive_count = counts.reshape(nx, ny).copy()
+        self._point_cell[:] = -1
+        self._point_cell[point_idx] = cell_id
+
+    def _kill(self, path):
+        endpoints = (path, path + self.nr_paths) if self.reversible else (path,)
+        for e in endpoints:
+            self._alive[e] = False
+            cid = self._point_cell[e]
+            self._alive_count[cid // self._ny, cid % self._ny] -= 1
+
+    def _gather(self, cells):
+        starts = self._offsets[cells]
+        counts = self._offsets[cells + 1] - starts
+        total = counts.sum()
+        shifts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        candidates = self._cell_points[shifts + np.arange(total)]
+        return candidates[self._alive[candidates]]
+
+    def _nearest(self, location):
+        """
+        Find the nearest endpoint that is still alive. The search window is grown around the cell holding the
+        location until the nearest candidate found is closer than the window margin.
+
+        :param location:    (x, y) NumPy array
+        :return:            index of the nearest endpoint or -1 if there are no endpoints left
+        :rtype:             int
+        """
+        cell = self._cell
+        qx = int(math.floor((location[0] - self._xmin) / cell))
+        qy = int(math.floor((location[1] - self._ymin) / cell))
+        r_limit = max(qx, self._nx - 1 - qx, qy, self._ny - 1 - qy, 1)
+
+        r = 1
+        while True:
+            x0 = max(qx - r, 0)
+            x1 = min(qx + r + 1, self._nx)
+            y0 = max(qy - r, 0)
+            y1 = min(qy + r + 1, self._ny)
+            if x0 < x1 and y0 < y1:
+                ix, iy = np.nonzero(self._alive_count[x0:x1, y0:y1])
+                if len(ix):
+                    candidates = self._gather((ix + x0) * self._ny + (iy + y0))
+                    pts = self.points[candidates]
+                    dist2 = (pts[:, 0] - location[0]) ** 2 + (pts[:, 1] - location[1]) ** 2
+                    best = int(np.argmin(dist2))
+                    best_dist = math.sqrt(dist2[best])
+                    # any point outside the window is at least r * cell away from the location
+                    if best_dist <= r * cell or r >= r_limit:
+                        return int(candidates[best])
+                    r = min(max(int(math.ceil(best_dist / cell)), r + 1), r_limit)
+                    continue
+            if r >= r_limit:
+                return -1
+            r = min(r * 2, r_limit)
@@ -0,0 +1,297 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+from camlib import to_dict, dict2obj
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import io
+import zipfile
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+import simplejson as json
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class ProjectArchive:
+    """
+    FlatCAM project saved as a ZIP container instead of a single JSON document.
+
+    The container holds a small JSON manifest (the app options, the version and a list of the objects) and, for
+    each object, a JSON document with the object attributes and a NumPy blob with all the object's Shapely geometry
+    stored as WKB. The geometry in the JSON document is replaced by references to the blob.
+
+    manifest.json
+    objects/0000.json
+    objects/0000.npz
+    objects/0001.json
+    ...
+
+    The objects are encoded in worker threads while saving, and are decoded in worker threads, in the background,
+    while loading, after the manifest was read.
+
+    Usage:
+    ProjectArchive.save(filename, objs=[obj.to_dict() for obj in objects], options=options, version=version)
+
+    archive = ProjectArchive(filename)
+    options = archive.options
+    for obj_dict in archive.objects():
+        ...
+    """
+
+    archive_format = 'FlatCAM Project Archive'
+    archive_version = 1
+
+    manifest_name = 'manifest.json'
+
+    def __init__(self, filename):
+        """
+
+        :param filename:    Path to the project archive
+        :type filename:     str
+        """
+        self.filename = filename
+        self.zip_file = zipfile.ZipFile(filename, 'r')
+
+        self.manifest = json.loads(self.zip_file.read(self.manifest_name).decode('utf-8'))
+        if self.manifest.get('format') != self.archive_format:
+            self.zip_file.close()
+            raise ValueError("Not a FlatCAM project archive: %s" % str(filename))
+
+    @property
+    def options(self):
+        return self.manifest['options']
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def object_entries(self):
+        """
+        List of dicts with the 'kind' and the 'name' of the objects, and the container entries that hold them.
+        """
+        return self.manifest['objs']
+
+    @staticmethod
+    def is_archive(filename):
+        """
+        :param filename:    Path to a project file
+        :type filename:     str
+        :return:            True if the file is a project archive and not a (compressed) JSON project
+        :rtype:             bool
+        """
+        try:
+            if not zipfile.is_zipfile(filename):
+                return False
+            with zipfile.ZipFile(filename, 'r') as z_file:
+                return ProjectArchive.manifest_name in z_file.namelist()
+        except (OSError, zipfile.BadZipFile):
+            return False
+
+    def load_object(self, index):
+        """
+        Loads one object from the archive.
+
+        :param index:   Index of the object in the manifest list of objects
+        :type index:    int
+        :return:        The object as a dictionary, the same as the one made by the object to_dict() method
+        :rtype:         dict
+        """
+        entry = self.object_entries[index]
+        return self.decode_object(self.zip_file.read(entry['json']), self.zip_file.read(entry['geometry']))
+
+    def objects(self, nr_workers=2, close=False):
+        """
+        Generator of the objects in the archive, in the manifest order. The objects are loaded in the background
+        by worker threads, while the ones already loaded are consumed.
+
+        :param nr_workers:  Number of worker threads
+        :type nr_workers:   int
+        :param close:       If True the archive is closed after the last object was loaded, or when the generator
+                            is closed (the loading was cancelled) or it failed
+        :type close:        bool
+        :return:            Generator of the objects as dictionaries
+        :rtype:             Generator
+        """
+        nr_workers = max(1, int(nr_workers))
+        try:
+            with ThreadPoolExecutor(max_workers=nr_workers) as executor:
+                pending = deque()
+                try:
+                    indexes = iter(range(len(self.object_entries)))
+                    # keep only a few objects in advance so the memory used is limited
+                    for index in indexes:
+                        pending.append(executor.submit(self.load_object, index))
+                        if len(pending) >= 2 * nr_workers:
+                            break
+
+                    while pending:
+                        obj_dict = pending.popleft().result()
+                        index = next(indexes, None)
+                        if index is not None:
+                            pending.append(executor.submit(self.load_object, index))
+                        yield obj_dict
+                finally:
+                    # the objects not consumed are not loaded anymore
+                    for future in pending:
+                        future.cancel()
+        finally:
+            # the worker threads have finished here so the archive can be closed
+            if close:
+                self.close()
+
+    def project_dict(self, nr_workers=2):
+        """
+        :param nr_workers:  Number of worker threads used to load the objects
+        :type nr_workers:   int
+        :return:            A project dictionary like the one from a JSON project but with the 'objs' key
+                            holding a generator that loads the objects on demand
+        :rtype:             dict
+        """
+        return {
+            "objs":     self.objects(nr_workers=nr_workers, close=True),
+            "options":  self.options,
+            "version":  self.version
+        }
+
+    def close(self):
+        self.zip_file.close()
+
+    @classmethod
+    def save(cls, filename, objs, options, version, compressed=True, compression_level=3, nr_workers=2):
+        """
+        Saves a project archive.
+
+        :param filename:            Path to the project archive
+        :type filename:             str
+        :param objs:                The objects as dictionaries, as made by the object's to_dict() method
+        :type objs:                 list
+        :param options:             The app options
+        :type options:              dict
+        :param version:             The app version
+        :type version:              float
+        :param compressed:          If True the JSON documents are compressed (DEFLATE) and the geometry blobs are
+                                    saved with numpy.savez_compressed()
+        :type compressed:           bool
+        :param compression_level:   The DEFLATE compression level, 0 to 9
+        :type compression_level:    int
+        :param nr_workers:          Number of worker threads that encode the objects
+        :type nr_workers:           int
+        :return:                    None
+        """
+        compression = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+        nr_workers = max(1, int(nr_workers))
+
+        obj_entries = []
+        with zipfile.ZipFile(filename, 'w', compression=compression, compresslevel=compression_level) as z_file, \
+                ThreadPoolExecutor(max_workers=nr_workers) as executor:
+
+            def write_encoded(idx, future):
+                obj_json, obj_blob = future.result()
+                json_name = 'objects/%04d.json' % idx
+                blob_name = 'objects/%04d.npz' % idx
+                z_file.writestr(json_name, obj_json)
+                # the blob is already compressed (or not) by NumPy
+                z_file.writestr(blob_name, obj_blob, compress_type=zipfile.ZIP_STORED)
+
+                obj_dict = objs[idx]
+                obj_options = obj_dict.get('obj_options', obj_dict.get('options', {}))
+                obj_entries.append({
+                    "kind":         obj_dict.get('kind'),
+                    "name":         obj_options.get('name'),
+                    "json":         json_name,
+                    "geometry":     blob_name
+                })
+
+            # encode the objects in parallel but write them in order, with only a few of them waiting to be written
+            pending = deque()
+            for index, obj_dict in enumerate(objs):
+                pending.append((index, executor.submit(cls.encode_object, obj_dict, compressed)))
+                if len(pending) >= 2 * nr_workers:
+                    write_encoded(*pending.popleft())
+            while pending:
+                write_encoded(*pending.popleft())
+
+            manifest = {
+                "format":           cls.archive_format,
+                "format_version":   cls.archive_version,
+                "version":          version,
+                "options":          options,
+                "objs":             obj_entries
+            }
+            z_file.writestr(cls.manifest_name, json.dumps(manifest, default=to_dict, indent=2, sort_keys=True))
+
+    @staticmethod
+    def encode_object(obj_dict, compressed=True):
+        """
+        Encodes an object as a JSON document and a geometry blob.
+
+        :param obj_dict:    The object as a dictionary, as made by the object's to_dict() method
+        :type obj_dict:     dict
+        :param compressed:  If True the geometry blob is compressed
+        :type compressed:   bool
+        :return:            The JSON document and the geometry blob
+        :rtype:             tuple
+        """
+        geometry = []
+
+        def geo_to_ref(obj):
+            if isinstance(obj, BaseGeometry):
+                geometry.append(obj)
+                return {"__class__": "ShplRef", "__inst__": len(geometry) - 1}
+            return to_dict(obj)
+
+        obj_json = json.dumps(obj_dict, default=geo_to_ref, sort_keys=True).encode('utf-8')
+
+        geo_arr = np.empty(len(geometry), dtype=object)
+        geo_arr[:] = geometry
+        wkb = shapely.to_wkb(geo_arr)
+        offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(w) for w in wkb])
+
+        blob = io.BytesIO()
+        save_fcn = np.savez_compressed if compressed else np.savez
+        save_fcn(blob,
+                 offsets=offsets,
+                 data=np.frombuffer(b''.join(wkb), dtype=np.uint8),
+                 # WKB has no LinearRing type, therefore the types are kept to restore them
+                 types=shapely.get_type_id(geo_arr).astype(np.int8))
+        return obj_json, blob.getvalue()
+
+    @staticmethod
+    def decode_object(obj_json, obj_blob):
+        """
+        Decodes an object encoded with encode_object().
+
+        :param obj_json:    The JSON document
+        :type obj_json:     bytes
+        :param obj_blob:    The geometry blob
+        :type obj_blob:     bytes
+        :return:            The object as a dictionary
+        :rtype:             dict
+        """
+        with np.load(io.BytesIO(obj_blob)) as npz:
+            offsets = npz['offsets']
+            data = npz['data'].tobytes()
+            types = npz['types']
+
+        geo_arr = shapely.from_wkb([data[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])])
+        for idx in np.flatnonzero(types == shapely.GeometryType.LINEARRING):
+            geo_arr[idx] = shapely.LinearRing(geo_arr[idx].coords)
+
+        def ref_to_geo(d):
+            if d.get('__class__') == 'ShplRef' and '__inst__' in d:
+                return geo_arr[d['__inst__']]
+            return dict2obj(d)
+
+        return json.loads(obj_json.decode('utf-8'), object_hook=ref_to_geo)
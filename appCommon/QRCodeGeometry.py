@@ -0,0 +1,171 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import numpy as np
+import shapely
+from shapely import box
+from shapely.ops import unary_union
+
+import qrcode
+
+import logging
+
+log = logging.getLogger('base')
+
+ERROR_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H
+}
+
+
+def qrcode_matrix(data, version=1, error='M', border=4):
+    """
+    :param data:        the text encoded in the QRCode
+    :type data:         str
+    :param version:     the QRCode version (1 to 40); a bigger one is used if the data does not fit
+    :type version:      int
+    :param error:       the error correction: 'L', 'M', 'Q' or 'H'
+    :type error:        str
+    :param border:      the number of modules of the clear border around the QRCode
+    :type border:       int
+    :return:            the modules of the QRCode, the border included; True is a dark module. The first row is the
+                        top row.
+    :rtype:             np.ndarray
+    """
+    qr = qrcode.QRCode(version=int(version), error_correction=ERROR_CORRECTION[error], border=int(border))
+    qr.add_data(data)
+    qr.make()
+    return np.array(qr.get_matrix(), dtype=bool)
+
+
+def matrix_boxes(matrix):
+    """
+    Merges the dark modules of a QRCode in rectangles: the dark modules of each row make runs and a run that has
+    the same start and end as a run in the row above extends that rectangle down.
+
+    :param matrix:  the modules, True is a dark module
+    :type matrix:   np.ndarray
+    :return:        (N, 4) array of rectangles as (first column, first row, last column + 1, last row + 1)
+    :rtype:         np.ndarray
+    """
+    matrix = np.asarray(matrix, dtype=bool)
+    boxes = []
+    # key is (start, stop) of a run in the previous row, value is the index of its rectangle in boxes
+    open_boxes = {}
+    for row_nr, row in enumerate(matrix):
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], row, [False])).astype(np.int8)))
+        row_boxes = {}
+        for start, stop in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+            box_idx = open_boxes.get((start, stop))
+            if box_idx is None:
+                boxes.append([start, row_nr, stop, row_nr + 1])
+                box_idx = len(boxes) - 1
+            else:
+                boxes[box_idx][3] = row_nr + 1
+            row_boxes[(start, stop)] = box_idx
+        open_boxes = row_boxes
+    return np.array(boxes, dtype=np.int64).reshape(-1, 4)
+
+
+def qrcode_boxes_task(data, version, error, border):
+    """
+    Worker process task: the merged rectangles of a QRCode.
+
+    :return:    ('ok', rectangles as returned by matrix_boxes(), number of rows of the matrix) or ('fail', message)
+    :rtype:     tuple
+    """
+    try:
+        matrix = qrcode_matrix(data, version=version, error=error, border=border)
+    except Exception as e:
+        return 'fail', str(e)
+    return 'ok', matrix_boxes(matrix), len(matrix)
+
+
+def boxes_geometry(boxes, nr_rows, module_size, position=(0, 0)):
+    """
+    :param boxes:       rectangles as returned by matrix_boxes()
+    :type boxes:        np.ndarray
+    :param nr_rows:     number of rows of the QRCode matrix, the border included
+    :type nr_rows:      int
+    :param module_size: the size of a module
+    :type module_size:  float
+    :param position:    the lower left corner of the QRCode, the border included
+    :type position:     tuple
+    :return:            the rectangles as Shapely Polygons
+    :rtype:             np.ndarray
+    """
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    height = nr_rows * module_size
+    return shapely.box(position[0] + boxes[:, 0] * module_size, position[1] + height - boxes[:, 3] * module_size,
+                       position[0] + boxes[:, 2] * module_size, position[1] + height - boxes[:, 1] * module_size)
+
+
+def qrcode_batch(items, version, error, module_size, border, polarity='pos', rounded='r', pool=None,
+                 abort_requested=None):
+    """
+    Makes the geometry of many QRCodes. The QRCodes are made in the worker processes of the pool, if there is one.
+
+    :param items:           sequence of (data, (x, y)) where (x, y) is the lower left corner of the QRCode, the border
+                            included
+    :type items:            list
+    :param version:         the QRCode version
+    :type version:          int
+    :param error:           the error correction: 'L', 'M', 'Q' or 'H'
+    :type error:            str
+    :param module_size:     the size of a module (a box of the QRCode)
+    :type module_size:      float
+    :param border:          the number of modules of the clear border around the QRCode
+    :type border:           int
+    :param polarity:        'pos' - the dark modules are the geometry; 'neg' - the dark modules are cut out of the
+                            QRCode bounding box
+    :type polarity:         str
+    :param rounded:         the bounding box (for the 'neg' polarity) has rounded ('r') or square ('s') corners
+    :type rounded:          str
+    :param pool:            the multiprocessing pool; if None the QRCodes are made in this process
+    :type pool:             multiprocessing.pool.Pool | None
+    :param abort_requested: called while waiting for the results; if it returns True the waiting is stopped and
+                            None is returned
+    :type abort_requested:  callable | None
+    :return:                for each item a list of Polygons (or an error message string if the QRCode could not be
+                            made), or None if it was aborted
+    :rtype:                 list | None
+    """
+    args = [(data, version, error, border) for data, __ in items]
+    if pool is None:
+        results = [qrcode_boxes_task(*arg) for arg in args]
+    else:
+        tasks = [pool.apply_async(qrcode_boxes_task, args=arg) for arg in args]
+        results = []
+        for task in tasks:
+            while not task.ready():
+                if abort_requested is not None and abort_requested():
+                    return None
+                task.wait(0.05)
+            results.append(task.get())
+
+    buff_val = border * module_size
+    join_style = 'round' if rounded == 'r' else 'mitre'
+
+    geometry = []
+    for (data, position), result in zip(items, results):
+        if result[0] != 'ok':
+            geometry.append(result[1])
+            continue
+
+        __, boxes, nr_rows = result
+        polygons = boxes_geometry(boxes, nr_rows, module_size, position=position).tolist()
+        if polarity == 'pos' or not polygons:
+            geometry.append(polygons)
+            continue
+
+        modules = unary_union(polygons)
+        mask_geo = box(*modules.bounds).buffer(buff_val, join_style=join_style)
+        neg_geo = mask_geo.difference(modules)
+        geometry.append(list(neg_geo.geoms) if hasattr(neg_geo, 'geoms') else [neg_geo])
+    return geometry
@@ -0,0 +1,242 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import math
+
+import numpy as np
+import shapely
+from shapely import Polygon, STRtree
+
+import logging
+
+log = logging.getLogger('base')
+
+
+def polygon_parts(geometry):
+    """
+    :param geometry:    Shapely geometry or array of Shapely geometry
+    :return:            the non-empty Polygons in the geometry
+    :rtype:             np.ndarray
+    """
+    parts = shapely.get_parts(geometry)
+    if len(parts) == 0:
+        return parts
+    keep = (shapely.get_type_id(parts) == shapely.GeometryType.POLYGON) & ~shapely.is_empty(parts)
+    return parts[keep]
+
+
+def subtract_cleared(residual, lines, distance):
+    """
+    :param residual:    the residual area of a tile, array of Polygons
+    :type residual:     np.ndarray
+    :param lines:       the tool paths, clipped to the tile (extended by the distance)
+    :type lines:        np.ndarray
+    :param distance:    half of the tool diameter
+    :type distance:     float
+    :return:            the part of the residual area that is not cleared by the tool paths, array of Polygons
+    :rtype:             np.ndarray
+    """
+    # the tiny extra distance closes the hairline gaps between neighbouring passes; the resolution is the one of the
+    # Shapely buffer() method
+    cleared = shapely.union_all(shapely.buffer(lines, distance + 0.0000001, quad_segs=16))
+    return polygon_parts(shapely.difference(shapely.multipolygons(residual), cleared))
+
+
+def subtract_cleared_task(residual_wkb, lines_wkb, distance):
+    """
+    Worker process task: subtract_cleared() with the geometry in the WKB format.
+
+    :return:    the WKB of the Polygons left in the tile
+    :rtype:     list
+    """
+    residual = subtract_cleared(shapely.from_wkb(residual_wkb), shapely.from_wkb(lines_wkb), distance)
+    return shapely.to_wkb(residual).tolist()
+
+
+class RestMachiningArea:
+    """
+    The area that is left to be cleared in rest machining, kept on a grid of tiles.
+
+    Each tile keeps the part of the area that is inside it. After a tool clears the area, only the tiles reached by
+    the tool paths are updated (a difference with the buffered tool paths clipped to the tile) and the tiles that
+    are left empty are dropped, therefore the next tool works only with the tiles that still have area to be
+    cleared. The tiles can be updated in the worker processes of a pool.
+
+    Usage:
+    area = RestMachiningArea(empty_area)
+    for tool in tools:
+        paths = clear(area.polygons(), tool)
+        area.subtract(paths, tool / 2, pool=app.pool)
+        if area.is_empty:
+            break
+    """
+
+    # the grid is made so that a tile has about this many vertices of the initial area
+    tile_vertices = 5000
+    max_tiles = 1024
+    # the tiles are updated in the pool only when there are at least this many tiles to update
+    pool_min_tiles = 4
+
+    def __init__(self, area, nr_tiles=None):
+        """
+
+        :param area:        the area to be cleared, Shapely geometry (or a list of Polygons)
+        :param nr_tiles:    the number of tiles of the grid; if None it is chosen by the complexity of the area
+        :type nr_tiles:     int | None
+        """
+        geo_arr = np.empty(len(area), dtype=object) if isinstance(area, list) else None
+        if geo_arr is not None:
+            geo_arr[:] = area
+        polygons = polygon_parts(geo_arr if geo_arr is not None else area)
+
+        # key is the tile index in the grid, value is the array of the Polygons in the tile
+        self.tiles = {}
+        self.tile_boxes = np.array([], dtype=object)
+        if len(polygons) == 0:
+            return
+
+        xmin, ymin, xmax, ymax = shapely.total_bounds(polygons)
+        width = max(xmax - xmin, 1e-9)
+        height = max(ymax - ymin, 1e-9)
+
+        if nr_tiles is None:
+            nr_tiles = int(shapely.get_num_coordinates(polygons).sum() // self.tile_vertices)
+        nr_tiles = min(max(int(nr_tiles), 1), self.max_tiles)
+        nx = max(int(round(math.sqrt(nr_tiles * width / height))), 1)
+        ny = max(int(math.ceil(nr_tiles / nx)), 1)
+
+        # the grid is a bit bigger than the area so no polygon lies on the outer edges of the tiles
+        x_edges = np.linspace(xmin - 1e-6, xmax + 1e-6, nx + 1)
+        y_edges = np.linspace(ymin - 1e-6, ymax + 1e-6, ny + 1)
+        x_min, y_min = np.meshgrid(x_edges[:-1], y_edges[:-1], indexing='ij')
+        x_max, y_max = np.meshgrid(x_edges[1:], y_edges[1:], indexing='ij')
+        self.tile_boxes = shapely.box(x_min.ravel(), y_min.ravel(), x_max.ravel(), y_max.ravel())
+
+        tile_idx, poly_idx = STRtree(polygons).query(self.tile_boxes, predicate='intersects')
+        # a polygon inside a tile is kept as it is, the others are split by the tiles
+        inside = shapely.contains_properly(self.tile_boxes[tile_idx], polygons[poly_idx])
+        pieces = polygons[poly_idx].copy()
+        pieces[~inside] = shapely.intersection(polygons[poly_idx[~inside]], self.tile_boxes[tile_idx[~inside]])
+
+        self.set_tiles(tile_idx, pieces)
+
+    def set_tiles(self, tile_idx, geometry):
+        """
+        :param tile_idx:    for each geometry element, the tile it belongs to
+        :type tile_idx:     np.ndarray
+        :param geometry:    the geometry elements
+        :type geometry:     np.ndarray
+        :return:            None
+        """
+        parts, part_idx = shapely.get_parts(geometry, return_index=True)
+        if len(parts) == 0:
+            return
+        keep = (shapely.get_type_id(parts) == shapely.GeometryType.POLYGON) & ~shapely.is_empty(parts)
+        parts, part_tiles = parts[keep], tile_idx[part_idx[keep]]
+
+        order = np.argsort(part_tiles, kind='stable')
+        parts, part_tiles = parts[order], part_tiles[order]
+        tiles, starts = np.unique(part_tiles, return_index=True)
+        for tile, piece in zip(tiles.tolist(), np.split(parts, starts[1:])):
+            self.tiles[tile] = piece
+
+    def copy(self):
+        """
+        :return:    a copy that can be changed without changing this one; the geometry is shared
+        :rtype:     RestMachiningArea
+        """
+        new_area = RestMachiningArea.__new__(RestMachiningArea)
+        new_area.tiles = dict(self.tiles)
+        new_area.tile_boxes = self.tile_boxes
+        return new_area
+
+    @property
+    def is_empty(self):
+        return len(self.tiles) == 0
+
+    @property
+    def area(self):
+        return float(sum(shapely.area(pieces).sum() for pieces in self.tiles.values()))
+
+    def subtract(self, lines, distance, pool=None):
+        """
+        Removes from the area what is cleared by the tool paths. Only the tiles reached by the tool paths are updated.
+
+        :param lines:       the tool paths
+        :type lines:        list
+        :param distance:    half of the tool diameter
+        :type distance:     float
+        :param pool:        the multiprocessing pool; if None the tiles are updated in this process
+        :type pool:         multiprocessing.pool.Pool | None
+        :return:            None
+        """
+        if self.is_empty or not lines:
+            return
+
+        lines_arr = np.empty(len(lines), dtype=object)
+        lines_arr[:] = lines
+        lines_arr = lines_arr[~(shapely.is_missing(lines_arr) | shapely.is_empty(lines_arr))]
+        if len(lines_arr) == 0:
+            return
+
+        active = np.array(sorted(self.tiles), dtype=np.int64)
+        box_idx, line_idx = STRtree(lines_arr).query(self.tile_boxes[active], predicate='dwithin', distance=distance)
+        if len(box_idx) == 0:
+            return
+
+        order = np.argsort(box_idx, kind='stable')
+        box_idx, line_idx = box_idx[order], line_idx[order]
+        boxes, starts = np.unique(box_idx, return_index=True)
+
+        jobs = []
+        for box_pos, tile_lines in zip(boxes.tolist(), np.split(line_idx, starts[1:])):
+            tile = int(active[box_pos])
+            bx_min, by_min, bx_max, by_max = shapely.bounds(self.tile_boxes[tile])
+            # only the part of the tool paths that can reach the tile is buffered
+            clipped = shapely.clip_by_rect(lines_arr[tile_lines], bx_min - distance, by_min - distance,
+                                           bx_max + distance, by_max + distance)
+            clipped = clipped[~shapely.is_empty(clipped)]
+            if len(clipped):
+                jobs.append((tile, clipped))
+
+        if pool is not None and len(jobs) >= self.pool_min_tiles:
+            tasks = [
+                pool.apply_async(subtract_cleared_task,
+                                 args=(shapely.to_wkb(self.tiles[tile]).tolist(), shapely.to_wkb(clipped).tolist(),
+                                       distance))
+                for tile, clipped in jobs
+            ]
+            results = [shapely.from_wkb(task.get()) for task in tasks]
+        else:
+            results = [subtract_cleared(self.tiles[tile], clipped, distance) for tile, clipped in jobs]
+
+        for (tile, __), pieces in zip(jobs, results):
+            pieces = np.asarray(pieces, dtype=object)
+            if len(pieces):
+                self.tiles[tile] = pieces
+            else:
+                del self.tiles[tile]
+
+    def polygons(self):
+        """
+        :return:    the area as whole Polygons: the pieces of the polygons that were split by the tiles are merged
+        :rtype:     list
+        """
+        if self.is_empty:
+            return []
+
+        tiles = sorted(self.tiles)
+        pieces = np.concatenate([self.tiles[tile] for tile in tiles])
+        piece_tiles = np.concatenate([np.full(len(self.tiles[tile]), tile) for tile in tiles])
+
+        # only the pieces that touch the edges of their tile can be parts of bigger polygons
+        inside = shapely.contains_properly(self.tile_boxes[piece_tiles], pieces)
+        result = pieces[inside].tolist()
+        if not np.all(inside):
+            merged = polygon_parts(shapely.union_all(pieces[~inside]))
+            result += [poly for poly in merged.tolist() if isinstance(poly, Polygon) and poly.is_valid]
+        return result
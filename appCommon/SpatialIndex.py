@@ -0,0 +1,302 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
+
+import logging
+
+log = logging.getLogger('base')
+
+
+class SpatialIndex:
+    """
+    The spatial queries done by the Editors on the mouse events: the nearest vertex (corner snap), the shapes under
+    the cursor (click selection) and the shapes in a selection rectangle.
+
+    The shapes are indexed by their geometry with a Shapely STRtree. The STRtree can not be changed once built,
+    therefore the shapes added after the tree was built are kept in a short list that is searched with the vectorized
+    Shapely predicates, and the removed shapes are only marked as dead. The tree is rebuilt, before a query, when the
+    added or the removed shapes since the last build are too many.
+
+    Each shape can have a tag (e.g. the aperture code or the tool diameter of its storage).
+
+    Usage:
+    index = SpatialIndex(get_geometry=lambda shape: shape.geo)
+    index.insert(shape, tag=tool_dia)
+    index.remove(shape)
+    index.sync((shape, tool_dia) for shape in storage.get_objects())
+    shapes = index.at_point((x, y), tolerance=0.01)
+    shapes = index.in_rectangle(start_pos, end_pos, contained=True)
+    (x, y), shape = index.nearest_vertex((x, y), max_distance=0.05)
+    """
+
+    # the tree is rebuilt when the shapes added (or removed) after the last build are more than this fraction of the
+    # shapes in the tree
+    rebuild_ratio = 0.25
+    rebuild_min = 256
+
+    def __init__(self, get_geometry=None):
+        """
+
+        :param get_geometry:    callable that takes a shape and returns its Shapely geometry (or None);
+                                by default the 'geo' attribute of the shape is used
+        :type get_geometry:     callable | None
+        """
+        self.get_geometry = get_geometry if get_geometry is not None else (lambda shape: shape.geo)
+
+        # for each slot: the shape (None if removed), its geometry and its tag
+        self._shapes = []
+        self._geoms = []
+        self._tags = []
+        # key is id(shape), value is the slot of the shape
+        self._slots = {}
+
+        self._tree = None
+        # the slots in the range [0, self._indexed) are in the tree
+        self._indexed = 0
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, shape):
+        return id(shape) in self._slots
+
+    def clear(self):
+        self._shapes = []
+        self._geoms = []
+        self._tags = []
+        self._slots = {}
+        self._tree = None
+        self._indexed = 0
+        self._dead = 0
+
+    def insert(self, shape, tag=None):
+        """
+        Adds a shape to the index; a shape already in the index is updated.
+
+        :param shape:   the shape; the shapes without geometry are not indexed
+        :param tag:     a value stored with the shape
+        :return:        None
+        """
+        self.remove(shape)
+
+        geometry = self.get_geometry(shape)
+        if not isinstance(geometry, BaseGeometry) or geometry.is_empty:
+            return
+
+        self._slots[id(shape)] = len(self._shapes)
+        self._shapes.append(shape)
+        self._geoms.append(geometry)
+        self._tags.append(tag)
+
+    def remove(self, shape):
+        """
+        :param shape:   the shape to be removed from the index; it is ignored if it is not in the index
+        :return:        None
+        """
+        slot = self._slots.pop(id(shape), None)
+        if slot is None:
+            return
+
+        self._shapes[slot] = None
+        self._geoms[slot] = None
+        self._tags[slot] = None
+        self._dead += 1
+
+    def update(self, shape, tag=None):
+        self.insert(shape, tag=tag)
+
+    def tag(self, shape, default=None):
+        """
+        :param shape:   a shape
+        :param default: returned if the shape is not in the index
+        :return:        the tag of the shape
+        """
+        slot = self._slots.get(id(shape))
+        return default if slot is None else self._tags[slot]
+
+    def sync(self, items):
+        """
+        Brings the index up to date with the shapes of the Editor. Only the differences are applied: the new shapes
+        are added, the shapes that are gone are removed and the shapes whose geometry (or tag) was replaced are
+        updated.
+
+        :param items:   iterable of (shape, tag) tuples, all the shapes of the Editor
+        :return:        None
+        """
+        seen = set()
+        for shape, tag in items:
+            key = id(shape)
+            seen.add(key)
+            slot = self._slots.get(key)
+            if slot is None or self._geoms[slot] is not self.get_geometry(shape) or self._tags[slot] != tag:
+                self.insert(shape, tag=tag)
+
+        for key in [k for k in self._slots if k not in seen]:
+            self.remove(self._shapes[self._slots[key]])
+
+    # ######################################################################################
+    # Queries
+    # ######################################################################################
+    def at_point(self, point, tolerance=0.0):
+        """
+        :param point:       the (x, y) coordinates of the cursor
+        :type point:        tuple
+        :param tolerance:   the maximum distance between the cursor and a shape
+        :type tolerance:    float
+        :return:            the shapes under the cursor, the nearest first
+        :rtype:             list
+        """
+        pt = shapely.Point(point[0], point[1])
+        if tolerance > 0:
+            slots = self._query(pt, 'dwithin', distance=tolerance)
+        else:
+            slots = self._query(pt, 'intersects')
+
+        if len(slots) > 1:
+            distances = shapely.distance(self._geometry_array(slots), pt)
+            slots = slots[np.argsort(distances, kind='stable')]
+        return [self._shapes[s] for s in slots]
+
+    def in_rectangle(self, start, end, contained=True):
+        """
+        :param start:       a corner of the selection rectangle
+        :type start:        tuple
+        :param end:         the opposite corner of the selection rectangle
+        :type end:          tuple
+        :param contained:   if True only the shapes inside the rectangle are returned, else all that touch it
+        :type contained:    bool
+        :return:            the shapes, in the order they were indexed
+        :rtype:             list
+        """
+        rect = shapely.box(min(start[0], end[0]), min(start[1], end[1]), max(start[0], end[0]), max(start[1], end[1]))
+        slots = self._query(rect, 'contains' if contained else 'intersects')
+        return [self._shapes[s] for s in slots]
+
+    def nearest(self, point, max_distance=None):
+        """
+        Will raise StopIteration if no shape is found.
+
+        :param point:           the (x, y) coordinates
+        :type point:            tuple
+        :param max_distance:    if not None, only the shapes within this distance are considered
+        :type max_distance:     float | None
+        :return:                the shape nearest to the point
+        """
+        self._update_tree()
+        pt = shapely.Point(point[0], point[1])
+
+        slots = []
+        if self._tree is not None:
+            found = self._tree.query_nearest(pt, max_distance=max_distance, all_matches=False)
+            if len(found) and self._shapes[found[0]] is not None:
+                slots.append(int(found[0]))
+            elif self._dead:
+                # the nearest shape in the tree was removed; look at all the shapes in the tree
+                slots.extend(range(self._indexed))
+        slots.extend(range(self._indexed, len(self._shapes)))
+        slots = np.array([s for s in slots if self._shapes[s] is not None], dtype=np.int64)
+        if len(slots) == 0:
+            raise StopIteration
+
+        distances = shapely.distance(self._geometry_array(slots), pt)
+        best = int(np.argmin(distances))
+        if max_distance is not None and distances[best] > max_distance:
+            raise StopIteration
+        return self._shapes[slots[best]]
+
+    def nearest_vertex(self, point, max_distance):
+        """
+        Will raise StopIteration if no vertex is found within the max_distance.
+
+        :param point:           the (x, y) coordinates
+        :type point:            tuple
+        :param max_distance:    the maximum distance from the point to the vertex
+        :type max_distance:     float
+        :return:                (match_x, match_y), the shape that owns the vertex
+        :rtype:                 tuple
+        """
+        slots = self._query(shapely.Point(point[0], point[1]), 'dwithin', distance=max_distance)
+        if len(slots) == 0:
+            raise StopIteration
+
+        coords, owners = shapely.get_coordinates(self._geometry_array(slots), return_index=True)
+        if len(coords) == 0:
+            raise StopIteration
+        distances = np.hypot(coords[:, 0] - point[0], coords[:, 1] - point[1])
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance:
+            raise StopIteration
+        return (float(coords[best, 0]), float(coords[best, 1])), self._shapes[slots[owners[best]]]
+
+    # ######################################################################################
+    # Internals
+    # ######################################################################################
+    def _geometry_array(self, slots):
+        geoms = np.empty(len(slots), dtype=object)
+        geoms[:] = [self._geoms[s] for s in slots]
+        return geoms
+
+    def _update_tree(self):
+        """
+        Rebuilds the tree, without the removed shapes, if the shapes added or removed after the last build are too
+        many.
+
+        :return: None
+        """
+        pending = len(self._shapes) - self._indexed
+        limit = max(self.rebuild_min, self.rebuild_ratio * self._indexed)
+        if pending <= limit and self._dead <= limit:
+            return
+
+        keep = [s for s, shape in enumerate(self._shapes) if shape is not None]
+        self._shapes = [self._shapes[s] for s in keep]
+        self._geoms = [self._geoms[s] for s in keep]
+        self._tags = [self._tags[s] for s in keep]
+        self._slots = {id(shape): s for s, shape in enumerate(self._shapes)}
+
+        self._tree = STRtree(self._geometry_array(range(len(self._geoms)))) if self._geoms else None
+        self._indexed = len(self._geoms)
+        self._dead = 0
+
+    def _query(self, geometry, predicate, distance=None):
+        """
+        :param geometry:    the query geometry
+        :param predicate:   'intersects', 'contains' (the query geometry contains the shape) or 'dwithin'
+        :param distance:    the distance for the 'dwithin' predicate
+        :return:            the slots of the shapes for which the predicate is True, sorted
+        :rtype:             np.ndarray
+        """
+        self._update_tree()
+
+        found = []
+        if self._tree is not None:
+            if predicate == 'dwithin':
+                found.append(self._tree.query(geometry, predicate='dwithin', distance=distance))
+            else:
+                found.append(self._tree.query(geometry, predicate=predicate))
+
+        if len(self._shapes) > self._indexed:
+            pending = self._geometry_array(range(self._indexed, len(self._shapes)))
+            if predicate == 'dwithin':
+                # shapely.dwithin() is only in Shapely 2.1+, the STRtree 'dwithin' predicate is in 2.0
+                mask = shapely.distance(pending, geometry) <= distance
+            elif predicate == 'contains':
+                mask = shapely.contains(geometry, pending)
+            else:
+                mask = shapely.intersects(pending, geometry)
+            found.append(np.flatnonzero(mask) + self._indexed)
+
+        if not found:
+            return np.array([], dtype=np.int64)
+
+        slots = np.unique(np.concatenate(found).astype(np.int64))
+        return np.array([s for s in slots if self._shapes[s] is not None], dtype=np.int64)
@@ -6,6 +6,7 @@
 # ##########################################################
 
 from camlib import distance, arc, AppRTreeStorage
+from appCommon.SpatialIndex import SpatialIndex
 
 from PyQt6 import QtCore, QtWidgets, QtGui
 from PyQt6.QtCore import Qt
@@ -61,9 +62,6 @@ class SelectEditorExc(FCShapeTool):
         # here we store the selected tools
         self.sel_tools = set()
 
-        # here we store all shapes that were selected so we can search for the nearest to our click location
-        self.sel_storage = AppExcEditor.make_storage()
-
         # make sure that the cursor text from the DrillAdd is deleted
         if self.draw_app.app.use_3d_engine and self.draw_app.app.plotcanvas.text_cursor.parent:
             self.draw_app.app.plotcanvas.text_cursor.parent = None
@@ -95,13 +93,8 @@ class SelectEditorExc(FCShapeTool):
         xmin, ymin, xmax, ymax = 0, 0, 0, 0
 
         try:
-            for storage in self.draw_app.storage_dict:
-                # for sh in self.draw_app.storage_dict[storage].get_objects():
-                #     self.sel_storage.insert(sh)
-                _, st_closest_shape = self.draw_app.storage_dict[storage].nearest(pos)
-                self.sel_storage.insert(st_closest_shape)
-
-            _, closest_shape = self.sel_storage.nearest(pos)
+            # the shape nearest to the click, from all the tools
+            closest_shape = self.draw_app.spatial_index.nearest(pos)
 
             # constrain selection to happen only within a certain bounding box; it works only for MultiLineStrings
             if isinstance(closest_shape.geo, MultiLineString):
@@ -156,9 +149,9 @@ class SelectEditorExc(FCShapeTool):
             self.sel_tools.clear()
 
             for shape_s in self.draw_app.selected:
-                for storage in self.draw_app.storage_dict:
-                    if shape_s in self.draw_app.storage_dict[storage].get_objects():
-                        self.sel_tools.add(storage)
+                tool_dia = self.draw_app.shape_tool(shape_s)
+                if tool_dia is not None:
+                    self.sel_tools.add(tool_dia)
 
             self.draw_app.ui.tools_table_exc.clearSelection()
             for storage in self.sel_tools:
@@ -172,9 +165,6 @@ class SelectEditorExc(FCShapeTool):
 
             self.draw_app.ui.tools_table_exc.cellPressed.connect(self.draw_app.on_row_selected)
 
-        # delete whatever is in selection storage, there is no longer need for those shapes
-        self.sel_storage = AppExcEditor.make_storage()
-
         return ""
 
         # clicked_pos[0] and clicked_pos[1] are the mouse click coordinates (x, y)
@@ -2976,6 +2966,10 @@ class AppExcEditor(QtCore.QObject):
         self.storage_dict = {}
         self.current_storage = []
 
+        # spatial queries on the shapes of all the tools: snapping, click selection and area selection
+        # the tag of each shape is the tool diameter of its storage
+        self.spatial_index = SpatialIndex()
+
         # build the data from the Excellon point into a dictionary
         #  {tool_dia: [geometry_in_points]}
         self.points_edit = {}
@@ -3766,6 +3760,7 @@ class AppExcEditor(QtCore.QObject):
 
         # initialize working objects
         self.storage_dict = {}
+        self.spatial_index.clear()
         self.current_storage = []
         self.points_edit = {}
         self.sorted_diameters = []
@@ -3964,6 +3959,7 @@ class AppExcEditor(QtCore.QObject):
         self.new_tools = {}
 
         # self.storage_dict = {}
+        self.spatial_index.clear()
 
         self.shapes.clear(update=True)
         self.tool_shape.clear(update=True)
@@ -4485,7 +4481,8 @@ class AppExcEditor(QtCore.QObject):
         if event.button == 1:
             self.clicked_pos = self.canvas.translate_coords(event_pos)
             if self.app.grid_status():
-                self.clicked_pos = self.app.geo_editor.snap(self.clicked_pos[0], self.clicked_pos[1])
+                self.clicked_pos = self.app.geo_editor.snap(self.clicked_pos[0], self.clicked_pos[1],
+                                                            spatial_index=self.spatial_index)
             else:
                 self.clicked_pos = (self.clicked_pos[0], self.clicked_pos[1])
 
@@ -4554,7 +4551,7 @@ class AppExcEditor(QtCore.QObject):
         pos_canvas = self.canvas.translate_coords(event_pos)
 
         if self.app.grid_status():
-            pos = self.app.geo_editor.snap(pos_canvas[0], pos_canvas[1])
+            pos = self.app.geo_editor.snap(pos_canvas[0], pos_canvas[1], spatial_index=self.spatial_index)
         else:
             pos = (pos_canvas[0], pos_canvas[1])
 
@@ -4667,7 +4664,7 @@ class AppExcEditor(QtCore.QObject):
 
         # ## Snap coordinates
         if self.app.grid_status():
-            x, y = self.app.geo_editor.snap(x, y)
+            x, y = self.app.geo_editor.snap(x, y, spatial_index=self.spatial_index)
 
             # Update cursor
             self.app.app_cursor.set_data(np.asarray([(x, y)]), symbol='++', edge_color=self.app.plotcanvas.cursor_color,
@@ -4763,6 +4760,44 @@ class AppExcEditor(QtCore.QObject):
             self.utility.append(shp)
         else:
             storage.insert(shp)  # TODO: Check performance
+            self.spatial_index.insert(shp, tag=self.storage_tool(storage))
+
+    def storage_tool(self, storage):
+        """
+        :param storage: a shape storage from the self.storage_dict
+        :type storage:  AppRTreeStorage
+        :return:        the tool diameter of the storage or None if the storage is not found
+        """
+        for tool_dia, tool_storage in self.storage_dict.items():
+            if tool_storage is storage:
+                return tool_dia
+        return None
+
+    def shape_tool(self, shape):
+        """
+        :param shape:   a shape from one of the storages of the tools
+        :type shape:    DrawToolShape
+        :return:        the tool diameter of the storage that holds the shape or None if the shape is not found
+        """
+        tool_dia = self.spatial_index.tag(shape)
+        if tool_dia is not None:
+            return tool_dia
+
+        for tool_dia, tool_storage in self.storage_dict.items():
+            if shape in tool_storage.get_objects():
+                return tool_dia
+        return None
+
+    def sync_spatial_index(self):
+        """
+        Updates the spatial index with the changes made directly in the storages of the tools (shapes added,
+        removed, replaced or moved to another tool).
+
+        :return:    None
+        """
+        self.spatial_index.sync(
+            (shape, tool_dia) for tool_dia, tool_storage in self.storage_dict.items()
+            for shape in tool_storage.get_objects())
 
     def add_shape(self, shp):
         """
@@ -4829,7 +4864,6 @@ class AppExcEditor(QtCore.QObject):
 
         start_pos = (start[0], start[1])
         end_pos = (end[0], end[1])
-        poly_selection = Polygon([start_pos, (end_pos[0], start_pos[1]), end_pos, (start_pos[0], end_pos[1])])
         modifiers = None
 
         # delete the selection shape that was just drawn, we no longer need it
@@ -4842,27 +4876,25 @@ class AppExcEditor(QtCore.QObject):
         elif self.modifiers == QtCore.Qt.KeyboardModifier.ControlModifier:
             modifiers = 'Control'
 
+        # the shapes included (touched) by the selection rectangle
+        if sel_type is None:
+            sel_objects_list = []
+        else:
+            sel_objects_list = self.spatial_index.in_rectangle(start_pos, end_pos, contained=sel_type is True)
+
         if modifiers == self.app.options["global_mselect_key"]:
-            for storage in self.storage_dict:
-                for obj in self.storage_dict[storage].get_objects():
-                    if (sel_type is True and poly_selection.contains(obj.geo)) or \
-                            (sel_type is False and poly_selection.intersects(obj.geo)):
-
-                        if obj in self.selected:
-                            # remove the shape object from the selected shapes storage
-                            self.selected.remove(obj)
-                        else:
-                            # add the shape object to the selected shapes storage
-                            self.selected.append(obj)
+            for obj in sel_objects_list:
+                if obj in self.selected:
+                    # remove the shape object from the selected shapes storage
+                    self.selected.remove(obj)
+                else:
+                    # add the shape object to the selected shapes storage
+                    self.selected.append(obj)
         else:
             # clear the selection shapes storage
             self.selected.clear()
             # then add to the selection shapes storage the shapes that are included (touched) by the selection rectangle
-            for storage in self.storage_dict:
-                for obj in self.storage_dict[storage].get_objects():
-                    if (sel_type is True and poly_selection.contains(obj.geo)) or \
-                            (sel_type is False and poly_selection.intersects(obj.geo)):
-                        self.selected.append(obj)
+            self.selected.extend(sel_objects_list)
 
         try:
             self.ui.tools_table_exc.cellPressed.disconnect()
@@ -4873,22 +4905,22 @@ class AppExcEditor(QtCore.QObject):
         self.ui.tools_table_exc.clearSelection()
         # and select the rows (tools) in the tool table according to the diameter(s) of the selected shape(s)
         self.ui.tools_table_exc.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.MultiSelection)
+        sel_tools = set(self.shape_tool(shape_s) for shape_s in self.selected)
         for storage in self.storage_dict:
-            for shape_s in self.selected:
-                if shape_s in self.storage_dict[storage].get_objects():
-                    for key_tool_nr in self.tool2tooldia:
-                        if self.tool2tooldia[key_tool_nr] == storage:
-                            row_to_sel = key_tool_nr - 1
-                            # item = self.ui.tools_table_exc.item(row_to_sel, 1)
-                            # self.ui.tools_table_exc.setCurrentItem(item)
-                            # item.setSelected(True)
-
-                            # if the row to be selected is not already in the selected rows then select it
-                            # otherwise don't do it as it seems that we have a toggle effect
-                            if row_to_sel not in set(
-                                    index.row() for index in self.ui.tools_table_exc.selectedIndexes()):
-                                self.ui.tools_table_exc.selectRow(row_to_sel)
-                            self.last_tool_selected = int(key_tool_nr)
+            if storage in sel_tools:
+                for key_tool_nr in self.tool2tooldia:
+                    if self.tool2tooldia[key_tool_nr] == storage:
+                        row_to_sel = key_tool_nr - 1
+                        # item = self.ui.tools_table_exc.item(row_to_sel, 1)
+                        # self.ui.tools_table_exc.setCurrentItem(item)
+                        # item.setSelected(True)
+
+                        # if the row to be selected is not already in the selected rows then select it
+                        # otherwise don't do it as it seems that we have a toggle effect
+                        if row_to_sel not in set(
+                                index.row() for index in self.ui.tools_table_exc.selectedIndexes()):
+                            self.ui.tools_table_exc.selectRow(row_to_sel)
+                        self.last_tool_selected = int(key_tool_nr)
 
         self.ui.tools_table_exc.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
 
@@ -4974,6 +5006,9 @@ class AppExcEditor(QtCore.QObject):
 
         self.shapes.clear(update=True)
 
+        # the storages of the tools are changed in many places, bring the spatial index up to date
+        self.sync_spatial_index()
+
         for storage in self.storage_dict:
             for shape_plus in self.storage_dict[storage].get_objects():
                 if shape_plus.geo is None:
@@ -5091,6 +5126,7 @@ class AppExcEditor(QtCore.QObject):
                     self.storage_dict[storage].remove(del_shape)
                     del self.slot_points_edit[storage][0]
 
+        self.spatial_index.remove(del_shape)
         if del_shape in self.selected:
             self.selected.remove(del_shape)
 
@@ -17,6 +17,8 @@ from PyQt6.QtCore import Qt
 import math
 
 from camlib import distance, arc, three_point_circle, Geometry, AppRTreeStorage, flatten_shapely_geometry
+from appCommon.Arcs import arc_tolerance
+from appCommon.SpatialIndex import SpatialIndex
 from appGUI.GUIElements import FCLabel, GLay, FCDoubleSpinner, FCTree, FCButton, FCFrame, FCCheckBox, FCEntry, \
     FCTextEdit
 from appGUI.VisPyVisuals import ShapeCollection
@@ -104,6 +106,9 @@ class AppGeoEditor(QtCore.QObject):
         self.storage = self.make_storage()
         self.utility = []
 
+        # spatial queries on the shapes in the storage: snapping, click selection and area selection
+        self.spatial_index = SpatialIndex()
+
         # VisPy visuals
         self.fcgeometry = None
         if self.app.use_3d_engine:
@@ -653,6 +658,7 @@ class AppGeoEditor(QtCore.QObject):
 
         # initialize working objects
         self.storage = self.make_storage()
+        self.spatial_index.clear()
         self.utility = []
         self.selected = []
 
@@ -719,6 +725,7 @@ class AppGeoEditor(QtCore.QObject):
 
         self.disconnect_canvas_event_handlers()
         self.storage = self.make_storage()
+        self.spatial_index.clear()
 
         self.clear()
         self.app.ui.geo_edit_toolbar.setDisabled(True)
@@ -1037,6 +1044,7 @@ class AppGeoEditor(QtCore.QObject):
             if geometry and geometry.is_valid and not geometry.is_empty and geometry.geom_type != 'Point':
                 try:
                     self.storage.insert(shape)
+                    self.spatial_index.insert(shape)
                 except Exception as err:
                     self.app.inform_shell.emit('%s\n%s' % (_("Error on inserting shapes into storage."), str(err)))
                 if build_ui is True:
@@ -1386,7 +1394,6 @@ class AppGeoEditor(QtCore.QObject):
         :param sel_type: if True it's a left to right selection (enclosure), if False it's a 'touch' selection
         :return:
         """
-        poly_selection = Polygon([start_pos, (end_pos[0], start_pos[1]), end_pos, (start_pos[0], end_pos[1])])
 
         key_modifier = QtWidgets.QApplication.keyboardModifiers()
 
@@ -1399,11 +1406,10 @@ class AppGeoEditor(QtCore.QObject):
 
         self.app.delete_selection_shape()
 
-        sel_objects_list = []
-        for obj in self.storage.get_objects():
-            if (sel_type is True and poly_selection.contains(obj.geo)) or (sel_type is False and
-                                                                           poly_selection.intersects(obj.geo)):
-                sel_objects_list.append(obj)
+        if sel_type is None:
+            sel_objects_list = []
+        else:
+            sel_objects_list = self.spatial_index.in_rectangle(start_pos, end_pos, contained=sel_type is True)
 
         if mod_key == self.app.options["global_mselect_key"]:
             for obj in sel_objects_list:
@@ -1550,6 +1556,7 @@ class AppGeoEditor(QtCore.QObject):
         for shape in w_shapes:
             # remove from Storage
             self.storage.remove(shape)
+            self.spatial_index.remove(shape)
 
     def on_move(self):
         # if not self.selected:
@@ -1580,6 +1587,29 @@ class AppGeoEditor(QtCore.QObject):
     def on_corner_snap(self):
         self.app.ui.corner_snap_btn.trigger()
 
+    def shapes_at(self, point):
+        """
+        The shapes under the mouse cursor, within the snap distance, the nearest first. If there is no shape under
+        the cursor, the nearest shape is returned.
+
+        :param point:   the (x, y) coordinates of the cursor
+        :type point:    tuple
+        :return:        list of shapes; empty if there are no shapes in the Editor
+        :rtype:         list
+        """
+        try:
+            tolerance = float(self.editor_options["global_snap_max"])
+        except (KeyError, TypeError, ValueError):
+            tolerance = 0.0
+
+        over_shape_list = self.spatial_index.at_point(point, tolerance=tolerance)
+        if not over_shape_list:
+            try:
+                over_shape_list = [self.spatial_index.nearest(point)]
+            except StopIteration:
+                pass
+        return over_shape_list
+
     def get_selected(self):
         """
         Returns list of shapes that are selected in the editor.
@@ -1648,6 +1678,9 @@ class AppGeoEditor(QtCore.QObject):
         geo_drawn = []
         geos_selected = []
 
+        # the shapes may have been changed in place (e.g. transformed) so update the index of the changed ones
+        self.spatial_index.sync((shape, None) for shape in self.storage.get_objects())
+
         for shape in self.storage.get_objects():
             if shape.geo and not shape.geo.is_empty and shape.geo.is_valid:
                 if shape in self.get_selected():
@@ -1754,30 +1787,31 @@ class AppGeoEditor(QtCore.QObject):
         if shape in self.selected:
             self.selected.remove(shape)
 
-    def snap(self, x, y):
+    def snap(self, x, y, spatial_index=None):
         """
         Adjusts coordinates to snap settings.
 
-        :param x: Input coordinate X
-        :param y: Input coordinate Y
-        :return: Snapped (x, y)
+        :param x:               Input coordinate X
+        :param y:               Input coordinate Y
+        :param spatial_index:   The index of the shapes used for the corner snap; if None the index of this Editor
+                                is used (the Gerber and the Excellon Editors use this method with their own index)
+        :type spatial_index:    SpatialIndex | None
+        :return:                Snapped (x, y)
         """
 
         snap_x, snap_y = (x, y)
         snap_distance = np.Inf
 
         # # ## Object (corner?) snap
-        # # ## No need for the objects, just the coordinates
-        # # ## in the index.
+        # # ## Only the shapes within the snap distance are searched for the nearest vertex
         if self.editor_options["corner_snap"]:
+            if spatial_index is None:
+                spatial_index = self.spatial_index
             try:
-                nearest_pt, shape = self.storage.nearest((x, y))
-
-                nearest_pt_distance = distance((x, y), nearest_pt)
-                if nearest_pt_distance <= float(self.editor_options["global_snap_max"]):
-                    snap_distance = nearest_pt_distance
-                    snap_x, snap_y = nearest_pt
-            except (StopIteration, AssertionError):
+                nearest_pt, shape = spatial_index.nearest_vertex((x, y), float(self.editor_options["global_snap_max"]))
+                snap_distance = distance((x, y), nearest_pt)
+                snap_x, snap_y = nearest_pt
+            except (StopIteration, TypeError, ValueError):
                 pass
 
         # # ## Grid snap
@@ -1961,6 +1995,9 @@ class AppGeoEditor(QtCore.QObject):
                         new_geo = linemerge(new_geo)
                     new_solid_geometry.append(new_geo)
                 fcgeometry.solid_geometry = flatten_shapely_geometry(new_solid_geometry)
+                # the geometry was edited, the buffered geometry and the rest machining area made from it are of no use
+                fcgeometry.buffer_cache.invalidate()
+                fcgeometry.ncc_rest_cache = None
 
                 try:
                     bounds = fcgeometry.bounds()
@@ -3019,13 +3056,10 @@ class FCCircle(FCShapeTool):
         if modifiers == QtCore.Qt.KeyboardModifier.ShiftModifier:
             # deselect all shapes
             self.draw_app.selected = []
-            for ____ in self.storage.get_objects():
-                try:
-                    __, closest_shape = self.storage.nearest(point)
-                    # select closes shape
-                    self.draw_app.selected.append(closest_shape)
-                except StopIteration:
-                    return ""
+            # select the closest shape
+            over_shape_list = self.draw_app.shapes_at(point)
+            if over_shape_list:
+                self.draw_app.selected.append(over_shape_list[0])
 
             if self.draw_app.selected:
                 self.draw_app.plot_all()
@@ -3299,6 +3333,8 @@ class FCArc(FCShapeTool):
         self.draw_app.app.jump_signal.connect(lambda x: self.draw_app.update_utility_geometry(data=x))
 
         self.steps_per_circ = self.draw_app.app.options["geometry_circle_steps"]
+        # the arc segments are chosen by the chord error, if it is set in Preferences
+        self.arc_tol = arc_tolerance(self.draw_app.app, self.draw_app.app.app_units)
 
     def click(self, point):
         try:
@@ -3377,7 +3413,8 @@ class FCArc(FCShapeTool):
                 stopangle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
 
                 return DrawToolUtilityShape([LineString(arc(center, radius, startangle, stopangle,
-                                                            self.direction, self.steps_per_circ)),
+                                                            self.direction, self.steps_per_circ,
+                                                            tolerance=self.arc_tol)),
                                              Point(center)])
 
             elif self.mode == '132':
@@ -3396,7 +3433,7 @@ class FCArc(FCShapeTool):
                 stopangle = np.arctan2(p3[1] - center[1], p3[0] - center[0])
 
                 return DrawToolUtilityShape([LineString(arc(center, radius, startangle, stopangle,
-                                                            direction, self.steps_per_circ)),
+                                                            direction, self.steps_per_circ, tolerance=self.arc_tol)),
                                              Point(center), Point(p1), Point(p3)])
 
             else:  # '12c'
@@ -3429,7 +3466,8 @@ class FCArc(FCShapeTool):
                 stopangle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
 
                 return DrawToolUtilityShape([LineString(arc(center, radius, startangle, stopangle,
-                                                            self.direction, self.steps_per_circ)),
+                                                            self.direction, self.steps_per_circ,
+                                                            tolerance=self.arc_tol)),
                                              Point(center)])
 
         return None
@@ -3445,7 +3483,7 @@ class FCArc(FCShapeTool):
             startangle = np.arctan2(p1[1] - center[1], p1[0] - center[0])
             stopangle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
             self.geometry = DrawToolShape(LineString(arc(center, radius, startangle, stopangle,
-                                                         self.direction, self.steps_per_circ)))
+                                                         self.direction, self.steps_per_circ, tolerance=self.arc_tol)))
 
         elif self.mode == '132':
             p1 = np.array(self.points[0])
@@ -3459,7 +3497,7 @@ class FCArc(FCShapeTool):
             stopangle = np.arctan2(p3[1] - center[1], p3[0] - center[0])
 
             self.geometry = DrawToolShape(LineString(arc(center, radius, startangle, stopangle,
-                                                         direction, self.steps_per_circ)))
+                                                         direction, self.steps_per_circ, tolerance=self.arc_tol)))
 
         else:  # self.mode == '12c'
             p1 = np.array(self.points[0])
@@ -3492,7 +3530,7 @@ class FCArc(FCShapeTool):
             stopangle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
 
             self.geometry = DrawToolShape(LineString(arc(center, radius, startangle, stopangle,
-                                                         self.direction, self.steps_per_circ)))
+                                                         self.direction, self.steps_per_circ, tolerance=self.arc_tol)))
         self.complete = True
 
         self.draw_app.app.jump_signal.disconnect()
@@ -3556,13 +3594,10 @@ class FCRectangle(FCShapeTool):
         if modifiers == QtCore.Qt.KeyboardModifier.ShiftModifier:
             # deselect all shapes
             self.draw_app.selected = []
-            for ____ in self.storage.get_objects():
-                try:
-                    __, closest_shape = self.storage.nearest(point)
-                    # select closes shape
-                    self.draw_app.selected.append(closest_shape)
-                except StopIteration:
-                    return ""
+            # select the closest shape
+            over_shape_list = self.draw_app.shapes_at(point)
+            if over_shape_list:
+                self.draw_app.selected.append(over_shape_list[0])
 
             if self.draw_app.selected:
                 self.draw_app.plot_all()
@@ -4350,31 +4385,12 @@ class FCSelect(DrawTool):
             self.draw_app.app.inform.emit('[WARNING_NOTCL] %s' % _("Selection not allowed. Wait ..."))
             return
 
-        # pos[0] and pos[1] are the mouse click coordinates (x, y)
-        for ____ in self.storage.get_objects():
-            # first method of click selection -> inconvenient
-            # minx, miny, maxx, maxy = obj_shape.geo.bounds
-            # if (minx <= pos[0] <= maxx) and (miny <= pos[1] <= maxy):
-            #     over_shape_list.append(obj_shape)
-
-            # second method of click selection -> slow
-            # outside = obj_shape.geo.buffer(0.1)
-            # inside = obj_shape.geo.buffer(-0.1)
-            # shape_band = outside.difference(inside)
-            # if Point(pos).within(shape_band):
-            #     over_shape_list.append(obj_shape)
-
-            # 3rd method of click selection -> inconvenient
-            try:
-                __, closest_shape = self.storage.nearest(point)
-            except StopIteration:
-                return ""
-
-            over_shape_list.append(closest_shape)
+        # point[0] and point[1] are the mouse click coordinates (x, y)
+        over_shape_list = self.draw_app.shapes_at(point)
+        if not over_shape_list:
+            return ""
 
         try:
-            # if there is no shape under our click then deselect all shapes
-            # it will not work for 3rd method of click selection
             if not over_shape_list:
                 self.draw_app.selected = []
                 AppGeoEditor.draw_shape_idx = -1
@@ -4482,6 +4498,7 @@ class FCExplode(FCShapeTool):
 
         for shape in to_be_deleted_list:
             self.draw_app.storage.remove(shape)
+            self.draw_app.spatial_index.remove(shape)
             if shape in self.draw_app.selected:
                 self.draw_app.selected.remove(shape)
 
@@ -4563,13 +4580,10 @@ class FCMove(FCShapeTool):
             # self.select_shapes(point)
             # deselect all shapes
             self.draw_app.selected = []
-            for ____ in self.storage.get_objects():
-                try:
-                    __, closest_shape = self.storage.nearest(point)
-                    # select closes shape
-                    self.draw_app.selected.append(closest_shape)
-                except StopIteration:
-                    return ""
+            # select the closest shape
+            over_shape_list = self.draw_app.shapes_at(point)
+            if over_shape_list:
+                self.draw_app.selected.append(over_shape_list[0])
 
             if not self.draw_app.selected:
                 self.draw_app.app.inform.emit('[WARNING_NOTCL] %s %s' %
@@ -4674,15 +4688,10 @@ class FCMove(FCShapeTool):
 
     def select_shapes(self, pos):
         # list where we store the overlapped shapes under our mouse left click position
-        over_shape_list = []
-
-        try:
-            _, closest_shape = self.storage.nearest(pos)
-        except StopIteration:
+        over_shape_list = self.draw_app.shapes_at(pos)
+        if not over_shape_list:
             return ""
 
-        over_shape_list.append(closest_shape)
-
         try:
             # if there is no shape under our click then deselect all shapes
             # it will not work for 3rd method of click selection
@@ -4912,13 +4921,10 @@ class FCCopy(FCShapeTool):
             # self.select_shapes(point)
             # deselect all shapes
             self.draw_app.selected = []
-            for ____ in self.storage.get_objects():
-                try:
-                    __, closest_shape = self.storage.nearest(point)
-                    # select closes shape
-                    self.draw_app.selected.append(closest_shape)
-                except StopIteration:
-                    return ""
+            # select the closest shape
+            over_shape_list = self.draw_app.shapes_at(point)
+            if over_shape_list:
+                self.draw_app.selected.append(over_shape_list[0])
 
             if not self.draw_app.selected:
                 self.draw_app.app.inform.emit('[WARNING_NOTCL] %s %s' %
@@ -5199,15 +5205,10 @@ class FCCopy(FCShapeTool):
 
     def select_shapes(self, pos):
         # list where we store the overlapped shapes under our mouse left click position
-        over_shape_list = []
-
-        try:
-            _, closest_shape = self.storage.nearest(pos)
-        except StopIteration:
+        over_shape_list = self.draw_app.shapes_at(pos)
+        if not over_shape_list:
             return ""
 
-        over_shape_list.append(closest_shape)
-
         try:
             # if there is no shape under our click then deselect all shapes
             # it will not work for 3rd method of click selection
@@ -5598,12 +5599,10 @@ class FCSimplification(FCShapeTool):
             self.draw_app.app.ui.splitter.setSizes([1, 1])
 
     def click(self, point):
-        for ____ in self.storage.get_objects():
-            try:
-                __, closest_shape = self.storage.nearest(point)
-                self.draw_app.selected.append(closest_shape)
-            except StopIteration:
-                return ""
+        # select the closest shape
+        over_shape_list = self.draw_app.shapes_at(point)
+        if over_shape_list:
+            self.draw_app.selected.append(over_shape_list[0])
         self.draw_app.plot_all()
 
         last_sel_geo = self.draw_app.selected[-1].geo
@@ -5648,14 +5647,10 @@ class FCEraser(FCShapeTool):
         self.draw_app.app.jump_signal.connect(lambda x: self.draw_app.update_utility_geometry(data=x))
 
         if len(self.draw_app.get_selected()) == 0:
-            for ____ in self.storage.get_objects():
-                try:
-                    __, closest_shape = self.storage.nearest(point)
-                    self.draw_app.selected.append(closest_shape)
-                except StopIteration:
-                    if len(self.draw_app.selected) > 0:
-                        self.draw_app.app.inform.emit(_("Click to pick-up the erase shape..."))
-                    return ""
+            # select the closest shape
+            over_shape_list = self.draw_app.shapes_at(point)
+            if over_shape_list:
+                self.draw_app.selected.append(over_shape_list[0])
 
         if len(self.draw_app.get_selected()) == 0:
             return _("Nothing to erase.")
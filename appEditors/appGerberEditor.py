@@ -8,6 +8,8 @@
 from appEditors.grb_plugins.GrbCommon import DrawToolUtilityShape, DrawToolShape, DrawTool, ShapeToolEditorGrb
 
 from camlib import distance, arc, three_point_circle, flatten_shapely_geometry
+from appCommon.Arcs import arc_tolerance
+from appCommon.SpatialIndex import SpatialIndex
 from appGUI.GUIElements import *
 
 from appTool import AppTool
@@ -2228,6 +2230,8 @@ class DiscSemiEditorGrb(ShapeToolEditorGrb):
             self.storage_obj = self.draw_app.storage_dict[0]['geometry']
 
         self.steps_per_circ = self.draw_app.app.options["gerber_circle_steps"]
+        # the arc segments are chosen by the chord error, if it is set in Preferences
+        self.arc_tol = arc_tolerance(self.draw_app.app, self.draw_app.app.app_units)
         self.draw_app.app.jump_signal.connect(lambda x: self.draw_app.update_utility_geometry(data=x))
 
     def click(self, point):
@@ -2310,7 +2314,8 @@ class DiscSemiEditorGrb(ShapeToolEditorGrb):
                 stopangle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
 
                 new_geo_el['solid'] = LineString(
-                    arc(center, radius, startangle, stopangle, self.direction, self.steps_per_circ))
+                    arc(center, radius, startangle, stopangle, self.direction, self.steps_per_circ,
+                        tolerance=self.arc_tol))
                 new_geo_el_pt1['solid'] = Point(center)
                 return DrawToolUtilityShape([new_geo_el, new_geo_el_pt1])
 
@@ -2331,7 +2336,7 @@ class DiscSemiEditorGrb(ShapeToolEditorGrb):
                 stopangle = np.arctan2(p3[1] - center[1], p3[0] - center[0])
 
                 new_geo_el['solid'] = LineString(
-                    arc(center, radius, startangle, stopangle, direction, self.steps_per_circ))
+                    arc(center, radius, startangle, stopangle, direction, self.steps_per_circ, tolerance=self.arc_tol))
                 new_geo_el_pt2['solid'] = Point(center)
                 new_geo_el_pt1['solid'] = Point(p1)
                 new_geo_el_pt3['solid'] = Point(p3)
@@ -2367,7 +2372,8 @@ class DiscSemiEditorGrb(ShapeToolEditorGrb):
                 stopangle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
 
                 new_geo_el['solid'] = LineString(
-                    arc(center, radius, startangle, stopangle, self.direction, self.steps_per_circ))
+                    arc(center, radius, startangle, stopangle, self.direction, self.steps_per_circ,
+                        tolerance=self.arc_tol))
                 new_geo_el_pt2['solid'] = Point(center)
 
                 return DrawToolUtilityShape([new_geo_el, new_geo_el_pt2])
@@ -2387,9 +2393,11 @@ class DiscSemiEditorGrb(ShapeToolEditorGrb):
             start_angle = np.arctan2(p1[1] - center[1], p1[0] - center[0])
             stop_angle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
             new_geo_el['solid'] = Polygon(
-                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ))
+                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ,
+                    tolerance=self.arc_tol))
             new_geo_el['follow'] = Polygon(
-                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ)).exterior
+                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ,
+                    tolerance=self.arc_tol)).exterior
             self.geometry = DrawToolShape(new_geo_el)
 
         elif self.mode == '132':
@@ -2404,9 +2412,11 @@ class DiscSemiEditorGrb(ShapeToolEditorGrb):
             start_angle = np.arctan2(p1[1] - center[1], p1[0] - center[0])
             stop_angle = np.arctan2(p3[1] - center[1], p3[0] - center[0])
 
-            new_geo_el['solid'] = Polygon(arc(center, radius, start_angle, stop_angle, direction, self.steps_per_circ))
+            new_geo_el['solid'] = Polygon(arc(center, radius, start_angle, stop_angle, direction, self.steps_per_circ,
+                                              tolerance=self.arc_tol))
             new_geo_el['follow'] = Polygon(
-                arc(center, radius, start_angle, stop_angle, direction, self.steps_per_circ)).exterior
+                arc(center, radius, start_angle, stop_angle, direction, self.steps_per_circ,
+                    tolerance=self.arc_tol)).exterior
             self.geometry = DrawToolShape(new_geo_el)
 
         else:  # self.mode == '12c'
@@ -2440,9 +2450,11 @@ class DiscSemiEditorGrb(ShapeToolEditorGrb):
             stop_angle = np.arctan2(p2[1] - center[1], p2[0] - center[0])
 
             new_geo_el['solid'] = Polygon(
-                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ))
+                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ,
+                    tolerance=self.arc_tol))
             new_geo_el['follow'] = Polygon(
-                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ)).exterior
+                arc(center, radius, start_angle, stop_angle, self.direction, self.steps_per_circ,
+                    tolerance=self.arc_tol)).exterior
             self.geometry = DrawToolShape(new_geo_el)
 
         self.draw_app.in_action = False
@@ -3199,9 +3211,6 @@ class SelectEditorGrb(QtCore.QObject, DrawTool):
         # here store the selected apertures
         self.sel_aperture = set()
 
-        # multiprocessing results
-        self.results = []
-
         try:
             self.draw_app.ui.apertures_table.clearSelection()
         except Exception as e:
@@ -3275,42 +3284,14 @@ class SelectEditorGrb(QtCore.QObject, DrawTool):
 
     def selection_worker(self, point):
         def job_thread(editor_obj):
-            self.results = []
             with editor_obj.app.proc_container.new('%s...' % _("Working")):
-
-                def divide_chunks(lst, n):
-                    # looping till length of lst
-                    for i in range(0, len(lst), n):
-                        yield lst[i:i + n]
-
-                # divide in chunks of 77 elements
-                n_chunks = 77
-
-                for ap_key, storage_val in editor_obj.storage_dict.items():
-                    # divide in chunks of 77 elements
-                    geo_list = list(divide_chunks(storage_val['geometry'], n_chunks))
-                    for chunk, list30 in enumerate(geo_list):
-                        self.results.append(
-                            editor_obj.pool.apply_async(
-                                self.check_intersection, args=(ap_key, chunk, list30, point))
-                        )
-
-                output = []
-                for p in self.results:
-                    output.append(p.get())
-
-                for ret_val in output:
-                    if ret_val:
-                        k = ret_val[0]
-                        part = ret_val[1]
-                        idx = ret_val[2] + (part * n_chunks)
-                        shape_stored = editor_obj.storage_dict[k]['geometry'][idx]
-
-                        if shape_stored in editor_obj.selected:
-                            editor_obj.selected.remove(shape_stored)
-                        else:
-                            # add the object to the selected shapes
-                            editor_obj.selected.append(shape_stored)
+                # the shapes under the click, found with the spatial index
+                for shape_stored in editor_obj.spatial_index.at_point(point):
+                    if shape_stored in editor_obj.selected:
+                        editor_obj.selected.remove(shape_stored)
+                    else:
+                        # add the object to the selected shapes
+                        editor_obj.selected.append(shape_stored)
 
                 self.draw_app.update_ui_sig.emit()
 
@@ -3318,14 +3299,6 @@ class SelectEditorGrb(QtCore.QObject, DrawTool):
 
         self.draw_app.app.worker_task.emit({'fcn': job_thread, 'params': [self.draw_app]})
 
-    @staticmethod
-    def check_intersection(ap_key, chunk, geo_storage, point):
-        for idx, shape_stored in enumerate(geo_storage):
-            if 'solid' in shape_stored.geo:
-                geometric_data = shape_stored.geo['solid']
-                if Point(point).intersects(geometric_data):
-                    return ap_key, chunk, idx
-
     def after_selection(self):
         # ######################################################################################################
         # select the aperture in the Apertures Table that is associated with the selected shape
@@ -3334,6 +3307,10 @@ class SelectEditorGrb(QtCore.QObject, DrawTool):
         self.draw_app.ui.apertures_table.clearSelection()
 
         for shape_s in self.draw_app.selected:
+            ap_code = self.draw_app.spatial_index.tag(shape_s)
+            if ap_code is not None:
+                self.sel_aperture.add(ap_code)
+                continue
             for storage in self.draw_app.storage_dict:
                 if shape_s in self.draw_app.storage_dict[storage]['geometry']:
                     self.sel_aperture.add(storage)
@@ -3905,6 +3882,10 @@ class AppGerberEditor(QtCore.QObject):
         self.storage_dict = {}
         self.current_storage = []
 
+        # spatial queries on the shapes of all the apertures: snapping, click selection and area selection
+        # the tag of each shape is the aperture code of its storage
+        self.spatial_index = SpatialIndex(get_geometry=lambda shape: shape.geo.get('solid'))
+
         self.sorted_apcode = []
 
         self.new_apertures = {}
@@ -4834,6 +4815,7 @@ class AppGerberEditor(QtCore.QObject):
 
         # init working objects
         self.storage_dict = {}
+        self.spatial_index.clear()
         self.current_storage = []
         self.sorted_apcode = []
         self.new_apertures = {}
@@ -5090,6 +5072,7 @@ class AppGerberEditor(QtCore.QObject):
         self.active_tool = None
         self.selected = []
         self.storage_dict.clear()
+        self.spatial_index.clear()
         self.results.clear()
 
         self.shapes.clear(update=True)
@@ -5740,6 +5723,28 @@ class AppGerberEditor(QtCore.QObject):
             self.utility.append(shape_element)
         else:
             storage.append(shape_element)
+            self.spatial_index.insert(shape_element, tag=self.storage_aperture(storage))
+
+    def storage_aperture(self, storage):
+        """
+        :param storage: a list of shapes, the 'geometry' of an aperture in the self.storage_dict
+        :type storage:  list
+        :return:        the aperture code of the storage or None if the storage is not found
+        """
+        for ap_code, ap_val in self.storage_dict.items():
+            if ap_val.get('geometry') is storage:
+                return ap_code
+        return None
+
+    def sync_spatial_index(self):
+        """
+        Updates the spatial index with the changes made directly in the storages of the apertures (shapes added,
+        removed, replaced or moved to another aperture).
+
+        :return:    None
+        """
+        self.spatial_index.sync(
+            (elem, ap_code) for ap_code, ap_val in self.storage_dict.items() for elem in ap_val.get('geometry', []))
 
     def on_canvas_click(self, event):
         """
@@ -5753,7 +5758,7 @@ class AppGerberEditor(QtCore.QObject):
         self.pos = self.canvas.translate_coords(event_pos)
 
         if self.app.grid_status():
-            self.pos = self.app.geo_editor.snap(self.pos[0], self.pos[1])
+            self.pos = self.app.geo_editor.snap(self.pos[0], self.pos[1], spatial_index=self.spatial_index)
         else:
             self.pos = (self.pos[0], self.pos[1])
 
@@ -5775,7 +5780,8 @@ class AppGerberEditor(QtCore.QObject):
                     return
 
                 # Dispatch event to active_tool
-                self.active_tool.click(self.app.geo_editor.snap(self.pos[0], self.pos[1]))
+                self.active_tool.click(
+                    self.app.geo_editor.snap(self.pos[0], self.pos[1], spatial_index=self.spatial_index))
 
                 # If it is a shape generating tool
                 if isinstance(self.active_tool, ShapeToolEditorGrb) and self.active_tool.complete:
@@ -5819,7 +5825,7 @@ class AppGerberEditor(QtCore.QObject):
 
         pos_canvas = self.canvas.translate_coords(event_pos)
         if self.app.grid_status():
-            pos = self.app.geo_editor.snap(pos_canvas[0], pos_canvas[1])
+            pos = self.app.geo_editor.snap(pos_canvas[0], pos_canvas[1], spatial_index=self.spatial_index)
         else:
             pos = (pos_canvas[0], pos_canvas[1])
 
@@ -5852,7 +5858,8 @@ class AppGerberEditor(QtCore.QObject):
                             if isinstance(self.active_tool, TrackEditorGrb):
                                 self.active_tool.make()
                             else:
-                                self.active_tool.click(self.app.geo_editor.snap(self.x, self.y))
+                                self.active_tool.click(
+                                    self.app.geo_editor.snap(self.x, self.y, spatial_index=self.spatial_index))
                                 self.active_tool.make()
 
                             if self.active_tool.complete:
@@ -5906,28 +5913,28 @@ class AppGerberEditor(QtCore.QObject):
         :return:
         """
 
-        poly_selection = Polygon([start_pos, (end_pos[0], start_pos[1]), end_pos, (start_pos[0], end_pos[1])])
         sel_aperture = set()
         self.ui.apertures_table.clearSelection()
         self.app.delete_selection_shape()
 
-        for storage in self.storage_dict:
-            for obj in self.storage_dict[storage]['geometry']:
-                if 'solid' in obj.geo:
-                    geometric_data = obj.geo['solid']
-                    if (sel_type is True and poly_selection.contains(geometric_data)) or \
-                            (sel_type is False and poly_selection.intersects(geometric_data)):
-                        if self.key == self.app.options["global_mselect_key"]:
-                            if obj in self.selected:
-                                self.selected.remove(obj)
-                            else:
-                                # add the object to the selected shapes
-                                self.selected.append(obj)
-                                sel_aperture.add(storage)
-                        else:
-                            if obj not in self.selected:
-                                self.selected.append(obj)
-                                sel_aperture.add(storage)
+        if sel_type is None:
+            sel_objects_list = []
+        else:
+            sel_objects_list = self.spatial_index.in_rectangle(start_pos, end_pos, contained=sel_type is True)
+
+        for obj in sel_objects_list:
+            storage = self.spatial_index.tag(obj)
+            if self.key == self.app.options["global_mselect_key"]:
+                if obj in self.selected:
+                    self.selected.remove(obj)
+                else:
+                    # add the object to the selected shapes
+                    self.selected.append(obj)
+                    sel_aperture.add(storage)
+            else:
+                if obj not in self.selected:
+                    self.selected.append(obj)
+                    sel_aperture.add(storage)
 
         # #############################################################################################################
         # ##########  select the aperture code of the selected geometry, in the tool table  ###########################
@@ -6027,7 +6034,7 @@ class AppGerberEditor(QtCore.QObject):
 
         # # ## Snap coordinates
         if self.app.grid_status():
-            x, y = self.app.geo_editor.snap(x, y)
+            x, y = self.app.geo_editor.snap(x, y, spatial_index=self.spatial_index)
 
             # Update cursor
             self.app.app_cursor.set_data(np.asarray([(x, y)]), symbol='++', edge_color=self.app.plotcanvas.cursor_color,
@@ -6150,6 +6157,9 @@ class AppGerberEditor(QtCore.QObject):
         with self.app.proc_container.new('%s ...' % _("Plotting")):
             self.shapes.clear(update=True)
 
+            # the storages of the apertures are changed in many places, bring the spatial index up to date
+            self.sync_spatial_index()
+
             if len(self.get_sel_color()) == 7:
                 sel_draw_color = self.get_sel_color() + 'FF'
             else:
@@ -6354,6 +6364,7 @@ class AppGerberEditor(QtCore.QObject):
                     self.storage_dict[storage]['geometry'].remove(geo_el)
             except KeyError:
                 pass
+        self.spatial_index.remove(geo_el)
         if geo_el in self.selected:
             self.selected.remove(geo_el)
 
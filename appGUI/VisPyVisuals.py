@@ -10,11 +10,18 @@ from vispy.visuals import CompoundVisual, LineVisual, MeshVisual, TextVisual, Ma
 from vispy.scene.visuals import VisualNode, generate_docstring, visuals
 from vispy.gloo import set_state
 from vispy.color import Color
+import shapely
 from shapely import Polygon, LineString, LinearRing
+from collections import OrderedDict
+import hashlib
 import threading
 import numpy as np
 from appGUI.VisPyTesselators import GLUTess
 
+import logging
+
+log = logging.getLogger('base')
+
 
 # class FlatCAMLineVisual(LineVisual):
 #     def __init__(self, pos=None, color=(0.5, 0.5, 0.5, 1), width=1, connect='strip', method='gl', antialias=False):
@@ -28,6 +35,177 @@ from appGUI.VisPyTesselators import GLUTess
 #         self.update()
 
 
+class TessellationCache:
+    """
+    Cache of the shape buffers made by _update_shape_buffers(), so the shapes whose geometry did not change are not
+    simplified and triangulated again when they are plotted again (color change, visibility toggle, selection).
+
+    The key is made from a hash of the geometry WKB, the simplification tolerance and the triangulation mode (the
+    triangulation engine and if the faces and the edges are used). The values are tuples of read-only NumPy arrays:
+    (mesh vertices (N, 2) float32, mesh triangles (K,) uint32, line points (M, 2) float32).
+
+    The least recently used entries are evicted when the memory used by the arrays is over the memory budget.
+    """
+
+    # Approximate memory used by an entry, besides its arrays
+    entry_overhead = 300
+
+    def __init__(self, max_memory=256 * 1024 * 1024):
+        """
+
+        :param max_memory:  Memory budget for the cached arrays, in bytes
+        :type max_memory:   int
+        """
+        self.max_memory = max_memory
+
+        self._entries = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._logged_stats = None
+
+    @staticmethod
+    def make_key(geometry, tolerance, triangulation, faces, edges):
+        """
+        :param geometry:        Shapely geometry
+        :param tolerance:       Simplification tolerance
+        :param triangulation:   Triangulation engine
+        :param faces:           If the polygon faces are triangulated (the shape has a face color)
+        :param edges:           If the shape edges are made (the shape has a line color)
+        :return:                The cache key or None if the geometry is None or empty
+        :rtype:                 tuple | None
+        """
+        if geometry is None or geometry.is_empty:
+            return None
+        geo_hash = hashlib.blake2b(shapely.to_wkb(geometry), digest_size=16).digest()
+        return geo_hash, tolerance, triangulation, bool(faces), bool(edges)
+
+    def get(self, key):
+        """
+        :param key:     Key made by make_key()
+        :return:        The cached buffers or None if they are not in the cache
+        :rtype:         tuple | None
+        """
+        if key is None:
+            return None
+
+        with self._lock:
+            buffers = self._entries.get(key)
+            if buffers is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return buffers
+
+    def put(self, key, buffers):
+        """
+        Adds buffers to the cache and evicts the least recently used ones if the memory budget is exceeded.
+
+        :param key:     Key made by make_key()
+        :param buffers: Tuple of NumPy arrays
+        :return:        None
+        """
+        if key is None:
+            return
+
+        size = self.entry_overhead + sum(arr.nbytes for arr in buffers)
+        if size > self.max_memory:
+            return
+
+        for arr in buffers:
+            arr.flags.writeable = False
+
+        with self._lock:
+            old_buffers = self._entries.pop(key, None)
+            if old_buffers is not None:
+                self._memory -= self.entry_overhead + sum(arr.nbytes for arr in old_buffers)
+
+            self._entries[key] = buffers
+            self._memory += size
+
+            while self._memory > self.max_memory and self._entries:
+                __, evicted = self._entries.popitem(last=False)
+                self._memory -= self.entry_overhead + sum(arr.nbytes for arr in evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._memory = 0
+
+    def log_stats(self):
+        """
+        Logs the cache counters, if they changed since the last time they were logged.
+        """
+        stats = (self.hits, self.misses, self.evictions, len(self._entries))
+        if stats == self._logged_stats:
+            return
+        self._logged_stats = stats
+        log.debug("VisPyVisuals tessellation cache -> hits: %d, misses: %d, evictions: %d, entries: %d, "
+                  "memory: %.1f MB" % (self.hits, self.misses, self.evictions, len(self._entries),
+                                       self._memory / 1048576.0))
+
+
+# Shared by all the shape collections such that the shapes are found in the cache when they are plotted again by a
+# new collection
+tessellation_cache = TessellationCache()
+
+
+def _tessellate(geo, tolerance, triangulation='glu', faces=True, edges=True):
+    """
+    Simplifies and triangulates Shapely geometry.
+
+    :param geo:             Shapely geometry: LineString, LinearRing or Polygon; other types are not drawn
+    :param tolerance:       Simplification tolerance
+    :param triangulation:   Triangulation engine
+    :param faces:           If True the polygon faces are triangulated
+    :param edges:           If True the line segments of the polygon edges are made
+    :return:                mesh vertices (N, 2) float32, mesh triangles (K,) uint32, line points (M, 2) float32
+    :rtype:                 tuple
+    """
+    tri_pts = np.empty((0, 2), dtype=np.float32)                    # Mesh vertices
+    tri_tris = np.empty(0, dtype=np.uint32)                         # Mesh faces
+    pts = np.empty((0, 2), dtype=np.float32)                        # Shape line points
+
+    if geo is None or geo.is_empty:
+        return tri_pts, tri_tris, pts
+
+    simplified_geo = geo.simplify(tolerance) if tolerance else geo      # Simplified shape
+
+    if type(geo) == LineString:
+        # Prepare lines
+        pts = _linestring_to_segments(simplified_geo.coords)
+
+    elif type(geo) == LinearRing:
+        # Prepare lines
+        pts = _linearring_to_segments(simplified_geo.coords)
+
+    elif type(geo) == Polygon:
+        # Prepare polygon faces
+        if faces:
+            if triangulation == 'glu':
+                gt = GLUTess()
+                tris, tess_pts = gt.triangulate(simplified_geo)
+                if len(tris) > 0 and len(tess_pts) > 0:
+                    tri_tris = np.asarray(tris, dtype=np.uint32)
+                    tri_pts = np.asarray(tess_pts, dtype=np.float32)[:, :2]
+            else:
+                print("Triangulation type '%s' isn't implemented. Drawing only edges." % triangulation)
+
+        # Prepare polygon edges
+        if edges:
+            pts = np.concatenate(
+                [_linearring_to_segments(simplified_geo.exterior.coords)] +
+                [_linearring_to_segments(ints.coords) for ints in simplified_geo.interiors]
+            )
+
+    return tri_pts, tri_tris, pts
+
+
 def _update_shape_buffers(data, triangulation='glu'):
     """
     Translates Shapely geometry to internal buffers for speedup redraws
@@ -36,64 +214,10 @@ def _update_shape_buffers(data, triangulation='glu'):
     :param triangulation: str
         Triangulation engine
     """
-    mesh_vertices = []                                              # Vertices for mesh
-    mesh_tris = []                                                  # Faces for mesh
-    mesh_colors = []                                                # Face colors
-    line_pts = []                                                   # Vertices for line
-    line_colors = []                                                # Line color
-
     geo, color, face_color, tolerance = data['geometry'], data['color'], data['face_color'], data['tolerance']
 
-    if geo is not None and not geo.is_empty:
-        simplified_geo = geo.simplify(tolerance) if tolerance else geo      # Simplified shape
-        pts = []                                                            # Shape line points
-        tri_pts = []                                                        # Mesh vertices
-        tri_tris = []                                                       # Mesh faces
-
-        if type(geo) == LineString:
-            # Prepare lines
-            pts = _linestring_to_segments(simplified_geo.coords)
-
-        elif type(geo) == LinearRing:
-            # Prepare lines
-            pts = _linearring_to_segments(simplified_geo.coords)
-
-        elif type(geo) == Polygon:
-            # Prepare polygon faces
-            if face_color is not None:
-                if triangulation == 'glu':
-                    gt = GLUTess()
-                    tri_tris, tri_pts = gt.triangulate(simplified_geo)
-                else:
-                    print("Triangulation type '%s' isn't implemented. Drawing only edges." % triangulation)
-
-            # Prepare polygon edges
-            if color is not None:
-                pts = _linearring_to_segments(simplified_geo.exterior.coords)
-                for ints in simplified_geo.interiors:
-                    pts += _linearring_to_segments(ints.coords)
-
-        # Appending data for mesh
-        if len(tri_pts) > 0 and len(tri_tris) > 0:
-            mesh_tris += tri_tris
-            mesh_vertices += tri_pts
-            face_color_rgba = Color(face_color).rgba
-            # mesh_colors += [face_color_rgba] * (len(tri_tris) // 3)
-            mesh_colors += [face_color_rgba for __ in range(len(tri_tris) // 3)]
-
-        # Appending data for line
-        if len(pts) > 0:
-            line_pts += pts
-            colo_rgba = Color(color).rgba
-            # line_colors += [colo_rgba] * len(pts)
-            line_colors += [colo_rgba for __ in range(len(pts))]
-
-    # Store buffers
-    data['line_pts'] = line_pts
-    data['line_colors'] = line_colors
-    data['mesh_vertices'] = mesh_vertices
-    data['mesh_tris'] = mesh_tris
-    data['mesh_colors'] = mesh_colors
+    buffers = _tessellate(geo, tolerance, triangulation, faces=face_color is not None, edges=color is not None)
+    _set_shape_buffers(data, buffers)
 
     # Clear shapely geometry
     del data['geometry']
@@ -101,6 +225,45 @@ def _update_shape_buffers(data, triangulation='glu'):
     return data
 
 
+def _set_shape_buffers(data, buffers):
+    """
+    Stores the buffers made by _tessellate() in the shape data and makes the color buffers
+    :param data: dict
+        Shape data
+    :param buffers: tuple
+        Mesh vertices, mesh triangles and line points
+    """
+    mesh_vertices, mesh_tris, line_pts = buffers
+
+    data['mesh_vertices'] = mesh_vertices                           # Vertices for mesh
+    data['mesh_tris'] = mesh_tris                                   # Faces for mesh
+    data['line_pts'] = line_pts                                     # Vertices for line
+
+    if len(mesh_vertices) > 0 and len(mesh_tris) > 0:
+        data['mesh_colors'] = _color_buffer(data['face_color'], len(mesh_tris) // 3)
+    else:
+        data['mesh_colors'] = _color_buffer(None, 0)
+
+    if len(line_pts) > 0:
+        data['line_colors'] = _color_buffer(data['color'], len(line_pts))
+    else:
+        data['line_colors'] = _color_buffer(None, 0)
+
+
+def _color_buffer(color, length):
+    """
+    :param color: str, tuple
+        Color
+    :param length: int
+        Number of items to color
+    :return: numpy.array
+        Array of (length, 4) RGBA colors
+    """
+    if length == 0:
+        return np.empty((0, 4), dtype=np.float32)
+    return np.tile(np.asarray(Color(color).rgba, dtype=np.float32), (length, 1))
+
+
 def _linearring_to_segments(arr):
     # Close linear ring
     """
@@ -110,8 +273,9 @@ def _linearring_to_segments(arr):
     :return: numpy.array
         Line segments
     """
-    if arr[0] != arr[-1]:
-        arr.append(arr[0])
+    arr = _coords_array(arr)
+    if len(arr) > 0 and (arr[0] != arr[-1]).any():
+        arr = np.vstack((arr, arr[:1]))
 
     return _linestring_to_segments(arr)
 
@@ -124,7 +288,97 @@ def _linestring_to_segments(arr):
     :return: numpy.array
         Line segments
     """
-    return [arr[i // 2] for i in range(0, len(arr) * 2)][1:-1]
+    return np.repeat(_coords_array(arr), 2, axis=0)[1:-1]
+
+
+def _coords_array(arr):
+    """
+    :param arr: Shapely coordinates sequence or array of vertices
+    :return: numpy.array
+        Array of (N, 2) float32 vertices
+    """
+    arr = np.asarray(arr, dtype=np.float32)
+    if arr.ndim != 2:
+        return np.empty((0, 2), dtype=np.float32)
+    return arr[:, :2]
+
+
+def _path_buffers(lines, width, steps=16):
+    """
+    Makes the buffers of lines drawn with a width, directly from their coordinates: a quad (two triangles) for each
+    segment and a disc at each vertex, for the round joins and ends. The lines are not buffered or triangulated.
+
+    :param lines:   Sequence of LineStrings
+    :param width:   Width of the lines
+    :param steps:   Number of vertices of the discs
+    :return:        mesh vertices (N, 2) float32, mesh triangles (K,) uint32, line points (M, 2) float32; the line
+                    points are the segments of the lines
+    :rtype:         tuple
+    """
+    coords, index = shapely.get_coordinates(lines, return_index=True)
+    if len(coords) == 0:
+        return np.empty((0, 2), dtype=np.float32), np.empty(0, dtype=np.uint32), np.empty((0, 2), dtype=np.float32)
+
+    # the segments are made by the consecutive vertices of the same line
+    same_line = index[1:] == index[:-1]
+    start = coords[:-1][same_line]
+    stop = coords[1:][same_line]
+
+    line_pts = np.empty((2 * len(start), 2), dtype=np.float32)
+    line_pts[0::2] = start
+    line_pts[1::2] = stop
+
+    radius = width / 2.0
+
+    # quads
+    direction = stop - start
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    normal = np.zeros_like(direction)
+    np.divide(np.column_stack((-direction[:, 1], direction[:, 0])), length[:, None], out=normal,
+              where=length[:, None] > 0)
+    normal *= radius
+    quad_vertices = np.stack((start + normal, start - normal, stop + normal, stop - normal), axis=1).reshape(-1, 2)
+    quad_tris = (4 * np.arange(len(start), dtype=np.uint32))[:, None] + np.array([0, 1, 2, 2, 1, 3], dtype=np.uint32)
+
+    # discs made as triangle fans
+    centers = np.unique(coords, axis=0)
+    angles = np.linspace(0, 2 * np.pi, steps, endpoint=False)
+    circle = radius * np.column_stack((np.cos(angles), np.sin(angles)))
+    disc_vertices = (centers[:, None, :] + circle[None, :, :]).reshape(-1, 2)
+    fan = np.column_stack((np.zeros(steps - 2), np.arange(1, steps - 1), np.arange(2, steps))).astype(np.uint32)
+    disc_tris = (len(quad_vertices) + steps * np.arange(len(centers), dtype=np.uint32))[:, None] + fan.ravel()
+
+    mesh_vertices = np.concatenate((quad_vertices, disc_vertices)).astype(np.float32)
+    mesh_tris = np.concatenate((quad_tris.ravel(), disc_tris.ravel())).astype(np.uint32)
+    return mesh_vertices, mesh_tris, line_pts
+
+
+def _convex_ring_buffers(rings):
+    """
+    Makes the buffers of closed convex rings (e.g. the drill holes) drawn filled, directly from their coordinates:
+    each ring face is a triangle fan from its first vertex.
+
+    :param rings:   Sequence of LinearRings or closed LineStrings
+    :return:        mesh vertices (N, 2) float32, mesh triangles (K,) uint32, line points (M, 2) float32
+    :rtype:         tuple
+    """
+    coords, index = shapely.get_coordinates(rings, return_index=True)
+    if len(coords) == 0:
+        return np.empty((0, 2), dtype=np.float32), np.empty(0, dtype=np.uint32), np.empty((0, 2), dtype=np.float32)
+
+    same_ring = index[1:] == index[:-1]
+    line_pts = np.empty((2 * np.count_nonzero(same_ring), 2), dtype=np.float32)
+    line_pts[0::2] = coords[:-1][same_ring]
+    line_pts[1::2] = coords[1:][same_ring]
+
+    counts = np.bincount(index)
+    ring_start = (np.cumsum(counts) - counts)[index]
+    vertex = np.arange(len(coords))
+    # a triangle for each vertex that is not the first of its ring and is not followed by the ring end
+    mask = (vertex > ring_start) & (vertex + 1 < ring_start + counts[index])
+    mesh_tris = np.column_stack((ring_start[mask], vertex[mask], vertex[mask] + 1)).astype(np.uint32).ravel()
+
+    return coords.astype(np.float32), mesh_tris, line_pts
 
 
 class ShapeGroup(object):
@@ -150,6 +404,16 @@ class ShapeGroup(object):
         self._indexes.append(key)
         return key
 
+    def add_paths(self, **kwargs):
+        """
+        Adds lines drawn with a width to collection and store index in group
+        :param kwargs: keyword arguments
+            Arguments for ShapeCollection.add_paths function
+        """
+        key = self._collection.add_paths(**kwargs)
+        self._indexes.append(key)
+        return key
+
     def remove(self, idx, update=False):
         self._indexes.remove(idx)
         self._collection.remove(idx, False)
@@ -246,6 +510,10 @@ class ShapeCollectionVisual(CompoundVisual):
         """
         self.fc_options = fcoptions
 
+        if self.fc_options and "global_graphic_engine_tess_cache" in self.fc_options:
+            # the memory budget is set in MB
+            tessellation_cache.max_memory = int(self.fc_options["global_graphic_engine_tess_cache"]) * 1048576
+
         self.data = {}
         self.last_key = -1
 
@@ -325,26 +593,113 @@ class ShapeCollectionVisual(CompoundVisual):
             'mesh_tris': [],        # Faces for mesh
             'mesh_colors': [],      # Face colors
             'line_pts': [],         # Vertices for line
-            'line_colors': []       # Line colors
+            'line_colors': [],      # Line colors
+            # key of the shape buffers in the tessellation cache
+            'tess_key': TessellationCache.make_key(shape, tolerance, 'glu', face_color is not None, color is not None)
         }
 
         if linewidth:
             self._line_width = linewidth
 
-        if self.fc_options and self.fc_options["global_graphic_engine_3d_no_mp"] is True:
+        # the geometry is the same as one already plotted: no need for simplification and triangulation
+        buffers = tessellation_cache.get(self.data[key]['tess_key'])
+        if buffers is not None:
+            _set_shape_buffers(self.data[key], buffers)
+            del self.data[key]['geometry']
+        elif self.fc_options and self.fc_options["global_graphic_engine_3d_no_mp"] is True:
             self.data[key] = _update_shape_buffers(self.data[key])
+            self._cache_shape_buffers(self.data[key])
         else:
             # Add data to process pool if pool exists
             try:
                 self.results[key] = self.pool.map_async(_update_shape_buffers, [self.data[key]])
             except Exception:
                 self.data[key] = _update_shape_buffers(self.data[key])
+                self._cache_shape_buffers(self.data[key])
 
         if update:
             self.redraw()   # redraw() waits for pool process end
 
         return key
 
+    def add_paths(self, lines=None, rings=None, width=0.0, color=None, face_color=None, visible=True, update=False,
+                  layer=1):
+        """
+        Adds many lines drawn with a width and many filled convex rings to collection, as one shape. The buffers are
+        made at once from the coordinates (see _path_buffers()), the geometry is not buffered, simplified or
+        triangulated; it is used to plot a lot of tool paths fast
+        :param lines: list
+            LineStrings drawn with the width
+        :param rings: list
+            Closed convex rings drawn filled
+        :param width: float
+            Width of the lines
+        :param color: str, tuple
+            Line/edge color
+        :param face_color: str, tuple
+            Face color
+        :param visible: bool
+            Shape visibility
+        :param update: bool
+            Set True to redraw collection
+        :param layer: int
+            Layer number. 0 - lowest.
+        :return: int
+            Index of shape
+        """
+        # Get new key
+        self.key_lock.acquire(True)
+        self.last_key += 1
+        key = self.last_key
+        self.key_lock.release()
+
+        all_buffers = []
+        if lines is not None and len(lines) > 0:
+            all_buffers.append(_path_buffers(lines, width))
+        if rings is not None and len(rings) > 0:
+            all_buffers.append(_convex_ring_buffers(rings))
+
+        mesh_vertices = [np.empty((0, 2), dtype=np.float32)]
+        mesh_tris = [np.empty(0, dtype=np.uint32)]
+        line_pts = [np.empty((0, 2), dtype=np.float32)]
+        offset = 0
+        for vertices, tris, pts in all_buffers:
+            mesh_vertices.append(vertices)
+            mesh_tris.append(tris + np.uint32(offset))
+            line_pts.append(pts)
+            offset += len(vertices)
+
+        if face_color is None:
+            mesh_tris = [np.empty(0, dtype=np.uint32)]
+        if color is None:
+            line_pts = [np.empty((0, 2), dtype=np.float32)]
+
+        self.data[key] = {
+            'color': color,
+            'alpha': None,
+            'face_color': face_color,
+            'visible': visible,
+            'layer': layer,
+            'tolerance': None,
+            'tess_key': None
+        }
+        _set_shape_buffers(self.data[key], (np.concatenate(mesh_vertices), np.concatenate(mesh_tris),
+                                            np.concatenate(line_pts)))
+
+        if update:
+            self.redraw()
+
+        return key
+
+    @staticmethod
+    def _cache_shape_buffers(data):
+        """
+        Adds the buffers of a translated shape to the tessellation cache
+        :param data: dict
+            Shape data, as returned by _update_shape_buffers()
+        """
+        tessellation_cache.put(data.get('tess_key'), (data['mesh_vertices'], data['mesh_tris'], data['line_pts']))
+
     def remove(self, key, update=False):
         """
         Removes shape from collection
@@ -399,18 +754,10 @@ class ShapeCollectionVisual(CompoundVisual):
 
         # if a new color is empty string then make it None so it will not be updated
         # if a new color is valid then transform it here in a format palatable
-        mesh_color_rgba = None
-        line_color_rgba = None
-        if new_mesh_color:
-            if new_mesh_color != '':
-                mesh_color_rgba = Color(new_mesh_color).rgba
-            else:
-                new_mesh_color = None
-        if new_line_color:
-            if new_line_color != '':
-                line_color_rgba = Color(new_line_color).rgba
-            else:
-                new_line_color = None
+        if new_mesh_color == '':
+            new_mesh_color = None
+        if new_line_color == '':
+            new_line_color = None
 
         mesh_colors = [[] for _ in range(0, len(self._meshes))]     # Face colors
         line_colors = [[] for _ in range(0, len(self._meshes))]     # Line colors
@@ -420,95 +767,66 @@ class ShapeCollectionVisual(CompoundVisual):
         self.update_lock.acquire(True)
         # Merge shapes buffers
 
-        if indexes is None:
-            for k, data in list(self.data.items()):
-                if data['visible'] and 'line_pts' in data:
-                    if new_mesh_color and new_mesh_color != '':
-                        dim_mesh_tris = (len(data['mesh_tris']) // 3)
-                        if dim_mesh_tris != 0:
-                            try:
-                                mesh_colors[data['layer']] += [mesh_color_rgba] * dim_mesh_tris
-                                self.data[k]['face_color'] = new_mesh_color
-
-                                data['mesh_colors'] = [mesh_color_rgba for __ in range(len(data['mesh_colors']))]
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create mesh colors --> Data error. %s" % str(e))
-
-                    if new_line_color and new_line_color != '':
-                        dim_line_pts = (len(data['line_pts']))
-                        if dim_line_pts != 0:
-                            try:
-                                line_pts[data['layer']] += data['line_pts']
-                                line_colors[data['layer']] += [line_color_rgba] * dim_line_pts
-                                self.data[k]['color'] = new_line_color
-
-                                data['line_colors'] = [mesh_color_rgba for __ in range(len(data['line_colors']))]
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create line colors --> Data error. %s" % str(e))
-        else:
-            for k, data in list(self.data.items()):
-                if data['visible'] and 'line_pts' in data:
-                    dim_mesh_tris = (len(data['mesh_tris']) // 3)
-                    dim_line_pts = (len(data['line_pts']))
-
-                    if k in indexes:
-                        if new_mesh_color and new_mesh_color != '':
-                            if dim_mesh_tris != 0:
-                                try:
-                                    mesh_colors[data['layer']] += [mesh_color_rgba] * dim_mesh_tris
-                                    self.data[k]['face_color'] = new_mesh_color
-
-                                    data['mesh_colors'] = [mesh_color_rgba for __ in range(len(data['mesh_colors']))]
-                                except Exception as e:
-                                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                          "Create mesh colors --> Data error. %s" % str(e))
-                        if new_line_color and new_line_color != '':
-                            if dim_line_pts != 0:
-                                try:
-                                    line_pts[data['layer']] += data['line_pts']
-                                    line_colors[data['layer']] += [line_color_rgba] * dim_line_pts
-                                    self.data[k]['color'] = new_line_color
-
-                                    data['line_colors'] = [mesh_color_rgba for __ in range(len(data['line_colors']))]
-                                except Exception as e:
-                                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                          "Create line colors --> Data error. %s" % str(e))
-                    else:
-                        if dim_mesh_tris != 0:
-                            try:
-                                mesh_colors[data['layer']] += [Color(data['face_color']).rgba] * dim_mesh_tris
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create mesh colors --> Data error. %s" % str(e))
-
-                        if dim_line_pts != 0:
-                            try:
-                                line_pts[data['layer']] += data['line_pts']
-                                line_colors[data['layer']] += [Color(data['color']).rgba] * dim_line_pts
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create line colors --> Data error. %s" % str(e))
+        for k, data in list(self.data.items()):
+            if not data['visible'] or 'line_pts' not in data:
+                continue
+
+            dim_mesh_tris = (len(data['mesh_tris']) // 3)
+            dim_line_pts = (len(data['line_pts']))
+            to_update = indexes is None or k in indexes
+
+            if to_update and new_mesh_color:
+                if dim_mesh_tris != 0:
+                    try:
+                        data['mesh_colors'] = _color_buffer(new_mesh_color, dim_mesh_tris)
+                        data['face_color'] = new_mesh_color
+                        mesh_colors[data['layer']].append(data['mesh_colors'])
+                    except Exception as e:
+                        print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
+                              "Create mesh colors --> Data error. %s" % str(e))
+            elif indexes is not None and not to_update and dim_mesh_tris != 0:
+                try:
+                    mesh_colors[data['layer']].append(_color_buffer(data['face_color'], dim_mesh_tris))
+                except Exception as e:
+                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
+                          "Create mesh colors --> Data error. %s" % str(e))
+
+            if to_update and new_line_color:
+                if dim_line_pts != 0:
+                    try:
+                        data['line_colors'] = _color_buffer(new_line_color, dim_line_pts)
+                        data['color'] = new_line_color
+                        line_pts[data['layer']].append(data['line_pts'])
+                        line_colors[data['layer']].append(data['line_colors'])
+                    except Exception as e:
+                        print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
+                              "Create line colors --> Data error. %s" % str(e))
+            elif indexes is not None and not to_update and dim_line_pts != 0:
+                try:
+                    line_pts[data['layer']].append(data['line_pts'])
+                    line_colors[data['layer']].append(_color_buffer(data['color'], dim_line_pts))
+                except Exception as e:
+                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
+                          "Create line colors --> Data error. %s" % str(e))
 
         # Updating meshes
-        if new_mesh_color and new_mesh_color != '':
+        if new_mesh_color:
             for i, mesh in enumerate(self._meshes):
                 if mesh_colors[i]:
                     try:
-                        mesh._meshdata.set_face_colors(colors=np.asarray(mesh_colors[i]))
+                        mesh._meshdata.set_face_colors(colors=np.concatenate(mesh_colors[i]))
                         mesh.mesh_data_changed()
                     except Exception as e:
                         print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
                               "Apply mesh colors --> Data error. %s" % str(e))
 
         # Updating lines
-        if new_line_color and new_line_color != '':
+        if new_line_color:
             for i, line in enumerate(self._lines):
                 if len(line_pts[i]) > 0:
                     line.visible = True
                     try:
-                        line._color = np.asarray(line_colors[i])
+                        line._color = np.concatenate(line_colors[i])
                         line._changed['color'] = True
                         line.update()
                     except Exception as e:
@@ -527,6 +845,7 @@ class ShapeCollectionVisual(CompoundVisual):
         mesh_vertices = [[] for _ in range(0, len(self._meshes))]       # Vertices for mesh
         mesh_tris = [[] for _ in range(0, len(self._meshes))]           # Faces for mesh
         mesh_colors = [[] for _ in range(0, len(self._meshes))]         # Face colors
+        mesh_offset = [0 for _ in range(0, len(self._meshes))]          # Number of vertices for mesh
         line_pts = [[] for _ in range(0, len(self._lines))]             # Vertices for line
         line_colors = [[] for _ in range(0, len(self._lines))]          # Line color
 
@@ -537,12 +856,16 @@ class ShapeCollectionVisual(CompoundVisual):
         for data in list(self.data.values()):
             if data['visible'] and 'line_pts' in data:
                 try:
-                    line_pts[data['layer']] += data['line_pts']
-                    line_colors[data['layer']] += data['line_colors']
-
-                    mesh_tris[data['layer']] += [x + len(mesh_vertices[data['layer']]) for x in data['mesh_tris']]
-                    mesh_vertices[data['layer']] += data['mesh_vertices']
-                    mesh_colors[data['layer']] += data['mesh_colors']
+                    layer = data['layer']
+                    if len(data['line_pts']) > 0:
+                        line_pts[layer].append(data['line_pts'])
+                        line_colors[layer].append(data['line_colors'])
+
+                    if len(data['mesh_tris']) > 0:
+                        mesh_tris[layer].append(data['mesh_tris'] + np.uint32(mesh_offset[layer]))
+                        mesh_vertices[layer].append(data['mesh_vertices'])
+                        mesh_colors[layer].append(data['mesh_colors'])
+                        mesh_offset[layer] += len(data['mesh_vertices'])
                 except Exception as e:
                     print("VisPyVisuals.ShapeCollectionVisual._update() --> Data error. %s" % str(e))
 
@@ -550,11 +873,11 @@ class ShapeCollectionVisual(CompoundVisual):
         for i, mesh in enumerate(self._meshes):
             if len(mesh_vertices[i]) > 0:
                 set_state(polygon_offset_fill=False)
-                faces_array = np.asarray(mesh_tris[i], dtype=np.uint32)
+                faces_array = np.concatenate(mesh_tris[i])
                 mesh.set_data(
-                    vertices=np.asarray(mesh_vertices[i]),
+                    vertices=np.concatenate(mesh_vertices[i]),
                     faces=faces_array.reshape((-1, 3)),
-                    face_colors=np.asarray(mesh_colors[i])
+                    face_colors=np.concatenate(mesh_colors[i])
                 )
             else:
                 mesh.set_data()
@@ -566,8 +889,8 @@ class ShapeCollectionVisual(CompoundVisual):
             if len(line_pts[i]) > 0:
                 line.visible = True
                 line.set_data(
-                    pos=np.asarray(line_pts[i]),
-                    color=np.asarray(line_colors[i]),
+                    pos=np.concatenate(line_pts[i]),
+                    color=np.concatenate(line_colors[i]),
                     width=self._line_width,
                     connect='segments')
             else:
@@ -595,12 +918,14 @@ class ShapeCollectionVisual(CompoundVisual):
                     self.results[i].wait()                                  # Wait for process results
                     if i in self.data:
                         self.data[i] = self.results[i].get()[0]             # Store translated data
+                        self._cache_shape_buffers(self.data[i])
                         del self.results[i]
                 except Exception as e:
                     print("VisPyVisuals.ShapeCollectionVisual.redraw() --> Data error = %s. Indexes = %s" %
                           (str(e), str(indexes)))
 
         self.results_lock.release()
+        tessellation_cache.log_stats()
 
         if update_colors is None or update_colors is False:
             self.__update()
@@ -58,6 +58,7 @@ class PreferencesUIManager(QtCore.QObject):
             "units_precision": self.ui.general_pref_form.general_app_group.precision_metric_entry,
             "global_graphic_engine": self.ui.general_pref_form.general_app_group.ge_radio,
             "global_graphic_engine_3d_no_mp": self.ui.general_pref_form.general_app_group.ge_comp_cb,
+            "global_graphic_engine_tess_cache": self.ui.general_pref_form.general_app_group.tess_cache_sb,
             "global_app_level": self.ui.general_pref_form.general_app_group.app_level_radio,
             "global_log_verbose": self.ui.general_pref_form.general_app_group.verbose_combo,
             "global_portable": self.ui.general_pref_form.general_app_group.portability_cb,
@@ -73,9 +74,11 @@ class PreferencesUIManager(QtCore.QObject):
             "global_worker_number": self.ui.general_pref_form.general_app_group.worker_number_sb,
             "global_process_number": self.ui.general_pref_form.general_app_group.process_number_sb,
             "global_tolerance": self.ui.general_pref_form.general_app_group.tol_entry,
+            "global_arc_tolerance": self.ui.general_pref_form.general_app_group.arc_tol_entry,
 
             "global_compression_level": self.ui.general_pref_form.general_app_group.compress_spinner,
             "global_save_compressed": self.ui.general_pref_form.general_app_group.save_type_cb,
+            "global_save_archive": self.ui.general_pref_form.general_app_group.save_archive_cb,
             "global_autosave": self.ui.general_pref_form.general_app_group.autosave_cb,
             "global_autosave_timeout": self.ui.general_pref_form.general_app_group.autosave_entry,
 
@@ -191,6 +194,7 @@ class PreferencesUIManager(QtCore.QObject):
             # Excellon General
             "excellon_plot": self.ui.excellon_pref_form.excellon_gen_group.plot_cb,
             "excellon_circle_steps": self.ui.excellon_pref_form.excellon_gen_group.circle_steps_entry,
+            "excellon_lightweight_drills": self.ui.excellon_pref_form.excellon_gen_group.lightweight_cb,
             "excellon_solid": self.ui.excellon_pref_form.excellon_gen_group.solid_cb,
             "excellon_multicolored": self.ui.excellon_pref_form.excellon_gen_group.multicolored_cb,
             "excellon_merge_fuse_tools": self.ui.excellon_pref_form.excellon_gen_group.fuse_tools_cb,
@@ -292,6 +296,7 @@ class PreferencesUIManager(QtCore.QObject):
             # CNC Job Options
             "cncjob_plot_kind":         self.ui.cncjob_pref_form.cncjob_opt_group.cncplot_method_radio,
             "cncjob_annotation":        self.ui.cncjob_pref_form.cncjob_opt_group.annotation_cb,
+            "cncjob_fast_plot":         self.ui.cncjob_pref_form.cncjob_opt_group.fast_plot_cb,
 
             # CNC Job Advanced Options
             "cncjob_annotation_fontsize":   self.ui.cncjob_pref_form.cncjob_adv_opt_group.annotation_fontsize_sp,
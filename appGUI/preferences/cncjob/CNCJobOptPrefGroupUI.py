@@ -76,4 +76,15 @@ class CNCJobOptPrefGroupUI(OptionsGroupUI):
 
         gcode_grid.addWidget(self.annotation_cb, 2, 0, 1, 2)
 
+        # Fast plotting
+        self.fast_plot_cb = FCCheckBox(_("Fast plotting"))
+        self.fast_plot_cb.setToolTip(
+            _("When checked, the tool paths are drawn as wide lines made\n"
+              "directly from the coordinates, one tool at a time,\n"
+              "instead of buffering each segment into a polygon.\n"
+              "It is much faster for large jobs. Works only with the 3D graphic engine.")
+        )
+
+        gcode_grid.addWidget(self.fast_plot_cb, 4, 0, 1, 2)
+
         self.layout.addStretch(2)
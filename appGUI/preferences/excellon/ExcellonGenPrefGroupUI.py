@@ -71,6 +71,15 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
         plot_grid.addWidget(self.circle_steps_label, 2, 0)
         plot_grid.addWidget(self.circle_steps_entry, 2, 1, 1, 2)
 
+        # Lightweight drills
+        self.lightweight_cb = FCCheckBox(label=_('Lightweight drills'))
+        self.lightweight_cb.setToolTip(
+            _("When checked, only the drill centers are stored and the drill circles\n"
+              "are made only when needed (plotting, checks).\n"
+              "It uses less memory for files with many drills.")
+        )
+        plot_grid.addWidget(self.lightweight_cb, 4, 0, 1, 3)
+
         # separator_line = QtWidgets.QFrame()
         # separator_line.setFrameShape(QtWidgets.QFrame.Shape.HLine)
         # separator_line.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
@@ -239,6 +248,8 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
               "MetaHeuristic Guided Local Path is used. Default search time is 3sec.\n"
               "- Basic -> Using Google OR-Tools Basic algorithm\n"
               "- TSA -> Using Travelling Salesman algorithm\n"
+              "- Greedy -> Fast nearest neighbour ordering on a spatial grid,\n"
+              "refined with 2-opt for the set duration.\n"
               "\n"
               "Some options are disabled when the application works in 32bit mode.")
         )
@@ -248,7 +259,8 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
                 {'label': _('Rtree'), 'value': 'R'},
                 {'label': _('MetaHeuristic'), 'value': 'M'},
                 {'label': _('Basic'), 'value': 'B'},
-                {'label': _('TSA'), 'value': 'T'}
+                {'label': _('TSA'), 'value': 'T'},
+                {'label': _('Greedy'), 'value': 'G'}
             ], orientation='vertical', compact=True)
 
         opt_grid.addWidget(self.excellon_optimization_label, 0, 0)
@@ -260,6 +272,7 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
             _("When OR-Tools Metaheuristic (MH) is enabled there is a\n"
               "maximum threshold for how much time is spent doing the\n"
               "path optimization. This max duration is set here.\n"
+              "For the Greedy algorithm it is the 2-opt refinement duration.\n"
               "In seconds.")
 
         )
@@ -381,7 +394,7 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
                 self.excellon_optimization_radio.set_value('T')
                 self.excellon_optimization_radio.blockSignals(False)
 
-        if val == 'M':
+        if val in ['M', 'G']:
             self.optimization_time_label.setDisabled(False)
             self.optimization_time_entry.setDisabled(False)
         else:
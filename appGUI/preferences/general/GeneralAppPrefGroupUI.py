@@ -84,6 +84,19 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
 
         grid1.addWidget(self.ge_comp_cb, 1, 0, 1, 2)
 
+        # Tessellation Cache
+        self.tess_cache_label = FCLabel('%s:' % _('Tessellation cache'))
+        self.tess_cache_label.setToolTip(
+            _("The memory (in MB) used to keep the triangulated shapes of the plotted objects.\n"
+              "The objects that are plotted again (color change, visibility change) are plotted faster.\n"
+              "Works only for 3D mode. A value of zero disables the cache.")
+        )
+        self.tess_cache_sb = FCSpinner()
+        self.tess_cache_sb.set_range(0, 65535)
+
+        grid1.addWidget(self.tess_cache_label, 3, 0)
+        grid1.addWidget(self.tess_cache_sb, 3, 1)
+
         # separator_line = QtWidgets.QFrame()
         # separator_line.setFrameShape(QtWidgets.QFrame.Shape.HLine)
         # separator_line.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
@@ -135,6 +148,24 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
         grid1.addWidget(tol_label, 6, 0)
         grid1.addWidget(self.tol_entry, 6, 1)
 
+        # Arc tolerance
+        arc_tol_label = FCLabel('%s:' % _("Arc Tolerance"))
+        arc_tol_label.setToolTip(_(
+            "The maximum distance, in millimeters, between an arc and\n"
+            "the straight segments that replace it, for the arcs found\n"
+            "in Gerber, G-code, DXF and HPGL2 files and for the arcs\n"
+            "drawn in the editors.\n"
+            "Big arcs get more segments and small arcs get fewer.\n"
+            "Zero means that the Circle Steps parameter is used."
+        ))
+        self.arc_tol_entry = FCDoubleSpinner()
+        self.arc_tol_entry.set_range(0.0, 10.0)
+        self.arc_tol_entry.setSingleStep(0.001)
+        self.arc_tol_entry.set_precision(6)
+
+        grid1.addWidget(arc_tol_label, 7, 0)
+        grid1.addWidget(self.arc_tol_entry, 7, 1)
+
         # Portability
         self.portability_cb = FCCheckBox('%s' % _('Portable app'))
         self.portability_cb.setToolTip(_("Choose if the application should run as portable.\n\n"
@@ -300,6 +331,16 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
 
         grid6.addWidget(self.save_type_cb, 0, 0, 1, 2)
 
+        # Save project as archive CB
+        self.save_archive_cb = FCCheckBox(_('Save Project as Archive'))
+        self.save_archive_cb.setToolTip(
+            _("Whether to save the project as an archive where the objects geometry\n"
+              "is stored in binary form. It is faster to save and to load.\n"
+              "When unchecked it will save a JSON project.")
+        )
+
+        grid6.addWidget(self.save_archive_cb, 1, 0, 1, 2)
+
         # Project LZMA Comppression Level
         self.compress_spinner = FCSpinner()
         self.compress_spinner.set_range(0, 9)
@@ -87,6 +87,8 @@ class GeometryGenPrefGroupUI(OptionsGroupUI):
               "MetaHeuristic Guided Local Path is used. Default search time is 3sec.\n"
               "- Basic -> Using Google OR-Tools Basic algorithm\n"
               "- TSA -> Using Travelling Salesman algorithm\n"
+              "- Greedy -> Fast nearest neighbour ordering on a spatial grid,\n"
+              "refined with 2-opt for the set duration.\n"
               "\n"
               "Some options are disabled when the application works in 32bit mode.")
         )
@@ -97,6 +99,7 @@ class GeometryGenPrefGroupUI(OptionsGroupUI):
                 {'label': _('MetaHeuristic'), 'value': 'M'},
                 {'label': _('Basic'), 'value': 'B'},
                 {'label': _('TSA'), 'value': 'T'},
+                {'label': _('Greedy'), 'value': 'G'},
                 {'label': _('None'), 'value': 'N'}
             ], orientation='vertical', compact=True)
 
@@ -108,6 +111,7 @@ class GeometryGenPrefGroupUI(OptionsGroupUI):
             _("When OR-Tools Metaheuristic (MH) is enabled there is a\n"
               "maximum threshold for how much time is spent doing the\n"
               "path optimization. This max duration is set here.\n"
+              "For the Greedy algorithm it is the 2-opt refinement duration.\n"
               "In seconds.")
 
         )
@@ -197,7 +201,7 @@ class GeometryGenPrefGroupUI(OptionsGroupUI):
                 self.opt_algorithm_radio.set_value('R')
                 self.opt_algorithm_radio.blockSignals(False)
 
-        if val == 'M':
+        if val in ['M', 'G']:
             self.optimization_time_label.setDisabled(False)
             self.optimization_time_entry.setDisabled(False)
         else:
@@ -94,7 +94,7 @@ class appEditor(QtCore.QObject):
             app_obj.log.debug("Excellon converted to Geometry: %s" % str(obj.obj_options["name"]))
             solid_geo = []
             for tool in obj.tools:
-                for geo in obj.tools[tool]['solid_geometry']:
+                for geo in obj.tool_geometry(tool):
                     solid_geo.append(geo)
             new_obj.solid_geometry = deepcopy(solid_geo)
             if not new_obj.solid_geometry:
@@ -166,7 +166,7 @@ class appEditor(QtCore.QObject):
                     'geometry': []
                 }
 
-                for geo in obj.tools[tool]['solid_geometry']:
+                for geo in obj.tool_geometry(tool):
                     new_el = {
                         'solid': geo,
                         'follow': geo.exterior
@@ -22,6 +22,8 @@ from xml.dom.minidom import parseString as parse_xml_string
 import time
 import sys
 import os
+import shutil
+import tempfile
 from copy import deepcopy
 import re
 
@@ -32,6 +34,7 @@ from datetime import datetime
 import simplejson as json
 
 from appCommon.Common import LoudDict
+from appCommon.ProjectArchive import ProjectArchive
 
 from vispy.gloo.util import _screenshot
 from vispy.io import write_png
@@ -1538,6 +1541,40 @@ class appIO(QtCore.QObject):
         self.app.file_saved.emit("preferences", filename)
         self.inform.emit('[success] %s: %s' % (_("Exported preferences to"), filename))
 
+    @staticmethod
+    def write_file_safely(filename, write_fcn):
+        """
+        Writes a file through a temporary file made in the same folder. The temporary file replaces the file only
+        if the writing is successful, so a failed export does not leave a truncated file.
+
+        :param filename:    Path to the file
+        :type filename:     str
+        :param write_fcn:   Callable that takes the opened file and writes in it; it returns 'fail' if it failed
+        :type write_fcn:    callable
+        :return:            'fail' if the writing failed, else None
+        """
+        folder = os.path.dirname(os.path.abspath(filename))
+        fd, tmp_filename = tempfile.mkstemp(dir=folder, prefix='.%s.' % os.path.basename(filename), suffix='.tmp')
+        written = False
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                if write_fcn(fp) == 'fail':
+                    return 'fail'
+
+            # the temporary file is made readable only by the owner; keep the permissions of the replaced file
+            if os.path.exists(filename):
+                shutil.copymode(filename, tmp_filename)
+            else:
+                os.chmod(tmp_filename, 0o644)
+            os.replace(tmp_filename, filename)
+            written = True
+        finally:
+            if not written:
+                try:
+                    os.remove(tmp_filename)
+                except OSError:
+                    pass
+
     def export_excellon(self, obj_name, filename, local_use=None, use_thread=True):
         """
         Exports an Excellon Object to an Excellon file.
@@ -1600,66 +1637,35 @@ class appIO(QtCore.QObject):
                 header += ';Created on : %s' % time_str + '\n'
 
                 if e_format == 'dec':
-                    has_slots, excellon_code = obj.export_excellon(e_whole, e_fract, factor=factor, slot_type=slot_type)
                     header += e_units + '\n'
-
-                    for tool in obj.tools:
-                        if e_units == 'METRIC':
-                            header += "T{tool}F00S00C{:.{dec}f}\n".format(float(obj.tools[tool]['tooldia']) * factor,
-                                                                          tool=str(tool),
-                                                                          dec=2)
-                        else:
-                            header += "T{tool}F00S00C{:.{dec}f}\n".format(float(obj.tools[tool]['tooldia']) * factor,
-                                                                          tool=str(tool),
-                                                                          dec=4)
                 else:
-                    if e_zeros == 'LZ':
-                        has_slots, excellon_code = obj.export_excellon(e_whole, e_fract,
-                                                                       form='ndec', e_zeros='LZ', factor=factor,
-                                                                       slot_type=slot_type)
-                        header += '%s,%s\n' % (e_units, 'LZ')
-                        header += format_exc
-
-                        for tool in obj.tools:
-                            if e_units == 'METRIC':
-                                header += "T{tool}F00S00C{:.{dec}f}\n".format(
-                                    float(obj.tools[tool]['tooldia']) * factor,
-                                    tool=str(tool),
-                                    dec=2)
-                            else:
-                                header += "T{tool}F00S00C{:.{dec}f}\n".format(
-                                    float(obj.tools[tool]['tooldia']) * factor,
-                                    tool=str(tool),
-                                    dec=4)
-                    else:
-                        has_slots, excellon_code = obj.export_excellon(e_whole, e_fract,
-                                                                       form='ndec', e_zeros='TZ', factor=factor,
-                                                                       slot_type=slot_type)
-                        header += '%s,%s\n' % (e_units, 'TZ')
-                        header += format_exc
-
-                        for tool in obj.tools:
-                            if e_units == 'METRIC':
-                                header += "T{tool}F00S00C{:.{dec}f}\n".format(
-                                    float(obj.tools[tool]['tooldia']) * factor,
-                                    tool=str(tool),
-                                    dec=2)
-                            else:
-                                header += "T{tool}F00S00C{:.{dec}f}\n".format(
-                                    float(obj.tools[tool]['tooldia']) * factor,
-                                    tool=str(tool),
-                                    dec=4)
+                    header += '%s,%s\n' % (e_units, 'LZ' if e_zeros == 'LZ' else 'TZ')
+                    header += format_exc
+
+                for tool in obj.tools:
+                    header += "T{tool}F00S00C{:.{dec}f}\n".format(float(obj.tools[tool]['tooldia']) * factor,
+                                                                  tool=str(tool),
+                                                                  dec=2 if e_units == 'METRIC' else 4)
                 header += '%\n'
                 footer = 'M30\n'
 
-                exported_excellon = header
-                exported_excellon += excellon_code
-                exported_excellon += footer
+                def write_excellon(fp):
+                    # the Excellon code is written in the stream as it is made
+                    fp.write(header)
+                    if e_format == 'dec':
+                        ret = obj.export_excellon(e_whole, e_fract, factor=factor, slot_type=slot_type, stream=fp)
+                    else:
+                        ret = obj.export_excellon(e_whole, e_fract, form='ndec',
+                                                  e_zeros='LZ' if e_zeros == 'LZ' else 'TZ', factor=factor,
+                                                  slot_type=slot_type, stream=fp)
+                    if ret == 'fail':
+                        return 'fail'
+                    fp.write(footer)
 
                 if local_use is None:
                     try:
-                        with open(filename, 'w') as fp:
-                            fp.write(exported_excellon)
+                        if self.write_file_safely(filename, write_excellon) == 'fail':
+                            return 'fail'
                     except PermissionError:
                         self.inform.emit('[WARNING] %s' %
                                          _("Permission denied, saving not possible.\n"
@@ -1671,7 +1677,10 @@ class appIO(QtCore.QObject):
                     self.app.file_saved.emit("Excellon", filename)
                     self.inform.emit('[success] %s: %s' % (_("Excellon file exported to"), filename))
                 else:
-                    return exported_excellon
+                    buffer = StringIO()
+                    if write_excellon(buffer) == 'fail':
+                        return 'fail'
+                    return buffer.getvalue()
             except Exception as e:
                 self.log.error("App.export_excellon.make_excellon() --> %s" % str(e))
                 return 'fail'
@@ -1785,16 +1794,17 @@ class appIO(QtCore.QObject):
 
                 footer = 'M02*\n'
 
-                gerber_code = obj.export_gerber(g_whole, g_fract, g_zeros=g_zeros, factor=factor)
-
-                exported_gerber = header
-                exported_gerber += gerber_code
-                exported_gerber += footer
+                def write_gerber(fp):
+                    # the Gerber code is written in the stream as it is made
+                    fp.write(header)
+                    if obj.export_gerber(g_whole, g_fract, g_zeros=g_zeros, factor=factor, stream=fp) == 'fail':
+                        return 'fail'
+                    fp.write(footer)
 
                 if local_use is None:
                     try:
-                        with open(filename, 'w') as fp:
-                            fp.write(exported_gerber)
+                        if self.write_file_safely(filename, write_gerber) == 'fail':
+                            return 'fail'
                     except PermissionError:
                         self.inform.emit('[WARNING] %s' %
                                          _("Permission denied, saving not possible.\n"
@@ -1806,7 +1816,10 @@ class appIO(QtCore.QObject):
                     self.app.file_saved.emit("Gerber", filename)
                     self.inform.emit('[success] %s: %s' % (_("Gerber file exported to"), filename))
                 else:
-                    return exported_gerber
+                    buffer = StringIO()
+                    if write_gerber(buffer) == 'fail':
+                        return 'fail'
+                    return buffer.getvalue()
             except Exception as e:
                 self.log.error("App.export_gerber.make_gerber() --> %s" % str(e))
                 return 'fail'
@@ -2136,7 +2149,7 @@ class appIO(QtCore.QObject):
                 return "fail"
 
             for tool in excellon_obj.tools:
-                if excellon_obj.tools[tool]['solid_geometry']:
+                if excellon_obj.tools[tool]['solid_geometry'] or len(excellon_obj.drill_centers(tool)):
                     return
             app_obj.inform.emit('[ERROR_NOTCL] %s: %s' % (_("No geometry found in file"), filename))
             return "fail"
@@ -2521,27 +2534,40 @@ class appIO(QtCore.QObject):
                         self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), prj_filename))
                         return
 
-                try:
-                    d = json.load(f, object_hook=dict2obj)
-                except Exception as e:
-                    self.log.debug(
-                        "Failed to parse project file, trying to see if it loads as an LZMA archive: %s because %s" %
-                        (prj_filename, str(e)))
+                is_archive = ProjectArchive.is_archive(prj_filename)
+                if is_archive:
                     f.close()
 
-                    # Open and parse a compressed Project file
+                    # Open a Project archive; only the manifest is read here, the objects are loaded in the
+                    # background while they are restored
                     try:
-                        with lzma.open(prj_filename) as f:
-                            file_content = f.read().decode('utf-8')
-                            d = json.loads(file_content, object_hook=dict2obj)
+                        d = ProjectArchive(prj_filename).project_dict(nr_workers=self.options["global_worker_number"])
                     except Exception as e:
                         self.log.error("Failed to open project file: %s with error: %s" % (prj_filename, str(e)))
                         self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), prj_filename))
                         return
+                else:
+                    try:
+                        d = json.load(f, object_hook=dict2obj)
+                    except Exception as e:
+                        self.log.debug(
+                            "Failed to parse project file, trying to see if it loads as an LZMA archive: "
+                            "%s because %s" % (prj_filename, str(e)))
+                        f.close()
+
+                        # Open and parse a compressed Project file
+                        try:
+                            with lzma.open(prj_filename) as f:
+                                file_content = f.read().decode('utf-8')
+                                d = json.loads(file_content, object_hook=dict2obj)
+                        except Exception as e:
+                            self.log.error("Failed to open project file: %s with error: %s" % (prj_filename, str(e)))
+                            self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), prj_filename))
+                            return
 
                 # Check for older projects
                 found_older_project = False
-                for obj in d['objs']:
+                for obj in ([] if is_archive else d['objs']):
                     if 'cnc_tools' in obj or 'exc_cnc_tools' in obj or 'apertures' in obj:
                         self.app.log.error(
                             'appIO.open_project() --> %s %s. %s' %
@@ -2629,6 +2655,15 @@ class appIO(QtCore.QObject):
     def restore_project_objects(self, proj_dict, filename, cli, plot):
 
         def worker_task():
+            try:
+                restore_objects()
+            finally:
+                # the objects of a project archive are loaded by a generator; if the loading did not finish, closing
+                # the generator stops the loading and closes the archive
+                if hasattr(proj_dict['objs'], 'close'):
+                    proj_dict['objs'].close()
+
+        def restore_objects():
             with self.app.proc_container.new('%s' % _("Loading...")):
                 # Re-create objects
                 self.log.debug(" **************** Started PROEJCT loading... **************** ")
@@ -2780,7 +2815,39 @@ class appIO(QtCore.QObject):
                 "version":          self.app.version
             }
 
-            if self.options["global_save_compressed"] is True:
+            if self.options["global_save_archive"] is True:
+                # objects geometry saved as WKB blobs in a ZIP container, with the objects encoded in parallel
+                try:
+                    ProjectArchive.save(filename, objs=d['objs'], options=d['options'], version=d['version'],
+                                        compressed=self.options["global_save_compressed"],
+                                        compression_level=int(self.options['global_compression_level']),
+                                        nr_workers=self.options["global_worker_number"])
+                except Exception as e:
+                    self.log.error("Failed to save project archive: %s because: %s" % (str(filename), str(e)))
+                    self.inform.emit('[ERROR_NOTCL] %s' % _("Failed."))
+                    self.app.save_in_progress = False
+                    return
+
+                # verification of the saved project
+                try:
+                    saved_archive = ProjectArchive(filename)
+                    bad_entry = saved_archive.zip_file.testzip()
+                    saved_archive.close()
+                except Exception:
+                    bad_entry = filename
+
+                if bad_entry is not None:
+                    if silent is False:
+                        self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
+                                         (_("Failed to parse saved project file"),
+                                          str(filename),
+                                          _("Retry to save it.")))  # noqa
+                    self.app.save_in_progress = False
+                    return
+
+                if silent is False:
+                    self.inform.emit('[success] %s: %s' % (_("Project saved to"), str(filename)))
+            elif self.options["global_save_compressed"] is True:
                 try:
                     project_as_json = json.dumps(d, default=to_dict, indent=2, sort_keys=True).encode('utf-8')
                 except Exception as e:
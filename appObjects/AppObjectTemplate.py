@@ -200,6 +200,13 @@ class FlatCAMObj(QtCore.QObject):
             key = self.shapes.add(tolerance=tol, **kwargs)
         return key
 
+    def add_paths(self, **kwargs):
+        if self.deleted:
+            raise ObjectDeleted()
+        else:
+            key = self.shapes.add_paths(**kwargs)
+        return key
+
     def add_mark_shape(self, **kwargs):
         tol = kwargs['tolerance'] if 'tolerance' in kwargs else self.drawing_tolerance
 
@@ -1065,7 +1065,10 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                 # when self.tools is empty - old projects
                 include_header = self.app.preprocessors['default'].include_header
 
-        gcode = ''
+        # the G-Code body is kept as a list of chunks (one for each tool) so the tools G-Code is never concatenated
+        # into one big string; when saving to a file the chunks are written one after another
+        gcode_chunks = []
+        hpgl = False
 
         if include_header is False:
             # detect if using multi-tool and make the Gcode summation correctly for each case
@@ -1074,47 +1077,32 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                     if self.obj_options['type'].lower() == 'geometry':
                         for tooluid_key in self.tools:
                             for key, value in self.tools[tooluid_key].items():
-                                if key == 'gcode':
-                                    gcode += value
+                                if key == 'gcode' and value:
+                                    gcode_chunks.append(value)
                                     break
                 except TypeError:
                     pass
             else:
-                gcode += global_gcode
+                gcode_chunks.append(global_gcode)
 
             # g = sstart_code + '\n' + preamble + '\n' + gcode + '\n' + postamble
-            g = ''
             end_gcode = self.gcode_footer() if self.app.options['cncjob_footer'] is True else ''
-            if preamble != '' and postamble != '':
-                g = start_code + '\n' + preamble + '\n' + gcode + '\n' + postamble + '\n' + end_gcode
-            if preamble == '':
-                g = start_code + '\n' + gcode + '\n' + postamble + '\n' + end_gcode
-            if postamble == '':
-                g = start_code + '\n' + preamble + '\n' + gcode + '\n' + end_gcode
-            if preamble == '' and postamble == '':
-                g = start_code + '\n' + gcode + '\n' + end_gcode
+            g_start = [start_code, '\n']
         else:
             # detect if using multi-tool and make the Gcode summation correctly for each case
             if self.multitool is True:
                 # for the case that self.tools is empty: old projects
                 try:
-                    if self.obj_options['type'].lower() == 'excellon':
-                        for tooluid_key in self.tools:
-                            for key, value in self.tools[tooluid_key].items():
-                                if key == 'gcode' and value:
-                                    gcode += value
-                                    break
-                    else:
-                        # it's made from a Geometry object
-                        for tooluid_key in self.tools:
-                            for key, value in self.tools[tooluid_key].items():
-                                if key == 'gcode' and value:
-                                    gcode += value
-                                    break
+                    # it's made from an Excellon or a Geometry object
+                    for tooluid_key in self.tools:
+                        for key, value in self.tools[tooluid_key].items():
+                            if key == 'gcode' and value:
+                                gcode_chunks.append(value)
+                                break
                 except TypeError:
                     pass
             else:
-                gcode += global_gcode
+                gcode_chunks.append(global_gcode)
 
             end_gcode = self.gcode_footer() if self.app.options['cncjob_footer'] is True else ''
 
@@ -1138,36 +1126,37 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                 hpgl = False
 
             if hpgl:
-                processed_body_gcode = ''
+                processed_body_gcode = []
                 pa_re = re.compile(r"^PA\s*(-?\d+\.\d*),?\s*(-?\d+\.\d*)*;?$")
 
                 # process body gcode
-                for gline in gcode.splitlines():
+                for gline in ''.join(gcode_chunks).splitlines():
                     match = pa_re.search(gline)
                     if match:
                         x_int = int(float(match.group(1)))
                         y_int = int(float(match.group(2)))
                         new_line = 'PA%d,%d;\n' % (x_int, y_int)
-                        processed_body_gcode += new_line
+                        processed_body_gcode.append(new_line)
                     else:
-                        processed_body_gcode += gline + '\n'
+                        processed_body_gcode.append(gline + '\n')
 
-                gcode = processed_body_gcode
-                g = self.gc_header + '\n' + start_code + '\n' + preamble + '\n' + \
-                    gcode + '\n' + postamble + end_gcode
+                gcode_chunks = [''.join(processed_body_gcode)]
+
+                # for HPGL the preamble is added even if empty and there is no newline before the footer
+                g_start = [self.gc_header, '\n', start_code, '\n', preamble, '\n']
+                g_end = ['\n', postamble, end_gcode]
             else:
-                g = ''
-                if preamble != '' and postamble != '':
-                    g = self.gc_header + start_code + '\n' + preamble + '\n' + gcode + '\n' + \
-                        postamble + '\n' + end_gcode
-                if preamble == '':
-                    g = self.gc_header + start_code + '\n' + gcode + '\n' + postamble + '\n' + end_gcode
-                if postamble == '':
-                    g = self.gc_header + start_code + '\n' + preamble + '\n' + gcode + '\n' + end_gcode
-                if preamble == '' and postamble == '':
-                    g = self.gc_header + start_code + '\n' + gcode + '\n' + end_gcode
-
-        lines = StringIO(g)
+                g_start = [self.gc_header, start_code, '\n']
+
+        if not hpgl:
+            if preamble != '':
+                g_start += [preamble, '\n']
+            g_end = ['\n']
+            if postamble != '':
+                g_end += [postamble, '\n']
+            g_end.append(end_gcode)
+
+        g_chunks = g_start + gcode_chunks + g_end
 
         # Write
         if filename is not None:
@@ -1175,12 +1164,12 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                 force_windows_line_endings = self.app.options['cncjob_line_ending']
                 if force_windows_line_endings and sys.platform != 'win32':
                     with open(filename, 'w', newline='\r\n') as f:
-                        for line in lines:
-                            f.write(line)
+                        for chunk in g_chunks:
+                            f.write(chunk)
                 else:
                     with open(filename, 'w') as f:
-                        for line in lines:
-                            f.write(line)
+                        for chunk in g_chunks:
+                            f.write(chunk)
             except FileNotFoundError:
                 self.app.inform.emit('[WARNING_NOTCL] %s' % _("No such file or directory"))
                 return
@@ -1198,6 +1187,10 @@ class CNCJobObject(FlatCAMObj, CNCjob):
 
             self.app.inform.emit('[success] %s: %s' % (_("Saved to"), filename))
         else:
+            lines = StringIO()
+            for chunk in g_chunks:
+                lines.write(chunk)
+            lines.seek(0)
             return lines
 
     def get_gcode(self, preamble='', postamble=''):
@@ -1313,6 +1306,9 @@ class CNCJobObject(FlatCAMObj, CNCjob):
 
         visible = visible if visible else self.obj_options['plot']
 
+        # with the fast plotting each tool is drawn as soon as it is ready, while the next ones are made
+        progressive = self.app.use_3d_engine and self.app.options["cncjob_fast_plot"]
+
         # Geometry shapes plotting
         try:
             if self.multitool is False:  # single tool usage
@@ -1350,6 +1346,8 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                             # gcode_parsed = self.gcode_parsed
                             self.plot2(tooldia=dia_plot, obj=self, visible=visible, gcode_parsed=gcode_parsed,
                                        kind=kind)
+                            if progressive:
+                                self.shapes.redraw()
                 else:
                     # multiple tools usage
                     if self.tools:
@@ -1361,6 +1359,8 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                             gcode_parsed = self.tools[tooluid_key]['gcode_parsed']
                             self.plot2(tooldia=dia_plot, obj=self, visible=visible, gcode_parsed=gcode_parsed,
                                        kind=kind)
+                            if progressive:
+                                self.shapes.redraw()
             self.shapes.redraw()
         except (ObjectDeleted, AttributeError) as err:
             self.app.log.debug("CNCJobObject.plot() --> %s" % str(err))
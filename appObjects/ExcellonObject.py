@@ -16,12 +16,15 @@ from appParsers.ParseExcellon import Excellon
 from appObjects.AppObjectTemplate import FlatCAMObj, ObjectDeleted
 from appGUI.GUIElements import FCCheckBox
 from appGUI.ObjectUI import ExcellonObjectUI
+from appCommon.CoordinateFormat import CoordinateFormatter, CoordinateWriter
 
 import itertools
 import numpy as np
 from copy import deepcopy
 
 from shapely import LineString
+import shapely
+from io import StringIO
 
 import gettext
 import appTranslation as fcTranslate
@@ -49,6 +52,8 @@ class ExcellonObject(FlatCAMObj, Excellon):
         Excellon.__init__(self, excellon_circle_steps=self.circle_steps)
         FlatCAMObj.__init__(self, name)
 
+        self.lightweight_drills = self.app.options["excellon_lightweight_drills"]
+
         self.kind = "excellon"
 
         self.obj_options.update({
@@ -747,9 +752,11 @@ class ExcellonObject(FlatCAMObj, Excellon):
     def on_milling_button_clicked(self):
         self.app.milling_tool.run(toggle=True)
 
-    def export_excellon(self, whole, fract, e_zeros=None, form='dec', factor=1, slot_type='routing'):
+    def export_excellon(self, whole, fract, e_zeros=None, form='dec', factor=1, slot_type='routing', stream=None):
         """
-        Returns two values, first is a boolean , if 1 then the file has slots and second contain the Excellon code
+        Returns two values, first is a boolean , if 1 then the file has slots and second contain the Excellon code.
+        The coordinates of each tool are formatted at once, as arrays, and the Excellon code is written in the stream
+        as it is made.
 
         :param whole:       Integer part digits
         :type whole:        int
@@ -763,12 +770,14 @@ class ExcellonObject(FlatCAMObj, Excellon):
         :type factor:       float
         :param slot_type:   How to treat slots: "routing" or "drilling"
         :type slot_type:    str
-        :return:            A tuple: (has_slots, Excellon_code) -> (bool, str)
+        :param stream:      where to write the Excellon code: a file or an in-memory buffer (io.StringIO); if None the
+                            Excellon code is returned
+        :type stream:       io.TextIOBase | None
+        :return:            A tuple: (has_slots, Excellon_code) -> (bool, str); Excellon_code is None if a stream is
+                            used
         :rtype:             tuple
         """
 
-        excellon_code = ''
-
         # store here if the file has slots, return 1 if any slots, 0 if only drills
         slots_in_file = 0
 
@@ -786,169 +795,49 @@ class ExcellonObject(FlatCAMObj, Excellon):
                 slots_in_file = 1
                 break
 
+        if not has_drills and not has_slots:
+            self.app.log.debug("ExcellonObject.export_excellon() --> Excellon Object is empty: no drills, no slots.")
+            return 'fail'
+
+        out_stream = StringIO() if stream is None else stream
+        # for the 'LZ' zeros type the leading zeros are kept
+        formatter = CoordinateFormatter(whole, fract, factor=factor, pad_whole=e_zeros == 'LZ',
+                                        decimal_point=form == 'dec')
+        writer = CoordinateWriter(out_stream, formatter)
+
         # drills processing
         if has_drills:
-            length = whole + fract
             for tool in self.tools:
-                excellon_code += 'T0%s\n' % str(tool) if int(tool) < 10 else 'T%s\n' % str(tool)
-
-                for drill in self.tools[tool]['drills']:
-                    if form == 'dec':
-                        try:
-                            drill_x = drill.x * factor
-                            drill_y = drill.y * factor
-                            excellon_code += "X{:.{dec}f}Y{:.{dec}f}\n".format(drill_x, drill_y, dec=fract)
-                        except Exception as e:
-                            self.app.log.error('ExcellonObject.export_excellon() drills "dec" -> %s' % str(e))
-                    elif e_zeros == 'LZ':
-                        try:
-                            drill_x = drill.x * factor
-                            drill_y = drill.y * factor
-
-                            exc_x_formatted = "{:.{dec}f}".format(drill_x, dec=fract)
-                            exc_y_formatted = "{:.{dec}f}".format(drill_y, dec=fract)
-
-                            # extract whole part and decimal part
-                            exc_x_formatted = exc_x_formatted.partition('.')
-                            exc_y_formatted = exc_y_formatted.partition('.')
+                writer.write('T0%s\n' % str(tool) if int(tool) < 10 else 'T%s\n' % str(tool))
 
-                            # left pad the 'whole' part with zeros
-                            x_whole = exc_x_formatted[0].rjust(whole, '0')
-                            y_whole = exc_y_formatted[0].rjust(whole, '0')
-
-                            # restore the coordinate padded in the left with 0 and added the decimal part
-                            # without the decinal dot
-                            exc_x_formatted = x_whole + exc_x_formatted[2]
-                            exc_y_formatted = y_whole + exc_y_formatted[2]
-
-                            excellon_code += "X{xform}Y{yform}\n".format(xform=exc_x_formatted, yform=exc_y_formatted)
-                        except Exception as e:
-                            self.app.log.error('ExcellonObject.export_excellon() drills "LZ" -> %s' % str(e))
-                    else:
-                        try:
-                            drill_x = drill.x * factor
-                            drill_y = drill.y * factor
-
-                            exc_x_formatted = "{:.{dec}f}".format(drill_x, dec=fract).replace('.', '')
-                            exc_y_formatted = "{:.{dec}f}".format(drill_y, dec=fract).replace('.', '')
-
-                            # pad with rear zeros
-                            exc_x_formatted.ljust(length, '0')
-                            exc_y_formatted.ljust(length, '0')
-
-                            excellon_code += "X{xform}Y{yform}\n".format(xform=exc_x_formatted, yform=exc_y_formatted)
-                        except Exception as e:
-                            self.app.log.error('ExcellonObject.export_excellon() drills "TZ" -> %s' % str(e))
+                try:
+                    drills = self.tools[tool].get('drills', [])
+                    if drills:
+                        writer.coords(shapely.get_coordinates(drills), suffix='\n')
+                except Exception as e:
+                    self.app.log.error('ExcellonObject.export_excellon() drills -> %s' % str(e))
 
         # slots processing
         if has_slots:
             for tool in self.tools:
-                excellon_code += 'G05\n'
+                writer.write('G05\n')
+                writer.write('T0%s\n' % str(tool) if int(tool) < 10 else 'T%s\n' % str(tool))
 
-                if int(tool) < 10:
-                    excellon_code += 'T0' + str(tool) + '\n'
-                else:
-                    excellon_code += 'T' + str(tool) + '\n'
-
-                for slot in self.tools[tool]['slots']:
-                    if form == 'dec':
-                        try:
-                            start_slot_x = slot[0].x * factor
-                            start_slot_y = slot[0].y * factor
-                            stop_slot_x = slot[1].x * factor
-                            stop_slot_y = slot[1].y * factor
-                            if slot_type == 'routing':
-                                excellon_code += "G00X{:.{dec}f}Y{:.{dec}f}\nM15\n".format(start_slot_x,
-                                                                                           start_slot_y,
-                                                                                           dec=fract)
-                                excellon_code += "G01X{:.{dec}f}Y{:.{dec}f}\nM16\n".format(stop_slot_x,
-                                                                                           stop_slot_y,
-                                                                                           dec=fract)
-                            elif slot_type == 'drilling':
-                                excellon_code += "X{:.{dec}f}Y{:.{dec}f}G85X{:.{dec}f}Y{:.{dec}f}\nG05\n".format(
-                                    start_slot_x, start_slot_y, stop_slot_x, stop_slot_y, dec=fract
-                                )
-                        except Exception as err:
-                            self.app.log.error('ExcellonObject.export_excellon() slots "dec" -> %s' % str(err))
-                    elif e_zeros == 'LZ':
-                        try:
-                            start_slot_x = slot[0].x * factor
-                            start_slot_y = slot[0].y * factor
-                            stop_slot_x = slot[1].x * factor
-                            stop_slot_y = slot[1].y * factor
-
-                            start_slot_x_formatted = "{:.{dec}f}".format(start_slot_x, dec=fract).replace('.', '')
-                            start_slot_y_formatted = "{:.{dec}f}".format(start_slot_y, dec=fract).replace('.', '')
-                            stop_slot_x_formatted = "{:.{dec}f}".format(stop_slot_x, dec=fract).replace('.', '')
-                            stop_slot_y_formatted = "{:.{dec}f}".format(stop_slot_y, dec=fract).replace('.', '')
-
-                            # extract whole part and decimal part
-                            start_slot_x_formatted = start_slot_x_formatted.partition('.')
-                            start_slot_y_formatted = start_slot_y_formatted.partition('.')
-                            stop_slot_x_formatted = stop_slot_x_formatted.partition('.')
-                            stop_slot_y_formatted = stop_slot_y_formatted.partition('.')
-
-                            # left pad the 'whole' part with zeros
-                            start_x_whole = start_slot_x_formatted[0].rjust(whole, '0')
-                            start_y_whole = start_slot_y_formatted[0].rjust(whole, '0')
-                            stop_x_whole = stop_slot_x_formatted[0].rjust(whole, '0')
-                            stop_y_whole = stop_slot_y_formatted[0].rjust(whole, '0')
-
-                            # restore the coordinate padded in the left with 0 and added the decimal part
-                            # without the decinal dot
-                            start_slot_x_formatted = start_x_whole + start_slot_x_formatted[2]
-                            start_slot_y_formatted = start_y_whole + start_slot_y_formatted[2]
-                            stop_slot_x_formatted = stop_x_whole + stop_slot_x_formatted[2]
-                            stop_slot_y_formatted = stop_y_whole + stop_slot_y_formatted[2]
-
-                            if slot_type == 'routing':
-                                excellon_code += "G00X{xstart}Y{ystart}\nM15\n".format(xstart=start_slot_x_formatted,
-                                                                                       ystart=start_slot_y_formatted)
-                                excellon_code += "G01X{xstop}Y{ystop}\nM16\n".format(xstop=stop_slot_x_formatted,
-                                                                                     ystop=stop_slot_y_formatted)
-                            elif slot_type == 'drilling':
-                                excellon_code += "{xstart}Y{ystart}G85X{xstop}Y{ystop}\nG05\n".format(
-                                    xstart=start_slot_x_formatted, ystart=start_slot_y_formatted,
-                                    xstop=stop_slot_x_formatted, ystop=stop_slot_y_formatted
-                                )
-                        except Exception as err:
-                            self.app.log.error('ExcellonObject.export_excellon() slots "LZ" -> %s' % str(err))
-                    else:
-                        try:
-                            start_slot_x = slot[0].x * factor
-                            start_slot_y = slot[0].y * factor
-                            stop_slot_x = slot[1].x * factor
-                            stop_slot_y = slot[1].y * factor
-                            length = whole + fract
-
-                            start_slot_x_formatted = "{:.{dec}f}".format(start_slot_x, dec=fract).replace('.', '')
-                            start_slot_y_formatted = "{:.{dec}f}".format(start_slot_y, dec=fract).replace('.', '')
-                            stop_slot_x_formatted = "{:.{dec}f}".format(stop_slot_x, dec=fract).replace('.', '')
-                            stop_slot_y_formatted = "{:.{dec}f}".format(stop_slot_y, dec=fract).replace('.', '')
-
-                            # pad with rear zeros
-                            start_slot_x_formatted.ljust(length, '0')
-                            start_slot_y_formatted.ljust(length, '0')
-                            stop_slot_x_formatted.ljust(length, '0')
-                            stop_slot_y_formatted.ljust(length, '0')
-
-                            if slot_type == 'routing':
-                                excellon_code += "G00X{xstart}Y{ystart}\nM15\n".format(xstart=start_slot_x_formatted,
-                                                                                       ystart=start_slot_y_formatted)
-                                excellon_code += "G01X{xstop}Y{ystop}\nM16\n".format(xstop=stop_slot_x_formatted,
-                                                                                     ystop=stop_slot_y_formatted)
-                            elif slot_type == 'drilling':
-                                excellon_code += "{xstart}Y{ystart}G85X{xstop}Y{ystop}\nG05\n".format(
-                                    xstart=start_slot_x_formatted, ystart=start_slot_y_formatted,
-                                    xstop=stop_slot_x_formatted, ystop=stop_slot_y_formatted
-                                )
-                        except Exception as err:
-                            self.app.log.error('ExcellonObject.export_excellon() slots "TZ" -> %s' % str(err))
-        if not has_drills and not has_slots:
-            self.app.log.debug("ExcellonObject.export_excellon() --> Excellon Object is empty: no drills, no slots.")
-            return 'fail'
-
-        return slots_in_file, excellon_code
+                try:
+                    slots = self.tools[tool].get('slots', [])
+                    if not slots:
+                        continue
+                    # the start and the stop points of the slots, alternating
+                    slot_points = shapely.get_coordinates([point for slot in slots for point in slot[:2]])
+                    if slot_type == 'routing':
+                        writer.coords(slot_points, prefix=('G00', 'G01'), suffix=('\nM15\n', '\nM16\n'))
+                    elif slot_type == 'drilling':
+                        writer.coords(slot_points, suffix=('G85', '\nG05\n'))
+                except Exception as err:
+                    self.app.log.error('ExcellonObject.export_excellon() slots -> %s' % str(err))
+
+        writer.flush()
+        return slots_in_file, (out_stream.getvalue() if stream is None else None)
 
     def generate_milling_drills(self, tools=None, outname=None, tooldia=None, plot=False, use_thread=False):
         """
@@ -1290,10 +1179,11 @@ class ExcellonObject(FlatCAMObj, Excellon):
                 return new_color
 
         # this stays for compatibility reasons, in case we try to open old projects
+        # (self._solid_geometry is used so the lightweight drill circles are not made here)
         try:
-            __ = iter(self.solid_geometry)
+            __ = iter(self._solid_geometry)
         except TypeError:
-            self.solid_geometry = [self.solid_geometry]
+            self.solid_geometry = [self._solid_geometry]
 
         visible = visible if visible else self.ui.plot_cb.get_value()
 
@@ -1310,7 +1200,7 @@ class ExcellonObject(FlatCAMObj, Excellon):
                         self.tools[tool]['multicolor'] = None
 
                     # tool is a dict also
-                    for geo in self.tools[tool]["solid_geometry"]:
+                    for geo in self.tool_geometry(tool):
                         idx = self.add_shape(shape=geo,
                                              color=geo_color if multicolored else self.outline_color,
                                              face_color=geo_color if multicolored else self.fill_color,
@@ -1322,7 +1212,7 @@ class ExcellonObject(FlatCAMObj, Excellon):
                             self.shape_indexes_dict[tool] = [idx]
             else:
                 for tool in self.tools:
-                    for geo in self.tools[tool]['solid_geometry']:
+                    for geo in self.tool_geometry(tool):
                         idx = self.add_shape(shape=geo.exterior, color='red', visible=visible)
                         try:
                             self.shape_indexes_dict[tool].append(idx)
@@ -17,12 +17,14 @@ from appParsers.ParseGerber import Gerber
 from appObjects.AppObjectTemplate import FlatCAMObj, ObjectDeleted, ValidationError
 
 from camlib import flatten_shapely_geometry
+from appCommon.CoordinateFormat import CoordinateFormatter, CoordinateWriter
 
 from shapely import MultiLineString, LinearRing, MultiPolygon, Polygon, LineString, Point
 from shapely.ops import unary_union
 
 import numpy as np
 from copy import deepcopy
+from io import StringIO
 
 import gettext
 import appTranslation as fcTranslate
@@ -1153,515 +1155,175 @@ class GerberObject(FlatCAMObj, Gerber):
 
         self.ui_connect()
 
-    def export_gerber(self, whole, fract, g_zeros='L', factor=1):
+    def export_gerber(self, whole, fract, g_zeros='L', factor=1, stream=None):
         """
         Creates a Gerber file content to be exported to a file.
+        The coordinates are formatted in batches, as arrays, and the Gerber code is written in the stream as it is
+        made.
 
-        :param whole: how many digits in the whole part of coordinates
-        :param fract: how many decimals in coordinates
+        :param whole:   how many digits in the whole part of coordinates
+        :param fract:   how many decimals in coordinates
         :param g_zeros: type of the zero suppression used: LZ or TZ; string
-        :param factor: factor to be applied onto the Gerber coordinates
-        :return: Gerber_code
+        :param factor:  factor to be applied onto the Gerber coordinates
+        :param stream:  where to write the Gerber code: a file or an in-memory buffer (io.StringIO); if None the
+                        Gerber code is returned
+        :return:        the Gerber code if no stream is used, else None; 'fail' if the Gerber object is empty
         """
         self.app.log.debug("GerberObject.export_gerber() --> Generating the Gerber code from the selected Gerber file")
 
-        def tz_format(x, y, fac):
-            x_c = x * fac
-            y_c = y * fac
-
-            x_form = "{:.{dec}f}".format(x_c, dec=fract)
-            y_form = "{:.{dec}f}".format(y_c, dec=fract)
+        if not self.tools:
+            self.app.log.debug("FlatCAMObj.GerberObject.export_gerber() --> Gerber Object is empty: no apertures.")
+            return 'fail'
 
-            # extract whole part and decimal part
-            x_form = x_form.partition('.')
-            y_form = y_form.partition('.')
+        out_stream = StringIO() if stream is None else stream
+        # for the 'T' zeros type the leading zeros are kept
+        formatter = CoordinateFormatter(whole, fract, factor=factor, pad_whole=g_zeros == 'T')
+        writer = CoordinateWriter(out_stream, formatter)
+
+        # the aperture 0 (regions) is written first
+        apertures = ([0] if 0 in self.tools else []) + [apid for apid in self.tools if apid != 0]
+        for apid in apertures:
+            aperture = self.tools[apid]
+            if apid == 0 or aperture['type'] in ['AM', 'P']:
+                # the geometry is made of regions
+                for geo_elem in aperture.get('geometry', []):
+                    try:
+                        if 'solid' in geo_elem:
+                            self.export_gerber_region(writer, geo_elem['solid'])
+                        if 'clear' in geo_elem:
+                            self.export_gerber_region(writer, geo_elem['clear'], clear=True)
+                    except Exception as e:
+                        self.app.log.error("FlatCAMObj.GerberObject.export_gerber() aperture %s --> %s" %
+                                           (str(apid), str(e)))
+                continue
 
-            # left padd the 'whole' part with zeros
-            x_whole = x_form[0].rjust(whole, '0')
-            y_whole = y_form[0].rjust(whole, '0')
+            writer.write('D%s*\n' % str(apid))
+            # consecutive flashes (or consecutive tracks) are written with one call
+            batch = []
+            batch_is_flash = None
+            for geo_elem in aperture.get('geometry', []):
+                follow_geo = geo_elem.get('follow')
+                if 'clear' not in geo_elem and isinstance(follow_geo, (Point, LineString, LinearRing)) and \
+                        not follow_geo.is_empty:
+                    is_flash = isinstance(follow_geo, Point)
+                    if batch and is_flash != batch_is_flash:
+                        self.export_gerber_batch(writer, batch, batch_is_flash)
+                        batch = []
+                    batch.append(follow_geo)
+                    batch_is_flash = is_flash
+                    continue
+
+                if batch:
+                    self.export_gerber_batch(writer, batch, batch_is_flash)
+                    batch = []
 
-            # restore the coordinate padded in the left with 0 and added the decimal part
-            # without the decinal dot
-            x_form = x_whole + x_form[2]
-            y_form = y_whole + y_form[2]
-            return x_form, y_form
+                try:
+                    if follow_geo is not None:
+                        self.export_gerber_paths(writer, follow_geo)
+                except Exception as e:
+                    self.app.log.error(
+                        "FlatCAMObj.GerberObject.export_gerber() 'follow' normal aperture--> %s" % str(e))
 
-        def lz_format(x, y, fac):
-            x_c = x * fac
-            y_c = y * fac
+                try:
+                    if 'clear' in geo_elem:
+                        writer.write('%LPC*%\n')
+                        if not geo_elem['clear'].is_empty:
+                            self.export_gerber_paths(writer, geo_elem['clear'])
+                            writer.write('%LPD*%\n')
+                except Exception as e:
+                    self.app.log.error("FlatCAMObj.GerberObject.export_gerber() 'clear' --> %s" % str(e))
 
-            x_form = "{:.{dec}f}".format(x_c, dec=fract).replace('.', '')
-            y_form = "{:.{dec}f}".format(y_c, dec=fract).replace('.', '')
+            if batch:
+                self.export_gerber_batch(writer, batch, batch_is_flash)
 
-            # pad with rear zeros
-            x_form.ljust(length, '0')
-            y_form.ljust(length, '0')
+        writer.flush()
+        if stream is None:
+            return out_stream.getvalue()
 
-            return x_form, y_form
+    @staticmethod
+    def export_gerber_batch(writer, geometry, flash):
+        """
+        Writes many flashes or many tracks made with the current aperture, at once.
+
+        :param writer:      the writer of the Gerber code
+        :type writer:       CoordinateWriter
+        :param geometry:    list of Points (flashes) or of LineStrings and LinearRings (tracks)
+        :type geometry:     list
+        :param flash:       if True the geometry is made of Points
+        :type flash:        bool
+        :return:            None
+        """
+        if flash:
+            writer.geometry_array_coords(geometry, suffix='D03*\n')
+        else:
+            # first command of each track is a move with pen-up D02 at the beginning of the geo
+            writer.geometry_array_coords(geometry, suffix='D01*\n', first_suffix='D02*\n', dedupe=True)
 
-        # Gerber code is stored here
-        gerber_code = ''
+    @staticmethod
+    def export_gerber_region(writer, geo, clear=False):
+        """
+        Writes a geometry element stored in the aperture 0 or in an AM or P aperture. The polygons are written as
+        regions (the interiors as clear regions), the lines and the points as tracks and flashes.
+
+        :param writer:  the writer of the Gerber code
+        :type writer:   CoordinateWriter
+        :param geo:     Shapely geometry element
+        :param clear:   if True the polygons are written as clear regions, and only their exteriors
+        :type clear:    bool
+        :return:        None
+        """
+        if geo.is_empty:
+            return
 
-        # apertures processing
-        try:
-            length = whole + fract
-            if 0 in self.tools:
-                if 'geometry' in self.tools[0]:
-                    for geo_elem in self.tools[0]['geometry']:
-                        if 'solid' in geo_elem:
-                            geo = geo_elem['solid']
-                            if not geo.is_empty and not isinstance(geo, LineString) and \
-                                    not isinstance(geo, MultiLineString) and not isinstance(geo, Point):
-                                gerber_code += 'G36*\n'
-                                geo_coords = list(geo.exterior.coords)
-                                # first command is a move with pen-up D02 at the beginning of the geo
-                                if g_zeros == 'T':
-                                    x_formatted, y_formatted = tz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                else:
-                                    x_formatted, y_formatted = lz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                for coord in geo_coords[1:]:
-                                    if g_zeros == 'T':
-                                        x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                        gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                       yform=y_formatted)
-                                    else:
-                                        x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                        gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                       yform=y_formatted)
-                                gerber_code += 'D02*\n'
-                                gerber_code += 'G37*\n'
-
-                                clear_list = list(geo.interiors)
-                                if clear_list:
-                                    gerber_code += '%LPC*%\n'
-                                    for clear_geo in clear_list:
-                                        gerber_code += 'G36*\n'
-                                        geo_coords = list(clear_geo.coords)
-
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                            prev_coord = coord
-
-                                        gerber_code += 'D02*\n'
-                                        gerber_code += 'G37*\n'
-                                    gerber_code += '%LPD*%\n'
-                            elif isinstance(geo, LineString) or isinstance(geo, MultiLineString) or \
-                                    isinstance(geo, Point):
-                                try:
-                                    if not geo.is_empty:
-                                        if isinstance(geo, Point):
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(geo.x, geo.y, factor)
-                                                gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(geo.x, geo.y, factor)
-                                                gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                        else:
-                                            geo_coords = list(geo.coords)
-                                            # first command is a move with pen-up D02 at the beginning of the geo
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-
-                                            prev_coord = geo_coords[0]
-                                            for coord in geo_coords[1:]:
-                                                if coord != prev_coord:
-                                                    if g_zeros == 'T':
-                                                        x_formatted, y_formatted = tz_format(coord[0], coord[1],
-                                                                                             factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                    else:
-                                                        x_formatted, y_formatted = lz_format(coord[0], coord[1],
-                                                                                             factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                prev_coord = coord
-
-                                            # gerber_code += "D02*\n"
-                                except Exception as e:
-                                    self.app.log.error(
-                                        "FlatCAMObj.GerberObject.export_gerber() 'follow' for 0 aperture --> %s" %
-                                        str(e))
-                        if 'clear' in geo_elem:
-                            geo = geo_elem['clear']
-                            if not geo.is_empty:
-                                gerber_code += '%LPC*%\n'
-                                gerber_code += 'G36*\n'
-                                geo_coords = list(geo.exterior.coords)
-                                # first command is a move with pen-up D02 at the beginning of the geo
-                                if g_zeros == 'T':
-                                    x_formatted, y_formatted = tz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                else:
-                                    x_formatted, y_formatted = lz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-
-                                prev_coord = geo_coords[0]
-                                for coord in geo_coords[1:]:
-                                    if coord != prev_coord:
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                            gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                            gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                    prev_coord = coord
-
-                                gerber_code += 'D02*\n'
-                                gerber_code += 'G37*\n'
-                                gerber_code += '%LPD*%\n'
-        except Exception as e:
-            self.app.log.error("FlatCAMObj.GerberObject.export_gerber() 0 aperture --> %s" % str(e))
+        if isinstance(geo, (LineString, LinearRing, MultiLineString, Point)):
+            GerberObject.export_gerber_paths(writer, geo)
+            return
 
-        for apid in self.tools:
-            if apid == 0:
+        for poly in (geo.geoms if isinstance(geo, MultiPolygon) else [geo]):
+            if clear:
+                writer.write('%LPC*%\nG36*\n')
+                # first command is a move with pen-up D02 at the beginning of the geo
+                writer.geometry_coords(poly.exterior, suffix='D01*\n', first_suffix='D02*\n', dedupe=True)
+                writer.write('D02*\nG37*\n%LPD*%\n')
                 continue
-            elif self.tools[apid]['type'] in ['AM', 'P']:
-                if 'geometry' in self.tools[apid]:
-                    for geo_elem in self.tools[apid]['geometry']:
-                        if 'solid' in geo_elem:
-                            geo = geo_elem['solid']
-                            if not geo.is_empty and not isinstance(geo, LineString) and \
-                                    not isinstance(geo, MultiLineString) and not isinstance(geo, Point):
-                                gerber_code += 'G36*\n'
-                                geo_coords = list(geo.exterior.coords)
-                                # first command is a move with pen-up D02 at the beginning of the geo
-                                if g_zeros == 'T':
-                                    x_formatted, y_formatted = tz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                else:
-                                    x_formatted, y_formatted = lz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                for coord in geo_coords[1:]:
-                                    if g_zeros == 'T':
-                                        x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                        gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                       yform=y_formatted)
-                                    else:
-                                        x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                        gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                       yform=y_formatted)
-                                gerber_code += 'D02*\n'
-                                gerber_code += 'G37*\n'
-
-                                clear_list = list(geo.interiors)
-                                if clear_list:
-                                    gerber_code += '%LPC*%\n'
-                                    for clear_geo in clear_list:
-                                        gerber_code += 'G36*\n'
-                                        geo_coords = list(clear_geo.coords)
-
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                        xform=x_formatted,
-                                                        yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                        xform=x_formatted,
-                                                        yform=y_formatted)
-                                            prev_coord = coord
-
-                                        gerber_code += 'D02*\n'
-                                        gerber_code += 'G37*\n'
-                                    gerber_code += '%LPD*%\n'
-                            elif isinstance(geo, LineString) or isinstance(geo, MultiLineString) or \
-                                    isinstance(geo, Point):
-                                try:
-                                    if not geo.is_empty:
-                                        if isinstance(geo, Point):
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(geo.x, geo.y, factor)
-                                                gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(geo.x, geo.y, factor)
-                                                gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                        else:
-                                            geo_coords = list(geo.coords)
-                                            # first command is a move with pen-up D02 at the beginning of the geo
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-
-                                            prev_coord = geo_coords[0]
-                                            for coord in geo_coords[1:]:
-                                                if coord != prev_coord:
-                                                    if g_zeros == 'T':
-                                                        x_formatted, y_formatted = tz_format(coord[0], coord[1],
-                                                                                             factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                    else:
-                                                        x_formatted, y_formatted = lz_format(coord[0], coord[1],
-                                                                                             factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                prev_coord = coord
-
-                                            # gerber_code += "D02*\n"
-                                except Exception as e:
-                                    self.app.log.error(
-                                        "FlatCAMObj.GerberObject.export_gerber() 'follow' for AM --> %s" % str(e))
-                        if 'clear' in geo_elem:
-                            geo = geo_elem['clear']
-                            if not geo.is_empty:
-                                gerber_code += '%LPC*%\n'
-                                gerber_code += 'G36*\n'
-                                geo_coords = list(geo.exterior.coords)
-                                # first command is a move with pen-up D02 at the beginning of the geo
-                                if g_zeros == 'T':
-                                    x_formatted, y_formatted = tz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                else:
-                                    x_formatted, y_formatted = lz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-
-                                prev_coord = geo_coords[0]
-                                for coord in geo_coords[1:]:
-                                    if coord != prev_coord:
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                            gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                            gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                    prev_coord = coord
-
-                                gerber_code += 'D02*\n'
-                                gerber_code += 'G37*\n'
-                                gerber_code += '%LPD*%\n'
-            else:
-                gerber_code += 'D%s*\n' % str(apid)
-                if 'geometry' in self.tools[apid]:
-                    for geo_elem in self.tools[apid]['geometry']:
-                        try:
-                            if 'follow' in geo_elem:
-                                geo = geo_elem['follow']
-                                if not geo.is_empty:
-                                    if isinstance(geo, Point):
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                    else:
-                                        geo_coords = list(geo.coords)
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                            prev_coord = coord
-
-                                        # gerber_code += "D02*\n"
-                        except Exception as e:
-                            self.app.log.error(
-                                "FlatCAMObj.GerberObject.export_gerber() 'follow' normal aperture--> %s" % str(e))
 
-                        try:
-                            if 'clear' in geo_elem:
-                                gerber_code += '%LPC*%\n'
-
-                                geo = geo_elem['clear']
-                                if not geo.is_empty:
-                                    if isinstance(geo, Point):
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                    elif isinstance(geo, Polygon):
-                                        geo_coords = list(geo.exterior.coords)
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-
-                                            prev_coord = coord
-
-                                        for geo_int in geo.interiors:
-                                            geo_coords = list(geo_int.coords)
-                                            # first command is a move with pen-up D02 at the beginning of the geo
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-
-                                            prev_coord = geo_coords[0]
-                                            for coord in geo_coords[1:]:
-                                                if coord != prev_coord:
-                                                    if g_zeros == 'T':
-                                                        x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                    else:
-                                                        x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-
-                                                prev_coord = coord
-                                    else:
-                                        geo_coords = list(geo.coords)
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-
-                                            prev_coord = coord
-                                        # gerber_code += "D02*\n"
-                                    gerber_code += '%LPD*%\n'
-                        except Exception as e:
-                            self.app.log.error("FlatCAMObj.GerberObject.export_gerber() 'clear' --> %s" % str(e))
+            writer.write('G36*\n')
+            writer.geometry_coords(poly.exterior, suffix='D01*\n', first_suffix='D02*\n')
+            writer.write('D02*\nG37*\n')
 
-        if not self.tools:
-            self.app.log.debug("FlatCAMObj.GerberObject.export_gerber() --> Gerber Object is empty: no apertures.")
-            return 'fail'
+            if poly.interiors:
+                writer.write('%LPC*%\n')
+                for interior in poly.interiors:
+                    writer.write('G36*\n')
+                    writer.geometry_coords(interior, suffix='D01*\n', first_suffix='D02*\n', dedupe=True)
+                    writer.write('D02*\nG37*\n')
+                writer.write('%LPD*%\n')
 
-        return gerber_code
+    @staticmethod
+    def export_gerber_paths(writer, geo):
+        """
+        Writes a geometry element as flashes (the points) and tracks (the lines and the outlines of the polygons)
+        made with the current aperture.
+
+        :param writer:  the writer of the Gerber code
+        :type writer:   CoordinateWriter
+        :param geo:     Shapely geometry element
+        :return:        None
+        """
+        if geo.is_empty:
+            return
+
+        if isinstance(geo, Point):
+            writer.geometry_coords(geo, suffix='D03*\n')
+        elif isinstance(geo, Polygon):
+            for ring in [geo.exterior] + list(geo.interiors):
+                GerberObject.export_gerber_paths(writer, ring)
+        elif hasattr(geo, 'geoms'):
+            for geo_part in geo.geoms:
+                GerberObject.export_gerber_paths(writer, geo_part)
+        else:
+            # first command is a move with pen-up D02 at the beginning of the geo
+            writer.geometry_coords(geo, suffix='D01*\n', first_suffix='D02*\n', dedupe=True)
 
     @staticmethod
     def merge(grb_list, grb_final, app):
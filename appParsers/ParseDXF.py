@@ -7,6 +7,7 @@
 
 from appParsers.ParseDXF_Spline import spline2Polyline, normalize_2
 from appParsers.ParseDXF_Spline import Vector as DxfVector
+from appCommon.Arcs import arc_steps, arc_points
 
 from shapely import LineString, Point, Polygon
 from shapely.affinity import rotate, translate, scale
@@ -60,7 +61,7 @@ def dxfcircle2shapely(circle, n_points=100):
     return geo
 
 
-def dxfarc2shapely(arc, n_points=100):
+def dxfarc2shapely(arc, n_points=100, tolerance=None):
     # ocs = arc.ocs()
     # # if the extrusion attribute is not (0, 0, 1) then we have to change the coordinate system from OCS to WCS
     # if arc.dxf.extrusion != (0, 0, 1):
@@ -117,42 +118,28 @@ def dxfarc2shapely(arc, n_points=100):
         end_angle = arc.dxf.end_angle
         direction = 'CCW'
 
-    center_x = arc_center[0]
-    center_y = arc_center[1]
     radius = arc.dxf.radius
 
-    point_list = []
-
     if start_angle > end_angle:
         start_angle = start_angle - 360
-    angle = start_angle
+    start = math.radians(start_angle)
+    sweep = math.radians(end_angle - start_angle)
 
-    step_angle = float(abs(end_angle - start_angle) / n_points)
+    # the arcs of the flipped coordinate system are walked on the negative angles
+    if direction == 'CW':
+        start, sweep = -start, -sweep
 
-    while angle <= end_angle:
-        if direction == 'CCW':
-            x = center_x + radius * math.cos(math.radians(angle))
-            y = center_y + radius * math.sin(math.radians(angle))
-        else:
-            x = center_x + radius * math.cos(math.radians(-angle))
-            y = center_y + radius * math.sin(math.radians(-angle))
-        point_list.append((x, y))
-        angle += abs(step_angle)
-
-    # in case the number of segments do not cover everything until the end of the arc
-    if angle != end_angle:
-        if direction == 'CCW':
-            x = center_x + radius * math.cos(math.radians(end_angle))
-            y = center_y + radius * math.sin(math.radians(end_angle))
-        else:
-            x = center_x + radius * math.cos(math.radians(- end_angle))
-            y = center_y + radius * math.sin(math.radians(- end_angle))
-        point_list.append((x, y))
+    if tolerance:
+        steps = arc_steps([sweep], [radius], n_points, tolerance=tolerance)
+    else:
+        steps = [n_points]
+
+    points, __ = arc_points([(arc_center[0], arc_center[1])], [radius], [start], [sweep], steps)
 
-    # log.debug("X = %.4f, Y = %.4f, Radius = %.4f, start_angle = %.1f, stop_angle = %.1f, step_angle = %.4f" %
-    #           (center_x, center_y, radius, start_angle, end_angle, step_angle))
+    # log.debug("X = %.4f, Y = %.4f, Radius = %.4f, start_angle = %.1f, stop_angle = %.1f, steps = %d" %
+    #           (arc_center[0], arc_center[1], radius, start_angle, end_angle, steps[0]))
 
-    geo = LineString(point_list)
+    geo = LineString(points)
     return geo
 
 
@@ -282,17 +269,17 @@ def dxftrace2shapely(trace):
         return Polygon(corner_list)
 
 
-def getdxfgeo(dxf_object):
+def getdxfgeo(dxf_object, tolerance=None):
 
     msp = dxf_object.modelspace()
-    geos = get_geo(dxf_object, msp)
+    geos = get_geo(dxf_object, msp, tolerance=tolerance)
 
     # geo_block = get_geo_from_block(dxf_object)
 
     return geos
 
 
-def get_geo_from_insert(dxf_object, insert):
+def get_geo_from_insert(dxf_object, insert, tolerance=None):
     geo_block_transformed = []
 
     phi = insert.dxf.rotation
@@ -311,7 +298,7 @@ def get_geo_from_insert(dxf_object, insert):
     block_coords = (block.block.dxf.base_point[0], block.block.dxf.base_point[1])
 
     # get a list of geometries found in the block
-    geo_block = get_geo(dxf_object, block)
+    geo_block = get_geo(dxf_object, block, tolerance=tolerance)
 
     # iterate over the geometries found and apply any transformation found in the 'INSERT' entity attributes
     for geo in geo_block:
@@ -343,7 +330,7 @@ def get_geo_from_insert(dxf_object, insert):
     return geo_block_transformed
 
 
-def get_geo(dxf_object, container):
+def get_geo(dxf_object, container, tolerance=None):
     # store shapely geometry here
     geo = []
 
@@ -357,7 +344,7 @@ def get_geo(dxf_object, container):
         elif dxf_entity.dxftype() == 'CIRCLE':
             g = dxfcircle2shapely(dxf_entity)
         elif dxf_entity.dxftype() == 'ARC':
-            g = dxfarc2shapely(dxf_entity)
+            g = dxfarc2shapely(dxf_entity, tolerance=tolerance)
         elif dxf_entity.dxftype() == 'ELLIPSE':
             g = dxfellipse2shapely(dxf_entity)
         elif dxf_entity.dxftype() == 'LWPOLYLINE':
@@ -371,7 +358,7 @@ def get_geo(dxf_object, container):
         elif dxf_entity.dxftype() == 'SPLINE':
             g = dxfspline2shapely(dxf_entity)
         elif dxf_entity.dxftype() == 'INSERT':
-            g = get_geo_from_insert(dxf_object, dxf_entity)
+            g = get_geo_from_insert(dxf_object, dxf_entity, tolerance=tolerance)
         else:
             log.debug(" %s is not supported yet." % dxf_entity.dxftype())
 
@@ -7,7 +7,9 @@
 # ########################################################## ##
 
 from camlib import Geometry, grace
+from appCommon.AffineTransform import AffineTransform
 
+import shapely
 import shapely.affinity as affinity
 from shapely import Point, LineString, LinearRing, MultiLineString, MultiPolygon
 import numpy as np
@@ -45,6 +47,7 @@ class Excellon(Geometry):
     slots             List that store the Shapely Points for slots. Each is a tuple: (start_point, stop_point)
     data              dictionary which holds the options for each tool
     solid_geometry    Geometry list for each tool
+    lightweight       True if the drill circles are not in solid_geometry (only the slots are)
     ================  ====================================
 
     """
@@ -82,6 +85,13 @@ class Excellon(Geometry):
 
         self.source_file = ''
 
+        # if True the drills are kept only as points: the drill circles are not stored in the tools 'solid_geometry'
+        # (the tools are flagged with the 'lightweight' key) but they are made when needed by tool_geometry(), from the
+        # drill centers kept in self.drills_xy
+        self.lightweight_drills = False
+        # the drill centers for each tool, as (N, 2) arrays
+        self.drills_xy = {}
+
         # it serves to flag if a start routing or a stop routing was encountered
         # if a stop is encounter and this flag is still 0 (so there is no stop for a previous start) issue error
         self.routing_flag = 1
@@ -1047,7 +1057,7 @@ class Excellon(Geometry):
             self.app.log.error("Aborted. Operation could not be completed due of %s" % str(e))
             return
 
-    def create_geometry(self):
+    def create_geometry(self, lightweight=None):
         """
         Creates circles of the tool diameter at every point
         specified in self.tools[tool]['drills'].
@@ -1064,45 +1074,55 @@ class Excellon(Geometry):
         tool_diameter     list of (Shapely.Point) Where to drill
         ================  ====================================
 
+        :param lightweight: If True the drill circles are not stored, only the drill centers as NumPy arrays;
+                            the circles are made when they are needed by tool_geometry().
+                            If None, the value of self.lightweight_drills is used.
+        :type lightweight:  bool | None
         :return: None
         """
 
         self.app.log.debug("appParsers.ParseExcellon.Excellon.create_geometry()")
-        self.solid_geometry = []
-        try:
-            # clear the solid_geometry in self.tools
-            for tool in self.tools:
-                self.tools[tool]['solid_geometry'] = []
-                self.tools[tool]['data'] = {}
+        if lightweight is not None:
+            self.lightweight_drills = lightweight
 
+        # self._solid_geometry is used so the lightweight drill circles are not made while the geometry is created
+        self._solid_geometry = []
+        self.drills_xy = {}
+        try:
             for tool in self.tools:
-                tooldia = self.tools[tool]['tooldia']
-
-                if 'drills' in self.tools[tool]:
-                    for drill in self.tools[tool]['drills']:
-                        poly = drill.buffer(tooldia / 2.0, int(self.excellon_circle_steps))
-
-                        # add poly in the tools geometry
-                        self.tools[tool]['solid_geometry'].append(poly)
-                        self.tools[tool]['data'] = deepcopy(self.default_data)
+                tool_dict = self.tools[tool]
+                # clear the solid_geometry in self.tools
+                tool_dict['solid_geometry'] = []
+                tool_dict['data'] = {}
+                # signal that the drill circles are not in the tool 'solid_geometry'
+                tool_dict['lightweight'] = bool(self.lightweight_drills)
+
+                drills = tool_dict['drills'] if 'drills' in tool_dict else []
+                slots = tool_dict['slots'] if 'slots' in tool_dict else []
+                if len(drills) == 0 and len(slots) == 0:
+                    continue
 
-                        # add poly to the total solid geometry
-                        self.solid_geometry.append(poly)
+                # one copy of the default data for each tool
+                tool_dict['data'] = deepcopy(self.default_data)
+                radius = tool_dict['tooldia'] / 2.0
 
-                if 'slots' in self.tools[tool]:
-                    for slot in self.tools[tool]['slots']:
-                        start = slot[0]
-                        stop = slot[1]
+                if len(drills) > 0:
+                    self.drills_xy[tool] = shapely.get_coordinates(drills)
+                    if not self.lightweight_drills:
+                        polys = self.drill_circles(self.drills_xy[tool], radius).tolist()
 
-                        lines_string = LineString([start, stop])
-                        poly = lines_string.buffer(tooldia / 2.0, int(self.excellon_circle_steps))
+                        # add the polygons in the tools geometry and in the total solid geometry
+                        tool_dict['solid_geometry'] += polys
+                        self._solid_geometry += polys
 
-                        # add poly in the tools geometry
-                        self.tools[tool]['solid_geometry'].append(poly)
-                        self.tools[tool]['data'] = deepcopy(self.default_data)
+                if len(slots) > 0:
+                    slots_coords = shapely.get_coordinates([pt for slot in slots for pt in slot[:2]]).reshape(-1, 2, 2)
+                    polys = shapely.buffer(shapely.linestrings(slots_coords), radius,
+                                           quad_segs=int(self.excellon_circle_steps)).tolist()
 
-                        # add poly to the total solid geometry
-                        self.solid_geometry.append(poly)
+                    # add the polygons in the tools geometry and in the total solid geometry
+                    tool_dict['solid_geometry'] += polys
+                    self._solid_geometry += polys
 
         except Exception as e:
             err_msg = "appParsers.ParseExcellon.Excellon.create_geometry() -> " \
@@ -1110,6 +1130,86 @@ class Excellon(Geometry):
             self.app.log.error(err_msg)
             return "fail"
 
+    @property
+    def solid_geometry(self):
+        """
+        The geometry of all the tools. When the drills are lightweight the drill circles are made on the first access
+        and they are stored in the object and in the tools 'solid_geometry' (see make_drill_geometry()).
+
+        :return:    List of Polygons or None
+        :rtype:     list
+        """
+        if self._solid_geometry is not None and any(t.get('lightweight', False) for t in self.tools.values()):
+            self.make_drill_geometry()
+        return self._solid_geometry
+
+    @solid_geometry.setter
+    def solid_geometry(self, geometry):
+        self._solid_geometry = geometry
+
+    def make_drill_geometry(self):
+        """
+        Makes the drill circles of the lightweight tools and adds them to the tools 'solid_geometry' and to the
+        object solid_geometry. After this the tools are no longer lightweight.
+
+        :return:    None
+        """
+        if self._solid_geometry is None:
+            self._solid_geometry = []
+
+        for tool, tool_dict in self.tools.items():
+            if not tool_dict.get('lightweight', False):
+                continue
+            tool_dict['lightweight'] = False
+
+            centers = self.drill_centers(tool)
+            if len(centers) == 0:
+                continue
+            polys = self.drill_circles(centers, tool_dict['tooldia'] / 2.0).tolist()
+            tool_dict['solid_geometry'] = polys + list(tool_dict.get('solid_geometry', []))
+            self._solid_geometry += polys
+
+    def drill_circles(self, centers, radius):
+        """
+        :param centers:     The drill centers
+        :type centers:      np.ndarray
+        :param radius:      The drill radius
+        :type radius:       float
+        :return:            Array of the drill circles (Polygons)
+        :rtype:             np.ndarray
+        """
+        return shapely.buffer(shapely.points(centers), radius, quad_segs=int(self.excellon_circle_steps))
+
+    def drill_centers(self, tool):
+        """
+        :param tool:    A key in self.tools
+        :return:        The drill centers of the tool as an (N, 2) array
+        :rtype:         np.ndarray
+        """
+        try:
+            return self.drills_xy[tool]
+        except KeyError:
+            drills = self.tools[tool]['drills'] if 'drills' in self.tools[tool] else []
+            self.drills_xy[tool] = shapely.get_coordinates(drills) if len(drills) else np.empty((0, 2))
+            return self.drills_xy[tool]
+
+    def tool_geometry(self, tool):
+        """
+        The geometry of the drills and of the slots of a tool. When the drills are lightweight (only their centers are
+        kept) the drill circles are made now and they are not stored.
+
+        :param tool:    A key in self.tools
+        :return:        List of Polygons
+        :rtype:         list
+        """
+        tool_dict = self.tools[tool]
+        solid_geometry = tool_dict['solid_geometry'] if 'solid_geometry' in tool_dict else []
+        if not tool_dict.get('lightweight', False) or len(self.drill_centers(tool)) == 0:
+            return solid_geometry
+
+        circles = self.drill_circles(self.drill_centers(tool), tool_dict['tooldia'] / 2.0).tolist()
+        return circles + list(solid_geometry)
+
     def bounds(self, flatten=None):
         """
         Returns coordinates of rectangular bounds
@@ -1120,7 +1220,8 @@ class Excellon(Geometry):
 
         self.app.log.debug("appParsers.ParseExcellon.Excellon.bounds()")
 
-        if self.solid_geometry is None or not self.tools:
+        # self._solid_geometry is checked so the lightweight drill circles are not made here
+        if self._solid_geometry is None or not self.tools:
             self.app.log.debug("appParsers.ParseExcellon.Excellon -> solid_geometry is None")
             return 0, 0, 0, 0
 
@@ -1157,6 +1258,14 @@ class Excellon(Geometry):
 
         for tool in self.tools:
             eminx, eminy, emaxx, emaxy = bounds_rec(self.tools[tool]['solid_geometry'])
+            centers = self.drill_centers(tool) if self.tools[tool].get('lightweight', False) else []
+            if len(centers) > 0:
+                # the drill circles are not stored, use the drill centers
+                radius = self.tools[tool]['tooldia'] / 2.0
+                eminx = min(eminx, float(centers[:, 0].min()) - radius)
+                eminy = min(eminy, float(centers[:, 1].min()) - radius)
+                emaxx = max(emaxx, float(centers[:, 0].max()) + radius)
+                emaxy = max(emaxy, float(centers[:, 1].max()) + radius)
             minx_list.append(eminx)
             miny_list.append(eminy)
             maxx_list.append(emaxx)
@@ -1205,6 +1314,24 @@ class Excellon(Geometry):
         self.create_geometry()
         return factor
 
+    def affine_transform(self, transform):
+        """
+        Transforms with an affine transformation the drills and the slots of all the tools, at once, and then
+        recreates the geometry.
+
+        :param transform:   The transformation
+        :type transform:    AffineTransform
+        :return:            None
+        """
+        tools_geo = [{k: self.tools[tool][k] for k in ('drills', 'slots') if k in self.tools[tool]}
+                     for tool in self.tools]
+        # the dictionaries are updated in place
+        transform.apply(tools_geo, progress=self.transform_progress)
+        for tool, tool_geo in zip(self.tools, tools_geo):
+            self.tools[tool].update(tool_geo)
+
+        self.create_geometry()
+
     def scale(self, xfactor, yfactor=None, point=None):
         """
         Scales geometry on the XY plane in the object by a given factor.
@@ -1232,56 +1359,7 @@ class Excellon(Geometry):
         if xfactor == 0 and yfactor == 0:
             return
 
-        def scale_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(scale_geom(g))
-                return new_obj
-            else:
-                try:
-                    return affinity.scale(obj, xfactor, yfactor, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for tool in self.tools:
-            # Scale Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.scale(drill, xfactor, yfactor, origin=(px, py)))
-                self.tools[tool]['drills'] = new_drills
-
-            # Scale Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.scale(slot[0], xfactor, yfactor, origin=(px, py))
-                    new_stop = affinity.scale(slot[1], xfactor, yfactor, origin=(px, py))
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Scale solid_geometry
-            self.tools[tool]['solid_geometry'] = scale_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        self.create_geometry()
+        self.affine_transform(AffineTransform().scale(xfactor, yfactor, origin=(px, py)))
         self.app.proc_container.new_text = ''
 
     def offset(self, vect):
@@ -1299,57 +1377,7 @@ class Excellon(Geometry):
         if dx == 0 and dy == 0:
             return
 
-        def offset_geom(obj):
-            try:
-                new_obj = []
-                for geo in obj:
-                    new_obj.append(offset_geom(geo))
-                return new_obj
-            except TypeError:
-                try:
-                    return affinity.translate(obj, xoff=dx, yoff=dy)
-                except AttributeError:
-                    return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.translate(drill, xoff=dx, yoff=dy))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.translate(slot[0], xoff=dx, yoff=dy)
-                    new_stop = affinity.translate(slot[1], xoff=dx, yoff=dy)
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = offset_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        # Recreate geometry
-        self.create_geometry()
+        self.affine_transform(AffineTransform().translate(dx, dy))
         self.app.proc_container.new_text = ''
 
     def mirror(self, axis, point):
@@ -1364,61 +1392,7 @@ class Excellon(Geometry):
         self.app.log.debug("appParsers.ParseExcellon.Excellon.mirror()")
 
         px, py = point
-        xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
-
-        def mirror_geom(obj):
-            try:
-                new_obj = []
-                for geo in obj:
-                    new_obj.append(mirror_geom(geo))
-                return new_obj
-            except TypeError:
-                try:
-                    return affinity.scale(obj, xscale, yscale, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        # Modify data
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.scale(drill, xscale, yscale, origin=(px, py)))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.scale(slot[0], xscale, yscale, origin=(px, py))
-                    new_stop = affinity.scale(slot[1], xscale, yscale, origin=(px, py))
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = mirror_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        # Recreate geometry
-        self.create_geometry()
+        self.affine_transform(AffineTransform().mirror(axis, origin=(px, py)))
         self.app.proc_container.new_text = ''
 
     def skew(self, angle_x=None, angle_y=None, point=None):
@@ -1447,61 +1421,12 @@ class Excellon(Geometry):
         if angle_x == 0 and angle_y == 0:
             return
 
-        def skew_geom(obj):
-            try:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(skew_geom(g))
-                return new_obj
-            except TypeError:
-                try:
-                    return affinity.skew(obj, angle_x, angle_y, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
         if point is None:
             px, py = 0, 0
         else:
             px, py = point
 
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.skew(drill, angle_x, angle_y, origin=(px, py)))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.skew(slot[0], angle_x, angle_y, origin=(px, py))
-                    new_stop = affinity.skew(slot[1], angle_x, angle_y, origin=(px, py))
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = skew_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        self.create_geometry()
+        self.affine_transform(AffineTransform().skew(angle_x, angle_y, origin=(px, py)))
         self.app.proc_container.new_text = ''
 
     def rotate(self, angle, point=None):
@@ -1509,7 +1434,7 @@ class Excellon(Geometry):
         Rotate the geometry of an object by an angle around the 'point' coordinates
 
         :param angle:
-        :param point:   tuple of coordinates (x, y)
+        :param point:   tuple of coordinates (x, y); if None the center of the bounding box is used
         :return:        None
         """
         self.app.log.debug("appParsers.ParseExcellon.Excellon.rotate()")
@@ -1517,67 +1442,14 @@ class Excellon(Geometry):
         if angle == 0:
             return
 
-        def rotate_geom(obj, origin=None):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(rotate_geom(g))
-                return new_obj
-            else:
-                if origin:
-                    try:
-                        return affinity.rotate(obj, angle, origin=origin)
-                    except AttributeError:
-                        return obj
-                else:
-                    try:
-                        return affinity.rotate(obj, angle, origin=orig)
-                    except AttributeError:
-                        return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
         if point is None:
-            orig = 'center'
+            # rotate around the center of the bounding box
+            xmin, ymin, xmax, ymax = self.bounds()
+            px, py = (xmin + xmax) / 2.0, (ymin + ymax) / 2.0
         else:
-            orig = point
-
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.rotate(drill, angle, origin=orig))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.rotate(slot[0], angle, origin=orig)
-                    new_stop = affinity.rotate(slot[1], angle, origin=orig)
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = rotate_geom(self.tools[tool]['solid_geometry'], origin=orig)
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
+            px, py = point
 
-        self.create_geometry()
+        self.affine_transform(AffineTransform().rotate(angle, origin=(px, py)))
         self.app.proc_container.new_text = ''
 
     def buffer(self, distance, join, factor, only_exterior=False):
@@ -1,14 +1,18 @@
 
 from PyQt6 import QtWidgets
 from camlib import Geometry, arc, arc_angle, ApertureMacro, grace, flatten_shapely_geometry
+from appCommon.AffineTransform import AffineTransform
+from appCommon.Arcs import arc_tolerance
 
 from appParsers.ParseDXF import getdxfgeo
 from appParsers.ParseSVG import svgparselength, getsvggeo, svgparse_viewbox
 
 import numpy as np
 import traceback
+import time
 from copy import deepcopy
 
+import shapely
 from shapely.ops import unary_union, linemerge
 import shapely.affinity as affinity
 from shapely import box as shply_box
@@ -76,6 +80,9 @@ class Gerber(Geometry):
 
     app = None
 
+    # polarity blocks with at least this many polygons are joined in tiles, in the app process pool
+    union_tile_threshold = 2000
+
     def __init__(self, steps_per_circle=None):
         """
         Use ``gerber.parse_files()`` or ``gerber.parse_lines()`` to populate the object from Gerber source.
@@ -143,6 +150,7 @@ class Gerber(Geometry):
         # it allows adding data into the clear_geometry key of the self.tools[aperture] dict
         self.is_lpc = False
 
+        # the Gerber source is stored as a list of chunks that are joined only when the source_file is requested
         self.source_file = ''
 
         # #############################################################################################################
@@ -248,6 +256,23 @@ class Gerber(Geometry):
         # from Geometry.
         self.ser_attrs += ['tools', 'int_digits', 'frac_digits', 'aperture_macros', 'solid_geometry', 'source_file']
 
+    @property
+    def source_file(self):
+        """
+        The Gerber source. While parsing, the lines are collected in a list, and they are joined into a string only
+        when this attribute is read.
+
+        :return:    The Gerber source
+        :rtype:     str
+        """
+        if len(self._source_chunks) > 1:
+            self._source_chunks = [''.join(self._source_chunks)]
+        return self._source_chunks[0] if self._source_chunks else ''
+
+    @source_file.setter
+    def source_file(self, value):
+        self._source_chunks = [value]
+
     def aperture_parse(self, apertureId, apertureType, apParameters):
         """
         Parse gerber aperture definition into dictionary of apertures.
@@ -347,45 +372,9 @@ class Gerber(Geometry):
         """
 
         with open(filename, 'r') as gfile:
-
-            read_gfile = gfile.read()
-
-            # clean KiCAD files of garbage
-            if '%TF.' in read_gfile or '%TO.' in read_gfile or '%TD' in read_gfile or '%TA' in read_gfile:
-                new_gfile = ""
-                for line in read_gfile.splitlines():
-                    if '%TF.' in line or '%TO.' in line or '%TD' in line or '%TA' in line:
-                        continue
-                    new_gfile += '%s\n' % line
-                split_lines = new_gfile.splitlines()
-            else:
-                split_lines = read_gfile.splitlines()
-
-            def line_generator():
-                for line in split_lines:
-                    line = line.strip(' \r\n')
-                    while len(line) > 0:
-
-                        # If ends with '%' leave as is.
-                        if line[-1] == '%':
-                            yield line
-                            break
-
-                        # Split after '*' if any.
-                        starpos = line.find('*')
-                        if starpos > -1:
-                            cleanline = line[:starpos + 1]
-                            yield cleanline
-                            line = line[starpos + 1:]
-
-                        # Otherwise leave as is.
-                        else:
-                            # yield clean line
-                            yield line
-                            break
-
-            processed_lines = list(line_generator())
-            ret_val = self.parse_lines(processed_lines)
+            # the file is consumed line by line through the buffered reader and the statements are fed to the
+            # parser as they are found, so the file content is never held in memory as a whole
+            ret_val = self.parse_lines(self.line_generator(gfile))
 
             if ret_val == 'fail':
                 return 'fail'
@@ -396,13 +385,48 @@ class Gerber(Geometry):
             else:
                 return
 
+    @staticmethod
+    def line_generator(gfile):
+        """
+        Yields the Gerber statements found in the lines of a Gerber source. The lines are split after each '*' if
+        multiple statements are found in a single line, except the lines that end with '%' which are left as they
+        are. The lines holding X2 attributes (KiCAD files) are skipped.
+
+        :param gfile:   An iterable of lines; an opened file object or a list of strings
+        :type gfile:    Any
+        :return:        Generator of Gerber statements
+        :rtype:         Generator
+        """
+        for line in gfile:
+            # clean KiCAD files of garbage
+            if '%TF.' in line or '%TO.' in line or '%TD' in line or '%TA' in line:
+                continue
+
+            line = line.strip(' \r\n')
+            if not line:
+                continue
+
+            # If ends with '%' leave as is.
+            if line[-1] == '%':
+                yield line
+                continue
+
+            # Split after '*' if any.
+            statements = line.split('*')
+            for statement in statements[:-1]:
+                yield statement + '*'
+
+            # Otherwise leave as is.
+            if statements[-1]:
+                yield statements[-1]
+
     # @profile
     def parse_lines(self, glines):
         """
         Main Gerber parser. Reads Gerber and populates ``self.paths``, ``self.tools``,
         ``self.flashes``, ``self.regions`` and ``self.units``.
 
-        :param glines: Gerber code as list of strings, each element being
+        :param glines: Gerber code as list (or any iterable) of strings, each element being
             one line of the source file.
         :type glines: list
         :return: only errors/warnings
@@ -468,7 +492,19 @@ class Gerber(Geometry):
 
         s_tol = float(self.app.options["gerber_simp_tolerance"])
 
-        self.app.inform.emit('%s %d %s.' % (_("Gerber processing. Parsing"), len(glines), _("Lines").lower()))
+        # timing breakdown: the union of the polarity blocks and the polarity apply; the rest is parsing
+        t_start = time.time()
+        t_union = 0.0
+        t_polarity = 0.0
+
+        try:
+            self.app.inform.emit('%s %d %s.' % (_("Gerber processing. Parsing"), len(glines), _("Lines").lower()))
+        except TypeError:
+            # the lines are streamed from a generator
+            self.app.inform.emit('%s...' % _("Gerber processing. Parsing"))
+
+        # the source lines are collected here and joined only when the source_file attribute is read
+        source_chunks = self._source_chunks
         try:
             for gline in glines:
                 if self.app.abort_flag:
@@ -476,7 +512,7 @@ class Gerber(Geometry):
                     raise grace
 
                 line_num += 1
-                self.source_file += gline + '\n'
+                source_chunks.append(gline + '\n')
 
                 # Cleanup #
                 gline = gline.strip(' \r\n')
@@ -564,11 +600,16 @@ class Gerber(Geometry):
                         buff_length = 1
 
                     if buff_length > 0:
+                        t0 = time.time()
+                        block_poly = self.union_polygon_buffer(poly_buffer)
+                        t1 = time.time()
                         if current_polarity == 'D':
-                            self.solid_geometry = self.solid_geometry.union(unary_union(poly_buffer))
+                            self.solid_geometry = self.solid_geometry.union(block_poly)
 
                         else:
-                            self.solid_geometry = self.solid_geometry.difference(unary_union(poly_buffer))
+                            self.solid_geometry = self.solid_geometry.difference(block_poly)
+                        t_union += t1 - t0
+                        t_polarity += time.time() - t1
 
                         # follow_buffer = []
                         poly_buffer = []
@@ -1543,7 +1584,7 @@ class Gerber(Geometry):
 
                         this_arc = arc(center, radius, start, stop,
                                        arcdir[current_interpolation_mode],
-                                       self.steps_per_circle)
+                                       self.steps_per_circle, tolerance=arc_tolerance(self.app, self.units))
 
                         # The last point in the computed arc can have
                         # numerical errors. The exact final point is the
@@ -1597,7 +1638,7 @@ class Gerber(Geometry):
                                 # self.app.log.debug("########## ACCEPTING ARC ############")
                                 this_arc = arc(center, radius, start, stop,
                                                arcdir[current_interpolation_mode],
-                                               self.steps_per_circle)
+                                               self.steps_per_circle, tolerance=arc_tolerance(self.app, self.units))
 
                                 # Replace with exact values
                                 this_arc[-1] = (circular_x, circular_y)
@@ -1705,6 +1746,8 @@ class Gerber(Geometry):
             self.app.log.warning("Joining %d polygons." % buff_length)
             self.app.inform.emit('%s: %d.' % (_("Gerber processing. Joining polygons"), buff_length))
 
+            t0 = time.time()
+
             if self.use_buffer_for_union:
                 self.app.log.debug("Union by buffer...")
 
@@ -1716,13 +1759,15 @@ class Gerber(Geometry):
 
             else:
                 self.app.log.debug("Union by union()...")
-                new_poly = unary_union(poly_buffer)
+                new_poly = self.union_polygon_buffer(poly_buffer)
                 new_poly = new_poly.buffer(0, int(self.steps_per_circle))
                 self.app.log.warning("Union done.")
 
             # #########################################################################################################
             prepare(new_poly)
             # #########################################################################################################
+            t1 = time.time()
+            t_union += t1 - t0
 
             if current_polarity == 'D':
                 self.app.inform.emit('%s' % _("Gerber processing. Applying Gerber polarity."))
@@ -1774,6 +1819,11 @@ class Gerber(Geometry):
             prepare(self.solid_geometry)
             # #########################################################################################################
             # print(f"Time elapsed: {time.time() - start}; Is prepared? {is_prepared(self.solid_geometry)}")
+            t_end = time.time()
+            t_polarity += t_end - t1
+
+            self.app.log.debug("Gerber.parse_lines() timing -> parse: %.3fs, union: %.3fs, polarity apply: %.3fs" %
+                               (t_end - t_start - t_union - t_polarity, t_union, t_polarity))
 
             if self.app.options['gerber_clean_apertures']:
                 # clean the Gerber file of apertures with no geometry
@@ -1801,6 +1851,78 @@ class Gerber(Geometry):
         if is_excellon_gx2 is True:
             return 'drill'
 
+    def union_polygon_buffer(self, poly_buffer):
+        """
+        Makes the union of the polygons collected in a polarity block.
+        Large blocks are split in a grid of tiles, by the center of the polygons bounding box. Each tile is joined
+        in the app process pool and then the tile results are joined, which leaves only the seams between the tiles
+        to be solved on the current thread.
+
+        :param poly_buffer:     Polygons to be joined
+        :type poly_buffer:      list
+        :return:                The union of the polygons
+        :rtype:                 Polygon | MultiPolygon
+        """
+        pool = getattr(self.app, 'pool', None)
+        nr_proc = int(self.app.options["global_process_number"])
+        if pool is None or nr_proc < 2 or len(poly_buffer) < self.union_tile_threshold:
+            return unary_union(poly_buffer)
+
+        geo_arr = np.empty(len(poly_buffer), dtype=object)
+        geo_arr[:] = poly_buffer
+
+        # about two tiles for each worker process
+        side = max(2, int(np.ceil(np.sqrt(2 * nr_proc))))
+
+        geo_bounds = shapely.bounds(geo_arr)
+        centers = (geo_bounds[:, :2] + geo_bounds[:, 2:]) * 0.5
+        c_min = np.nanmin(centers, axis=0)
+        c_span = np.nanmax(centers, axis=0) - c_min
+        c_span[c_span == 0] = 1.0
+        cells = np.clip(np.nan_to_num((centers - c_min) / c_span * side).astype(int), 0, side - 1)
+        tile_ids = cells[:, 0] * side + cells[:, 1]
+
+        sort_idx = np.argsort(tile_ids, kind='stable')
+        split_at = np.flatnonzero(np.diff(tile_ids[sort_idx])) + 1
+
+        try:
+            results = [
+                pool.apply_async(self.union_tile, args=(shapely.to_wkb(geo_arr[tile_idx]).tolist(), ))
+                for tile_idx in np.split(sort_idx, split_at)
+            ]
+            tiles = [shapely.get_parts(shapely.from_wkb(res.get())) for res in results]
+        except Exception as err:
+            self.app.log.error("Gerber.union_polygon_buffer() -> tiled union failed, using a serial union: %s" %
+                               str(err))
+            return unary_union(poly_buffer)
+
+        # merge the seams between the tiles: only the pieces that intersect pieces from another tile are joined again
+        pieces = np.concatenate(tiles)
+        if not np.all(shapely.get_type_id(pieces) == shapely.GeometryType.POLYGON):
+            return unary_union(pieces)
+
+        piece_tile = np.repeat(np.arange(len(tiles)), [len(t) for t in tiles])
+        pairs = shapely.STRtree(pieces).query(pieces, predicate='intersects')
+        pairs = pairs[:, piece_tile[pairs[0]] != piece_tile[pairs[1]]]
+        on_seam = np.zeros(len(pieces), dtype=bool)
+        on_seam[pairs[0]] = True
+
+        # the pieces that are not on a seam are disjoint from each other and from the merged seam pieces
+        seam_geo = shapely.get_parts(unary_union(pieces[on_seam]))
+        return shapely.multipolygons(np.concatenate((pieces[~on_seam], seam_geo)))
+
+    @staticmethod
+    def union_tile(wkb_list):
+        """
+        Union of the polygons in a tile. It runs in a worker process therefore the geometry is passed as WKB.
+
+        :param wkb_list:    Polygons as WKB
+        :type wkb_list:     list
+        :return:            The union as WKB
+        :rtype:             bytes
+        """
+        return shapely.to_wkb(unary_union(shapely.from_wkb(wkb_list)))
+
     def create_flash_geometry(self, location, aperture, steps_per_circle=None):
 
         # self.app.log.debug('Flashing @%s, Aperture: %s' % (location, aperture))
@@ -2085,7 +2207,7 @@ class Gerber(Geometry):
 
         # Parse into list of shapely objects
         dxf = ezdxf.readfile(filename)
-        geos = getdxfgeo(dxf)
+        geos = getdxfgeo(dxf, tolerance=arc_tolerance(self.app, units))
 
         # trying to optimize the resulting geometry by merging contiguous lines
         geos = list(self.flatten_list(geos))
@@ -2140,6 +2262,22 @@ class Gerber(Geometry):
             new_el = {'solid': pol, 'follow': pol}
             self.tools[0]['geometry'].append(new_el)
 
+    def affine_transform(self, transform):
+        """
+        Transforms with an affine transformation the objects' geometry: the ``solid_geometry``, the
+        ``follow_geometry`` and the geometry stored in the apertures. All the geometry elements are transformed at
+        once.
+
+        :param transform:   The transformation
+        :type transform:    AffineTransform
+        :return:            None
+        """
+        self.buffer_cache.invalidate()
+
+        aperture_geo = [self.tools[apid]['geometry'] for apid in self.tools if 'geometry' in self.tools[apid]]
+        self.solid_geometry, self.follow_geometry, __ = transform.apply(
+            self.solid_geometry, self.follow_geometry, aperture_geo, progress=self.transform_progress)
+
     def scale(self, xfactor, yfactor=None, point=None):
         """
         Scales the objects' geometry on the XY plane by a given factor.
@@ -2190,57 +2328,11 @@ class Gerber(Geometry):
         else:
             px, py = point
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            if isinstance(self.solid_geometry, MultiPolygon):
-                self.geo_len = len(self.solid_geometry.geoms)
-            else:
-                self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def scale_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(scale_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 99]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.scale(obj, xfactor, yfactor, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = scale_geom(self.solid_geometry)
-        self.follow_geometry = scale_geom(self.follow_geometry)
-
         # we need to scale the geometry stored in the Gerber apertures, too
         try:
-            for apid in self.tools:
-                new_geometry = []
-                if 'geometry' in self.tools[apid]:
-                    for geo_el in self.tools[apid]['geometry']:
-                        new_geo_el = {}
-                        if 'solid' in geo_el:
-                            new_geo_el['solid'] = scale_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            new_geo_el['follow'] = scale_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            new_geo_el['clear'] = scale_geom(geo_el['clear'])
-                        new_geometry.append(new_geo_el)
-
-                self.tools[apid]['geometry'] = deepcopy(new_geometry)
+            self.affine_transform(AffineTransform().scale(xfactor, yfactor, origin=(px, py)))
 
+            for apid in self.tools:
                 try:
                     if str(self.tools[apid]['type']) == 'R' or str(self.tools[apid]['type']) == 'O':
                         self.tools[apid]['width'] *= xfactor
@@ -2304,53 +2396,9 @@ class Gerber(Geometry):
         if dx == 0 and dy == 0:
             return
 
-        # variables to display the percentage of work done
-        if isinstance(self.solid_geometry, (MultiPolygon, MultiLineString)):
-            self.geo_len = len(self.solid_geometry.geoms)
-        elif isinstance(self.solid_geometry, list):
-            self.geo_len = len(self.solid_geometry)
-        elif isinstance(self.solid_geometry, Polygon):
-            self.geo_len = 1
-        else:
-            self.geo_len = 0
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def offset_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(offset_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 99]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.translate(obj, xoff=dx, yoff=dy)
-                except AttributeError:
-                    return obj
-
-        # ## Solid geometry
-        self.solid_geometry = offset_geom(self.solid_geometry)
-        self.follow_geometry = offset_geom(self.follow_geometry)
-
         # we need to offset the geometry stored in the Gerber apertures, too
         try:
-            for apid in self.tools:
-                if 'geometry' in self.tools[apid]:
-                    for geo_el in self.tools[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = offset_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = offset_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = offset_geom(geo_el['clear'])
-
+            self.affine_transform(AffineTransform().translate(dx, dy))
         except Exception as e:
             self.app.log.error('ParseGerber.Gerber.offset() Exception --> %s' % str(e))
             return 'fail'
@@ -2382,50 +2430,10 @@ class Gerber(Geometry):
         self.app.log.debug("parseGerber.Gerber.mirror()")
 
         px, py = point
-        xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def mirror_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(mirror_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 99]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.scale(obj, xscale, yscale, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = mirror_geom(self.solid_geometry)
-        self.follow_geometry = mirror_geom(self.follow_geometry)
 
         # we need to mirror the geometry stored in the Gerber apertures, too
         try:
-            for apid in self.tools:
-                if 'geometry' in self.tools[apid]:
-                    for geo_el in self.tools[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = mirror_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = mirror_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = mirror_geom(geo_el['clear'])
+            self.affine_transform(AffineTransform().mirror(axis, origin=(px, py)))
         except Exception as e:
             self.app.log.error('ParseGerber.Gerber.mirror() Exception --> %s' % str(e))
             return 'fail'
@@ -2458,48 +2466,9 @@ class Gerber(Geometry):
         if angle_x == 0 and angle_y == 0:
             return
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def skew_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(skew_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.skew(obj, angle_x, angle_y, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = skew_geom(self.solid_geometry)
-        self.follow_geometry = skew_geom(self.follow_geometry)
-
         # we need to skew the geometry stored in the Gerber apertures, too
         try:
-            for apid in self.tools:
-                if 'geometry' in self.tools[apid]:
-                    for geo_el in self.tools[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = skew_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = skew_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = skew_geom(geo_el['clear'])
+            self.affine_transform(AffineTransform().skew(angle_x, angle_y, origin=(px, py)))
         except Exception as e:
             self.app.log.error('ParseGerber.Gerber.skew() Exception --> %s' % str(e))
             return 'fail'
@@ -2521,48 +2490,9 @@ class Gerber(Geometry):
         if angle == 0:
             return
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def rotate_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(rotate_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.rotate(obj, angle, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = rotate_geom(self.solid_geometry)
-        self.follow_geometry = rotate_geom(self.follow_geometry)
-
         # we need to rotate the geometry stored in the Gerber apertures, too
         try:
-            for apid in self.tools:
-                if 'geometry' in self.tools[apid]:
-                    for geo_el in self.tools[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = rotate_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = rotate_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = rotate_geom(geo_el['clear'])
+            self.affine_transform(AffineTransform().rotate(angle, origin=(px, py)))
         except Exception as e:
             self.app.log.error('ParseGerber.Gerber.rotate() Exception --> %s' % str(e))
             return 'fail'
@@ -2583,6 +2513,8 @@ class Gerber(Geometry):
         if distance == 0:
             return
 
+        self.buffer_cache.invalidate()
+
         # variables to display the percentage of work done
         self.geo_len = 0
         try:
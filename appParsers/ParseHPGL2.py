@@ -7,6 +7,7 @@
 # ############################################################
 
 from camlib import arc, three_point_circle, grace
+from appCommon.Arcs import arc_tolerance
 
 import numpy as np
 import re
@@ -358,7 +359,8 @@ class HPGL2:
                             startangle = np.arctan2(p1[1] - center[1], p1[0] - center[0])
                             stopangle = startangle + angle
 
-                            geo = LineString(arc(center, radius, startangle, stopangle, arcdir, self.steps_per_circle))
+                            geo = LineString(arc(center, radius, startangle, stopangle, arcdir, self.steps_per_circle,
+                                                 tolerance=arc_tolerance(self.app, self.units)))
                             self.tools[current_tool]['solid_geometry'].append(geo)
                             geo_buffer.append(geo)
 
@@ -399,7 +401,8 @@ class HPGL2:
                             stopangle = np.arctan2(p3[1] - center[1], p3[0] - center[0])
 
                             geo = LineString(arc(center, radius, startangle, stopangle,
-                                                 direction, self.steps_per_circle))
+                                                 direction, self.steps_per_circle,
+                                                 tolerance=arc_tolerance(self.app, self.units)))
                             self.tools[current_tool]['solid_geometry'].append(geo)
                             geo_buffer.append(geo)
 
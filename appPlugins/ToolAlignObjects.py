@@ -12,6 +12,8 @@ from appGUI.GUIElements import VerticalScrollArea, FCLabel, FCButton, FCFrame, G
 from shapely import Point
 from shapely.affinity import translate
 
+from appCommon.AffineTransform import AffineTransform
+
 import logging
 import math
 
@@ -305,18 +307,34 @@ class AlignObjects(AppTool):
             self.set_color()
 
         if len(self.clicked_points) == 4:
-            self.align_translate()
-            self.align_rotate()
+            self.align_translate(rotate=True)
             self.app.inform.emit('[success] %s' % _("Done."))
 
             self.disconnect_cal_events()
             self.app.plot_all()
 
-    def align_translate(self):
+    def align_translate(self, rotate=False):
+        """
+        Moves the aligned object so the START point is on the DESTINATION point and, for the dual point alignment,
+        rotates it around the first DESTINATION point so the second START point is aligned too. The translation and
+        the rotation are fused into a single transformation.
+
+        :param rotate:  If True the object is rotated, too
+        :type rotate:   bool
+        :return:        None
+        """
         dx = self.clicked_points[1][0] - self.clicked_points[0][0]
         dy = self.clicked_points[1][1] - self.clicked_points[0][1]
 
-        self.aligned_obj.offset((dx, dy))
+        transform = AffineTransform().translate(dx, dy)
+        if rotate is True:
+            angle = self.align_rotation_angle(dx, dy)
+            if angle is not None:
+                transform = transform.rotate(angle, origin=self.clicked_points[1])
+
+        self.aligned_obj.affine_transform(transform)
+        if self.aligned_obj.kind.lower() == 'gerber':
+            self.aligned_obj.replotApertures.emit()
 
         # Update the object bounding box options
         a, b, c, d = self.aligned_obj.bounds()
@@ -325,10 +343,16 @@ class AlignObjects(AppTool):
         self.aligned_obj.obj_options['xmax'] = c
         self.aligned_obj.obj_options['ymax'] = d
 
-    def align_rotate(self):
-        dx = self.clicked_points[1][0] - self.clicked_points[0][0]
-        dy = self.clicked_points[1][1] - self.clicked_points[0][1]
-
+    def align_rotation_angle(self, dx, dy):
+        """
+        :param dx:  The X translation of the aligned object
+        :type dx:   float
+        :param dy:  The Y translation of the aligned object
+        :type dy:   float
+        :return:    The angle (degrees) by which the translated object has to be rotated or None if no rotation is
+                    needed
+        :rtype:     float | None
+        """
         test_rotation_pt = translate(Point(self.clicked_points[2]), xoff=dx, yoff=dy)
         new_start = (test_rotation_pt.x, test_rotation_pt.y)
         new_dest = self.clicked_points[3]
@@ -343,15 +367,16 @@ class AlignObjects(AppTool):
 
         rotation_not_needed = (abs(new_start[0] - new_dest[0]) <= (10 ** -self.decimals)) or \
                               (abs(new_start[1] - new_dest[1]) <= (10 ** -self.decimals))
-        if rotation_not_needed is False:
-            # calculate rotation angle
-            try:
-                angle_dest = math.degrees(math.atan(dyd / dxd))
-                angle_start = math.degrees(math.atan(dys / dxs))
-                angle = angle_dest - angle_start
-                self.aligned_obj.rotate(angle=angle, point=origin_pt)
-            except Exception:
-                pass
+        if rotation_not_needed is True:
+            return None
+
+        # calculate rotation angle
+        try:
+            angle_dest = math.degrees(math.atan(dyd / dxd))
+            angle_start = math.degrees(math.atan(dys / dxs))
+        except ZeroDivisionError:
+            return None
+        return angle_dest - angle_start
 
     def disconnect_cal_events(self):
         # restore the Grid snapping if it was active before
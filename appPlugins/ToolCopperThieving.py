@@ -19,10 +19,10 @@ from copy import deepcopy
 import numpy as np
 from typing import Iterable
 
+import shapely
 import shapely.geometry.base as base
-from shapely import Polygon, MultiPolygon, box, Point, LineString
+from shapely import Polygon, MultiPolygon, box, Point, LineString, STRtree
 from shapely.ops import unary_union
-from shapely.affinity import translate
 
 import gettext
 import appTranslation as fcTranslate
@@ -38,6 +38,10 @@ log = logging.getLogger('base')
 class ToolCopperThieving(AppTool):
     work_finished = QtCore.pyqtSignal()
 
+    # the centroid of the dot/square grid is calculated from all its shapes up to this number of coordinates,
+    # and the shapes of the grid are made in chunks of a tenth of it
+    max_grid_coords = 4000000
+
     def __init__(self, app):
         AppTool.__init__(self, app)
 
@@ -756,47 +760,21 @@ class ToolCopperThieving(AppTool):
             tool_obj.app.proc_container.update_view_text(' %s' % _("Create geometry"))
 
             if fill_type == 1 or fill_type == 2:  # 'dot' or 'square'
-                # build the MultiPolygon of dots/squares that will fill the entire bounding box
-                thieving_list = []
-
+                # the grid of dots/squares that will fill the entire bounding box: a template shape, made in the
+                # origin, is moved over each center of the grid
                 if fill_type == 1:  # 'dot'
                     radius = dot_dia / 2.0
-                    new_x = x0 + radius
-                    new_y = y0 + radius
-                    while new_x <= x1 - radius:
-                        while new_y <= y1 - radius:
-                            dot_geo = Point((new_x, new_y)).buffer(radius, resolution=64)
-                            thieving_list.append(dot_geo)
-                            new_y += dot_dia + dot_spacing
-                        new_x += dot_dia + dot_spacing
-                        new_y = y0 + radius
+                    template = Point((0, 0)).buffer(radius, resolution=64)
+                    x_centers = self.grid_positions(x0 + radius, x1 - radius, dot_dia + dot_spacing)
+                    y_centers = self.grid_positions(y0 + radius, y1 - radius, dot_dia + dot_spacing)
                 else:   # 'square'
                     h_size = square_size / 2.0
-                    new_x = x0 + h_size
-                    new_y = y0 + h_size
-                    while new_x <= x1 - h_size:
-                        while new_y <= y1 - h_size:
-                            a, b, c, d = (Point((new_x, new_y)).buffer(h_size)).bounds
-                            square_geo = box(a, b, c, d)
-                            thieving_list.append(square_geo)
-                            new_y += square_size + square_spacing
-                        new_x += square_size + square_spacing
-                        new_y = y0 + h_size
-
-                thieving_box_geo = MultiPolygon(thieving_list)
-                dx = bounding_box.centroid.x - thieving_box_geo.centroid.x
-                dy = bounding_box.centroid.y - thieving_box_geo.centroid.y
-
-                thieving_box_geo = translate(thieving_box_geo, xoff=dx, yoff=dy)
-                thieving_box_geo = flatten_shapely_geometry(thieving_box_geo)
-
-                thieving_geo = []
-                for dot_geo in thieving_box_geo:
-                    for geo_t in tool_obj.thief_solid_geometry:
-                        if dot_geo.within(geo_t):
-                            thieving_geo.append(dot_geo)
-
-                tool_obj.thief_solid_geometry = thieving_geo
+                    template = box(*Point((0, 0)).buffer(h_size).bounds)
+                    x_centers = self.grid_positions(x0 + h_size, x1 - h_size, square_size + square_spacing)
+                    y_centers = self.grid_positions(y0 + h_size, y1 - h_size, square_size + square_spacing)
+
+                tool_obj.thief_solid_geometry = self.pattern_geometry(
+                    template, x_centers, y_centers, bounding_box, tool_obj.thief_solid_geometry)
 
             if fill_type == 3:  # 'line'
                 half_thick_line = line_size / 2.0
@@ -1208,6 +1186,93 @@ class ToolCopperThieving(AppTool):
                                                                   self.app.on_mouse_click_release_over_plot)
             self.handlers_connected = False
 
+    @staticmethod
+    def grid_positions(start, stop, step):
+        """
+        The positions of the grid centers on one axis: start, start + step, ... while not greater than stop.
+        The positions are made by repeated addition so they are the same as the ones made by a while loop.
+
+        :param start:   the first position
+        :type start:    float
+        :param stop:    the last position allowed
+        :type stop:     float
+        :param step:    the distance between two positions
+        :type step:     float
+        :return:        the positions
+        :rtype:         np.ndarray
+        """
+        positions = []
+        if step <= 0:
+            return np.array(positions, dtype=float)
+
+        pos = start
+        while pos <= stop:
+            positions.append(pos)
+            pos += step
+        return np.array(positions, dtype=float)
+
+    @staticmethod
+    def pattern_geometry(template, x_centers, y_centers, bounding_box, areas):
+        """
+        Makes a grid of shapes, copies of the template moved over each center of the grid, centers the grid on the
+        bounding box and keeps the shapes that are within the areas.
+
+        The shapes are made in chunks, from arrays with the coordinates of many shapes, and only the centers inside
+        the areas (a single prepared geometry query) are tested if their shape is within an area.
+
+        :param template:        the shape of the pattern, a Polygon made in the origin
+        :type template:         Polygon
+        :param x_centers:       the X positions of the grid centers
+        :type x_centers:        np.ndarray
+        :param y_centers:       the Y positions of the grid centers
+        :type y_centers:        np.ndarray
+        :param bounding_box:    the grid of shapes is centered on this geometry
+        :param areas:           list of Polygons, the areas to be filled
+        :type areas:            list
+        :return:                list of Polygons, the shapes within the areas, ordered on columns (X then Y)
+        :rtype:                 list
+        """
+        areas = [geo for geo in areas if geo.geom_type == 'Polygon' and not geo.is_empty]
+        if len(x_centers) == 0 or len(y_centers) == 0 or not areas:
+            return []
+
+        grid_x, grid_y = np.meshgrid(x_centers, y_centers, indexing='ij')
+        centers = np.column_stack((grid_x.ravel(), grid_y.ravel()))
+        template_coords = shapely.get_coordinates(template.exterior)
+
+        # the centroid of the grid of shapes; for very large grids it is calculated from the centers, as the
+        # centroid of all the shapes does not fit in memory (the result is the same, up to the rounding errors)
+        if len(centers) * len(template_coords) <= ToolCopperThieving.max_grid_coords:
+            grid_shapes = shapely.polygons(template_coords[np.newaxis, :, :] + centers[:, np.newaxis, :])
+            grid_centroid = shapely.multipolygons(grid_shapes).centroid
+            grid_cx, grid_cy = grid_centroid.x, grid_centroid.y
+            del grid_shapes
+        else:
+            grid_cx, grid_cy = np.array([template.centroid.x, template.centroid.y]) + centers.mean(axis=0)
+
+        # center the grid of shapes on the bounding box
+        offset = np.array([bounding_box.centroid.x - grid_cx, bounding_box.centroid.y - grid_cy])
+
+        # a shape can be within an area only if its center is inside the area
+        area_geo = MultiPolygon(areas)
+        shapely.prepare(area_geo)
+        moved_centers = centers + offset
+        inside = np.flatnonzero(shapely.contains_xy(area_geo, moved_centers[:, 0], moved_centers[:, 1]))
+
+        areas_tree = STRtree(areas)
+        chunk_size = max(1, ToolCopperThieving.max_grid_coords // (10 * len(template_coords)))
+        pattern = []
+        for start in range(0, len(inside), chunk_size):
+            chunk = inside[start:start + chunk_size]
+            shapes = shapely.polygons(
+                (template_coords[np.newaxis, :, :] + centers[chunk][:, np.newaxis, :]) + offset)
+
+            # keep the shapes that are within an area; the order is the one of the shapes then the one of the areas
+            shape_idx, area_idx = areas_tree.query(shapes, predicate='within')
+            order = np.lexsort((area_idx, shape_idx))
+            pattern += list(shapes[shape_idx[order]])
+        return pattern
+
     def flatten(self, geometry):
         """
         Creates a list of non-iterable linear geometry objects.
@@ -506,8 +506,9 @@ class Distance(AppTool):
                                         clicked_geo.append(geo_dict['follow'])
                 elif obj.kind == 'excellon':
                     for t in obj.tools:
-                        if obj.tools[t]['solid_geometry']:
-                            for drill_geo in obj.tools[t]['solid_geometry']:
+                        tool_geo = obj.tool_geometry(t)
+                        if tool_geo:
+                            for drill_geo in tool_geo:
                                 if current_pt.within(drill_geo):
                                     clicked_geo.append(drill_geo.centroid)
 
@@ -22,7 +22,7 @@ import sys
 import platform
 import re
 
-from shapely import LineString
+from shapely import LineString, buffer
 
 import gettext
 import appTranslation as fcTranslate
@@ -70,6 +70,9 @@ class ToolDrilling(AppTool, Excellon):
         self.obj_name = ""
         self.excellon_obj = None
 
+        # ids of the shapes that mark on canvas the drills found in the exclusion areas
+        self.offending_shapes = []
+
         # this holds the resulting GCode
         self.total_gcode = ''
 
@@ -319,6 +322,8 @@ class ToolDrilling(AppTool, Excellon):
     def set_tool_ui(self):
         self.units = self.app.app_units.upper()
 
+        self.clear_offending_drills()
+
         self.clear_ui(self.layout)
         self.init_ui()
 
@@ -1954,15 +1959,74 @@ class ToolDrilling(AppTool, Excellon):
         return points
 
     def check_intersection(self, points, excellon_tools=None):
+        """
+        Finds the drills that are in the exclusion areas: the drill holes (made with the tool diameter) that touch the
+        areas. The drills of each tool are checked at once, against the union of the areas.
+
+        :param points:          a dictionary: keys are tools and values are lists of Shapely Points (the drills)
+        :type points:           dict
+        :param excellon_tools:  the tools dictionary holding the tool diameters; if None the Tool tools are used
+        :type excellon_tools:   dict | None
+        :return:                a dictionary: keys are the tools that have drills in the exclusion areas and values are
+                                lists of those drills (Shapely Points); empty if there are none
+        :rtype:                 dict
+        """
         if excellon_tools is None:
             excellon_tools = self.excellon_tools
+
+        offending_drills = {}
         for tool_key in points:
-            for pt in points[tool_key]:
-                for area in self.app.exc_areas.exclusion_areas_storage:
-                    pt_buf = pt.buffer(excellon_tools[tool_key]['tooldia'] / 2.0)
-                    if pt_buf.within(area['shape']) or pt_buf.intersects(area['shape']):
-                        return True
-        return False
+            tool_radius = float(excellon_tools[tool_key]['tooldia']) / 2.0
+            found_idx = self.app.exc_areas.points_in_areas(points[tool_key], distance=tool_radius)
+            if len(found_idx):
+                offending_drills[tool_key] = [points[tool_key][idx] for idx in found_idx.tolist()]
+        return offending_drills
+
+    def plot_offending_drills(self, offending_drills, excellon_tools=None):
+        """
+        Marks on canvas the drills found in the exclusion areas.
+
+        :param offending_drills:    a dictionary as returned by check_intersection()
+        :type offending_drills:     dict
+        :param excellon_tools:      the tools dictionary holding the tool diameters; if None the Tool tools are used
+        :type excellon_tools:       dict | None
+        :return:                    None
+        """
+        if excellon_tools is None:
+            excellon_tools = self.excellon_tools
+
+        if self.app.tool_shapes is None:
+            return
+
+        # delete the drills marked before
+        self.clear_offending_drills(redraw=False)
+
+        for tool_key, drills in offending_drills.items():
+            tool_radius = float(excellon_tools[tool_key]['tooldia']) / 2.0
+            for drill_hole in buffer(drills, tool_radius):
+                shape_id = self.app.tool_shapes.add(
+                    shape=drill_hole, color=self.app.options['global_sel_draw_color'] + 'FF',
+                    face_color=self.app.options['global_sel_draw_color'] + 'FF', visible=True, layer=0, tolerance=None)
+                self.offending_shapes.append(shape_id)
+        self.app.tool_shapes.redraw()
+
+    def clear_offending_drills(self, redraw=True):
+        """
+        Deletes from canvas the drills marked by plot_offending_drills().
+
+        :param redraw:  if True the canvas shapes are redrawn
+        :type redraw:   bool
+        :return:        None
+        """
+        if self.app.tool_shapes is None or not self.offending_shapes:
+            self.offending_shapes = []
+            return
+
+        for shape_id in self.offending_shapes:
+            self.app.tool_shapes.remove(shape_id)
+        self.offending_shapes = []
+        if redraw:
+            self.app.tool_shapes.redraw()
 
     def on_generate_cnc_job(self):
         obj_name = self.ui.object_combo.currentText()
@@ -2051,10 +2115,18 @@ class ToolDrilling(AppTool, Excellon):
         # points is a dictionary: keys are tools ad values are lists of Shapely Points
         points = self.create_drill_points(selected_tools=sel_tools, selected_sorted_tools=sorted_tools)
 
+        # delete the drills marked by a previous check; they are marked again if they are still offending
+        self.clear_offending_drills()
+
         # check if there are drill points in the exclusion areas (if any areas)
-        if self.app.exc_areas.exclusion_areas_storage and self.check_intersection(points) is True:
-            self.app.inform.emit("[ERROR_NOTCL] %s %s" % (_("Failed."), _("Drill points inside the exclusion zones.")))
-            return 'fail'
+        if self.app.exc_areas.exclusion_areas_storage:
+            offending_drills = self.check_intersection(points)
+            if offending_drills:
+                self.app.log.debug("ToolDrilling.on_generate_cnc_job() --> %d drills in the exclusion areas" %
+                                   sum(len(drills) for drills in offending_drills.values()))
+                self.plot_offending_drills(offending_drills)
+                self.app.inform.emit("[ERROR_NOTCL] %s %s" % (_("Failed."), _("Drill points inside the exclusion zones.")))
+                return 'fail'
 
         # #############################################################################################################
         # General Parameters
@@ -2389,6 +2461,9 @@ class ToolDrilling(AppTool, Excellon):
         # self.app.worker.add_task(job_thread, [self.app])
         self.app.worker_task.emit({'fcn': job_thread, 'params': [self.app]})
 
+    def on_plugin_cleanup(self):
+        self.clear_offending_drills()
+
     def reset_fields(self):
         self.ui.object_combo.setRootModelIndex(self.app.collection.index(0, 0, QtCore.QModelIndex()))
 
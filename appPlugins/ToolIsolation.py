@@ -21,7 +21,7 @@ import sys
 import math
 
 from shapely import LineString, MultiLineString, Polygon, MultiPolygon, Point, LinearRing
-from shapely.ops import unary_union, nearest_points
+from shapely.ops import unary_union
 
 import gettext
 import appTranslation as fcTranslate
@@ -30,6 +30,7 @@ import builtins
 from appParsers.ParseGerber import Gerber
 from matplotlib.backend_bases import KeyEvent as mpl_key_event
 from camlib import grace, flatten_shapely_geometry
+from appCommon.MinimumDistance import MinimumDistanceEngine
 
 fcTranslate.apply_language('strings')
 if '_' not in builtins.__dict__:
@@ -1140,31 +1141,9 @@ class ToolIsolation(AppTool, Gerber):
             msg = ('[ERROR_NOTCL] %s' % _("The Gerber object has one Polygon as geometry.\n"
                                           "There are no distances between geometry elements to be found."))
 
-        min_dict = {}
-        idx = 1
-        w_geo = flatten_shapely_geometry(total_geo)
-        for geo in w_geo:
-            for s_geo in w_geo[idx:]:
-                # minimize the number of distances by not taking into considerations
-                # those that are too small
-                dist = geo.distance(s_geo)
-                dist = float('%.*f' % (decimals, dist))
-                loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                proc_loc = (
-                    (float('%.*f' % (decimals, loc_1.x)), float('%.*f' % (decimals, loc_1.y))),
-                    (float('%.*f' % (decimals, loc_2.x)), float('%.*f' % (decimals, loc_2.y)))
-                )
-
-                if dist in min_dict:
-                    min_dict[dist].append(proc_loc)
-                else:
-                    min_dict[dist] = [proc_loc]
-
-            idx += 1
-
-        min_list = list(min_dict.keys())
-        min_dist = min(min_list)
+        min_dist = MinimumDistanceEngine.minimum_distance(flatten_shapely_geometry(total_geo), decimals=decimals)
+        if min_dist is None:
+            return msg, np.Inf
         min_dist -= 10 ** -decimals  # make sure that this works for isolation case
 
         return msg, min_dist
@@ -1254,8 +1233,6 @@ class ToolIsolation(AppTool, Gerber):
         def job_thread(app_obj):
             with self.app.proc_container.new(_("Checking ...")):
                 try:
-                    old_disp_number = 0
-                    pol_nr = 0
                     app_obj.proc_container.update_view_text(' %d%%' % 0)
                     total_geo = []
 
@@ -1280,42 +1257,17 @@ class ToolIsolation(AppTool, Gerber):
                         app_obj.inform.emit('[ERROR_NOTCL] %s' % msg)
                         return 'fail'
 
-                    geo_len = (geo_len * (geo_len - 1)) / 2
-
-                    min_dict = {}
-                    idx = 1
-                    for geo in total_geo:
-                        for s_geo in total_geo[idx:]:
-                            if self.app.abort_flag:
-                                # graceful abort requested by the user
-                                raise grace
-
-                            # minimize the number of distances by not taking into considerations those
-                            # that are too small
-                            dist = geo.distance(s_geo)
-                            dist = float('%.*f' % (self.decimals, dist))
-                            loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                            proc_loc = (
-                                (float('%.*f' % (self.decimals, loc_1.x)), float('%.*f' % (self.decimals, loc_1.y))),
-                                (float('%.*f' % (self.decimals, loc_2.x)), float('%.*f' % (self.decimals, loc_2.y)))
-                            )
-
-                            if dist in min_dict:
-                                min_dict[dist].append(proc_loc)
-                            else:
-                                min_dict[dist] = [proc_loc]
-
-                            pol_nr += 1
-                            disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
+                    def check_abort():
+                        if self.app.abort_flag:
+                            # graceful abort requested by the user
+                            raise grace
 
-                            if old_disp_number < disp_number <= 100:
-                                app_obj.proc_container.update_view_text(' %d%%' % disp_number)
-                                old_disp_number = disp_number
-                        idx += 1
+                    def show_progress(disp_number):
+                        app_obj.proc_container.update_view_text(' %d%%' % disp_number)
 
-                    min_list = list(min_dict.keys())
-                    min_dist = min(min_list)
+                    min_dict = MinimumDistanceEngine(total_geo, decimals=self.decimals, check_abort=check_abort,
+                                                     progress=show_progress).find(nr_distances=1, locations=False)
+                    min_dist = min(min_dict)
 
                     min_dist_truncated = self.app.dec_format(float(min_dist), self.decimals)
                     self.safe_tooldia = min_dist_truncated
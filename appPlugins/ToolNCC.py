@@ -20,14 +20,16 @@ import traceback
 
 from shapely import LineString, Polygon, MultiPolygon, MultiLineString, LinearRing
 from shapely.geometry import base
-from shapely.ops import unary_union, nearest_points
+from shapely.ops import unary_union
 
 import gettext
 import appTranslation as fcTranslate
 import builtins
 
 from appParsers.ParseGerber import Gerber
-from camlib import grace, flatten_shapely_geometry
+from camlib import grace, flatten_shapely_geometry, PolygonClearing
+from appCommon.MinimumDistance import MinimumDistanceEngine
+from appCommon.RestMachining import RestMachiningArea
 from matplotlib.backend_bases import KeyEvent as mpl_key_event
 
 fcTranslate.apply_language('strings')
@@ -974,33 +976,10 @@ class NonCopperClear(AppTool, Gerber):
 
         total_geo = flatten_shapely_geometry(total_geo)
 
-        if len(total_geo) in [0, 1]:
+        min_dist = MinimumDistanceEngine.minimum_distance(total_geo, decimals=decimals)
+        if min_dist is None:
             msg = ('[ERROR_NOTCL] %s' % _("Too few polygons in the Gerber object to determine distances."))
             return msg, np.Inf
-        min_dict = {}
-        idx = 1
-        for geo in total_geo:
-            for s_geo in total_geo[idx:]:
-                # minimize the number of distances by not taking into considerations
-                # those that are too small
-                dist = geo.distance(s_geo)
-                dist = float('%.*f' % (decimals, dist))
-                loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                proc_loc = (
-                    (float('%.*f' % (decimals, loc_1.x)), float('%.*f' % (decimals, loc_1.y))),
-                    (float('%.*f' % (decimals, loc_2.x)), float('%.*f' % (decimals, loc_2.y)))
-                )
-
-                if dist in min_dict:
-                    min_dict[dist].append(proc_loc)
-                else:
-                    min_dict[dist] = [proc_loc]
-
-            idx += 1
-
-        min_list = list(min_dict.keys())
-        min_dist = min(min_list)
         min_dist -= 10**-decimals  # make sure that this works for isolation case
 
         return msg, min_dist
@@ -1095,8 +1074,6 @@ class NonCopperClear(AppTool, Gerber):
         def job_thread(app_obj):
             with self.app.proc_container.new(_("Checking ...")):
                 try:
-                    old_disp_number = 0
-                    pol_nr = 0
                     app_obj.proc_container.update_view_text(' %d%%' % 0)
                     total_geo = []
 
@@ -1121,42 +1098,17 @@ class NonCopperClear(AppTool, Gerber):
                                               "There are no distances between geometry elements to be found."))
                         return 'fail'
 
-                    geo_len = (geo_len * (geo_len - 1)) / 2
-
-                    min_dict = {}
-                    idx = 1
-                    for geo in total_geo:
-                        for s_geo in total_geo[idx:]:
-                            if self.app.abort_flag:
-                                # graceful abort requested by the user
-                                raise grace
-
-                            # minimize the number of distances by not taking into considerations
-                            # those that are too small
-                            dist = geo.distance(s_geo)
-                            dist = float('%.*f' % (self.decimals, dist))
-                            loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                            proc_loc = (
-                                (float('%.*f' % (self.decimals, loc_1.x)), float('%.*f' % (self.decimals, loc_1.y))),
-                                (float('%.*f' % (self.decimals, loc_2.x)), float('%.*f' % (self.decimals, loc_2.y)))
-                            )
-
-                            if dist in min_dict:
-                                min_dict[dist].append(proc_loc)
-                            else:
-                                min_dict[dist] = [proc_loc]
-
-                            pol_nr += 1
-                            disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
+                    def check_abort():
+                        if self.app.abort_flag:
+                            # graceful abort requested by the user
+                            raise grace
 
-                            if old_disp_number < disp_number <= 100:
-                                app_obj.proc_container.update_view_text(' %d%%' % disp_number)
-                                old_disp_number = disp_number
-                        idx += 1
+                    def show_progress(disp_number):
+                        app_obj.proc_container.update_view_text(' %d%%' % disp_number)
 
-                    min_list = list(min_dict.keys())
-                    min_dist = min(min_list)
+                    min_dict = MinimumDistanceEngine(total_geo, decimals=self.decimals, check_abort=check_abort,
+                                                     progress=show_progress).find(nr_distances=1, locations=False)
+                    min_dist = min(min_dict)
 
                     min_dist_truncated = self.app.dec_format(float(min_dist), self.decimals)
                     self.safe_tooldia = min_dist_truncated
@@ -2236,6 +2188,210 @@ class NonCopperClear(AppTool, Gerber):
             self.app.inform_shell.emit('%s %s' % (_('Polygon could not be cleared. Location:'), str(coords)))
             return None
 
+    def clear_polygons(self, polygons, tooldia, ncc_method, ncc_overlap, ncc_connect, ncc_contour, prog_plot,
+                       simplify_tol=0.0):
+        """
+        Copper clears the polygons. When there is more than one polygon, the polygons are cleared in the processes of
+        the app pool, one task for each polygon.
+
+        :param polygons:        the polygons to be cleared
+        :type polygons:         list
+        :return:                yields (polygon, tool paths) in the order of the polygons; the tool paths are a list
+                                of LineStrings or None if the polygon could not be cleared
+
+        For the other parameters see clear_polygon_worker().
+        """
+        if len(polygons) < 2:
+            for pol in polygons:
+                res = self.clear_polygon_worker(pol=pol, tooldia=tooldia, ncc_method=ncc_method,
+                                                ncc_overlap=ncc_overlap, ncc_connect=ncc_connect,
+                                                ncc_contour=ncc_contour, prog_plot=prog_plot,
+                                                simplify_tol=simplify_tol)
+                if res == "fail":
+                    # graceful abort requested by the user
+                    raise grace
+                yield pol, res
+            return
+
+        results = PolygonClearing.pool_clear(self.app.pool, polygons, PolygonClearing.methods[ncc_method], tooldia,
+                                             self.circle_steps, overlap=ncc_overlap, connect=ncc_connect,
+                                             contour=ncc_contour, simplify_tol=simplify_tol,
+                                             abort_requested=lambda: self.app.abort_flag)
+        for pol, res in results:
+            if res is None:
+                pt = pol.representative_point()
+                coords = (pt.x, pt.y)
+                self.app.inform_shell.emit('%s %s' % (_('Polygon could not be cleared. Location:'), str(coords)))
+            elif prog_plot:
+                self.plot_temp_shapes(res)
+                self.temp_shapes.redraw()
+            yield pol, res
+
+    def rest_clear_tool(self, rest_area, tool, ncc_method, ncc_overlap, ncc_connect, ncc_contour, prog_plot,
+                        run_threaded, simplify_tol=0.0):
+        """
+        Rest machining with one tool: clears the polygons of the area left by the previous tools that the tool can
+        clear and then removes from the area what the tool cleared. Only the tiles of the area that are reached by
+        the tool paths are updated.
+
+        :param rest_area:       the area left to be cleared by the previous tools; it is updated
+        :type rest_area:        RestMachiningArea
+        :param tool:            the tool diameter
+        :type tool:             float
+        :param run_threaded:    False if it runs in the TclShell (the GUI events are processed while working)
+        :type run_threaded:     bool
+        :return:                the tool paths and the number of polygons that could not be cleared
+        :rtype:                 tuple
+
+        For the other parameters see clear_polygon_worker().
+        """
+        # select the polygons that can be cleared
+        polygons_to_clear = []
+        for p in rest_area.polygons():
+            # provide the app with a way to process the GUI events when in a blocking loop
+            if not run_threaded:
+                QtWidgets.QApplication.processEvents()
+
+            if self.app.abort_flag:
+                # graceful abort requested by the user
+                raise grace
+
+            # speedup the clearing by not trying to clear polygons that is obvious they can't be
+            # cleared with the current tool. this tremendously reduce the clearing time
+            if p.is_valid and not p.buffer(-tool / 2, self.circle_steps).is_empty:
+                polygons_to_clear.append(p)
+
+        # variables to display the percentage of work done
+        geo_len = len(polygons_to_clear)
+        old_disp_number = 0
+        self.app.log.warning("Total number of polygons to be cleared: %s" % str(geo_len))
+
+        # actual copper clearing is done here
+        cleared_geo = []
+        poly_failed = 0
+        pol_nr = 0
+        for p, res in self.clear_polygons(polygons_to_clear, tooldia=tool, ncc_method=ncc_method,
+                                          ncc_overlap=ncc_overlap, ncc_connect=ncc_connect, ncc_contour=ncc_contour,
+                                          simplify_tol=simplify_tol, prog_plot=prog_plot):
+            # provide the app with a way to process the GUI events when in a blocking loop
+            if not run_threaded:
+                QtWidgets.QApplication.processEvents()
+
+            if res is not None:
+                cleared_geo += res
+            else:
+                poly_failed += 1
+
+            pol_nr += 1
+            disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
+            if old_disp_number < disp_number <= 100:
+                self.app.proc_container.update_view_text(' %d%%' % disp_number)
+                old_disp_number = disp_number
+
+        if self.app.abort_flag:
+            raise grace     # graceful abort requested by the user
+
+        # the area to clear next
+        rest_area.subtract(cleared_geo, tool / 2, pool=self.app.pool)
+        return cleared_geo, poly_failed
+
+    @staticmethod
+    def rest_machining_key(ncc_obj, sel_obj, ncc_select, *params):
+        """
+        :param ncc_obj:     the object to be copper cleared
+        :param sel_obj:     the reference object or None
+        :param ncc_select:  the selection type: 0 - itself, 1 - area, 2 - reference object
+        :param params:      the parameters that change the area to be cleared or the clearing
+        :return:            what identifies a rest machining, so it can be continued with more tools; None if the
+                            rest machining can not be continued (the area was selected with the mouse)
+        :rtype:             tuple | None
+        """
+        if ncc_select == 1:
+            return None
+        sel_name = sel_obj.obj_options['name'] if ncc_select == 2 and sel_obj is not None else None
+        return (ncc_obj.obj_options['name'], ncc_select, sel_name) + tuple(params)
+
+    def find_rest_machining(self, key, ncc_obj, sel_obj, tools_params):
+        """
+        Looks for a Geometry object made by a rest machining that can be continued: the same object cleared with the
+        same parameters and with the first tools the same as the ones to be used now.
+
+        :param key:             as returned by rest_machining_key()
+        :param ncc_obj:         the object to be copper cleared
+        :param sel_obj:         the reference object or None
+        :param tools_params:    for each tool, in the order of use: (diameter, overlap, method)
+        :type tools_params:     list
+        :return:                the Geometry object and the number of tools already used in it, or (None, 0)
+        :rtype:                 tuple
+        """
+        if key is None:
+            return None, 0
+
+        found_obj = None
+        found_nr = 0
+        for obj in self.app.collection.get_list():
+            rest_cache = getattr(obj, 'ncc_rest_cache', None)
+            if not rest_cache or rest_cache['key'] != key:
+                continue
+            # the geometry of the objects must be the same
+            if rest_cache['ncc_geo'] is not ncc_obj.solid_geometry or \
+                    rest_cache['sel_geo'] is not (sel_obj.solid_geometry if sel_obj is not None else None):
+                continue
+
+            # the tools used by the rest machining must still be in the object (they may have been deleted)
+            obj_dias = {self.app.dec_format(t_val['tooldia'], self.decimals) for t_val in obj.tools.values()}
+            if any(t_params[0] not in obj_dias for t_params in rest_cache['tools']):
+                continue
+
+            nr_done = len(rest_cache['tools'])
+            if list(tools_params[:nr_done]) == rest_cache['tools'] and nr_done > found_nr:
+                found_obj = obj
+                found_nr = nr_done
+        return found_obj, found_nr
+
+    def reuse_rest_machining(self, geo_obj, found_obj, tools_storage):
+        """
+        Copies in the new Geometry object the tools of the rest machining that is continued.
+
+        :param geo_obj:         the new Geometry object
+        :param found_obj:       the Geometry object of the rest machining that is continued
+        :param tools_storage:   the tools of the current copper clearing
+        :type tools_storage:    dict
+        :return:                a copy of the area that is left to be cleared and the isolation warning flag
+        :rtype:                 tuple
+        """
+        for old_uid, old_tool in found_obj.tools.items():
+            new_uid = old_uid
+            for k, v in tools_storage.items():
+                if self.app.dec_format(v['tooldia'], self.decimals) == \
+                        self.app.dec_format(old_tool['tooldia'], self.decimals):
+                    new_uid = int(k)
+                    break
+            geo_obj.tools[new_uid] = deepcopy(old_tool)
+
+        rest_cache = found_obj.ncc_rest_cache
+        self.app.log.debug("NCC Tool. Rest machining continued from %s, after %d tools." %
+                           (found_obj.obj_options['name'], len(rest_cache['tools'])))
+        return rest_cache['rest_area'].copy(), rest_cache['warning_flag']
+
+    @staticmethod
+    def store_rest_machining(geo_obj, key, ncc_obj, sel_obj, tools_done, rest_area, warning_flag):
+        """
+        Keeps in the Geometry object what is needed to continue the rest machining with more tools.
+
+        :return:    None
+        """
+        if key is None:
+            return
+        geo_obj.ncc_rest_cache = {
+            'key': key,
+            'ncc_geo': ncc_obj.solid_geometry,
+            'sel_geo': sel_obj.solid_geometry if sel_obj is not None else None,
+            'tools': list(tools_done),
+            'rest_area': rest_area,
+            'warning_flag': warning_flag
+        }
+
     def ncc_handler(self, ncc_obj, ncctd_list, isotd_list, sel_obj=None, outname=None, order=None,
                     tools_storage=None, run_threaded=True):
         """
@@ -2398,63 +2554,55 @@ class NonCopperClear(AppTool, Gerber):
                 if not tool_empty_area:
                     continue
 
-                # variables to display the percentage of work done
-                old_disp_number = 0
-                geo_len = len(tool_empty_area)
-                self.app.log.warning("Total number of polygons to be cleared. %s" % str(geo_len))
-
                 # ----------------------------------------------------
-                # Copper-clear the Polygons in the non-copper-area
-                # Iterate over them
+                # attempt to fix possible problems with the polygons
                 # ----------------------------------------------------
-                pol_nr = 0
+                polygons_to_clear = []
                 for p in tool_empty_area:
-                    # provide the app with a way to process the GUI events when in a blocking loop
-                    if not run_threaded:
-                        QtWidgets.QApplication.processEvents()
-
                     if self.app.abort_flag:
                         # graceful abort requested by the user
                         raise grace
 
-                    # ----------------------------------------------------
-                    # attempt to fix possible problems with the polygon
-                    # ----------------------------------------------------
                     p = p.buffer(0.0000001)
-                    p = flatten_shapely_geometry(p, simplify_tolerance=simplification_value)
-
-                    poly_failed = 0
-                    for pol in p:
-                        # provide the app with a way to process the GUI events when in a blocking loop
-                        QtWidgets.QApplication.processEvents()
-
+                    for pol in flatten_shapely_geometry(p, simplify_tolerance=simplification_value):
                         if pol is not None and pol.is_valid and isinstance(pol, Polygon):
-                            # ----------------------------------------------------
-                            # This is where copper clearing is happening
-                            # ----------------------------------------------------
-                            res = self.clear_polygon_worker(pol=pol, tooldia=tool,
-                                                            ncc_method=ncc_method,
-                                                            ncc_overlap=ncc_overlap,
-                                                            ncc_connect=ncc_connect,
-                                                            ncc_contour=ncc_contour,
-                                                            simplify_tol=simplification_value,
-                                                            prog_plot=prog_plot)
-                            if res is not None:
-                                cleared_geo += res
-                            else:
-                                poly_failed += 1
+                            polygons_to_clear.append(pol)
                         else:
                             self.app.log.warning(
                                 "Expected geo is a Polygon. Instead got a %s" % str(type(pol)))
 
-                        pol_nr += 1
-                        disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
-                        if old_disp_number < disp_number <= 100:
-                            self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                            old_disp_number = disp_number
+                # variables to display the percentage of work done
+                old_disp_number = 0
+                geo_len = len(polygons_to_clear)
+                self.app.log.warning("Total number of polygons to be cleared. %s" % str(geo_len))
 
-                    if poly_failed > 0:
-                        app_obj.poly_not_cleared = True
+                # ----------------------------------------------------
+                # Copper-clear the Polygons in the non-copper-area
+                # This is where copper clearing is happening
+                # ----------------------------------------------------
+                pol_nr = 0
+                poly_failed = 0
+                for pol, res in self.clear_polygons(polygons_to_clear, tooldia=tool, ncc_method=ncc_method,
+                                                    ncc_overlap=ncc_overlap, ncc_connect=ncc_connect,
+                                                    ncc_contour=ncc_contour, simplify_tol=simplification_value,
+                                                    prog_plot=prog_plot):
+                    # provide the app with a way to process the GUI events when in a blocking loop
+                    if not run_threaded:
+                        QtWidgets.QApplication.processEvents()
+
+                    if res is not None:
+                        cleared_geo += res
+                    else:
+                        poly_failed += 1
+
+                    pol_nr += 1
+                    disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
+                    if old_disp_number < disp_number <= 100:
+                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
+                        old_disp_number = disp_number
+
+                if poly_failed > 0:
+                    app_obj.poly_not_cleared = True
 
                 # ---------------------------------------------------------
                 # Debug message regarding how many points are in the result
@@ -2607,15 +2755,43 @@ class NonCopperClear(AppTool, Gerber):
             has_offset = self.ui.rest_ncc_choice_offset_cb.get_value()
             ncc_offset = self.ui.rest_ncc_offset_spinner.get_value()
 
-            # Area to clear
-            area, warning_flag = self.get_tool_empty_area(name=name, ncc_obj=ncc_obj, geo_obj=geo_obj,
-                                                          isotooldia=isotd_list,
-                                                          has_offset=has_offset, ncc_offset=ncc_offset,
-                                                          ncc_margin=ncc_margin, tools_storage=tools_storage,
-                                                          bounding_box=bbox)
+            # parameters of each tool, in the order of use
+            tools_params = []
+            for tool in sorted_clear_tools:
+                tool_uid = 0    # find the current tool_uid
+                for k, v in self.ncc_tools.items():
+                    if self.app.dec_format(v['tooldia'], self.decimals) == self.app.dec_format(tool, self.decimals):
+                        tool_uid = int(k)
+                        break
+                tool_data_dict = self.ncc_tools[tool_uid]["data"]
+                tools_params.append((self.app.dec_format(tool, self.decimals), tool_data_dict["tools_ncc_overlap"],
+                                     tool_data_dict["tools_ncc_method"]))
+
+            # if this rest machining was already done with the first tools, continue it from the area left to clear
+            ref_obj = sel_obj if ncc_select == 2 else None
+            rest_key = self.rest_machining_key(ncc_obj, ref_obj, ncc_select, ncc_margin, has_offset, ncc_offset,
+                                               tuple(isotd_list), ncc_connect, ncc_contour,
+                                               self.ui.milling_type_radio.get_value())
+            found_obj, nr_done = self.find_rest_machining(rest_key, ncc_obj, ref_obj, tools_params)
+            if found_obj is not None:
+                rest_area, warning_flag = self.reuse_rest_machining(geo_obj, found_obj, tools_storage)
+                del sorted_clear_tools[:nr_done]
+            else:
+                # Area to clear
+                area, warning_flag = self.get_tool_empty_area(name=name, ncc_obj=ncc_obj, geo_obj=geo_obj,
+                                                              isotooldia=isotd_list,
+                                                              has_offset=has_offset, ncc_offset=ncc_offset,
+                                                              ncc_margin=ncc_margin, tools_storage=tools_storage,
+                                                              bounding_box=bbox)
+                if area == 'fail':
+                    return 'fail'
+                # the area is kept on a grid of tiles; after each tool only the tiles that still have area to be
+                # cleared are worked on
+                rest_area = RestMachiningArea(flatten_shapely_geometry(area, simplify_tolerance=simplification_value))
+            tools_done = tools_params[:nr_done]
 
             # for testing purposes ----------------------------------
-            # for po in area.geoms:
+            # for po in rest_area.polygons():
             #     self.app.tool_shapes.add(po, color=self.app.options['global_sel_line'],
             #                              face_color=self.app.options['global_sel_line'],
             #                              update=True, layer=0, tolerance=None)
@@ -2650,88 +2826,15 @@ class NonCopperClear(AppTool, Gerber):
                 ncc_overlap = float(tool_data_dict["tools_ncc_overlap"]) / 100.0
                 ncc_method = tool_data_dict["tools_ncc_method"]
 
-                # variables to display the percentage of work done
-                geo_len = len(area.geoms)
-                old_disp_number = 0
-                self.app.log.warning("Total number of polygons to be cleared: %s" % str(geo_len))
-
-                # def random_color():
-                #     r_color = np.random.rand(4)
-                #     r_color[3] = 0.5
-                #     return r_color
-
-                # store here the geometry generated by clear operation
+                # clear the area left by the previous tools and remove from it what this tool cleared
                 cleared_geo = []
-
-                tool_empty_area = []
-                if area.geoms:
-                    tool_empty_area = flatten_shapely_geometry(area.geoms)
-
-                if tool_empty_area:
-                    poly_failed = 0
-                    pol_nr = 0
-                    for p in tool_empty_area:
-                        # provide the app with a way to process the GUI events when in a blocking loop
-                        if not run_threaded:
-                            QtWidgets.QApplication.processEvents()
-
-                        if self.app.abort_flag:
-                            # graceful abort requested by the user
-                            raise grace
-
-                        if p is not None and p.is_valid and not p.is_empty:
-                            # provide the app with a way to process the GUI events when in a blocking loop
-                            QtWidgets.QApplication.processEvents()
-
-                            # speedup the clearing by not trying to clear polygons that is obvious they can't be
-                            # cleared with the current tool. this tremendously reduce the clearing time
-                            check_dist = -tool / 2
-                            check_buff = p.buffer(check_dist, self.circle_steps)
-                            check_buff = flatten_shapely_geometry(check_buff, simplify_tolerance=simplification_value)
-                            if not check_buff:
-                                continue
-
-                            # if self.app.dec_format(float(tool), self.decimals) == 0.15:
-                            #     # for testing purposes ----------------------------------
-                            #     self.app.tool_shapes.add(p, color=self.app.options['global_sel_line'],
-                            #                              face_color=random_color(),
-                            #                              update=True, layer=0, tolerance=None)
-                            #     self.app.tool_shapes.add(check_buff, color=self.app.options['global_sel_line'],
-                            #                              face_color='#FFFFFFFF',
-                            #                              update=True, layer=0, tolerance=None)
-                            #     # -------------------------------------------------------
-
-                            # actual copper clearing is done here
-                            if isinstance(p, Polygon):
-                                res = self.clear_polygon_worker(pol=p, tooldia=tool,
-                                                                ncc_method=ncc_method,
-                                                                ncc_overlap=ncc_overlap,
-                                                                ncc_connect=ncc_connect,
-                                                                ncc_contour=ncc_contour,
-                                                                simplify_tol=simplification_value,
-                                                                prog_plot=prog_plot)
-
-                                if res is not None:
-                                    cleared_geo += res
-                                else:
-                                    poly_failed += 1
-                            else:
-                                self.app.log.warning("Expected geo is a Polygon. Instead got a %s" % str(type(p)))
-
-                            if poly_failed > 0:
-                                app_obj.poly_not_cleared = True
-
-                            pol_nr += 1
-                            disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
-                            # log.debug("Polygons cleared: %d" % pol_nr)
-
-                            if old_disp_number < disp_number <= 100:
-                                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                                old_disp_number = disp_number
-                                # log.debug("Polygons cleared: %d. Percentage done: %d%%" % (pol_nr, disp_number))
-
-                    if self.app.abort_flag:
-                        raise grace     # graceful abort requested by the user
+                if not rest_area.is_empty:
+                    cleared_geo, poly_failed = self.rest_clear_tool(
+                        rest_area, tool, ncc_method=ncc_method, ncc_overlap=ncc_overlap, ncc_connect=ncc_connect,
+                        ncc_contour=ncc_contour, prog_plot=prog_plot, run_threaded=run_threaded,
+                        simplify_tol=simplification_value)
+                    if poly_failed:
+                        app_obj.poly_not_cleared = True
 
                     # check if there is a geometry at all in the cleared geometry
                     if cleared_geo:
@@ -2751,65 +2854,15 @@ class NonCopperClear(AppTool, Gerber):
                 self.app.log.debug(
                     "NCC Tool.ncc_handler.gen_clear_area_rest() -> Number of cleared geo coords: %s" % str(l_coords))
 
-                # # Area to clear next
-                # try:
-                #     # buffered_cleared = unary_union(cleared_geo).buffer(tool / 2.0)
-                #     # area = area.difference(buffered_cleared)
-                #     area = area.difference(unary_union(cleared_geo))
-                # except Exception as e:
-                #     self.app.log.error("Creating new area failed due of: %s" % str(e))
-
                 if not cleared_geo:
                     break
-                buffered_cleared_geo = [line.buffer(tool / 2) for line in cleared_geo]
-                buffered_cleared_geo = flatten_shapely_geometry(buffered_cleared_geo)
-                if not buffered_cleared_geo:
-                    break
-                try:
-                    new_area = MultiPolygon(buffered_cleared_geo)
-                except Exception as err:
-                    self.app.log.error("NonCopperClear.ncc_handler.gen_clear_area_rest() Buffering -> %s" % str(err))
-                    self.app.log.debug(
-                        "NonCopperClear.ncc_handler.gen_clear_area_rest() Buffering -> %s" % str(traceback.format_exc())
-                    )
-                    return
-                new_area = new_area.buffer(0.0000001)
-
-                area = area.difference(new_area)
-                area = flatten_shapely_geometry(area, simplify_tolerance=simplification_value)
-
-                new_area = [pol for pol in area if pol.is_valid and not pol.is_empty]
-                area = MultiPolygon(new_area)
-
-                # speedup the clearing by not trying to clear polygons that is clear they can't be
-                # cleared with any tool. this tremendously reduce the clearing time
-                # found_poly_to_clear = False
-                # for t in sorted_clear_tools:
-                #     check_dist = -t / 2.000000001
-                #     for pl in area:
-                #         check_buff = pl.buffer(check_dist)
-                #         if not check_buff or check_buff.is_empty or not check_buff.is_valid:
-                #             continue
-                #         else:
-                #             found_poly_to_clear = True
-                #             break
-                #     if found_poly_to_clear is True:
-                #         break
-                #
-                # if found_poly_to_clear is False:
-                #     log.warning("The area to be cleared no longer has polygons. Finishing.")
-                #     break
-
-                if not area or area.is_empty:
+                tools_done.append(tools_params[len(tools_done)])
+
+                if rest_area.is_empty:
                     break
 
-                # # try to clear the polygons
-                # buff_distance = 0.0
-                # try:
-                #     new_area = [p.buffer(buff_distance) for p in area if not p.is_empty]
-                # except TypeError:
-                #     new_area = [area.buffer(tool * ncc_overlap)]
-                # area = unary_union(area)
+            # keep the area left to clear so the rest machining can be continued with more tools
+            self.store_rest_machining(geo_obj, rest_key, ncc_obj, ref_obj, tools_done, rest_area, warning_flag)
 
             geo_obj.multigeo = True
             geo_obj.obj_options["tools_mill_tooldia"] = '0.0'
@@ -3429,9 +3482,6 @@ class NonCopperClear(AppTool, Gerber):
 
             sorted_tools.sort(reverse=True)
 
-            cleared_geo = []
-            cleared_by_last_tool = []
-            rest_geo = []
             current_uid = 1
             try:
                 tool = eval(str(self.app.options["tools_ncc_tools"]))[0]
@@ -3440,157 +3490,173 @@ class NonCopperClear(AppTool, Gerber):
 
             # repurposed flag for final object, geo_obj. True if it has any solid_geometry, False if not.
             app_obj.poly_not_cleared = True
-            app_obj.log.debug("NCC Tool. Calculate 'empty' area.")
-            app_obj.inform.emit("NCC Tool. Calculate 'empty' area.")
 
-            # ###################################################################################################
-            # Calculate the empty area by subtracting the solid_geometry from the object bounding box geometry ##
-            # ###################################################################################################
-            if ncc_obj.kind == 'gerber' and not isotooldia:
-                sol_geo = ncc_obj.solid_geometry
-                if has_offset is True:
-                    app_obj.inform.emit('[WARNING_NOTCL] %s ...' % _("Buffering"))
-                    sol_geo = sol_geo.buffer(distance=ncc_offset)
-                    app_obj.inform.emit('[success] %s ...' % _("Buffering finished"))
-                empty = self.get_ncc_empty_area(target=sol_geo, boundary=bounding_box)
-                if empty == 'fail':
-                    return 'fail'
+            # if this rest machining was already done with the first tools, continue it from the area left to clear
+            ref_obj = ncc_sel_obj if ncc_select == 2 else None
+            tools_params = [(self.app.dec_format(t, self.decimals), overlap, ncc_method) for t in sorted_tools]
+            rest_key = self.rest_machining_key(ncc_obj, ref_obj, ncc_select, ncc_margin, has_offset, ncc_offset,
+                                               tuple(isotooldia) if isotooldia else (), connect, contour,
+                                               self.app.options["tools_ncc_milling_type"])
+            found_obj, nr_done = self.find_rest_machining(rest_key, ncc_obj, ref_obj, tools_params)
+            if found_obj is not None:
+                rest_area, warning_flag = self.reuse_rest_machining(geo_obj, found_obj, tools_storage)
+                del sorted_tools[:nr_done]
+            else:
+                app_obj.log.debug("NCC Tool. Calculate 'empty' area.")
+                app_obj.inform.emit("NCC Tool. Calculate 'empty' area.")
 
-                if empty.is_empty:
-                    app_obj.inform.emit('[ERROR_NOTCL] %s' %
-                                        _("Could not get the extent of the area to be non copper cleared."))
-                    return 'fail'
-            elif ncc_obj.kind == 'gerber' and isotooldia:
-                isolated_geo = []
-                self.solid_geometry = ncc_obj.solid_geometry
+                # ###################################################################################################
+                # Calculate the empty area by subtracting the solid_geometry from the object bounding box geometry ##
+                # ###################################################################################################
+                if ncc_obj.kind == 'gerber' and not isotooldia:
+                    sol_geo = ncc_obj.solid_geometry
+                    if has_offset is True:
+                        app_obj.inform.emit('[WARNING_NOTCL] %s ...' % _("Buffering"))
+                        sol_geo = sol_geo.buffer(distance=ncc_offset)
+                        app_obj.inform.emit('[success] %s ...' % _("Buffering finished"))
+                    empty = self.get_ncc_empty_area(target=sol_geo, boundary=bounding_box)
+                    if empty == 'fail':
+                        return 'fail'
 
-                # if milling type is climb then the move is counter-clockwise around features
-                milling_type = self.app.options["tools_ncc_milling_type"]
+                    if empty.is_empty:
+                        app_obj.inform.emit('[ERROR_NOTCL] %s' %
+                                            _("Could not get the extent of the area to be non copper cleared."))
+                        return 'fail'
+                elif ncc_obj.kind == 'gerber' and isotooldia:
+                    isolated_geo = []
+                    self.solid_geometry = ncc_obj.solid_geometry
 
-                for tool_iso in isotooldia:
-                    new_geometry = []
+                    # if milling type is climb then the move is counter-clockwise around features
+                    milling_type = self.app.options["tools_ncc_milling_type"]
 
-                    if milling_type == 'cl':
-                        isolated_geo = self.generate_envelope(tool_iso, 1)
-                    else:
-                        isolated_geo = self.generate_envelope(tool_iso, 0)
+                    for tool_iso in isotooldia:
+                        new_geometry = []
 
-                    if isolated_geo == 'fail':
-                        app_obj.inform.emit('[ERROR_NOTCL] %s' % _("Isolation geometry could not be generated."))
-                    else:
-                        app_obj.inform.emit('[WARNING_NOTCL] %s' % _("Isolation geometry is broken. Margin is less "
-                                                                     "than isolation tool diameter."))
+                        if milling_type == 'cl':
+                            isolated_geo = self.generate_envelope(tool_iso, 1)
+                        else:
+                            isolated_geo = self.generate_envelope(tool_iso, 0)
 
-                        try:
-                            for geo_elem in isolated_geo:
-                                # provide the app with a way to process the GUI events when in a blocking loop
-                                QtWidgets.QApplication.processEvents()
+                        if isolated_geo == 'fail':
+                            app_obj.inform.emit('[ERROR_NOTCL] %s' % _("Isolation geometry could not be generated."))
+                        else:
+                            app_obj.inform.emit('[WARNING_NOTCL] %s' % _("Isolation geometry is broken. Margin is less "
+                                                                         "than isolation tool diameter."))
 
-                                if self.app.abort_flag:
-                                    # graceful abort requested by the user
-                                    raise grace
+                            try:
+                                for geo_elem in isolated_geo:
+                                    # provide the app with a way to process the GUI events when in a blocking loop
+                                    QtWidgets.QApplication.processEvents()
 
-                                if isinstance(geo_elem, Polygon):
-                                    for ring in self.poly2rings(geo_elem):
-                                        new_geo = ring.intersection(bounding_box)
-                                        if new_geo and not new_geo.is_empty:
-                                            new_geometry.append(new_geo)
-                                elif isinstance(geo_elem, MultiPolygon):
-                                    for poly_g in geo_elem.geoms:
-                                        for ring in self.poly2rings(poly_g):
+                                    if self.app.abort_flag:
+                                        # graceful abort requested by the user
+                                        raise grace
+
+                                    if isinstance(geo_elem, Polygon):
+                                        for ring in self.poly2rings(geo_elem):
                                             new_geo = ring.intersection(bounding_box)
                                             if new_geo and not new_geo.is_empty:
                                                 new_geometry.append(new_geo)
-                                elif isinstance(geo_elem, LineString):
-                                    new_geo = geo_elem.intersection(bounding_box)
-                                    if new_geo:
-                                        if not new_geo.is_empty:
-                                            new_geometry.append(new_geo)
-                                elif isinstance(geo_elem, MultiLineString):
-                                    for line_elem in geo_elem.geoms:
-                                        new_geo = line_elem.intersection(bounding_box)
-                                        if new_geo and not new_geo.is_empty:
-                                            new_geometry.append(new_geo)
-                        except TypeError:
-                            try:
-                                if isinstance(isolated_geo, Polygon):
-                                    for ring in self.poly2rings(isolated_geo):
-                                        new_geo = ring.intersection(bounding_box)
+                                    elif isinstance(geo_elem, MultiPolygon):
+                                        for poly_g in geo_elem.geoms:
+                                            for ring in self.poly2rings(poly_g):
+                                                new_geo = ring.intersection(bounding_box)
+                                                if new_geo and not new_geo.is_empty:
+                                                    new_geometry.append(new_geo)
+                                    elif isinstance(geo_elem, LineString):
+                                        new_geo = geo_elem.intersection(bounding_box)
                                         if new_geo:
                                             if not new_geo.is_empty:
                                                 new_geometry.append(new_geo)
-                                elif isinstance(isolated_geo, LineString):
-                                    new_geo = isolated_geo.intersection(bounding_box)
-                                    if new_geo and not new_geo.is_empty:
-                                        new_geometry.append(new_geo)
-                                elif isinstance(isolated_geo, MultiLineString):
-                                    for line_elem in isolated_geo.geoms:
-                                        new_geo = line_elem.intersection(bounding_box)
+                                    elif isinstance(geo_elem, MultiLineString):
+                                        for line_elem in geo_elem.geoms:
+                                            new_geo = line_elem.intersection(bounding_box)
+                                            if new_geo and not new_geo.is_empty:
+                                                new_geometry.append(new_geo)
+                            except TypeError:
+                                try:
+                                    if isinstance(isolated_geo, Polygon):
+                                        for ring in self.poly2rings(isolated_geo):
+                                            new_geo = ring.intersection(bounding_box)
+                                            if new_geo:
+                                                if not new_geo.is_empty:
+                                                    new_geometry.append(new_geo)
+                                    elif isinstance(isolated_geo, LineString):
+                                        new_geo = isolated_geo.intersection(bounding_box)
                                         if new_geo and not new_geo.is_empty:
                                             new_geometry.append(new_geo)
-                            except Exception:
-                                pass
+                                    elif isinstance(isolated_geo, MultiLineString):
+                                        for line_elem in isolated_geo.geoms:
+                                            new_geo = line_elem.intersection(bounding_box)
+                                            if new_geo and not new_geo.is_empty:
+                                                new_geometry.append(new_geo)
+                                except Exception:
+                                    pass
 
-                        # a MultiLineString geometry element will show that the isolation is broken for this tool
-                        for geo_e in new_geometry:
-                            if type(geo_e) == MultiLineString:
-                                warning_flag += 1
-                                break
+                            # a MultiLineString geometry element will show that the isolation is broken for this tool
+                            for geo_e in new_geometry:
+                                if type(geo_e) == MultiLineString:
+                                    warning_flag += 1
+                                    break
 
-                        for k, v in tools_storage.items():
-                            if float('%.*f' % (self.decimals, v['tooldia'])) == float('%.*f' % (self.decimals,
-                                                                                                tool_iso)):
-                                current_uid = int(k)
-                                # add the solid_geometry to the current too in self.paint_tools dictionary
-                                # and then reset the temporary list that stored that solid_geometry
-                                v['solid_geometry'] = deepcopy(new_geometry)
-                                v['data']['name'] = name
-                                break
-                        geo_obj.tools[current_uid] = dict(tools_storage[current_uid])
+                            for k, v in tools_storage.items():
+                                if float('%.*f' % (self.decimals, v['tooldia'])) == float('%.*f' % (self.decimals,
+                                                                                                    tool_iso)):
+                                    current_uid = int(k)
+                                    # add the solid_geometry to the current too in self.paint_tools dictionary
+                                    # and then reset the temporary list that stored that solid_geometry
+                                    v['solid_geometry'] = deepcopy(new_geometry)
+                                    v['data']['name'] = name
+                                    break
+                            geo_obj.tools[current_uid] = dict(tools_storage[current_uid])
 
-                sol_geo = unary_union(isolated_geo)
-                if has_offset is True:
-                    app_obj.inform.emit('[WARNING_NOTCL] %s ...' % _("Buffering"))
-                    sol_geo = sol_geo.buffer(distance=ncc_offset)
-                    app_obj.inform.emit('[success] %s ...' % _("Buffering finished"))
-                empty = self.get_ncc_empty_area(target=sol_geo, boundary=bounding_box)
-                if empty == 'fail':
-                    return 'fail'
+                    sol_geo = unary_union(isolated_geo)
+                    if has_offset is True:
+                        app_obj.inform.emit('[WARNING_NOTCL] %s ...' % _("Buffering"))
+                        sol_geo = sol_geo.buffer(distance=ncc_offset)
+                        app_obj.inform.emit('[success] %s ...' % _("Buffering finished"))
+                    empty = self.get_ncc_empty_area(target=sol_geo, boundary=bounding_box)
+                    if empty == 'fail':
+                        return 'fail'
 
-                if empty.is_empty:
-                    app_obj.inform.emit('[ERROR_NOTCL] %s' %
-                                        _("Isolation geometry is broken. Margin is less than isolation tool diameter."))
-                    return 'fail'
+                    if empty.is_empty:
+                        app_obj.inform.emit('[ERROR_NOTCL] %s' % _("Isolation geometry is broken. Margin is less than "
+                                                                   "isolation tool diameter."))
+                        return 'fail'
 
-            elif ncc_obj.kind == 'geometry':
-                sol_geo = unary_union(ncc_obj.solid_geometry)
-                if has_offset is True:
-                    app_obj.inform.emit('[WARNING_NOTCL] %s ...' % _("Buffering"))
-                    sol_geo = sol_geo.buffer(distance=ncc_offset)
-                    app_obj.inform.emit('[success] %s ...' % _("Buffering finished"))
-                empty = self.get_ncc_empty_area(target=sol_geo, boundary=bounding_box)
-                if empty == 'fail':
-                    return 'fail'
+                elif ncc_obj.kind == 'geometry':
+                    sol_geo = unary_union(ncc_obj.solid_geometry)
+                    if has_offset is True:
+                        app_obj.inform.emit('[WARNING_NOTCL] %s ...' % _("Buffering"))
+                        sol_geo = sol_geo.buffer(distance=ncc_offset)
+                        app_obj.inform.emit('[success] %s ...' % _("Buffering finished"))
+                    empty = self.get_ncc_empty_area(target=sol_geo, boundary=bounding_box)
+                    if empty == 'fail':
+                        return 'fail'
 
-                if empty.is_empty:
+                    if empty.is_empty:
+                        app_obj.inform.emit('[ERROR_NOTCL] %s' %
+                                            _("Could not get the extent of the area to be non copper cleared."))
+                        return 'fail'
+                else:
                     app_obj.inform.emit('[ERROR_NOTCL] %s' %
-                                        _("Could not get the extent of the area to be non copper cleared."))
-                    return 'fail'
-            else:
-                app_obj.inform.emit('[ERROR_NOTCL] %s' % _('The selected object is not suitable for copper clearing.'))
-                return
+                                        _('The selected object is not suitable for copper clearing.'))
+                    return
 
-            if self.app.abort_flag:
-                # graceful abort requested by the user
-                raise grace
+                if self.app.abort_flag:
+                    # graceful abort requested by the user
+                    raise grace
 
-            if type(empty) is Polygon:
-                empty = MultiPolygon([empty])
+                if type(empty) is Polygon:
+                    empty = MultiPolygon([empty])
 
-            area = empty.buffer(0)
+                # the area is kept on a grid of tiles; after each tool only the tiles that still have area to be
+                # cleared are worked on
+                rest_area = RestMachiningArea(flatten_shapely_geometry(empty.buffer(0)))
 
-            app_obj.log.debug("NCC Tool. Finished calculation of 'empty' area.")
-            app_obj.inform.emit("NCC Tool. Finished calculation of 'empty' area.")
+                app_obj.log.debug("NCC Tool. Finished calculation of 'empty' area.")
+                app_obj.inform.emit("NCC Tool. Finished calculation of 'empty' area.")
+            tools_done = tools_params[:nr_done]
 
             # Generate area for each tool
             while sorted_tools:
@@ -3606,162 +3672,38 @@ class NonCopperClear(AppTool, Gerber):
                 )
                 app_obj.proc_container.update_view_text(' %d%%' % 0)
 
-                tool_used = tool - 1e-12
-                cleared_geo[:] = []
-
-                # Area to clear
-                for poly_r in cleared_by_last_tool:
-                    # provide the app with a way to process the GUI events when in a blocking loop
-                    QtWidgets.QApplication.processEvents()
-
-                    if self.app.abort_flag:
-                        # graceful abort requested by the user
-                        raise grace
-                    try:
-                        area = area.difference(poly_r)
-                    except Exception:
-                        pass
-                cleared_by_last_tool[:] = []
-
-                # Transform area to MultiPolygon
-                if type(area) is Polygon:
-                    area = MultiPolygon([area])
-
-                # add the rest that was not able to be cleared previously; area is a MultyPolygon
-                # and rest_geo it's a list
-                allparts = [p.buffer(0) for p in area.geoms]
-                allparts += deepcopy(rest_geo)
-                rest_geo[:] = []
-                area = MultiPolygon(deepcopy(allparts))
-                allparts[:] = []
-
-                # variables to display the percentage of work done
-                geo_len = len(area.geoms)
-                old_disp_number = 0
-                self.app.log.warning("Total number of polygons to be cleared. %s" % str(geo_len))
-
-                if area.geoms:
-                    if len(area.geoms) > 0:
-                        pol_nr = 0
-                        for p in area.geoms:
-                            if self.app.abort_flag:
-                                # graceful abort requested by the user
-                                raise grace
-
-                            # clean the polygon
-                            p = p.buffer(0)
-
-                            if p is not None and p.is_valid:
-                                # provide the app with a way to process the GUI events when in a blocking loop
-                                QtWidgets.QApplication.processEvents()
-
-                                if isinstance(p, Polygon):
-                                    try:
-                                        if ncc_method == 0:     # standard
-                                            cp = self.clear_polygon_shrink(p, tool_used,
-                                                                           self.circle_steps,
-                                                                           overlap=overlap, contour=contour, connect=connect,
-                                                                           prog_plot=False)
-                                        elif ncc_method == 1:   # seed
-                                            cp = self.clear_polygon_seed(p, tool_used,
-                                                                         self.circle_steps,
-                                                                         overlap=overlap, contour=contour, connect=connect,
-                                                                         prog_plot=False)
-                                        else:
-                                            cp = self.clear_polygon_lines(p, tool_used,
-                                                                          self.circle_steps,
-                                                                          overlap=overlap, contour=contour, connect=connect,
-                                                                          prog_plot=False)
-                                        cleared_geo.append(list(cp.get_objects()))
-                                    except Exception as ee:
-                                        self.app.log.error("Polygon can't be cleared. %s" % str(ee))
-                                        # this polygon should be added to a list and then try clear it with
-                                        # a smaller tool
-                                        rest_geo.append(p)
-                                elif isinstance(p, MultiPolygon):
-                                    for poly_p in p.geoms:
-                                        if poly_p is not None:
-                                            # provide the app with a way to process the GUI events when
-                                            # in a blocking loop
-                                            QtWidgets.QApplication.processEvents()
-
-                                            try:
-                                                if ncc_method == 0:     # 'standard'
-                                                    cp = self.clear_polygon_shrink(poly_p, tool_used,
-                                                                                   self.circle_steps,
-                                                                                   overlap=overlap, contour=contour,
-                                                                                   connect=connect,
-                                                                                   prog_plot=False)
-                                                elif ncc_method == 1:   # 'seed'
-                                                    cp = self.clear_polygon_seed(poly_p, tool_used,
-                                                                                 self.circle_steps,
-                                                                                 overlap=overlap, contour=contour,
-                                                                                 connect=connect,
-                                                                                 prog_plot=False)
-                                                else:
-                                                    cp = self.clear_polygon_lines(poly_p, tool_used,
-                                                                                  self.circle_steps,
-                                                                                  overlap=overlap, contour=contour,
-                                                                                  connect=connect,
-                                                                                  prog_plot=False)
-                                                cleared_geo.append(list(cp.get_objects()))
-                                            except Exception as eee:
-                                                self.app.log.error("Polygon can't be cleared. %s" % str(eee))
-                                                # this polygon should be added to a list and then try clear it with
-                                                # a smaller tool
-                                                rest_geo.append(poly_p)
-
-                                pol_nr += 1
-                                disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
-                                # log.debug("Polygons cleared: %d" % pol_nr)
-
-                                if old_disp_number < disp_number <= 100:
-                                    self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                                    old_disp_number = disp_number
-                                    # log.debug("Polygons cleared: %d. Percentage done: %d%%" % (pol_nr, disp_number))
-
-                        if self.app.abort_flag:
-                            # graceful abort requested by the user
-                            raise grace
-
-                        # check if there is a geometry at all in the cleared geometry
-                        if cleared_geo:
-                            # Overall cleared area
-                            cleared_area = list(self.flatten_list(cleared_geo))
-
-                            # cleared = MultiPolygon([p.buffer(tool_used / 2).buffer(-tool_used / 2)
-                            #                         for p in cleared_area])
+                if rest_area.is_empty:
+                    break
 
-                            # here we store the poly's already processed in the original geometry by the current tool
-                            # into cleared_by_last_tool list
-                            # this will be sutracted from the original geometry_to_be_cleared and make data for
-                            # the next tool
-                            buffer_value = tool_used / 2
-                            for p in cleared_area:
-                                if self.app.abort_flag:
-                                    # graceful abort requested by the user
-                                    raise grace
+                # clear the area left by the previous tools and remove from it what this tool cleared; the polygons
+                # that could not be cleared stay in the area, to be cleared with a smaller tool
+                tool_used = tool - 1e-12
+                cleared_area, poly_failed = self.rest_clear_tool(
+                    rest_area, tool_used, ncc_method=ncc_method, ncc_overlap=overlap, ncc_connect=connect,
+                    ncc_contour=contour, prog_plot=False, run_threaded=run_threaded)
+                app_obj.log.warning("Total number of polygons failed to be cleared: %s" % str(poly_failed))
+                tools_done.append(tools_params[len(tools_done)])
 
-                                r_poly = p.buffer(buffer_value)
-                                cleared_by_last_tool.append(r_poly)
+                # check if there is a geometry at all in the cleared geometry
+                if cleared_area:
+                    # find the tooluid associated with the current tool_dia so we know
+                    # where to add the tool solid_geometry
+                    for k, v in tools_storage.items():
+                        if float('%.*f' % (self.decimals, v['tooldia'])) == float('%.*f' % (self.decimals, tool)):
+                            current_uid = int(k)
 
-                            # find the tooluid associated with the current tool_dia so we know
-                            # where to add the tool solid_geometry
-                            for k, v in tools_storage.items():
-                                if float('%.*f' % (self.decimals, v['tooldia'])) == float('%.*f' % (self.decimals,
-                                                                                                    tool)):
-                                    current_uid = int(k)
+                            # add the solid_geometry to the current too in self.paint_tools dictionary
+                            # and then reset the temporary list that stored that solid_geometry
+                            v['solid_geometry'] = flatten_shapely_geometry(cleared_area)
+                            v['data']['name'] = name
+                            break
 
-                                    # add the solid_geometry to the current too in self.paint_tools dictionary
-                                    # and then reset the temporary list that stored that solid_geometry
-                                    v['solid_geometry'] = flatten_shapely_geometry(cleared_area)
-                                    v['data']['name'] = name
-                                    cleared_area[:] = []
-                                    break
+                    geo_obj.tools[current_uid] = dict(tools_storage[current_uid])
+                else:
+                    app_obj.log.debug("There are no geometries in the cleared polygon.")
 
-                            geo_obj.tools[current_uid] = dict(tools_storage[current_uid])
-                        else:
-                            app_obj.log.debug("There are no geometries in the cleared polygon.")
+            # keep the area left to clear so the rest machining can be continued with more tools
+            self.store_rest_machining(geo_obj, rest_key, ncc_obj, ref_obj, tools_done, rest_area, warning_flag)
 
             geo_obj.multigeo = True
             geo_obj.obj_options["tools_mill_tooldia"] = str(tool)
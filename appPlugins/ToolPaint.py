@@ -31,7 +31,7 @@ import appTranslation as fcTranslate
 import builtins
 
 from appParsers.ParseGerber import Gerber
-from camlib import Geometry, AppRTreeStorage, grace, flatten_shapely_geometry
+from camlib import Geometry, AppRTreeStorage, grace, flatten_shapely_geometry, PolygonClearing
 
 fcTranslate.apply_language('strings')
 if '_' not in builtins.__dict__:
@@ -1850,6 +1850,50 @@ class ToolPaint(AppTool, Gerber):
             self.app.inform.emit('[ERROR_NOTCL] %s' % _('Geometry could not be painted completely'))
             return None
 
+    def paint_polygons(self, polygons, tooldiameter, paint_method, over, conn, cont, prog_plot, obj):
+        """
+        Paints the polygons. When there is more than one polygon, the polygons are painted in the processes of the
+        app pool, one task for each polygon. The 'Laser_lines' method needs the painted object and is always done
+        here, one polygon after another.
+
+        :param polygons:    the polygons to be painted
+        :type polygons:     list
+        :return:            yields (polygon, tool paths) in the order of the polygons; the tool paths are a list of
+                            LineStrings or None if the polygon could not be painted
+
+        For the other parameters see paint_polygon_worker().
+        """
+        # the key is the index of the method in the UI
+        pool_methods = {0: 'shrink', 1: 'seed', 2: 'lines', 4: 'combo'}
+
+        if len(polygons) < 2 or paint_method not in pool_methods:
+            for polyg in polygons:
+                # provide the app with a way to process the GUI events when in a blocking loop
+                QtWidgets.QApplication.processEvents()
+                if self.app.abort_flag:
+                    # graceful abort requested by the user
+                    raise grace
+
+                geo_res = self.paint_polygon_worker(polyg, tooldiameter=tooldiameter, over=over, conn=conn,
+                                                    cont=cont, paint_method=paint_method, obj=obj,
+                                                    prog_plot=prog_plot)
+                if geo_res == "fail":
+                    # graceful abort requested by the user
+                    raise grace
+                yield polyg, list(geo_res.get_objects()) if geo_res else None
+            return
+
+        results = PolygonClearing.pool_clear(self.app.pool, polygons, pool_methods[paint_method], tooldiameter,
+                                             self.circle_steps, overlap=over, connect=conn, contour=cont,
+                                             abort_requested=lambda: self.app.abort_flag)
+        for polyg, geo_res in results:
+            if geo_res is None:
+                self.app.inform.emit('[ERROR_NOTCL] %s' % _('Geometry could not be painted completely'))
+            elif prog_plot:
+                self.plot_temp_shapes(geo_res)
+                self.temp_shapes.redraw()
+            yield polyg, geo_res
+
     def paint_geo(self, obj, geometry, tooldia=None, order=None, method=None, outname=None,
                   tools_storage=None, plot=True, rest=None, run_threaded=True):
         """
@@ -1971,15 +2015,9 @@ class ToolPaint(AppTool, Gerber):
                 # -----------------------------
                 try:
                     cp_list = []
-                    for pp in poly_buf:
-                        # provide the app with a way to process the GUI events when in a blocking loop
-                        QtWidgets.QApplication.processEvents()
-                        if self.app.abort_flag:
-                            # graceful abort requested by the user
-                            raise grace
-                        geo_res = self.paint_polygon_worker(pp, tooldiameter=tool_dia, over=over, conn=conn,
-                                                            cont=cont, paint_method=paint_method, obj=obj,
-                                                            prog_plot=prog_plot)
+                    for pp, geo_res in self.paint_polygons(poly_buf, tooldiameter=tool_dia, over=over, conn=conn,
+                                                           cont=cont, paint_method=paint_method, obj=obj,
+                                                           prog_plot=prog_plot):
                         if geo_res:
                             cp_list.append(geo_res)
                         pol_nr += 1
@@ -1994,9 +2032,9 @@ class ToolPaint(AppTool, Gerber):
                     if cp_list:
                         for cp in cp_list:
                             if simplification_value > 0.0:
-                                total_geometry += [x.simplify(simplification_value) for x in cp.get_objects()]
+                                total_geometry += [x.simplify(simplification_value) for x in cp]
                             else:
-                                total_geometry += [x for x in cp.get_objects()]
+                                total_geometry += [x for x in cp]
 
                         # clean the geometry
                         total_geometry = [g for g in total_geometry if g and not g.is_empty]
@@ -2138,28 +2176,24 @@ class ToolPaint(AppTool, Gerber):
                 # -----------------------------
                 try:
                     cleared_geo = []
+
+                    # speedup the clearing by not trying to clear polygons that is clear they can't be
+                    # cleared with the current tool. this tremendously reduce the clearing time
+                    check_dist = -tool_dia / 2.0
+                    polygons_to_paint = []
                     for pp in poly_buf:
-                        # provide the app with a way to process the GUI events when in a blocking loop
-                        QtWidgets.QApplication.processEvents()
-                        if self.app.abort_flag:
-                            # graceful abort requested by the user
-                            raise grace
-
-                        # speedup the clearing by not trying to clear polygons that is clear they can't be
-                        # cleared with the current tool. this tremendously reduce the clearing time
-                        check_dist = -tool_dia / 2.0
                         check_buff = pp.buffer(check_dist)
-                        if not check_buff or check_buff.is_empty:
-                            continue
-
-                        geo_res = self.paint_polygon_worker(pp, tooldiameter=tool_dia, over=over, conn=conn,
-                                                            cont=cont, paint_method=paint_method, obj=obj,
-                                                            prog_plot=prog_plot)
+                        if check_buff and not check_buff.is_empty:
+                            polygons_to_paint.append(pp)
 
+                    for pp, geo_res in self.paint_polygons(polygons_to_paint, tooldiameter=tool_dia, over=over,
+                                                           conn=conn, cont=cont, paint_method=paint_method, obj=obj,
+                                                           prog_plot=prog_plot):
+                        geo_res = geo_res if geo_res else []
                         if simplification_value > 0.0:
-                            geo_elems = [x.simplify(simplification_value) for x in geo_res.get_objects()]
+                            geo_elems = [x.simplify(simplification_value) for x in geo_res]
                         else:
-                            geo_elems = [x for x in geo_res.get_objects()]
+                            geo_elems = [x for x in geo_res]
 
                         # See if the polygon was completely cleared
                         pp_cleared = unary_union(geo_elems).buffer(tool_dia / 2.0)
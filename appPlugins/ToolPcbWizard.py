@@ -365,7 +365,7 @@ class PcbWizard(AppTool):
                 return "fail"
 
             for tool in excellon_obj.tools:
-                if excellon_obj.tools[tool]['solid_geometry']:
+                if excellon_obj.tools[tool]['solid_geometry'] or len(excellon_obj.drill_centers(tool)):
                     return
             app_obj.inform.emit('[ERROR_NOTCL] %s: %s' % (_("No geometry found in file"), name))
             return "fail"
@@ -23,6 +23,7 @@ import appTranslation as fcTranslate
 import builtins
 
 from appParsers.ParseGerber import Gerber
+from appCommon.PadDrillMatch import PadDrillIndex, pad_drill_index
 from camlib import Geometry
 
 fcTranslate.apply_language('strings')
@@ -667,29 +668,26 @@ class ToolPunchGerber(AppTool, Gerber):
         # store here the clear geometry, the key is the drill size
         holes_apertures = {}
 
-        for apid, val in new_apertures_items:
-            if apid in sel_apid:
-                for elem in val['geometry']:
-                    # make it work only for Gerber Flashes who are Points in 'follow'
-                    if 'solid' in elem and isinstance(elem['follow'], Point):
-                        for tool in exc_obj.tools:
-                            clear_apid_size = exc_obj.tools[tool]['tooldia']
-
-                            if 'drills' in exc_obj.tools[tool]:
-                                for drill_pt in exc_obj.tools[tool]['drills']:
-                                    # since there may be drills that do not drill into a pad we test only for
-                                    # drills in a pad
-                                    if drill_pt.within(elem['solid']):
-                                        geo_elem = {'clear': drill_pt}
-
-                                        if clear_apid_size not in holes_apertures:
-                                            holes_apertures[clear_apid_size] = {
-                                                'type': 'C',
-                                                'size': clear_apid_size,
-                                                'geometry': []
-                                            }
-
-                                        holes_apertures[clear_apid_size]['geometry'].append(deepcopy(geo_elem))
+        # since there may be drills that do not drill into a pad we use only the drills in a pad; the pads are only
+        # the Gerber Flashes (Points in 'follow')
+        pad_index = pad_drill_index(grb_obj, exc_obj)
+        for pad_pos, drill_pos in zip(*pad_index.pairs()):
+            apid = pad_index.pad_keys[pad_pos][0]
+            if apid not in sel_apid:
+                continue
+
+            tool = pad_index.drill_keys[drill_pos][0]
+            clear_apid_size = exc_obj.tools[tool]['tooldia']
+            geo_elem = {'clear': pad_index.drills[drill_pos]}
+
+            if clear_apid_size not in holes_apertures:
+                holes_apertures[clear_apid_size] = {
+                    'type': 'C',
+                    'size': clear_apid_size,
+                    'geometry': []
+                }
+
+            holes_apertures[clear_apid_size]['geometry'].append(deepcopy(geo_elem))
 
         # add the clear geometry to new apertures; it's easier than to test if there are apertures with the same
         # size and add there the clear geometry
@@ -731,17 +729,15 @@ class ToolPunchGerber(AppTool, Gerber):
         for it in self.ui.apertures_table.selectedItems():
             sel_apid.append(int(it.text()))
 
-        # this is the punching geometry
+        # this is the punching geometry: the drills that are within the selected pads
         exc_solid_geometry = MultiPolygon(exc_obj.solid_geometry)
-        fin_exc_geo = []
+        sel_pads = []
         for sel_geo in self.manual_pads:
-            apid = sel_geo['apid']
-            idx = sel_geo['idx']
-            for exc_geo in exc_solid_geometry.geoms:
-                if exc_geo.within(self.grb_obj.tools[apid]['geometry'][idx]['solid']) and \
-                        isinstance(self.grb_obj.tools[apid]['geometry'][idx]['follow'], Point):
-                    fin_exc_geo.append(exc_geo)
-        exc_solid_geometry = MultiPolygon(fin_exc_geo)
+            sel_elem = self.grb_obj.tools[sel_geo['apid']]['geometry'][sel_geo['idx']]
+            if isinstance(sel_elem['follow'], Point):
+                sel_pads.append(sel_elem['solid'])
+        __, exc_pos = PadDrillIndex(sel_pads, exc_solid_geometry.geoms).pairs()
+        exc_solid_geometry = MultiPolygon([exc_solid_geometry.geoms[int(pos)] for pos in exc_pos])
 
         # this is the target geometry
         grb_solid_geometry = []
@@ -778,39 +774,39 @@ class ToolPunchGerber(AppTool, Gerber):
         # find maximum aperture id
         new_apid = max([int(x) for x, __ in new_apertures_items])
 
-        sel_pad_geo_list = []
-        for pad_elem in self.manual_pads:
-            apid = pad_elem['apid']
-            idx = pad_elem['idx']
-            sel_geo = self.grb_obj.tools[apid]['geometry'][idx]['solid']
-            sel_pad_geo_list.append(sel_geo)
-
         # store here the clear geometry, the key is the drill size
         holes_apertures = {}
 
-        for apid, val in new_apertures_items:
-            for elem in val['geometry']:
-                # make it work only for Gerber Flashes who are Points in 'follow'
-                if 'solid' in elem and isinstance(elem['follow'], Point):
-                    for tool in exc_obj.tools:
-                        clear_apid_size = exc_obj.tools[tool]['tooldia']
-
-                        if 'drills' in exc_obj.tools[tool]:
-                            for drill_pt in exc_obj.tools[tool]['drills']:
-                                # since there may be drills that do not drill into a pad we test only for
-                                # drills in a pad
-                                for sel_pad_geo in sel_pad_geo_list:
-                                    if drill_pt.within(elem['solid']) and drill_pt.within(sel_pad_geo):
-                                        geo_elem = {'clear': drill_pt}
-
-                                        if clear_apid_size not in holes_apertures:
-                                            holes_apertures[clear_apid_size] = {
-                                                'type': 'C',
-                                                'size': clear_apid_size,
-                                                'geometry': []
-                                            }
-
-                                        holes_apertures[clear_apid_size]['geometry'].append(deepcopy(geo_elem))
+        # since there may be drills that do not drill into a pad we use only the drills in a pad; the pads are only
+        # the Gerber Flashes (Points in 'follow')
+        pad_index = pad_drill_index(self.grb_obj, exc_obj)
+        pad_positions = {key: pos for pos, key in enumerate(pad_index.pad_keys)}
+
+        # for each drill, in how many of the selected pads it is
+        sel_pad_pos = {pad_positions.get((pad_elem['apid'], pad_elem['idx'])) for pad_elem in self.manual_pads}
+        sel_pads_nr = {}
+        for pad_pos, drill_pos in zip(*pad_index.pairs()):
+            if int(pad_pos) in sel_pad_pos:
+                sel_pads_nr[int(drill_pos)] = sel_pads_nr.get(int(drill_pos), 0) + 1
+
+        for drill_pos in pad_index.pairs()[1].tolist():
+            if drill_pos not in sel_pads_nr:
+                continue
+
+            tool = pad_index.drill_keys[drill_pos][0]
+            clear_apid_size = exc_obj.tools[tool]['tooldia']
+            geo_elem = {'clear': pad_index.drills[drill_pos]}
+
+            if clear_apid_size not in holes_apertures:
+                holes_apertures[clear_apid_size] = {
+                    'type': 'C',
+                    'size': clear_apid_size,
+                    'geometry': []
+                }
+
+            # the drill is added once for each selected pad it is in
+            for __ in range(sel_pads_nr[drill_pos]):
+                holes_apertures[clear_apid_size]['geometry'].append(deepcopy(geo_elem))
 
         # add the clear geometry to new apertures; it's easier than to test if there are apertures with the same
         # size and add there the clear geometry
@@ -1638,20 +1634,15 @@ class ToolPunchGerber(AppTool, Gerber):
         for it in self.ui.apertures_table.selectedItems():
             sel_apid.append(int(it.text()))
 
-        for apid, apid_value in self.grb_obj.tools.items():
+        pad_index = pad_drill_index(self.grb_obj)
+        for pad_pos in pad_index.pads_at(pt):
+            apid, idx = pad_index.pad_keys[pad_pos]
             if apid in sel_apid:
-                for idx, elem in enumerate(apid_value['geometry']):
-                    if 'follow' in elem and isinstance(elem['follow'], Point):
-                        try:
-                            pad = elem['solid']
-                        except KeyError:
-                            continue
-                        if pt.within(pad):
-                            new_elem = {
-                                'apid': apid,
-                                'idx': idx
-                            }
-                            results.append(deepcopy(new_elem))
+                new_elem = {
+                    'apid': apid,
+                    'idx': idx
+                }
+                results.append(deepcopy(new_elem))
         return results
 
     def on_manual_punch(self):
@@ -26,6 +26,7 @@ import appTranslation as fcTranslate
 import builtins
 
 from appParsers.ParseSVG import getsvggeo, getsvgtext, svgparselength, svgparse_viewbox
+from appCommon.QRCodeGeometry import qrcode_batch
 
 import qrcode
 import qrcode.image.svg
@@ -135,6 +136,7 @@ class QRCode(AppTool):
     def connect_signals_at_init(self):
         self.ui.level.toggled.connect(self.on_level_changed)
         self.ui.qrcode_button.clicked.connect(self.execute)
+        self.ui.batch_button.clicked.connect(self.on_batch_click)
         self.ui.export_png_button.clicked.connect(self.export_png_file)
         self.ui.export_svg_button.clicked.connect(self.export_svg_file)
 
@@ -293,6 +295,135 @@ class QRCode(AppTool):
 
         self.app.worker_task.emit({'fcn': job_thread_qr, 'params': [self.app]})
 
+    @staticmethod
+    def parse_batch_data(text):
+        """
+        :param text:    one QRCode per line, in the format: X, Y, QRCode data. The empty lines are ignored.
+        :type text:     str
+        :return:        list of (QRCode data, (X, Y))
+        :rtype:         list
+        """
+        items = []
+        for line_nr, line in enumerate(text.splitlines(), start=1):
+            if line.strip() == '':
+                continue
+            try:
+                x, y, data = line.split(',', 2)
+                items.append((data.strip(), (float(x), float(y))))
+            except ValueError:
+                raise ValueError('%s: %d' % (_("Wrong format. Expected: X, Y, QRCode data. Line"), line_nr))
+        return items
+
+    def on_batch_click(self):
+        try:
+            items = self.parse_batch_data(self.ui.batch_data.get_value())
+        except ValueError as e:
+            self.app.inform.emit('[ERROR_NOTCL] %s' % str(e))
+            return
+        if not items:
+            self.app.inform.emit('[ERROR_NOTCL] %s' % _("Cancelled. There is no QRCode Data in the text box."))
+            return
+
+        self.make_batch(items, outname='qrcode_batch',
+                        version=self.ui.version_entry.get_value(),
+                        error=self.ui.error_radio.get_value(),
+                        box_size=self.ui.bsize_entry.get_value(),
+                        border=self.ui.border_size_entry.get_value(),
+                        polarity=self.ui.pol_radio.get_value(),
+                        rounded=self.ui.bb_radio.get_value(),
+                        run_threaded=True)
+
+    def make_batch(self, items, outname, version, error, box_size, border, polarity, rounded, plot=True,
+                   run_threaded=False):
+        """
+        Makes a Gerber object with many QRCodes. The QRCodes are made in the worker processes and each one is made
+        of the rectangles that merge its modules, without an SVG step.
+
+        :param items:           list of (QRCode data, (X, Y)) where (X, Y) is the lower left corner of the QRCode,
+                                the border included
+        :type items:            list
+        :param outname:         name of the new Gerber object
+        :type outname:          str
+        :param version:         QRCode version
+        :type version:          int
+        :param error:           error correction: 'L', 'M', 'Q' or 'H'
+        :type error:            str
+        :param box_size:        size of a QRCode box (module) in tenths of a millimeter
+        :type box_size:         int
+        :param border:          the number of boxes of the clear border around the QRCode
+        :type border:           int
+        :param polarity:        'pos' or 'neg'
+        :type polarity:         str
+        :param rounded:         the bounding box in the 'neg' polarity: rounded ('r') or square ('s')
+        :type rounded:          str
+        :param plot:            if True the new object is plotted
+        :type plot:             bool
+        :param run_threaded:    If True the method will be run in a threaded way suitable for GUI usage;
+                                if False it will run non-threaded for TclShell usage
+        :type run_threaded:     bool
+        :return:                'fail' if no QRCode could be made, else the list of the data of the QRCodes that could
+                                not be made
+        """
+        module_size = float(box_size) / 10.0
+        if self.app.app_units.upper() == 'IN':
+            module_size /= 25.4
+
+        def job_thread(app_obj):
+            geometry = qrcode_batch(items, version, error, module_size, border, polarity=polarity, rounded=rounded,
+                                    pool=app_obj.pool, abort_requested=lambda: app_obj.abort_flag)
+            if geometry is None:
+                app_obj.inform.emit('[WARNING_NOTCL] %s' % _("Cancelled."))
+                return 'fail'
+
+            geo_elements = []
+            solid_geometry = []
+            failed = []
+            for (data, __), qr_geo in zip(items, geometry):
+                if isinstance(qr_geo, str):
+                    app_obj.log.error("QRCode.make_batch() --> %s: %s" % (data, qr_geo))
+                    failed.append(data)
+                    continue
+                for poly in qr_geo:
+                    geo_elements.append({'solid': poly, 'follow': poly.exterior})
+                solid_geometry += qr_geo
+
+            if len(solid_geometry) == 0:
+                app_obj.inform.emit('[ERROR_NOTCL] %s' % _("Failed."))
+                return 'fail'
+
+            def init_func(new_obj, app_obj_):
+                new_obj.obj_options['name'] = outname
+                new_obj.tools = {
+                    0: {
+                        'type': 'REG',
+                        'size': 0.0,
+                        'geometry': geo_elements
+                    }
+                }
+                new_obj.solid_geometry = solid_geometry
+                new_obj.source_file = app_obj_.f_handlers.export_gerber(obj_name=outname, filename=None,
+                                                                        local_use=new_obj, use_thread=False)
+
+            app_obj.app_obj.new_object('gerber', outname, init_func, plot=plot, autoselected=False)
+            if failed:
+                # only the first ones are listed, the rest are in the log
+                failed_txt = ', '.join(failed[:10]) + (', ...' if len(failed) > 10 else '')
+                app_obj.inform.emit('[WARNING] %s: %d. %s' % (_("QRCode Tool done. QRCodes that could not be made"),
+                                                               len(failed), failed_txt))
+            else:
+                app_obj.inform.emit('[success] %s' % _("QRCode Tool done."))
+            return failed
+
+        if run_threaded:
+            def job_thread_qr(app_obj):
+                with app_obj.proc_container.new('%s...' % _("Working")):
+                    job_thread(app_obj)
+
+            self.app.collection.promise(outname)
+            self.app.worker_task.emit({'fcn': job_thread_qr, 'params': [self.app]})
+        else:
+            return job_thread(self.app)
+
     def make(self, pos):
         self.on_exit()
 
@@ -917,6 +1048,31 @@ class QRcodeUI:
         grid1.addWidget(self.bb_label, 12, 0)
         grid1.addWidget(self.bb_radio, 12, 1)
 
+        # #############################################################################################################
+        # Batch Frame
+        # #############################################################################################################
+        self.batch_label = FCLabel('%s' % _("Batch"), color='indigo', bold=True)
+        self.batch_label.setToolTip(
+            _("Many QRCodes (e.g. a serial number for each board of a panel)\n"
+              "are added at once in a new Gerber object.\n"
+              "One QRCode per line, in the format: X, Y, QRCode data\n"
+              "where X, Y is the lower left corner of the QRCode.")
+        )
+        self.tools_box.addWidget(self.batch_label)
+
+        b_frame = FCFrame()
+        self.tools_box.addWidget(b_frame)
+
+        grid2 = GLay(v_spacing=5, h_spacing=3)
+        b_frame.setLayout(grid2)
+
+        self.batch_data = FCTextArea()
+        self.batch_data.setFrameStyle(QtWidgets.QFrame.Shape.NoFrame)
+        self.batch_data.setPlaceholderText(
+            _("One QRCode per line: X, Y, QRCode data")
+        )
+        grid2.addWidget(self.batch_data, 0, 0, 1, 2)
+
         # #############################################################################################################
         # Export Frame
         # #############################################################################################################
@@ -1008,6 +1164,15 @@ class QRcodeUI:
         self.qrcode_button.bold = True
         self.tools_box.addWidget(self.qrcode_button)
 
+        # ## Batch QRCodes
+        self.batch_button = FCButton(_("Batch QRCodes"))
+        self.batch_button.setIcon(QtGui.QIcon(self.app.resource_location + '/qrcode32.png'))
+        self.batch_button.setToolTip(
+            _("Create a new Gerber object with the QRCodes from the Batch list.")
+        )
+        self.batch_button.bold = True
+        self.tools_box.addWidget(self.batch_button)
+
         self.layout.addStretch(1)
 
         # ## Reset Tool
@@ -10,11 +10,14 @@ from appTool import AppTool
 from appGUI.GUIElements import VerticalScrollArea, FCLabel, FCButton, FCFrame, GLay, FCComboBox, FCCheckBox, \
     FCDoubleSpinner, OptionalInputSection
 from appObjects import GerberObject
+from appCommon.PadDrillMatch import PadDrillIndex
 
 import logging
 from copy import deepcopy
 
-from shapely import Polygon, MultiPolygon
+import numpy as np
+import shapely
+from shapely import Polygon, MultiPolygon, STRtree
 from shapely.ops import nearest_points
 
 import gettext
@@ -186,6 +189,67 @@ class RulesCheck(AppTool):
 
         self.reset_fields()
 
+    @staticmethod
+    def clearance_locations(geo, size, other_geo=None, chunk_size=50000):
+        """
+        Finds the pairs of geometry elements that are closer than the clearance rule. A spatial index (STRtree)
+        gives only the candidate pairs that are within the rule distance and only those are measured, in chunks.
+
+        :param geo:         Geometry elements
+        :type geo:          list | np.ndarray
+        :param size:        The clearance rule; pairs with a distance less than this value are violations
+        :type size:         float
+        :param other_geo:   If given, the pairs are made between the elements in 'geo' and the ones in 'other_geo'.
+                            Otherwise the pairs are made between the elements in 'geo'
+        :type other_geo:    list | np.ndarray
+        :param chunk_size:  How many candidate pairs are measured at once
+        :type chunk_size:   int
+        :return:            The locations of the violations: for each pair, the middle of the shortest line
+                            between the elements
+        :rtype:             set
+        """
+        size = float(size)
+
+        geo_arr = np.empty(len(geo), dtype=object)
+        geo_arr[:] = list(geo)
+        geo_arr = geo_arr[~shapely.is_missing(geo_arr)]
+        geo_arr = geo_arr[~shapely.is_empty(geo_arr)]
+        if other_geo is None:
+            other_arr = geo_arr
+        else:
+            other_arr = np.empty(len(other_geo), dtype=object)
+            other_arr[:] = list(other_geo)
+            other_arr = other_arr[~shapely.is_missing(other_arr)]
+            other_arr = other_arr[~shapely.is_empty(other_arr)]
+
+        locations = set()
+        if len(geo_arr) == 0 or len(other_arr) == 0:
+            return locations
+
+        idx_geo, idx_other = STRtree(other_arr).query(geo_arr, predicate='dwithin', distance=size)
+        if other_geo is None:
+            # each pair only once and not an element with itself
+            keep = idx_geo < idx_other
+            idx_geo, idx_other = idx_geo[keep], idx_other[keep]
+
+        for start in range(0, len(idx_geo), chunk_size):
+            geo_a = geo_arr[idx_geo[start:start + chunk_size]]
+            geo_b = other_arr[idx_other[start:start + chunk_size]]
+
+            close = shapely.distance(geo_a, geo_b) < size
+            if not np.any(close):
+                continue
+
+            lines = shapely.shortest_line(geo_a[close], geo_b[close])
+            coords = shapely.get_coordinates(lines).reshape(-1, 2, 2)
+            x_1, y_1 = coords[:, 0, 0], coords[:, 0, 1]
+            x_2, y_2 = coords[:, 1, 0], coords[:, 1, 1]
+            loc_x = np.minimum(x_1, x_2) + (np.abs(x_1 - x_2) / 2)
+            loc_y = np.minimum(y_1, y_2) + (np.abs(y_1 - y_2) / 2)
+            locations.update(zip(loc_x.tolist(), loc_y.tolist()))
+
+        return locations
+
     @staticmethod
     def check_inside_gerber_clearance(gerber_obj, size, rule):
         # log.debug("RulesCheck.check_inside_gerber_clearance()")
@@ -228,33 +292,11 @@ class RulesCheck(AppTool):
         if isinstance(total_geo, Polygon):
             obj_violations['points'] = ['Failed. Only one polygon.']
             return rule_title, [obj_violations]
-        else:
-            iterations = len(total_geo)
-            iterations = (iterations * (iterations - 1)) / 2
-        # log.debug("RulesCheck.check_gerber_clearance(). Iterations: %s" % str(iterations))
+        elif not isinstance(total_geo, list):
+            total_geo = shapely.get_parts(total_geo)
+        # log.debug("RulesCheck.check_gerber_clearance(). Polygons: %s" % str(len(total_geo)))
 
-        min_dict = {}
-        idx = 1
-        for geo in total_geo:
-            for s_geo in total_geo[idx:]:
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                if float(dist) < float(size):
-                    loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                    dx = loc_1.x - loc_2.x
-                    dy = loc_1.y - loc_2.y
-                    loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
-
-                    if dist in min_dict:
-                        min_dict[dist].append(loc)
-                    else:
-                        min_dict[dist] = [loc]
-            idx += 1
-        points_list = set()
-        for dist in min_dict.keys():
-            for location in min_dict[dist]:
-                points_list.add(location)
+        points_list = RulesCheck.clearance_locations(total_geo, size)
 
         obj_violations['points'] = list(points_list)
         violations.append(deepcopy(obj_violations))
@@ -312,47 +354,15 @@ class RulesCheck(AppTool):
                         total_geo_grb_3.append(geo_el['solid'])
 
         total_geo_grb_1 = MultiPolygon(total_geo_grb_1)
-        total_geo_grb_1 = total_geo_grb_1.buffer(0)
+        total_geo_grb_1 = shapely.get_parts(total_geo_grb_1.buffer(0))
 
         total_geo_grb_3 = MultiPolygon(total_geo_grb_3)
-        total_geo_grb_3 = total_geo_grb_3.buffer(0)
-
-        if isinstance(total_geo_grb_1, Polygon):
-            len_1 = 1
-            total_geo_grb_1 = [total_geo_grb_1]
-        else:
-            len_1 = len(total_geo_grb_1)
-
-        if isinstance(total_geo_grb_3, Polygon):
-            len_3 = 1
-            total_geo_grb_3 = [total_geo_grb_3]
-        else:
-            len_3 = len(total_geo_grb_3)
+        total_geo_grb_3 = shapely.get_parts(total_geo_grb_3.buffer(0))
 
-        iterations = len_1 * len_3
-        # log.debug("RulesCheck.check_gerber_clearance(). Iterations: %s" % str(iterations))
+        # log.debug("RulesCheck.check_gerber_clearance(). Polygons: %s x %s" % (len(total_geo_grb_1),
+        #                                                                         len(total_geo_grb_3)))
 
-        min_dict = {}
-        for geo in total_geo_grb_1:
-            for s_geo in total_geo_grb_3:
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                if float(dist) < float(size):
-                    loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                    dx = loc_1.x - loc_2.x
-                    dy = loc_1.y - loc_2.y
-                    loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
-
-                    if dist in min_dict:
-                        min_dict[dist].append(loc)
-                    else:
-                        min_dict[dist] = [loc]
-
-        points_list = set()
-        for dist in min_dict.keys():
-            for location in min_dict[dist]:
-                points_list.add(location)
+        points_list = RulesCheck.clearance_locations(total_geo_grb_1, size, other_geo=total_geo_grb_3)
 
         name_list = []
         if gerber_1:
@@ -415,30 +425,7 @@ class RulesCheck(AppTool):
                     for geo in geometry:
                         total_geo.append(geo)
 
-        min_dict = {}
-        idx = 1
-        for geo in total_geo:
-            for s_geo in total_geo[idx:]:
-
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                dx = loc_1.x - loc_2.x
-                dy = loc_1.y - loc_2.y
-                loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
-
-                if dist in min_dict:
-                    min_dict[dist].append(loc)
-                else:
-                    min_dict[dist] = [loc]
-            idx += 1
-
-        points_list = set()
-        for dist in min_dict.keys():
-            if float(dist) < size:
-                for location in min_dict[dist]:
-                    points_list.add(location)
+        points_list = RulesCheck.clearance_locations(total_geo, size)
 
         name_list = []
         for elem in elements:
@@ -570,48 +557,36 @@ class RulesCheck(AppTool):
                         total_geo_exc.append(geo)
 
         if isinstance(total_geo_grb, Polygon):
-            len_1 = 1
             total_geo_grb = [total_geo_grb]
         else:
-            len_1 = len(total_geo_grb)
+            total_geo_grb = list(total_geo_grb.geoms)
 
-        if isinstance(total_geo_exc, Polygon):
-            len_2 = 1
-            total_geo_exc = [total_geo_exc]
-        else:
-            len_2 = len(total_geo_exc)
-
-        iterations = len_1 * len_2
-        # log.debug("RulesCheck.check_gerber_annular_ring(). Iterations: %s" % str(iterations))
+        # only the copper polygons within the rule distance from a hole can have a ring that is too small
+        total_geo_grb = [geo for geo in total_geo_grb if isinstance(geo, Polygon)]
+        pad_index = PadDrillIndex(total_geo_grb, total_geo_exc)
+        grb_pos, exc_pos = pad_index.pairs(predicate='dwithin', distance=float(size))
+        exteriors = shapely.get_exterior_ring(pad_index.pads[grb_pos])
+        distances = np.abs(shapely.distance(exteriors, pad_index.drills[exc_pos]))
 
         min_dict = {}
-        dist = None
-        for geo in total_geo_grb:
-            for s_geo in total_geo_exc:
-                try:
-                    # minimize the number of distances by not taking into considerations those that are too small
-                    dist = abs(geo.exterior.distance(s_geo))
-                except Exception:
-                    # log.error("RulesCheck.check_gerber_annular_ring() --> %s" % str(e))
-                    pass
-
-                if dist > 0:
-                    if float(dist) < float(size):
-                        loc_1, loc_2 = nearest_points(geo.exterior, s_geo)
+        for exterior, s_geo, dist in zip(exteriors, pad_index.drills[exc_pos], distances.tolist()):
+            if dist > 0:
+                if float(dist) < float(size):
+                    loc_1, loc_2 = nearest_points(exterior, s_geo)
 
-                        dx = loc_1.x - loc_2.x
-                        dy = loc_1.y - loc_2.y
-                        loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
+                    dx = loc_1.x - loc_2.x
+                    dy = loc_1.y - loc_2.y
+                    loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
 
-                        if dist in min_dict:
-                            min_dict[dist].append(loc)
-                        else:
-                            min_dict[dist] = [loc]
-                else:
                     if dist in min_dict:
-                        min_dict[dist].append(s_geo.representative_point())
+                        min_dict[dist].append(loc)
                     else:
-                        min_dict[dist] = [s_geo.representative_point()]
+                        min_dict[dist] = [loc]
+            elif dist == 0:
+                if dist in min_dict:
+                    min_dict[dist].append(s_geo.representative_point())
+                else:
+                    min_dict[dist] = [s_geo.representative_point()]
 
         points_list = []
         for dist in min_dict.keys():
@@ -647,6 +622,21 @@ class RulesCheck(AppTool):
         violations.append(deepcopy(obj_violations))
         return rule_title, violations
 
+    @staticmethod
+    def excellon_tools(exc_obj):
+        """
+        :param exc_obj:     Excellon object
+        :return:            A copy of the object tools, with the drill circles in the tools 'solid_geometry' also when
+                            the object keeps only the drill centers (lightweight drills)
+        :rtype:             dict
+        """
+        tools = deepcopy(exc_obj.tools)
+        for tool in tools:
+            if tools[tool].get('lightweight', False):
+                tools[tool]['solid_geometry'] = exc_obj.tool_geometry(tool)
+                tools[tool]['lightweight'] = False
+        return tools
+
     def execute(self):
         self.results = []
 
@@ -998,14 +988,12 @@ class RulesCheck(AppTool):
                 excellon_1 = self.ui.e1_object.currentText()
                 if excellon_1 != '' and self.ui.e1_cb.get_value():
                     exc_1_dict['name'] = deepcopy(excellon_1)
-                    exc_1_dict['tools'] = deepcopy(
-                        app_obj.collection.get_by_name(excellon_1).tools)
+                    exc_1_dict['tools'] = self.excellon_tools(app_obj.collection.get_by_name(excellon_1))
 
                 excellon_2 = self.ui.e2_object.currentText()
                 if excellon_2 != '' and self.ui.e2_cb.get_value():
                     exc_2_dict['name'] = deepcopy(excellon_2)
-                    exc_2_dict['tools'] = deepcopy(
-                        app_obj.collection.get_by_name(excellon_2).tools)
+                    exc_2_dict['tools'] = self.excellon_tools(app_obj.collection.get_by_name(excellon_2))
 
                 try:
                     ring_val = float(self.ui.ring_integrity_entry.get_value())
@@ -8,14 +8,18 @@
 from PyQt6 import QtWidgets, QtCore, QtGui
 from appTool import AppTool
 from appGUI.GUIElements import VerticalScrollArea, FCLabel, FCButton, FCFrame, GLay, FCComboBox, FCCheckBox
+from camlib import flatten_shapely_geometry
 
 import logging
 from copy import deepcopy
 import time
 import traceback
 
-from shapely import LineString, Polygon, MultiPolygon, MultiLineString
+import numpy as np
+import shapely
+from shapely import LineString, Polygon, MultiPolygon
 from shapely.ops import unary_union
+from shapely.strtree import STRtree
 
 import gettext
 import appTranslation as fcTranslate
@@ -37,6 +41,9 @@ class ToolSub(AppTool):
     # meaning geometry that was deformed
     aperture_processing_finished = QtCore.pyqtSignal(str, list)
 
+    # Number of target geometry elements in a job sent to the process pool
+    pool_chunk_size = 2000
+
     def __init__(self, app):
         self.app = app
         self.decimals = self.app.decimals
@@ -81,7 +88,9 @@ class ToolSub(AppTool):
         # store here the options from target_obj
         self.target_options = {}
 
-        self.sub_union = []
+        # the parts of the Subtractor geometry (Geometry objects) and a spatial index over them
+        self.sub_geo_parts = None
+        self.sub_tree = None
 
         # multiprocessing
         self.pool = self.app.pool
@@ -265,7 +274,8 @@ class ToolSub(AppTool):
         # reset previous values
         self.new_apertures.clear()
         self.new_solid_geometry = []
-        self.sub_union = []
+        self.sub_geo_parts = None
+        self.sub_tree = None
 
         self.sub_type = "gerber"
 
@@ -337,20 +347,43 @@ class ToolSub(AppTool):
                         if "clear" in s_el:
                             sub_geometry['clear'].append(s_el["clear"])
 
+                # a spatial index over the SUBTRACTOR geometry; only the SUBTRACTOR elements that may touch a chunk of
+                # TARGET elements are sent with the chunk to the process pool
+                sub_arrays = {}
+                sub_trees = {}
+                for key in ('solid', 'clear'):
+                    sub_arrays[key] = np.empty(len(sub_geometry[key]), dtype=object)
+                    sub_arrays[key][:] = sub_geometry[key]
+                    sub_trees[key] = STRtree(sub_arrays[key])
+
                 for ap_id in app_obj.target_grb_obj.tools:
                     # TARGET geometry
-                    target_geo = [geo for geo in app_obj.target_grb_obj.tools[ap_id]['geometry']]
-
-                    # send the job to the multiprocessing JOB
-                    app_obj.results.append(
-                        app_obj.pool.apply_async(app_obj.aperture_intersection, args=(ap_id, target_geo, sub_geometry))
-                    )
+                    target_geo = app_obj.target_grb_obj.tools[ap_id]['geometry']
+
+                    for start in range(0, len(target_geo), app_obj.pool_chunk_size):
+                        chunk = target_geo[start:start + app_obj.pool_chunk_size]
+                        chunk_sub_geometry = {}
+                        for key in ('solid', 'clear'):
+                            chunk_geo = np.empty(len(chunk), dtype=object)
+                            chunk_geo[:] = [geo_el.get(key) for geo_el in chunk]
+                            candidates = np.unique(sub_trees[key].query(chunk_geo)[1])
+                            chunk_sub_geometry[key] = list(sub_arrays[key][candidates])
+
+                        # send the job to the multiprocessing JOB
+                        app_obj.results.append(
+                            app_obj.pool.apply_async(app_obj.aperture_intersection,
+                                                     args=(ap_id, chunk, chunk_sub_geometry))
+                        )
 
                 output = []
+                finished_apid = None
                 for p in app_obj.results:
                     res = p.get()
                     output.append(res)
-                    app_obj.app.inform.emit('%s: %s...' % (_("Finished parsing geometry for aperture"), str(res[0])))
+                    if res[0] != finished_apid:
+                        finished_apid = res[0]
+                        app_obj.app.inform.emit('%s: %s...' % (_("Finished parsing geometry for aperture"),
+                                                               str(res[0])))
 
                 app_obj.app.inform.emit("%s" % _("Subtraction aperture processing finished."))
 
@@ -359,9 +392,51 @@ class ToolSub(AppTool):
 
         self.app.worker_task.emit({'fcn': worker_job, 'params': [self]})
 
+    @staticmethod
+    def subtract(target_geo, sub_geo, sub_tree=None):
+        """
+        Subtracts geometry from each element of a target. Each target element is tested only against the subtractor
+        elements found with a spatial index query and the union of the ones that intersect it is subtracted with
+        a single difference. The target elements that are not touched are returned as they are, not copied.
+
+        :param target_geo:  1D NumPy object array of Shapely geometry elements (or None) from which to subtract
+        :type target_geo:   np.ndarray
+        :param sub_geo:     1D NumPy object array of the Shapely geometry elements to be subtracted
+        :type sub_geo:      np.ndarray
+        :param sub_tree:    STRtree made over sub_geo; if None it is made here
+        :type sub_tree:     STRtree | None
+        :return:            (the resulting geometry array, boolean array that is True for the modified elements)
+        :rtype:             tuple
+        """
+        result = target_geo.copy()
+        modified = np.zeros(len(target_geo), dtype=bool)
+        if len(target_geo) == 0 or len(sub_geo) == 0:
+            return result, modified
+
+        if sub_tree is None:
+            sub_tree = STRtree(sub_geo)
+
+        # the pairs are sorted by the target index
+        target_idx, sub_idx = sub_tree.query(target_geo, predicate='intersects')
+        if len(target_idx) == 0:
+            return result, modified
+
+        touched, group_start = np.unique(target_idx, return_index=True)
+        sub_unions = np.empty(len(touched), dtype=object)
+        sub_unions[:] = [
+            sub_geo[group[0]] if len(group) == 1 else shapely.union_all(sub_geo[group])
+            for group in np.split(sub_idx, group_start[1:])
+        ]
+
+        result[touched] = shapely.difference(target_geo[touched], sub_unions)
+        modified[touched] = True
+        return result, modified
+
     @staticmethod
     def aperture_intersection(apid, target_geo, sub_geometry):
         """
+        The geometry elements that are not touched by the subtractor geometry are returned as they are. The modified
+        ones are returned as regions and the ones that become empty are dropped.
 
         :param apid:            the aperture id for which we process geometry
         :type apid:             str
@@ -376,38 +451,30 @@ class ToolSub(AppTool):
         unafected_geo = []
         affected_geo = []
 
-        for target_geo_obj in target_geo:
-            solid_is_modified = False
+        results = {}
+        for key in ('solid', 'clear'):
+            key_target = np.empty(len(target_geo), dtype=object)
+            key_target[:] = [target_geo_obj.get(key) for target_geo_obj in target_geo]
+            key_sub = np.empty(len(sub_geometry[key]), dtype=object)
+            key_sub[:] = sub_geometry[key]
+            results[key] = ToolSub.subtract(key_target, key_sub)
+
+        solid_geo, solid_modified = results['solid']
+        clear_geo, clear_modified = results['clear']
+
+        for idx, target_geo_obj in enumerate(target_geo):
+            if not solid_modified[idx] and not clear_modified[idx]:
+                unafected_geo.append(target_geo_obj)
+                continue
+
             destination_geo_obj = {}
-            if "solid" in target_geo_obj:
-                diff = []
-                target_solid = target_geo_obj["solid"]
-                for sub_solid_geo in sub_geometry["solid"]:
-                    if target_solid.intersects(sub_solid_geo) or target_solid.contains(sub_solid_geo):
-                        target_solid = target_solid.difference(sub_solid_geo)
-                if not target_solid.is_empty:
-                    diff.append(target_solid)
-                    solid_is_modified = True
-                    target_solid = unary_union(diff)
-                destination_geo_obj["solid"] = deepcopy(target_solid)
-
-            clear_is_modified = False
-            if "clear" in target_geo_obj:
-                clear_diff = []
-                target_clear = target_geo_obj["clear"]
-                for sub_clear_geo in sub_geometry["clear"]:
-                    if target_clear.intersects(sub_clear_geo) or target_clear.contains(sub_clear_geo):
-                        target_clear = target_clear.difference(sub_clear_geo)
-                if not target_clear.is_empty:
-                    clear_diff.append(target_clear)
-                    clear_is_modified = True
-                    target_clear = unary_union(clear_diff)
-                destination_geo_obj["clear"] = deepcopy(target_clear)
-
-            if solid_is_modified or clear_is_modified:
-                affected_geo.append(deepcopy(destination_geo_obj))
-            else:
-                unafected_geo.append(deepcopy(destination_geo_obj))
+            if "solid" in target_geo_obj and not solid_geo[idx].is_empty:
+                destination_geo_obj["solid"] = solid_geo[idx]
+            if "clear" in target_geo_obj and not clear_geo[idx].is_empty:
+                destination_geo_obj["clear"] = clear_geo[idx]
+
+            if destination_geo_obj:
+                affected_geo.append(destination_geo_obj)
 
         return apid, unafected_geo, affected_geo
 
@@ -433,20 +500,18 @@ class ToolSub(AppTool):
                 grb_obj.tools[0]['size'] = 0.0
                 grb_obj.tools[0]['geometry'] = []
 
+            # output is a list of tuples in the format (apid, surviving_geo, modified_geo), possibly more than one
+            # for an aperture; apid is the aperture id (key in the obj.tools and string)
+            # unaffected_geo and affected_geo are lists
+            # the geometry comes from the process pool, there is no need to copy it
+            for new_apid, surving_geo, modified_geo in output:
+                if surving_geo:
+                    grb_obj.tools[new_apid]['geometry'] += surving_geo
+
+                if modified_geo:
+                    grb_obj.tools[0]['geometry'] += modified_geo
+
             for apid in list(grb_obj.tools.keys()):
-                # output is a tuple in the format (apid, surviving_geo, modified_geo)
-                # apid is the aperture id (key in the obj.tools and string)
-                # unaffected_geo and affected_geo are lists
-                for t in output:
-                    new_apid = t[0]
-                    if apid == new_apid:
-                        surving_geo = t[1]
-                        modified_geo = t[2]
-                        if surving_geo:
-                            grb_obj.tools[apid]['geometry'] += deepcopy(surving_geo)
-
-                        if modified_geo:
-                            grb_obj.tools[0]['geometry'] += modified_geo
 
                 # if the current aperture does not have geometry then get rid of it
                 if not grb_obj.tools[apid]['geometry']:
@@ -506,7 +571,8 @@ class ToolSub(AppTool):
         self.new_tools.clear()
         self.target_options.clear()
         self.new_solid_geometry = []
-        self.sub_union = []
+        self.sub_geo_parts = None
+        self.sub_tree = None
 
         self.sub_type = "geo"
 
@@ -560,7 +626,13 @@ class ToolSub(AppTool):
         else:
             self.promises.append("single")
 
-        self.sub_union = unary_union(self.sub_geo_obj.solid_geometry)
+        # the parts of the Subtractor geometry are indexed; each target element is tested only against the parts
+        # that may touch it
+        self.sub_geo_parts = np.empty(0, dtype=object)
+        sub_geo_list = flatten_shapely_geometry(self.sub_geo_obj.solid_geometry)
+        if sub_geo_list:
+            self.sub_geo_parts = shapely.get_parts(sub_geo_list)
+        self.sub_tree = STRtree(self.sub_geo_parts)
 
         self.periodic_check(self.check_interval, reset=True)
 
@@ -584,51 +656,29 @@ class ToolSub(AppTool):
         with self.app.proc_container.new(text):
             # resulting paths are closed resulting into Polygons
             if self.ui.close_paths_cb.isChecked():
-                new_geo = (unary_union(geo)).difference(self.sub_union)
+                target_union = unary_union(geo)
+                # only the Subtractor parts that touch the target are subtracted
+                sub_candidates = self.sub_geo_parts[self.sub_tree.query(target_union, predicate='intersects')]
+                new_geo = target_union.difference(unary_union(sub_candidates)) if len(sub_candidates) else \
+                    target_union
                 if new_geo:
                     if not new_geo.is_empty:
                         new_geometry.append(new_geo)
             # resulting paths are unclosed resulting in a multitude of rings
             else:
-                try:
-                    for geo_elem in geo:
-                        if isinstance(geo_elem, Polygon):
-                            for ring in self.poly2rings(geo_elem):
-                                new_geo = ring.difference(self.sub_union)
-                                if new_geo and not new_geo.is_empty:
-                                    new_geometry.append(new_geo)
-                        elif isinstance(geo_elem, MultiPolygon):
-                            for poly in geo_elem.geoms:
-                                for ring in self.poly2rings(poly):
-                                    new_geo = ring.difference(self.sub_union)
-                                    if new_geo and not new_geo.is_empty:
-                                        new_geometry.append(new_geo)
-                        elif isinstance(geo_elem, LineString):
-                            new_geo = geo_elem.difference(self.sub_union)
-                            if new_geo:
-                                if not new_geo.is_empty:
-                                    new_geometry.append(new_geo)
-                        elif isinstance(geo_elem, MultiLineString):
-                            for line_elem in geo_elem.geoms:
-                                new_geo = line_elem.difference(self.sub_union)
-                                if new_geo and not new_geo.is_empty:
-                                    new_geometry.append(new_geo)
-                except TypeError:
-                    if isinstance(geo, Polygon):
-                        for ring in self.poly2rings(geo):
-                            new_geo = ring.difference(self.sub_union)
-                            if new_geo:
-                                if not new_geo.is_empty:
-                                    new_geometry.append(new_geo)
-                    elif isinstance(geo, LineString):
-                        new_geo = geo.difference(self.sub_union)
-                        if new_geo and not new_geo.is_empty:
-                            new_geometry.append(new_geo)
-                    elif isinstance(geo, MultiLineString):
-                        for line_elem in geo.geoms:
-                            new_geo = line_elem.difference(self.sub_union)
-                            if new_geo and not new_geo.is_empty:
-                                new_geometry.append(new_geo)
+                # the polygons are made into rings and the multi-geometry into parts; then each part is subtracted
+                # only from the Subtractor parts that intersect it, and it is kept as it is if there are none
+                paths = []
+                for geo_elem in flatten_shapely_geometry(geo):
+                    if isinstance(geo_elem, Polygon):
+                        paths += self.poly2rings(geo_elem)
+                    elif isinstance(geo_elem, LineString):
+                        paths.append(geo_elem)
+
+                paths_arr = np.empty(len(paths), dtype=object)
+                paths_arr[:] = paths
+                new_paths, __ = self.subtract(paths_arr, self.sub_geo_parts, sub_tree=self.sub_tree)
+                new_geometry = [new_geo for new_geo in new_paths if new_geo and not new_geo.is_empty]
 
         if new_geometry:
             if tool == "single":
@@ -694,7 +744,8 @@ class ToolSub(AppTool):
             # cleanup
             self.new_tools.clear()
             self.new_solid_geometry[:] = []
-            self.sub_union = []
+            self.sub_geo_parts = None
+            self.sub_tree = None
 
     def periodic_check(self, check_period, reset=False):
         """
@@ -58,6 +58,17 @@ class PreProc(object, metaclass=ABCPreProcRegister):
     def linear_code(self, p):
         pass
 
+    def linear_code_batch(self, p, coords):
+        # optional hook used to format many linear motions at once; it returns a list of lines, each one terminated
+        # by a newline. This default calls linear_code() for each point but a preprocessor can override it with a
+        # faster version as long as the output is the same
+        lines = []
+        for pt in coords:
+            p.x = pt[0]
+            p.y = pt[1]
+            lines.append(self.linear_code(p) + "\n")
+        return lines
+
     @abstractmethod
     def end_code(self, p):
         pass
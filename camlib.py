@@ -9,6 +9,10 @@ import shapely
 from PyQt6 import QtWidgets
 
 from appCommon.Common import GracefulException as grace
+from appCommon.PathOrdering import PathOrderingEngine
+from appCommon.AffineTransform import AffineTransform
+from appCommon.Arcs import arc_tolerance, arc_steps, arc_points
+from appCommon.BufferCache import BufferCache
 
 # from scipy.spatial import KDTree, Delaunay
 # from scipy.spatial import Delaunay
@@ -31,6 +35,8 @@ from io import StringIO
 import ezdxf
 
 import math
+import time
+import multiprocessing
 
 # See: http://toblerity.org/shapely/manual.html
 from shapely import Polygon, Point, LinearRing, MultiPoint, MultiLineString, MultiPolygon, LineString
@@ -529,1265 +535,1525 @@ class ApertureMacro:
         return self.geometry
 
 
-class Geometry(object):
-    """
-    Base geometry class.
+class PolygonClearing:
     """
+    The algorithms that fill a polygon with tool paths, used for the copper clearing and for the painting:
 
-    defaults = {
-        "units": 'mm',
-        # "geo_steps_per_circle": 128
-    }
-
-    def __init__(self, geo_steps_per_circle=None):
-        # Units (in or mm)
-        self.units = self.app.app_units
-        self.decimals = self.app.decimals
-
-        self.drawing_tolerance = 0.0
-        self.tools = None
-
-        # Final geometry: MultiPolygon or list (of geometry constructs)
-        self.solid_geometry = None
+    - shrink:   the standard method; the edges of the polygon are shrunk and the resulting edges are the tool paths
+    - seed:     circles are drawn around a seed point inside the polygon; the arcs inside the polygon are the paths
+    - lines:    lines are drawn inside the polygon
+    - combo:    the lines method, followed by the seed method and then by the shrink method, if the previous one
+                made no tool paths
 
-        # Final geometry: MultiLineString or list (of LineString or Points)
-        self.follow_geometry = None
+    The class does not use the app, therefore it can be used in a worker process. The app is reached through the
+    callables given to the constructor.
 
-        # Flattened geometry (list of paths only)
-        self.flat_geometry = []
+    The polygons can be cleared in the processes of a multiprocessing pool, each polygon as a task, with pool_clear().
+    The polygons and the tool paths travel to and from the worker processes as WKB.
+    """
 
-        # this is the calculated conversion factor when the file units are different than the ones in the app
-        self.file_units_factor = 1
+    methods = ('shrink', 'seed', 'lines', 'combo')
 
-        # Index
-        self.index = None
+    # Manager of the events used to abort the tasks running in the pool; it is started when first needed
+    manager = None
 
-        self.geo_steps_per_circle = geo_steps_per_circle
+    def __init__(self, check_abort=None, plot=None, redraw=None, on_connect=None):
+        """
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        self.old_disp_number = 0
-        self.el_count = 0
+        :param check_abort: called in the loops; it raises a GracefulException when an abort was requested
+        :type check_abort:  callable | None
+        :param plot:        called with the tool paths, as soon as they are made (progressive plotting)
+        :type plot:         callable | None
+        :param redraw:      called to show the tool paths plotted so far
+        :type redraw:       callable | None
+        :param on_connect:  called before the tool paths are connected, which may take a while
+        :type on_connect:   callable | None
+        """
+        self.check_abort = check_abort
+        self.plot = plot
+        self.redraw = redraw
+        self.on_connect = on_connect
 
-        if self.app.use_3d_engine:
-            self.temp_shapes = self.app.plotcanvas.new_shape_collection(layers=1)
-        else:
-            from appGUI.PlotCanvasLegacy import ShapeCollectionLegacy
-            self.temp_shapes = ShapeCollectionLegacy(obj=self, app=self.app, name='camlib.geometry')
+    def _check_abort(self):
+        if self.check_abort is not None:
+            self.check_abort()
 
-        # Attributes to be included in serialization
-        self.ser_attrs = ["units", 'solid_geometry', 'follow_geometry', 'tools']
+    def _plot(self, geo):
+        if self.plot is not None:
+            self.plot(geo)
 
-    def plot_temp_shapes(self, element, color='red'):
+    def _redraw(self):
+        if self.redraw is not None:
+            self.redraw()
 
-        try:
-            for sub_el in element:
-                self.plot_temp_shapes(sub_el)
-        except TypeError:  # Element is not iterable...
-            # self.add_shape(shape=element, color=color, visible=visible, layer=0)
-            self.temp_shapes.add(tolerance=float(self.app.options["global_tolerance"]),
-                                 shape=element, color=color, visible=True, layer=0)
+    def _connect(self, storage, boundary, tooldia, steps_per_circle):
+        if self.on_connect is not None:
+            self.on_connect()
+        return Geometry.paint_connect(storage, boundary, tooldia, steps_per_circle)
 
-    def make_index(self):
-        self.flatten()
-        self.index = AppRTree()
+    @staticmethod
+    def _storage():
+        # The toolpaths
+        # Index first and last points in paths
+        def get_pts(o):
+            return [o.coords[0], o.coords[-1]]
 
-        for i, g in enumerate(self.flat_geometry):
-            self.index.insert(i, g)
+        storage = AppRTreeStorage()
+        storage.get_points = get_pts
+        return storage
 
-    def add_circle(self, origin, radius, tool=None):
+    def clear(self, method, polygon, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True,
+              simplify_tol=0.0):
         """
-        Adds a circle to the object.
+        Clears the polygon with one of the methods.
 
-        :param origin:  Center of the circle.
-        :param radius:  Radius of the circle.
-        :param tool:    A tool in the Tools dictionary attribute of the object
-        :return: None
+        :param method:              one of the names in PolygonClearing.methods
+        :type method:               str
+        :param polygon:             Polygon to clear
+        :param tooldia:             Diameter of the tool
+        :param steps_per_circle:    number of linear segments to be used to approximate a circle
+        :param overlap:             Overlap of tool passes
+        :param connect:             Draw lines between disjoint segments to minimize tool lifts
+        :param contour:             Paint around the edges
+        :param simplify_tol:        The tolerance used to simplify the tool paths of the seed and lines methods
+        :return:                    The tool paths or None
+        :rtype:                     AppRTreeStorage | None
         """
+        if method == 'shrink':
+            return self.shrink(polygon, tooldia, steps_per_circle, overlap=overlap, connect=connect, contour=contour)
+        if method == 'seed':
+            return self.seed(polygon, tooldia, steps_per_circle, overlap=overlap, connect=connect, contour=contour,
+                             simplify_tol=simplify_tol)
+        if method == 'lines':
+            return self.lines(polygon, tooldia, steps_per_circle, overlap=overlap, connect=connect, contour=contour,
+                              simplify_tol=simplify_tol)
+
+        # combo
+        for combo_method in ('lines', 'seed', 'shrink'):
+            storage = self.clear(combo_method, polygon, tooldia, steps_per_circle, overlap=overlap, connect=connect,
+                                 contour=contour, simplify_tol=simplify_tol)
+            if storage and storage.objects:
+                return storage
+        return storage
+
+    def shrink(self, polygon, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True):
+        """
+        Creates geometry inside a polygon for a tool to cover
+        the whole area.
 
-        if self.solid_geometry is None:
-            self.solid_geometry = []
+        This algorithm shrinks the edges of the polygon and takes
+        the resulting edges as toolpaths.
 
-        new_circle = Point(origin).buffer(radius, int(self.geo_steps_per_circle))
-        if not new_circle.is_valid:
-            return "fail"
+        :param polygon:             Polygon to clear.
+        :param tooldia:             Diameter of the tool.
+        :param steps_per_circle:    number of linear segments to be used to approximate a circle
+        :param overlap:             Overlap of toolpasses.
+        :param connect:             Draw lines between disjoint segments to
+                                    minimize tool lifts.
+        :param contour:             Paint around the edges. Inconsequential in
+                                    this painting method.
+        :return:
+        """
+        geoms = self._storage()
 
-        # add to the solid_geometry
-        try:
-            self.solid_geometry.append(new_circle)
-        except TypeError:
-            try:
-                self.solid_geometry = self.solid_geometry.union(new_circle)
-            except Exception as e:
-                self.app.log.error("Failed to run union on polygons. %s" % str(e))
-                return "fail"
+        # Can only result in a Polygon or MultiPolygon
+        # NOTE: The resulting polygon can be "empty".
+        current = polygon.buffer((-tooldia / 2), int(steps_per_circle))
+        current = flatten_shapely_geometry(current)
 
-        # add in tools solid_geometry
-        if tool is None or tool not in self.tools:
-            tool = 1
-        self.tools[tool]['solid_geometry'].append(new_circle)
+        for p in current:
+            geoms.insert(p.exterior)
+            for i in p.interiors:
+                geoms.insert(i)
 
-        # calculate bounds
-        try:
-            xmin, ymin, xmax, ymax = self.bounds()
+        for cl_pol in current:
+            while True:
+                self._check_abort()
 
-            self.obj_options['xmin'] = xmin
-            self.obj_options['ymin'] = ymin
-            self.obj_options['xmax'] = xmax
-            self.obj_options['ymax'] = ymax
-        except Exception as e:
-            self.app.log.error("Failed. The object has no bounds properties. %s" % str(e))
+                cl_pol = cl_pol.buffer(-tooldia * (1 - overlap), int(steps_per_circle))
+                cl_pol_list = flatten_shapely_geometry(cl_pol)
 
-    def add_polygon(self, points, tool=None):
-        """
-        Adds a polygon to the object (by union)
+                added_flag = False
+                for tiny_pol in cl_pol_list:
+                    if tiny_pol.area > 0:
+                        added_flag = True
+                        geoms.insert(tiny_pol.exterior)
+                        self._plot(tiny_pol.exterior)
 
-        :param points:  The vertices of the polygon.
-        :param tool:    A tool in the Tools dictionary attribute of the object
-        :return:        None
-        """
-        if self.solid_geometry is None:
-            self.solid_geometry = []
+                        for i in tiny_pol.interiors:
+                            geoms.insert(i)
+                            self._plot(i)
+                if added_flag is False:
+                    break
 
-        new_poly = Polygon(points)
-        if not new_poly.is_valid:
-            return "fail"
+                cl_pol = unary_union(cl_pol_list)
 
-        # add to the solid_geometry
-        if type(self.solid_geometry) is list:
-            self.solid_geometry.append(new_poly)
-        else:
-            try:
-                self.solid_geometry = self.solid_geometry.union(Polygon(points))
-            except Exception as e:
-                self.app.log.error("Failed to run union on polygons. %s" % str(e))
-                return "fail"
+        if not geoms.objects:
+            log.debug("camlib.PolygonClearing.shrink() --> Current Area is zero")
+            return
 
-        # add in tools solid_geometry
-        if tool is None or tool not in self.tools:
-            tool = 1
-        self.tools[tool]['solid_geometry'].append(new_poly)
+        self._redraw()
 
-        # calculate bounds
-        try:
-            xmin, ymin, xmax, ymax = self.bounds()
+        # Optimization: Reduce lifts
+        if connect:
+            geoms = self._connect(geoms, polygon, tooldia, int(steps_per_circle))
 
-            self.obj_options['xmin'] = xmin
-            self.obj_options['ymin'] = ymin
-            self.obj_options['xmax'] = xmax
-            self.obj_options['ymax'] = ymax
-        except Exception as e:
-            self.app.log.error("Failed. The object has no bounds properties. %s" % str(e))
+        return geoms
 
-    def add_polyline(self, points, tool=None):
+    def seed(self, polygon_to_clear, tooldia, steps_per_circle, seedpoint=None, overlap=0.15, connect=True,
+             contour=True, simplify_tol=0.0):
         """
-        Adds a polyline to the object (by union)
+        Creates geometry inside a polygon for a tool to cover
+        the whole area.
 
-        :param points:  The vertices of the polyline.
-        :param tool:    A tool in the Tools dictionary attribute of the object
-        :return:        None
+        This algorithm starts with a seed point inside the polygon
+        and draws circles around it. Arcs inside the polygons are
+        valid cuts. Finalizes by cutting around the inside edge of
+        the polygon.
+
+        :param polygon_to_clear:    Shapely.geometry.Polygon
+        :param steps_per_circle:    how many linear segments to use to approximate a circle
+        :param tooldia:             Diameter of the tool
+        :param seedpoint:           Shapely.geometry.Point or None
+        :param overlap:             Tool fraction overlap between passes
+        :param connect:             Connect disjoint segment to minimize tool lifts
+        :param contour:             Cut contour inside the polygon.
+        :param simplify_tol:        Tolerance used to simplify the paths
+        :return:                    List of toolpaths covering polygon.
+        :rtype:                     AppRTreeStorage | None
         """
-        if self.solid_geometry is None:
-            self.solid_geometry = []
+        # Current buffer radius
+        radius = tooldia / 2 * (1 - overlap)
 
-        new_line = LineString(points)
-        if not new_line.is_valid:
-            return "fail"
+        geom_elems = self._storage()
 
-        # add to the solid_geometry
-        if type(self.solid_geometry) is list:
-            self.solid_geometry.append(new_line)
-        else:
-            try:
-                self.solid_geometry = self.solid_geometry.union(new_line)
-            except Exception as e:
-                self.app.log.error("Failed to run union on polylines. %s" % str(e))
-                return "fail"
+        # Path margin
+        path_margin = polygon_to_clear.buffer(-tooldia / 2, int(steps_per_circle))
+        path_margin = flatten_shapely_geometry(path_margin, simplify_tolerance=simplify_tol)
+        path_margin = MultiPolygon(path_margin)
 
-        # add in tools solid_geometry
-        if tool is None or tool not in self.tools:
-            tool = 1
-        self.tools[tool]['solid_geometry'].append(new_line)
+        if path_margin.is_empty or path_margin is None:
+            return None
 
-        # calculate bounds
-        try:
-            xmin, ymin, xmax, ymax = self.bounds()
+        # Estimate good seedpoint if not provided.
+        if seedpoint is None:
+            seedpoint = path_margin.representative_point()
 
-            self.obj_options['xmin'] = xmin
-            self.obj_options['ymin'] = ymin
-            self.obj_options['xmax'] = xmax
-            self.obj_options['ymax'] = ymax
-        except Exception as e:
-            self.app.log.error("Failed. The object has no bounds properties. %s" % str(e))
+        # Grow from seed until outside the box. The polygons will
+        # never have an interior, so take the exterior LinearRing.
+        while True:
+            self._check_abort()
 
-    def is_empty(self):
-        if isinstance(self.solid_geometry, BaseGeometry) or isinstance(self.solid_geometry, Polygon) or \
-                isinstance(self.solid_geometry, MultiPolygon):
-            return self.solid_geometry.is_empty
+            path = Point(seedpoint).buffer(radius, int(steps_per_circle)).exterior
+            path = path.simplify(simplify_tol)
+            path = path.intersection(path_margin)
 
-        if isinstance(self.solid_geometry, list):
-            return len(self.solid_geometry) == 0
+            # Touches polygon?
+            if path.is_empty:
+                break
 
-        self.app.inform.emit('[ERROR_NOTCL] %s' % _("self.solid_geometry is neither BaseGeometry or list."))
-        return
+            # path can be a collection of paths.
+            path_geometry = flatten_shapely_geometry(path, simplify_tolerance=simplify_tol)
+            for p in path_geometry:
+                geom_elems.insert(p)
+                self._plot(p)
 
-    def subtract_polygon(self, points):
-        """
-        Subtract polygon from the given object. This only operates on the paths in the original geometry,
-        i.e. it converts polygons into paths.
+            self._redraw()
 
-        :param points: The vertices of the polygon.
-        :return: none
-        """
-        if self.solid_geometry is None:
-            self.solid_geometry = []
+            radius += tooldia * (1 - overlap)
 
-        # pathonly should be allways True, otherwise polygons are not subtracted
-        flat_geometry = self.flatten(pathonly=True)
-        self.app.log.debug("%d paths" % len(flat_geometry))
+        # Clean inside edges (contours) of the original polygon
+        if contour:
+            buffered_poly = autolist(polygon_to_clear.buffer(-tooldia / 2, int(steps_per_circle)))
+            buffered_poly = [x.simplify(simplify_tol) for x in buffered_poly]
+            outer_edges = [x.exterior for x in buffered_poly]
 
-        if not isinstance(points, Polygon):
-            polygon = Polygon(points)
-        else:
-            polygon = points
-        toolgeo = unary_union(polygon)
-        diffs = []
-        for target in flat_geometry:
-            if isinstance(target, LineString) or isinstance(target, LineString) or isinstance(target, MultiLineString):
-                diffs.append(target.difference(toolgeo))
-            else:
-                self.app.log.warning("Not implemented.")
+            inner_edges = []
+            # Over resulting polygons
+            for x in buffered_poly:
+                for y in x.interiors:  # Over interiors of each polygon
+                    inner_edges.append(y)
 
-        self.solid_geometry = unary_union(diffs)
+            for g in outer_edges + inner_edges:
+                if g and not g.is_empty:
+                    geom_elems.insert(g)
+                    self._plot(g)
 
-    def bounds(self, flatten=False):
+        self._redraw()
+
+        # Optimization: Reduce lifts
+        if connect:
+            geoms_conn = self._connect(geom_elems, polygon_to_clear, tooldia, steps_per_circle)
+            if geoms_conn:
+                return geoms_conn
+
+        return geom_elems
+
+    def lines(self, polygon, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True, simplify_tol=0.0):
         """
-        Returns coordinates of rectangular bounds
-        of geometry: (xmin, ymin, xmax, ymax).
-        :param flatten: will flatten the solid_geometry if True
+        Creates geometry inside a polygon for a tool to cover
+        the whole area.
+
+        This algorithm draws horizontal lines inside the polygon.
+
+        :param polygon:             The polygon being painted.
+        :type polygon:              shapely.geometry.Polygon
+        :param tooldia:             Tool diameter.
+        :param steps_per_circle:    how many linear segments to use to approximate a circle
+        :param overlap:             Tool path overlap percentage.
+        :param connect:             Connect lines to avoid tool lifts.
+        :param contour:             Paint around the edges.
+        :param simplify_tol:        Tolerance used to simplify the paths
         :return:
         """
-        # fixed issue of getting bounds only for one level lists of objects
-        # now it can get bounds for nested lists of objects
+        if not isinstance(polygon, Polygon):
+            log.debug("camlib.PolygonClearing.lines() --> Not a Polygon but %s" % str(type(polygon)))
+            return None
 
-        self.app.log.debug("camlib.Geometry.bounds()")
+        geoms = self._storage()
 
-        def bounds_rec(obj):
-            if type(obj) is list:
-                gminx = np.Inf
-                gminy = np.Inf
-                gmaxx = -np.Inf
-                gmaxy = -np.Inf
+        lines_trimmed = []
 
-                for k in obj:
-                    if type(k) is dict:
-                        for key in k:
-                            minx_, miny_, maxx_, maxy_ = bounds_rec(k[key])
-                            gminx = min(gminx, minx_)
-                            gminy = min(gminy, miny_)
-                            gmaxx = max(gmaxx, maxx_)
-                            gmaxy = max(gmaxy, maxy_)
-                    else:
-                        try:
-                            if k.is_empty:
-                                continue
-                        except Exception:
-                            pass
+        # Bounding box
+        left, bot, right, top = polygon.bounds
 
-                        minx_, miny_, maxx_, maxy_ = bounds_rec(k)
-                        gminx = min(gminx, minx_)
-                        gminy = min(gminy, miny_)
-                        gmaxx = max(gmaxx, maxx_)
-                        gmaxy = max(gmaxy, maxy_)
-                return gminx, gminy, gmaxx, gmaxy
-            else:
-                # it's a Shapely object, return it's bounds
-                return obj.bounds
+        try:
+            margin_poly = polygon.buffer(-tooldia / 1.99999999, (int(steps_per_circle)))
+            margin_poly = margin_poly.simplify(simplify_tol)
+        except Exception:
+            log.debug("camlib.PolygonClearing.lines() --> Could not buffer the Polygon")
+            return None
 
-        if self.multigeo is True:
-            minx_list = []
-            miny_list = []
-            maxx_list = []
-            maxy_list = []
+        # decide the direction of the lines
+        if abs(left - right) >= abs(top - bot):
+            # First line
+            try:
+                y = top - tooldia / 1.99999999
+                while y > bot + tooldia / 1.999999999:
+                    self._check_abort()
 
-            for tool in self.tools:
-                working_geo = self.tools[tool]['solid_geometry']
-                if not working_geo:
-                    continue
+                    line = LineString([(left, y), (right, y)])
+                    line = line.intersection(margin_poly)
+                    line = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
+                    lines_trimmed += line
+                    y -= tooldia * (1 - overlap)
+                    if self.plot is not None:
+                        self._plot(line)
+                        self._redraw()
 
-                if flatten:
-                    self.flatten(geometry=working_geo, reset=True)
-                    working_geo = self.flat_geometry
+                # Last line
+                y = bot + tooldia / 2
+                line = LineString([(left, y), (right, y)])
+                line = line.intersection(margin_poly)
 
-                minx, miny, maxx, maxy = bounds_rec(working_geo)
-                minx_list.append(minx)
-                miny_list.append(miny)
-                maxx_list.append(maxx)
-                maxy_list.append(maxy)
+                lines_geometry = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
+                for ll in lines_geometry:
+                    lines_trimmed.append(ll)
+                    self._plot(ll)
+            except grace:
+                raise
+            except Exception as e:
+                log.error('camlib.PolygonClearing.lines() Processing poly --> %s' % str(e))
+                return None
+        else:
+            # First line
+            try:
+                x = left + tooldia / 1.99999999
+                while x < right - tooldia / 1.999999999:
+                    self._check_abort()
 
-            if not minx_list and not miny_list and not maxx_list and not maxy_list:
-                self.app.log.debug("solid_geometry is None")
-                return 0, 0, 0, 0
+                    line = LineString([(x, top), (x, bot)])
+                    line = line.intersection(margin_poly)
+                    line = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
+                    lines_trimmed += line
+                    x += tooldia * (1 - overlap)
+                    if self.plot is not None:
+                        self._plot(line)
+                        self._redraw()
 
-            return min(minx_list), min(miny_list), max(maxx_list), max(maxy_list)
-        else:
-            if self.solid_geometry is None:
-                self.app.log.debug("solid_geometry is None")
-                return 0, 0, 0, 0
+                # Last line
+                x = right + tooldia / 2
+                line = LineString([(x, top), (x, bot)])
+                line = line.intersection(margin_poly)
 
-            if flatten:
-                self.flatten(reset=True)
-                self.solid_geometry = self.flat_geometry
+                lines_geometry = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
+                for ll in lines_geometry:
+                    lines_trimmed.append(ll)
+                    self._plot(ll)
+            except grace:
+                raise
+            except Exception as e:
+                log.error('camlib.PolygonClearing.lines() Processing poly --> %s' % str(e))
+                return None
 
-            bounds_coords = bounds_rec(self.solid_geometry)
-            return bounds_coords
+        self._redraw()
 
-        # try:
-        #     # from here: http://rightfootin.blogspot.com/2006/09/more-on-python-flatten.html
-        #     def flatten(l, ltypes=(list, tuple)):
-        #         ltype = type(l)
-        #         l = list(l)
-        #         i = 0
-        #         while i < len(l):
-        #             while isinstance(l[i], ltypes):
-        #                 if not l[i]:
-        #                     l.pop(i)
-        #                     i -= 1
-        #                     break
-        #                 else:
-        #                     l[i:i + 1] = l[i]
-        #             i += 1
-        #         return ltype(l)
-        #
-        #     log.debug("Geometry->bounds()")
-        #     if self.solid_geometry is None:
-        #         log.debug("solid_geometry is None")
-        #         return 0, 0, 0, 0
-        #
-        #     if type(self.solid_geometry) is list:
-        #         if len(self.solid_geometry) == 0:
-        #             log.debug('solid_geometry is empty []')
-        #             return 0, 0, 0, 0
-        #         return unary_union(flatten(self.solid_geometry)).bounds
-        #     else:
-        #         return self.solid_geometry.bounds
-        # except Exception as e:
-        #     self.app.inform.emit("[ERROR_NOTCL] Error cause: %s" % str(e))
+        lines_trimmed = unary_union(lines_trimmed)
 
-        # log.debug("Geometry->bounds()")
-        # if self.solid_geometry is None:
-        #     log.debug("solid_geometry is None")
-        #     return 0, 0, 0, 0
-        #
-        # if type(self.solid_geometry) is list:
-        #     if len(self.solid_geometry) == 0:
-        #         log.debug('solid_geometry is empty []')
-        #         return 0, 0, 0, 0
-        #     return unary_union(self.solid_geometry).bounds
-        # else:
-        #     return self.solid_geometry.bounds
+        # Add lines to storage
+        lines_t_geo = flatten_shapely_geometry(lines_trimmed, simplify_tolerance=simplify_tol)
+        for line in lines_t_geo:
+            if isinstance(line, LineString) or isinstance(line, LinearRing):
+                if not line.is_empty:
+                    geoms.insert(line)
+            else:
+                log.debug("camlib.PolygonClearing.lines(). Not a line: %s" % str(type(line)))
 
-    def find_polygon(self, point, geoset=None) -> shapely.Polygon | None:
+        # Add margin (contour) to storage
+        if contour:
+            margin_poly_geo = flatten_shapely_geometry(margin_poly, simplify_tolerance=simplify_tol)
+            for poly in margin_poly_geo:
+                if isinstance(poly, Polygon) and not poly.is_empty:
+                    geoms.insert(poly.exterior)
+                    self._plot(poly.exterior)
+                    for ints in poly.interiors:
+                        geoms.insert(ints)
+                        self._plot(ints)
+
+        self._redraw()
+
+        # Optimization: Reduce lifts
+        if connect:
+            geoms_conn = self._connect(geoms, polygon, tooldia, steps_per_circle)
+            if geoms_conn:
+                return geoms_conn
+
+        return geoms
+
+    # ######################################################################################
+    # Clearing in the processes of a multiprocessing pool
+    # ######################################################################################
+    @classmethod
+    def new_abort_event(cls):
         """
-        Find an object that object.contains(Point(point)) in
-        poly, which can can be iterable, contain iterable of, or
-        be itself an implementer of .contains().
+        :return:    an event that can be sent to the pool tasks; when it is set the tasks stop
+        :rtype:     multiprocessing.managers.EventProxy
+        """
+        if cls.manager is None:
+            cls.manager = multiprocessing.Manager()
+        return cls.manager.Event()
 
-        :param point: See description
-        :param geoset: a polygon or list of polygons where to find if the param point is contained
-        :return: Polygon containing point or None.
+    @staticmethod
+    def pool_task(polygon_wkb, method, tooldia, steps_per_circle, overlap, connect, contour, simplify_tol,
+                  abort_event):
         """
+        Clears a polygon in a worker process.
 
-        if geoset is None:
-            geoset = self.solid_geometry
+        :param polygon_wkb:     the polygon to clear, as WKB
+        :type polygon_wkb:      bytes
+        :param abort_event:     when it is set, the clearing stops
+        :type abort_event:      multiprocessing.managers.EventProxy
+        :return:                ('ok', list of the tool paths as WKB), ('fail', None) if the polygon could not be
+                                cleared or ('abort', None)
 
-        try:  # Iterable
-            for sub_geo in geoset:
-                p = self.find_polygon(point, geoset=sub_geo)
-                if p is not None:
-                    return p
-        except TypeError:  # Non-iterable
-            try:  # Implements .contains()
-                if isinstance(geoset, LinearRing):
-                    geoset = Polygon(geoset)
-                if geoset.contains(Point(point)):
-                    return geoset
-            except AttributeError:  # Does not implement .contains()
-                return None
+        For the other parameters see clear().
+        """
+        if abort_event.is_set():
+            return 'abort', None
 
-        return None
+        # the event is shared with the app process, therefore reading it is not free; it is read at most 10 times
+        # per second
+        last_check = [time.monotonic()]
 
-    def get_interiors(self, geometry=None):
+        def check_abort():
+            now = time.monotonic()
+            if now - last_check[0] > 0.1:
+                last_check[0] = now
+                if abort_event.is_set():
+                    raise grace
 
-        interiors = []
+        try:
+            polygon = shapely.from_wkb(polygon_wkb)
+            storage = PolygonClearing(check_abort=check_abort).clear(
+                method, polygon, tooldia, steps_per_circle, overlap=overlap, connect=connect, contour=contour)
+        except grace:
+            return 'abort', None
+        except Exception as err:
+            log.error("camlib.PolygonClearing.pool_task() %s --> %s" % (method, str(err)))
+            return 'fail', None
+
+        if not storage or not storage.objects:
+            return 'fail', None
+
+        paths = [x for x in storage.get_objects() if x and not x.is_empty]
+        if simplify_tol > 0.0:
+            paths = [x.simplify(simplify_tol) for x in paths]
+        return 'ok', list(shapely.to_wkb(np.array(paths, dtype=object))) if paths else []
 
-        if geometry is None:
-            geometry = self.solid_geometry
+    @staticmethod
+    def pool_clear(pool, polygons, method, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True,
+                   simplify_tol=0.0, abort_requested=None):
+        """
+        Clears the polygons in the processes of the pool, each polygon as a task.
+
+        The results are yielded as soon as they are ready, in the order of the polygons, so the tool paths can be
+        plotted progressively and the output is the same as when the polygons are cleared one after another.
+
+        :param pool:            the multiprocessing pool
+        :type pool:             multiprocessing.pool.Pool
+        :param polygons:        the polygons to clear
+        :type polygons:         list
+        :param method:          one of the names in PolygonClearing.methods
+        :type method:           str
+        :param tooldia:         Diameter of the tool
+        :param steps_per_circle: number of linear segments to be used to approximate a circle
+        :param overlap:         Overlap of tool passes
+        :param connect:         Draw lines between disjoint segments to minimize tool lifts
+        :param contour:         Paint around the edges
+        :param simplify_tol:    The tool paths are simplified with this tolerance
+        :param abort_requested: called while waiting for the results; if it returns True the tasks are stopped and
+                                a GracefulException is raised
+        :type abort_requested:  callable | None
+        :return:                yields (polygon, tool paths) where the tool paths are a list of LineStrings and
+                                LinearRings or None if the polygon could not be cleared
+        """
+        abort_event = PolygonClearing.new_abort_event()
+        tasks = [
+            pool.apply_async(PolygonClearing.pool_task,
+                             args=(shapely.to_wkb(polygon), method, tooldia, steps_per_circle, overlap, connect,
+                                   contour, simplify_tol, abort_event))
+            for polygon in polygons
+        ]
 
-        w_geo = flatten_shapely_geometry(geometry)
-        for geo in w_geo:
-            try:
-                interiors.append(geo.interiors)
-            except Exception:
-                continue
+        try:
+            for polygon, task in zip(polygons, tasks):
+                while not task.ready():
+                    if abort_requested is not None and abort_requested():
+                        raise grace
+                    task.wait(0.05)
 
-        return interiors
+                status, paths_wkb = task.get()
+                if status == 'abort':
+                    raise grace
+                yield polygon, list(shapely.from_wkb(paths_wkb)) if status == 'ok' else None
+        finally:
+            # stop the tasks that are still running when the generator is not consumed until the end
+            abort_event.set()
 
-    def get_exteriors(self, geometry=None):
-        """
-        Returns all exteriors of polygons in geometry. Uses
-        ``self.solid_geometry`` if geometry is not provided.
 
-        :param geometry: Shapely type or list or list of list of such.
-        :return: List of paths constituting the exteriors
-           of polygons in geometry.
-        """
+class Geometry(object):
+    """
+    Base geometry class.
+    """
 
-        exteriors = []
+    defaults = {
+        "units": 'mm',
+        # "geo_steps_per_circle": 128
+    }
 
-        if geometry is None:
-            geometry = self.solid_geometry
+    def __init__(self, geo_steps_per_circle=None):
+        # Units (in or mm)
+        self.units = self.app.app_units
+        self.decimals = self.app.decimals
 
-        w_geo = flatten_shapely_geometry(geometry)
-        for geo in w_geo:
-            try:
-                exteriors.append(geo.exterior)
-            except Exception:
-                continue
+        self.drawing_tolerance = 0.0
+        self.tools = None
 
-        return exteriors
+        # Final geometry: MultiPolygon or list (of geometry constructs)
+        self.solid_geometry = None
 
-    def flatten(self, geometry=None, reset=True, pathonly=False):
-        """
-        Creates a list of non-iterable linear geometry objects.
-        Polygons are expanded into its exterior and interiors if specified.
+        # Final geometry: MultiLineString or list (of LineString or Points)
+        self.follow_geometry = None
 
-        Results are placed in self.flat_geometry
+        # Flattened geometry (list of paths only)
+        self.flat_geometry = []
 
-        :param geometry: Shapely type, or list, or a list of lists of such.
-        :param reset: Clears the contents of self.flat_geometry.
-        :param pathonly: Expands polygons into linear elements.
-        """
+        # this is the calculated conversion factor when the file units are different than the ones in the app
+        self.file_units_factor = 1
 
-        if geometry is None:
-            geometry = self.solid_geometry
+        # Index
+        self.index = None
 
-        if reset:
-            self.flat_geometry = []
+        self.geo_steps_per_circle = geo_steps_per_circle
+
+        # variables to display the percentage of work done
+        self.geo_len = 0
+        self.old_disp_number = 0
+        self.el_count = 0
+
+        if self.app.use_3d_engine:
+            self.temp_shapes = self.app.plotcanvas.new_shape_collection(layers=1)
+        else:
+            from appGUI.PlotCanvasLegacy import ShapeCollectionLegacy
+            self.temp_shapes = ShapeCollectionLegacy(obj=self, app=self.app, name='camlib.geometry')
+
+        # the buffered geometry made by isolation_geometry()
+        self.buffer_cache = BufferCache()
+        # what is needed to continue a NCC rest machining, kept in the Geometry object made by it (see ToolNCC)
+        self.ncc_rest_cache = None
+
+        # Attributes to be included in serialization
+        self.ser_attrs = ["units", 'solid_geometry', 'follow_geometry', 'tools']
+
+    def plot_temp_shapes(self, element, color='red'):
 
-        # ## If iterable, expand recursively.
         try:
-            work_geo = geometry.geoms if isinstance(geometry, (MultiPolygon, MultiLineString)) else geometry
-            for geo in work_geo:
-                if geo is not None:
-                    self.flatten(geometry=geo,
-                                 reset=False,
-                                 pathonly=pathonly)
+            for sub_el in element:
+                self.plot_temp_shapes(sub_el)
+        except TypeError:  # Element is not iterable...
+            # self.add_shape(shape=element, color=color, visible=visible, layer=0)
+            self.temp_shapes.add(tolerance=float(self.app.options["global_tolerance"]),
+                                 shape=element, color=color, visible=True, layer=0)
 
-        # ## Not iterable, do the actual indexing and add.
-        except TypeError:
-            if pathonly and isinstance(geometry, Polygon):
-                ext_geo = geometry.exterior
-                ints_geo = geometry.interiors
-                if ext_geo is not None and not ext_geo.is_empty:
-                    self.flat_geometry.append(ext_geo)
-                self.flatten(geometry=ints_geo, reset=False,  pathonly=True)
-            else:
-                if geometry is not None and not geometry.is_empty:
-                    self.flat_geometry.append(geometry)
+    def make_index(self):
+        self.flatten()
+        self.index = AppRTree()
 
-        return self.flat_geometry
+        for i, g in enumerate(self.flat_geometry):
+            self.index.insert(i, g)
 
-    def flatten_exterior_interiors(self, geometry=None):
+    def add_circle(self, origin, radius, tool=None):
         """
-        Creates a list of non-iterable linear geometry objects.
-        Polygons are expanded into its exterior and interiors.
-
+        Adds a circle to the object.
 
-        :param geometry: Shapely type, or a list, or a list of lists of such.
+        :param origin:  Center of the circle.
+        :param radius:  Radius of the circle.
+        :param tool:    A tool in the Tools dictionary attribute of the object
+        :return: None
         """
 
-        flat_geo_ext = []
-        flat_geo_ints = []
+        if self.solid_geometry is None:
+            self.solid_geometry = []
 
-        if geometry is None:
-            geometry = self.solid_geometry
-        # ## If iterable, expand recursively.
+        new_circle = Point(origin).buffer(radius, int(self.geo_steps_per_circle))
+        if not new_circle.is_valid:
+            return "fail"
+
+        # add to the solid_geometry
         try:
-            work_geo = geometry.geoms if isinstance(geometry, (MultiPolygon, MultiLineString)) else geometry
-            for geo in work_geo:
-                if geo is not None:
-                    ext, ints = self.flatten_exterior_interiors(geo)
-                    flat_geo_ext += ext
-                    flat_geo_ints += ints
-        # ## Not iterable, do the actual indexing and add.
+            self.solid_geometry.append(new_circle)
         except TypeError:
-            if isinstance(geometry, Polygon):
-                ext_geo = geometry.exterior
-                ints_geo = geometry.interiors
-                if ext_geo is not None and not ext_geo.is_empty:
-                    flat_geo_ext.append(ext_geo)
-                for i_geo in ints_geo:
-                    if i_geo is not None and not i_geo.is_empty:
-                        flat_geo_ints.append(i_geo)
-            elif isinstance(geometry, (LineString, LinearRing)):
-                if geometry is not None and not geometry.is_empty:
-                    flat_geo_ext.append(geometry)
+            try:
+                self.solid_geometry = self.solid_geometry.union(new_circle)
+            except Exception as e:
+                self.app.log.error("Failed to run union on polygons. %s" % str(e))
+                return "fail"
 
-        return flat_geo_ext, flat_geo_ints
+        # add in tools solid_geometry
+        if tool is None or tool not in self.tools:
+            tool = 1
+        self.tools[tool]['solid_geometry'].append(new_circle)
 
-    # def make2Dstorage(self):
-    #
-    #     self.flatten()
-    #
-    #     def get_pts(o):
-    #         pts = []
-    #         if type(o) == Polygon:
-    #             g = o.exterior
-    #             pts += list(g.coords)
-    #             for i in o.interiors:
-    #                 pts += list(i.coords)
-    #         else:
-    #             pts += list(o.coords)
-    #         return pts
-    #
-    #     storage = AppRTreeStorage()
-    #     storage.get_points = get_pts
-    #     for shape in self.flat_geometry:
-    #         storage.insert(shape)
-    #     return storage
+        # calculate bounds
+        try:
+            xmin, ymin, xmax, ymax = self.bounds()
 
-    # def flatten_to_paths(self, geometry=None, reset=True):
-    #     """
-    #     Creates a list of non-iterable linear geometry elements and
-    #     indexes them in rtree.
-    #
-    #     :param geometry: Iterable geometry
-    #     :param reset: Either to clear (True) or append (False) to self.flat_geometry
-    #     :return: self.flat_geometry, self.flat_geometry_rtree
-    #     """
-    #
-    #     if geometry is None:
-    #         geometry = self.solid_geometry
-    #
-    #     if reset:
-    #         self.flat_geometry = []
-    #
-    #     # ## If iterable, expand recursively.
-    #     try:
-    #         for geo in geometry:
-    #             self.flatten_to_paths(geometry=geo, reset=False)
-    #
-    #     # ## Not iterable, do the actual indexing and add.
-    #     except TypeError:
-    #         if type(geometry) == Polygon:
-    #             g = geometry.exterior
-    #             self.flat_geometry.append(g)
-    #
-    #             # ## Add first and last points of the path to the index.
-    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[0])
-    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[-1])
-    #
-    #             for interior in geometry.interiors:
-    #                 g = interior
-    #                 self.flat_geometry.append(g)
-    #                 self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[0])
-    #                 self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[-1])
-    #         else:
-    #             g = geometry
-    #             self.flat_geometry.append(g)
-    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[0])
-    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[-1])
-    #
-    #     return self.flat_geometry, self.flat_geometry_rtree
+            self.obj_options['xmin'] = xmin
+            self.obj_options['ymin'] = ymin
+            self.obj_options['xmax'] = xmax
+            self.obj_options['ymax'] = ymax
+        except Exception as e:
+            self.app.log.error("Failed. The object has no bounds properties. %s" % str(e))
 
-    def isolation_geometry(self, offset, geometry=None, iso_type=2, corner=None, passes=0, prog_plot=False):
+    def add_polygon(self, points, tool=None):
         """
-        Creates contours around geometry at a given
-        offset distance.
+        Adds a polygon to the object (by union)
 
-        :param offset:      Offset distance.
-        :type offset:       float
-        :param geometry     The geometry to work with
-        :param iso_type:    type of isolation, can be 0 = exteriors or 1 = interiors or 2 = both (complete)
-        :param corner:      type of corner for the isolation:
-                            0 = round; 1 = square; 2= beveled (line that connects the ends)
-        :param passes:      current pass out of possible multiple passes for which the isolation is done
-        :param prog_plot:   type of plotting: "normal" or "progressive"
-        :return:            The buffered geometry.
-        :rtype:             Shapely.MultiPolygon or Shapely.Polygon
+        :param points:  The vertices of the polygon.
+        :param tool:    A tool in the Tools dictionary attribute of the object
+        :return:        None
         """
+        if self.solid_geometry is None:
+            self.solid_geometry = []
 
-        if self.app.abort_flag:
-            # graceful abort requested by the user
-            raise grace
+        new_poly = Polygon(points)
+        if not new_poly.is_valid:
+            return "fail"
 
-        geo_iso = []
+        # add to the solid_geometry
+        if type(self.solid_geometry) is list:
+            self.solid_geometry.append(new_poly)
+        else:
+            try:
+                self.solid_geometry = self.solid_geometry.union(Polygon(points))
+            except Exception as e:
+                self.app.log.error("Failed to run union on polygons. %s" % str(e))
+                return "fail"
 
-        if geometry:
-            working_geo = geometry
+        # add in tools solid_geometry
+        if tool is None or tool not in self.tools:
+            tool = 1
+        self.tools[tool]['solid_geometry'].append(new_poly)
+
+        # calculate bounds
+        try:
+            xmin, ymin, xmax, ymax = self.bounds()
+
+            self.obj_options['xmin'] = xmin
+            self.obj_options['ymin'] = ymin
+            self.obj_options['xmax'] = xmax
+            self.obj_options['ymax'] = ymax
+        except Exception as e:
+            self.app.log.error("Failed. The object has no bounds properties. %s" % str(e))
+
+    def add_polyline(self, points, tool=None):
+        """
+        Adds a polyline to the object (by union)
+
+        :param points:  The vertices of the polyline.
+        :param tool:    A tool in the Tools dictionary attribute of the object
+        :return:        None
+        """
+        if self.solid_geometry is None:
+            self.solid_geometry = []
+
+        new_line = LineString(points)
+        if not new_line.is_valid:
+            return "fail"
+
+        # add to the solid_geometry
+        if type(self.solid_geometry) is list:
+            self.solid_geometry.append(new_line)
         else:
-            working_geo = self.solid_geometry
+            try:
+                self.solid_geometry = self.solid_geometry.union(new_line)
+            except Exception as e:
+                self.app.log.error("Failed to run union on polylines. %s" % str(e))
+                return "fail"
 
-        working_geo_shp = flatten_shapely_geometry(working_geo)
-        geo_len = len(working_geo_shp)
+        # add in tools solid_geometry
+        if tool is None or tool not in self.tools:
+            tool = 1
+        self.tools[tool]['solid_geometry'].append(new_line)
 
-        old_disp_number = 0
-        pol_nr = 0
-        # yet, it can be done by issuing an unary_union in the end, thus getting rid of the overlapping geo
-        for pol in working_geo_shp:
-            if self.app.abort_flag:
-                # graceful abort requested by the user
-                raise grace
-            if offset == 0:
-                temp_geo = pol
-            else:
-                corner_type = 1 if corner is None else corner
-                temp_geo = pol.buffer(offset, int(self.geo_steps_per_circle), join_style=corner_type)
+        # calculate bounds
+        try:
+            xmin, ymin, xmax, ymax = self.bounds()
 
-            geo_iso.append(temp_geo)
+            self.obj_options['xmin'] = xmin
+            self.obj_options['ymin'] = ymin
+            self.obj_options['xmax'] = xmax
+            self.obj_options['ymax'] = ymax
+        except Exception as e:
+            self.app.log.error("Failed. The object has no bounds properties. %s" % str(e))
 
-            pol_nr += 1
+    def is_empty(self):
+        if isinstance(self.solid_geometry, BaseGeometry) or isinstance(self.solid_geometry, Polygon) or \
+                isinstance(self.solid_geometry, MultiPolygon):
+            return self.solid_geometry.is_empty
 
-            # activity view update
-            disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
-            if old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %s %d: %d%%' %
-                                                         (_("Pass"), int(passes + 1), int(disp_number)))
-                old_disp_number = disp_number
+        if isinstance(self.solid_geometry, list):
+            return len(self.solid_geometry) == 0
 
-        self.app.proc_container.update_view_text(' %s' % _("Buffering"))
-        geo_iso = unary_union(geo_iso)
+        self.app.inform.emit('[ERROR_NOTCL] %s' % _("self.solid_geometry is neither BaseGeometry or list."))
+        return
 
-        self.app.proc_container.update_view_text('')
-        # end of replaced block
+    def subtract_polygon(self, points):
+        """
+        Subtract polygon from the given object. This only operates on the paths in the original geometry,
+        i.e. it converts polygons into paths.
+
+        :param points: The vertices of the polygon.
+        :return: none
+        """
+        if self.solid_geometry is None:
+            self.solid_geometry = []
 
-        if iso_type == 2:
-            ret_geo = flatten_shapely_geometry(geo_iso)
-        elif iso_type == 0:
-            self.app.proc_container.update_view_text(' %s' % _("Get Exteriors"))
-            ret_geo = self.get_exteriors(geo_iso)
-        elif iso_type == 1:
-            self.app.proc_container.update_view_text(' %s' % _("Get Interiors"))
-            ret_geo = self.get_interiors(geo_iso)
+        # pathonly should be allways True, otherwise polygons are not subtracted
+        flat_geometry = self.flatten(pathonly=True)
+        self.app.log.debug("%d paths" % len(flat_geometry))
+
+        if not isinstance(points, Polygon):
+            polygon = Polygon(points)
         else:
-            self.app.log.debug("Geometry.isolation_geometry() --> Type of isolation not supported")
-            return "fail"
+            polygon = points
+        toolgeo = unary_union(polygon)
+        diffs = []
+        for target in flat_geometry:
+            if isinstance(target, LineString) or isinstance(target, LineString) or isinstance(target, MultiLineString):
+                diffs.append(target.difference(toolgeo))
+            else:
+                self.app.log.warning("Not implemented.")
 
-        if prog_plot == 'progressive':
-            for elem in ret_geo:
-                self.plot_temp_shapes(elem)
+        self.solid_geometry = unary_union(diffs)
 
-        return ret_geo
+    def bounds(self, flatten=False):
+        """
+        Returns coordinates of rectangular bounds
+        of geometry: (xmin, ymin, xmax, ymax).
+        :param flatten: will flatten the solid_geometry if True
+        :return:
+        """
+        # fixed issue of getting bounds only for one level lists of objects
+        # now it can get bounds for nested lists of objects
 
-    def flatten_list(self, obj_list):
-        for item in obj_list:
-            if isinstance(item, Iterable) and not isinstance(item, (str, bytes)):
-                yield from self.flatten_list(item)
+        self.app.log.debug("camlib.Geometry.bounds()")
+
+        def bounds_rec(obj):
+            if type(obj) is list:
+                gminx = np.Inf
+                gminy = np.Inf
+                gmaxx = -np.Inf
+                gmaxy = -np.Inf
+
+                for k in obj:
+                    if type(k) is dict:
+                        for key in k:
+                            minx_, miny_, maxx_, maxy_ = bounds_rec(k[key])
+                            gminx = min(gminx, minx_)
+                            gminy = min(gminy, miny_)
+                            gmaxx = max(gmaxx, maxx_)
+                            gmaxy = max(gmaxy, maxy_)
+                    else:
+                        try:
+                            if k.is_empty:
+                                continue
+                        except Exception:
+                            pass
+
+                        minx_, miny_, maxx_, maxy_ = bounds_rec(k)
+                        gminx = min(gminx, minx_)
+                        gminy = min(gminy, miny_)
+                        gmaxx = max(gmaxx, maxx_)
+                        gmaxy = max(gmaxy, maxy_)
+                return gminx, gminy, gmaxx, gmaxy
             else:
-                yield item
+                # it's a Shapely object, return it's bounds
+                return obj.bounds
 
-    def import_svg(self, filename, object_type=None, flip=True, units=None):
-        """
-        Imports shapes from an SVG file into the object's geometry.
+        if self.multigeo is True:
+            minx_list = []
+            miny_list = []
+            maxx_list = []
+            maxy_list = []
 
-        :param filename:    Path to the SVG file.
-        :type filename:     str
-        :param object_type: parameter passed further along
-        :param flip:        Flip the vertically.
-        :type flip:         bool
-        :param units:       FlatCAM units
-        :return:            None
-        """
+            for tool in self.tools:
+                working_geo = self.tools[tool]['solid_geometry']
+                if not working_geo:
+                    continue
 
-        self.app.log.debug("camlib.Geometry.import_svg()")
+                if flatten:
+                    self.flatten(geometry=working_geo, reset=True)
+                    working_geo = self.flat_geometry
 
-        # Parse into list of shapely objects
-        svg_tree = ET.parse(filename)
-        svg_root = svg_tree.getroot()
+                minx, miny, maxx, maxy = bounds_rec(working_geo)
+                minx_list.append(minx)
+                miny_list.append(miny)
+                maxx_list.append(maxx)
+                maxy_list.append(maxy)
 
-        # Change origin to bottom left
-        # h = float(svg_root.get('height'))
-        # w = float(svg_root.get('width'))
-        svg_parsed_dims = svgparselength(svg_root.get('height'))
-        h = svg_parsed_dims[0]  # TODO: No units support yet
-        svg_units = svg_parsed_dims[1]
-        if svg_units in ['em', 'ex', 'pt', 'px']:
-            self.app.log.error("camlib.Geometry.import_svg(). SVG units not supported: %s" % svg_units)
-            self.app.inform.emit("[ERROR_NOTCL] %s" % _("Failed."))
-            return
+            if not minx_list and not miny_list and not maxx_list and not maxy_list:
+                self.app.log.debug("solid_geometry is None")
+                return 0, 0, 0, 0
 
-        units = self.app.app_units if units is None else units
-        res = self.app.options['geometry_circle_steps']
-        factor = svgparse_viewbox(svg_root)
+            return min(minx_list), min(miny_list), max(maxx_list), max(maxy_list)
+        else:
+            if self.solid_geometry is None:
+                self.app.log.debug("solid_geometry is None")
+                return 0, 0, 0, 0
 
-        if svg_units == 'cm':
-            factor *= 10
+            if flatten:
+                self.flatten(reset=True)
+                self.solid_geometry = self.flat_geometry
 
-        geos = getsvggeo(svg_root, object_type, units=units, res=res, factor=factor, app=self.app)
-        if geos is None:
-            return 'fail'
+            bounds_coords = bounds_rec(self.solid_geometry)
+            return bounds_coords
 
-        self.app.log.debug("camlib.Geometry.import_svg(). Finished parsing the SVG geometry.")
+        # try:
+        #     # from here: http://rightfootin.blogspot.com/2006/09/more-on-python-flatten.html
+        #     def flatten(l, ltypes=(list, tuple)):
+        #         ltype = type(l)
+        #         l = list(l)
+        #         i = 0
+        #         while i < len(l):
+        #             while isinstance(l[i], ltypes):
+        #                 if not l[i]:
+        #                     l.pop(i)
+        #                     i -= 1
+        #                     break
+        #                 else:
+        #                     l[i:i + 1] = l[i]
+        #             i += 1
+        #         return ltype(l)
+        #
+        #     log.debug("Geometry->bounds()")
+        #     if self.solid_geometry is None:
+        #         log.debug("solid_geometry is None")
+        #         return 0, 0, 0, 0
+        #
+        #     if type(self.solid_geometry) is list:
+        #         if len(self.solid_geometry) == 0:
+        #             log.debug('solid_geometry is empty []')
+        #             return 0, 0, 0, 0
+        #         return unary_union(flatten(self.solid_geometry)).bounds
+        #     else:
+        #         return self.solid_geometry.bounds
+        # except Exception as e:
+        #     self.app.inform.emit("[ERROR_NOTCL] Error cause: %s" % str(e))
 
-        if flip:
-            geos = [translate(scale(g, 1.0, -1.0, origin=(0, 0)), yoff=h) for g in geos]
-            self.app.log.debug("camlib.Geometry.import_svg(). SVG geometry was flipped.")
+        # log.debug("Geometry->bounds()")
+        # if self.solid_geometry is None:
+        #     log.debug("solid_geometry is None")
+        #     return 0, 0, 0, 0
+        #
+        # if type(self.solid_geometry) is list:
+        #     if len(self.solid_geometry) == 0:
+        #         log.debug('solid_geometry is empty []')
+        #         return 0, 0, 0, 0
+        #     return unary_union(self.solid_geometry).bounds
+        # else:
+        #     return self.solid_geometry.bounds
+
+    def find_polygon(self, point, geoset=None) -> shapely.Polygon | None:
+        """
+        Find an object that object.contains(Point(point)) in
+        poly, which can can be iterable, contain iterable of, or
+        be itself an implementer of .contains().
+
+        :param point: See description
+        :param geoset: a polygon or list of polygons where to find if the param point is contained
+        :return: Polygon containing point or None.
+        """
+
+        if geoset is None:
+            geoset = self.solid_geometry
+
+        try:  # Iterable
+            for sub_geo in geoset:
+                p = self.find_polygon(point, geoset=sub_geo)
+                if p is not None:
+                    return p
+        except TypeError:  # Non-iterable
+            try:  # Implements .contains()
+                if isinstance(geoset, LinearRing):
+                    geoset = Polygon(geoset)
+                if geoset.contains(Point(point)):
+                    return geoset
+            except AttributeError:  # Does not implement .contains()
+                return None
 
-        # trying to optimize the resulting geometry by merging contiguous lines
-        geos = list(self.flatten_list(geos))
-        geos_polys = []
-        geos_lines = []
-        for g in geos:
-            if isinstance(g, Polygon):
-                geos_polys.append(g)
-            else:
-                geos_lines.append(g)
+        return None
 
-        try:
-            merged_lines = linemerge(geos_lines)
-        except Exception:
-            merged_lines = geos_lines
-            self.app.log.error(
-                'camlib.Geometry.import_svg(). Could not merge the lines, working with the original SVG geometry.')
+    def get_interiors(self, geometry=None):
 
-        geos = geos_polys
-        try:
-            w_geo = merged_lines.geoms if isinstance(merged_lines, (MultiPolygon, MultiLineString)) else merged_lines
-            for ml in w_geo:
-                geos.append(ml)
-        except TypeError:
-            geos.append(merged_lines)
+        interiors = []
 
-        # Add to object
-        if self.solid_geometry is None:
-            self.solid_geometry = []
+        if geometry is None:
+            geometry = self.solid_geometry
 
-        if type(self.solid_geometry) is list:
-            if type(geos) is list:
-                self.solid_geometry += geos
-            else:
-                self.solid_geometry.append(geos)
-        else:  # It's shapely geometry
-            self.solid_geometry = [self.solid_geometry, geos]
+        w_geo = flatten_shapely_geometry(geometry)
+        for geo in w_geo:
+            try:
+                interiors.append(geo.interiors)
+            except Exception:
+                continue
 
-        # flatten the self.solid_geometry list for import_svg() to import SVG as Gerber
-        self.solid_geometry = list(self.flatten_list(self.solid_geometry))
+        return interiors
 
-        geos_text = getsvgtext(svg_root, object_type, app=self.app, units=units)
+    def get_exteriors(self, geometry=None):
+        """
+        Returns all exteriors of polygons in geometry. Uses
+        ``self.solid_geometry`` if geometry is not provided.
 
-        if geos_text is not None:
-            self.app.log.debug("camlib.Geometry.import_svg(). Processing SVG text.")
-            geos_text_f = []
-            if flip:
-                # Change origin to bottom left
-                for i in geos_text:
-                    __, minimy, __, maximy = i.bounds
-                    h2 = (maximy - minimy) * 0.5
-                    geos_text_f.append(translate(scale(i, 1.0, -1.0, origin=(0, 0)), yoff=(h + h2)))
-            if geos_text_f:
-                self.solid_geometry = self.solid_geometry + geos_text_f
+        :param geometry: Shapely type or list or list of list of such.
+        :return: List of paths constituting the exteriors
+           of polygons in geometry.
+        """
 
-        tooldia = float(self.app.options["tools_mill_tooldia"])
-        tooldia = float('%.*f' % (self.decimals, tooldia))
+        exteriors = []
 
-        new_data = {k: v for k, v in self.obj_options.items()}
+        if geometry is None:
+            geometry = self.solid_geometry
 
-        self.tools.update({
-            1: {
-                'tooldia': tooldia,
-                'offset': 'Path',
-                'offset_value': 0.0,
-                'type': 'Rough',
-                'tool_type': 'C1',
-                'data': deepcopy(new_data),
-                'solid_geometry': self.solid_geometry
-            }
-        })
+        w_geo = flatten_shapely_geometry(geometry)
+        for geo in w_geo:
+            try:
+                exteriors.append(geo.exterior)
+            except Exception:
+                continue
 
-        self.tools[1]['data']['name'] = self.obj_options['name']
+        return exteriors
 
-    def import_dxf_as_geo(self, filename, units='MM'):
+    def flatten(self, geometry=None, reset=True, pathonly=False):
         """
-        Imports shapes from an DXF file into the object's geometry.
+        Creates a list of non-iterable linear geometry objects.
+        Polygons are expanded into its exterior and interiors if specified.
 
-        :param filename:    Path to the DXF file.
-        :type filename:     str
-        :param units:       Application units
-        :return: None
+        Results are placed in self.flat_geometry
+
+        :param geometry: Shapely type, or list, or a list of lists of such.
+        :param reset: Clears the contents of self.flat_geometry.
+        :param pathonly: Expands polygons into linear elements.
         """
-        self.app.log.debug("Parsing DXF file geometry into a Geometry object solid geometry.")
 
-        # Multi-geo Geometry Object
-        self.multigeo = True
+        if geometry is None:
+            geometry = self.solid_geometry
 
-        # Parse into list of shapely objects
-        dxf = ezdxf.readfile(filename)
-        geos = getdxfgeo(dxf)
+        if reset:
+            self.flat_geometry = []
 
-        # trying to optimize the resulting geometry by merging contiguous lines
-        geos = list(self.flatten_list(geos))
-        geos_polys = []
-        geos_lines = []
-        for g in geos:
-            if isinstance(g, (Polygon, MultiPolygon)):
-                geos_polys.append(g)
+        # ## If iterable, expand recursively.
+        try:
+            work_geo = geometry.geoms if isinstance(geometry, (MultiPolygon, MultiLineString)) else geometry
+            for geo in work_geo:
+                if geo is not None:
+                    self.flatten(geometry=geo,
+                                 reset=False,
+                                 pathonly=pathonly)
+
+        # ## Not iterable, do the actual indexing and add.
+        except TypeError:
+            if pathonly and isinstance(geometry, Polygon):
+                ext_geo = geometry.exterior
+                ints_geo = geometry.interiors
+                if ext_geo is not None and not ext_geo.is_empty:
+                    self.flat_geometry.append(ext_geo)
+                self.flatten(geometry=ints_geo, reset=False,  pathonly=True)
             else:
-                geos_lines.append(g)
+                if geometry is not None and not geometry.is_empty:
+                    self.flat_geometry.append(geometry)
 
-        merged_lines = linemerge(geos_lines)
-        geos = geos_polys
+        return self.flat_geometry
 
-        try:
-            w_geo = merged_lines.geoms if isinstance(merged_lines, MultiLineString) else merged_lines
-            for ml in w_geo:
-                geos.append(ml)
-        except TypeError:
-            geos.append(merged_lines)
+    def flatten_exterior_interiors(self, geometry=None):
+        """
+        Creates a list of non-iterable linear geometry objects.
+        Polygons are expanded into its exterior and interiors.
 
-        # Add to object
-        if self.solid_geometry is None:
-            self.solid_geometry = []
 
-        if type(self.solid_geometry) is list:
-            if type(geos) is list:
-                self.solid_geometry += geos
-            else:
-                self.solid_geometry.append(geos)
-        else:  # It's shapely geometry
-            self.solid_geometry = [self.solid_geometry, geos]
+        :param geometry: Shapely type, or a list, or a list of lists of such.
+        """
 
-        tooldia = float(self.app.options["tools_mill_tooldia"])
-        tooldia = float('%.*f' % (self.decimals, tooldia))
+        flat_geo_ext = []
+        flat_geo_ints = []
 
-        new_data = {k: v for k, v in self.obj_options.items()}
+        if geometry is None:
+            geometry = self.solid_geometry
+        # ## If iterable, expand recursively.
+        try:
+            work_geo = geometry.geoms if isinstance(geometry, (MultiPolygon, MultiLineString)) else geometry
+            for geo in work_geo:
+                if geo is not None:
+                    ext, ints = self.flatten_exterior_interiors(geo)
+                    flat_geo_ext += ext
+                    flat_geo_ints += ints
+        # ## Not iterable, do the actual indexing and add.
+        except TypeError:
+            if isinstance(geometry, Polygon):
+                ext_geo = geometry.exterior
+                ints_geo = geometry.interiors
+                if ext_geo is not None and not ext_geo.is_empty:
+                    flat_geo_ext.append(ext_geo)
+                for i_geo in ints_geo:
+                    if i_geo is not None and not i_geo.is_empty:
+                        flat_geo_ints.append(i_geo)
+            elif isinstance(geometry, (LineString, LinearRing)):
+                if geometry is not None and not geometry.is_empty:
+                    flat_geo_ext.append(geometry)
 
-        self.tools.update({
-            1: {
-                'tooldia': tooldia,
-                'offset': 'Path',
-                'offset_value': 0.0,
-                'type': 'Rough',
-                'tool_type': 'C1',
-                'data': deepcopy(new_data),
-                'solid_geometry': self.solid_geometry
-            }
-        })
+        return flat_geo_ext, flat_geo_ints
 
-        self.tools[1]['data']['name'] = self.obj_options['name']
+    # def make2Dstorage(self):
+    #
+    #     self.flatten()
+    #
+    #     def get_pts(o):
+    #         pts = []
+    #         if type(o) == Polygon:
+    #             g = o.exterior
+    #             pts += list(g.coords)
+    #             for i in o.interiors:
+    #                 pts += list(i.coords)
+    #         else:
+    #             pts += list(o.coords)
+    #         return pts
+    #
+    #     storage = AppRTreeStorage()
+    #     storage.get_points = get_pts
+    #     for shape in self.flat_geometry:
+    #         storage.insert(shape)
+    #     return storage
 
-        # commented until this function is ready
-        # geos_text = getdxftext(dxf, object_type, units=units)
-        # if geos_text is not None:
-        #     geos_text_f = []
-        #     self.solid_geometry = [self.solid_geometry, geos_text_f]
+    # def flatten_to_paths(self, geometry=None, reset=True):
+    #     """
+    #     Creates a list of non-iterable linear geometry elements and
+    #     indexes them in rtree.
+    #
+    #     :param geometry: Iterable geometry
+    #     :param reset: Either to clear (True) or append (False) to self.flat_geometry
+    #     :return: self.flat_geometry, self.flat_geometry_rtree
+    #     """
+    #
+    #     if geometry is None:
+    #         geometry = self.solid_geometry
+    #
+    #     if reset:
+    #         self.flat_geometry = []
+    #
+    #     # ## If iterable, expand recursively.
+    #     try:
+    #         for geo in geometry:
+    #             self.flatten_to_paths(geometry=geo, reset=False)
+    #
+    #     # ## Not iterable, do the actual indexing and add.
+    #     except TypeError:
+    #         if type(geometry) == Polygon:
+    #             g = geometry.exterior
+    #             self.flat_geometry.append(g)
+    #
+    #             # ## Add first and last points of the path to the index.
+    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[0])
+    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[-1])
+    #
+    #             for interior in geometry.interiors:
+    #                 g = interior
+    #                 self.flat_geometry.append(g)
+    #                 self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[0])
+    #                 self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[-1])
+    #         else:
+    #             g = geometry
+    #             self.flat_geometry.append(g)
+    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[0])
+    #             self.flat_geometry_rtree.insert(len(self.flat_geometry) - 1, g.coords[-1])
+    #
+    #     return self.flat_geometry, self.flat_geometry_rtree
 
-    def size(self):
-        """
-        Returns (width, height) of rectangular
-        bounds of geometry.
+    def isolation_geometry(self, offset, geometry=None, iso_type=2, corner=None, passes=0, prog_plot=False):
         """
-        if self.solid_geometry is None:
-            log.warning("Solid_geometry not computed yet.")
-            return 0
-        bounds = self.bounds()
-        return bounds[2] - bounds[0], bounds[3] - bounds[1]
+        Creates contours around geometry at a given
+        offset distance.
 
-    def get_empty_area(self, boundary=None):
-        """
-        Returns the complement of self.solid_geometry within
-        the given boundary polygon. If not specified, it defaults to
-        the rectangular bounding box of self.solid_geometry.
+        :param offset:      Offset distance.
+        :type offset:       float
+        :param geometry     The geometry to work with
+        :param iso_type:    type of isolation, can be 0 = exteriors or 1 = interiors or 2 = both (complete)
+        :param corner:      type of corner for the isolation:
+                            0 = round; 1 = square; 2= beveled (line that connects the ends)
+        :param passes:      current pass out of possible multiple passes for which the isolation is done
+        :param prog_plot:   type of plotting: "normal" or "progressive"
+        :return:            The buffered geometry.
+        :rtype:             Shapely.MultiPolygon or Shapely.Polygon
         """
-        if boundary is None:
-            boundary = self.solid_geometry.envelope
-        return boundary.difference(self.solid_geometry)
 
-    def clear_polygon_shrink(self, polygon, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True,
-                             prog_plot=False):
-        """
-        Creates geometry inside a polygon for a tool to cover
-        the whole area.
+        if self.app.abort_flag:
+            # graceful abort requested by the user
+            raise grace
 
-        This algorithm shrinks the edges of the polygon and takes
-        the resulting edges as toolpaths.
+        if geometry:
+            working_geo = geometry
+        else:
+            working_geo = self.solid_geometry
 
-        :param polygon:             Polygon to clear.
-        :param tooldia:             Diameter of the tool.
-        :param steps_per_circle:    number of linear segments to be used to approximate a circle
-        :param overlap:             Overlap of toolpasses.
-        :param connect:             Draw lines between disjoint segments to
-                                    minimize tool lifts.
-        :param contour:             Paint around the edges. Inconsequential in
-                                    this painting method.
-        :param prog_plot:           boolean; if Ture use the progressive plotting
-        :return:
-        """
+        working_geo_shp = flatten_shapely_geometry(working_geo)
 
-        # log.debug("camlib.clear_polygon_shrink()")
+        # the buffered geometry is taken from the cache if this geometry was already buffered with this offset
+        corner_type = 1 if corner is None else corner
+        steps = int(self.geo_steps_per_circle)
+        geo_hash = self.buffer_cache.geometry_hash(working_geo_shp)
+        cache_key = (float(offset), corner_type, iso_type, steps)
+
+        ret_geo = self.buffer_cache.get(geo_hash, cache_key)
+        if ret_geo is None:
+            geo_iso = self.buffer_cache.get(geo_hash, (float(offset), corner_type, None, steps))
+            if geo_iso is None:
+                geo_iso, geo_error = self.buffer_geometry(working_geo_shp, offset, corner_type, steps, geo_hash,
+                                                          passes)
+                self.buffer_cache.put(geo_hash, (float(offset), corner_type, None, steps), geo_iso, geo_error)
+
+            if iso_type == 2:
+                ret_geo = flatten_shapely_geometry(geo_iso)
+            elif iso_type == 0:
+                self.app.proc_container.update_view_text(' %s' % _("Get Exteriors"))
+                ret_geo = self.get_exteriors(geo_iso)
+            elif iso_type == 1:
+                self.app.proc_container.update_view_text(' %s' % _("Get Interiors"))
+                ret_geo = self.get_interiors(geo_iso)
+            else:
+                self.app.log.debug("Geometry.isolation_geometry() --> Type of isolation not supported")
+                return "fail"
+            self.buffer_cache.put(geo_hash, cache_key, ret_geo)
 
-        # The toolpaths
-        # Index first and last points in paths
-        def get_pts(o):
-            return [o.coords[0], o.coords[-1]]
+        self.buffer_cache.log_stats(name='Geometry.isolation_geometry()')
+        # the cached list is not given away, so it can't be changed by the caller
+        ret_geo = list(ret_geo)
 
-        geoms = AppRTreeStorage()
-        geoms.get_points = get_pts
+        if prog_plot == 'progressive':
+            for elem in ret_geo:
+                self.plot_temp_shapes(elem)
 
-        # Can only result in a Polygon or MultiPolygon
-        # NOTE: The resulting polygon can be "empty".
-        current = polygon.buffer((-tooldia / 2), int(steps_per_circle))
-        current = flatten_shapely_geometry(current)
+        return ret_geo
 
-        for p in current:
-            geoms.insert(p.exterior)
-            for i in p.interiors:
-                geoms.insert(i)
+    def buffer_geometry(self, geometry, offset, corner_type, steps, geo_hash, passes=0):
+        """
+        Buffers the geometry and fuses the result. With the round corners, the buffered geometry is made from the
+        cached one of a smaller offset, if there is one (a previous pass of a multiple passes isolation) and the
+        estimated error of the result stays within the arc tolerance set in Preferences.
 
-        for cl_pol in current:
-            while True:
-                if self.app.abort_flag:
-                    # graceful abort requested by the user
-                    raise grace
-                # provide the app with a way to process the GUI events when in a blocking loop
-                QtWidgets.QApplication.processEvents()
+        :param geometry:    list of Shapely geometry elements
+        :type geometry:     list
+        :param offset:      Offset distance
+        :type offset:       float
+        :param corner_type: the Shapely join style
+        :type corner_type:  int
+        :param steps:       steps per circle
+        :type steps:        int
+        :param geo_hash:    the hash of the geometry, as returned by BufferCache.geometry_hash()
+        :type geo_hash:     bytes
+        :param passes:      current pass out of possible multiple passes for which the isolation is done
+        :type passes:       int
+        :return:            (the fused buffered geometry, its estimated error); the error is 0.0 if the geometry
+                            was buffered directly
+        :rtype:             tuple
+        """
+        base_offset, base_geo, base_error = self.buffer_cache.nearest_base(
+            geo_hash, offset, corner_type, steps, tolerance=arc_tolerance(self.app, self.units))
+        if base_geo is not None:
+            self.app.proc_container.update_view_text(' %s' % _("Buffering"))
+            geo_iso = BufferCache.derive(base_geo, base_offset, offset, steps)
+            self.app.proc_container.update_view_text('')
+            if geo_iso is not None:
+                return geo_iso, base_error
 
-                cl_pol = cl_pol.buffer(-tooldia * (1 - overlap), int(steps_per_circle))
-                cl_pol_list = flatten_shapely_geometry(cl_pol)
+        geo_iso = []
+        geo_len = len(geometry)
 
-                added_flag = False
-                for tiny_pol in cl_pol_list:
-                    if tiny_pol.area > 0:
-                        added_flag = True
-                        geoms.insert(tiny_pol.exterior)
-                        if prog_plot:
-                            self.plot_temp_shapes(tiny_pol.exterior)
+        old_disp_number = 0
+        pol_nr = 0
+        # yet, it can be done by issuing an unary_union in the end, thus getting rid of the overlapping geo
+        for pol in geometry:
+            if self.app.abort_flag:
+                # graceful abort requested by the user
+                raise grace
+            if offset == 0:
+                temp_geo = pol
+            else:
+                temp_geo = pol.buffer(offset, steps, join_style=corner_type)
 
-                        for i in tiny_pol.interiors:
-                            geoms.insert(i)
-                            if prog_plot:
-                                self.plot_temp_shapes(i)
-                if added_flag is False:
-                    break
+            geo_iso.append(temp_geo)
 
-                cl_pol = unary_union(cl_pol_list)
+            pol_nr += 1
 
-                # if isinstance(cl_pol, MultiPolygon):
-                #     cl_pol = flatten_shapely_geometry(cl_pol)
-                #
-                #     added_flag = False
-                #     for tiny_pol in cl_pol:
-                #         if tiny_pol.area > 0:
-                #             added_flag = True
-                #             geoms.insert(tiny_pol.exterior)
-                #             if prog_plot:
-                #                 self.plot_temp_shapes(tiny_pol.exterior)
-                #
-                #             for i in tiny_pol.interiors:
-                #                 geoms.insert(i)
-                #                 if prog_plot:
-                #                     self.plot_temp_shapes(i)
-                #     if added_flag is False:
-                #         break
-                #
-                #     cl_pol = MultiPolygon(cl_pol)
-                # else:
-                #     if cl_pol.area > 0:
-                #         geoms.insert(cl_pol.exterior)
-                #         if prog_plot:
-                #             self.plot_temp_shapes(cl_pol.exterior)
-                #
-                #         for i in cl_pol.interiors:
-                #             geoms.insert(i)
-                #             if prog_plot:
-                #                 self.plot_temp_shapes(i)
-                #     else:
-                #         break
+            # activity view update
+            disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
+            if old_disp_number < disp_number <= 100:
+                self.app.proc_container.update_view_text(' %s %d: %d%%' %
+                                                         (_("Pass"), int(passes + 1), int(disp_number)))
+                old_disp_number = disp_number
 
-        if not geoms.objects:
-            self.app.log.debug("camlib.Geometry.clear_polygon_shrink() --> Current Area is zero")
-            return
+        self.app.proc_container.update_view_text(' %s' % _("Buffering"))
+        geo_iso = unary_union(geo_iso)
 
-        if prog_plot:
-            self.temp_shapes.redraw()
+        self.app.proc_container.update_view_text('')
+        # end of replaced block
 
-        # Optimization: Reduce lifts
-        if connect:
-            # log.debug("Reducing tool lifts...")
-            self.app.inform_no_echo.emit(_("Connect: reducing tool lifts. This may take a while, please wait..."))
-            self.app.proc_container.update_view_text(' %s' % _("Connecting..."), clear=True)
-            geoms = Geometry.paint_connect(geoms, polygon, tooldia, int(steps_per_circle))
+        return geo_iso, 0.0
 
-        return geoms
+    def flatten_list(self, obj_list):
+        for item in obj_list:
+            if isinstance(item, Iterable) and not isinstance(item, (str, bytes)):
+                yield from self.flatten_list(item)
+            else:
+                yield item
 
-    def clear_polygon_seed(self, polygon_to_clear, tooldia, steps_per_circle, seedpoint=None, overlap=0.15,
-                           connect=True, contour=True, simplify_tol=0.0, prog_plot=False):
+    def import_svg(self, filename, object_type=None, flip=True, units=None):
         """
-        Creates geometry inside a polygon for a tool to cover
-        the whole area.
-
-        This algorithm starts with a seed point inside the polygon
-        and draws circles around it. Arcs inside the polygons are
-        valid cuts. Finalizes by cutting around the inside edge of
-        the polygon.
+        Imports shapes from an SVG file into the object's geometry.
 
-        :param polygon_to_clear:    Shapely.geometry.Polygon
-        :param steps_per_circle:    how many linear segments to use to approximate a circle
-        :param tooldia:             Diameter of the tool
-        :param seedpoint:           Shapely.geometry.Point or None
-        :param overlap:             Tool fraction overlap between passes
-        :param connect:             Connect disjoint segment to minimize tool lifts
-        :param contour:             Cut contour inside the polygon.
-        :param prog_plot:           boolean; if True use the progressive plotting
-        :return:                    List of toolpaths covering polygon.
-        :rtype:                     AppRTreeStorage | None
+        :param filename:    Path to the SVG file.
+        :type filename:     str
+        :param object_type: parameter passed further along
+        :param flip:        Flip the vertically.
+        :type flip:         bool
+        :param units:       FlatCAM units
+        :return:            None
         """
 
-        # log.debug("camlib.clear_polygon_seed()")
+        self.app.log.debug("camlib.Geometry.import_svg()")
 
-        # Current buffer radius
-        radius = tooldia / 2 * (1 - overlap)
+        # Parse into list of shapely objects
+        svg_tree = ET.parse(filename)
+        svg_root = svg_tree.getroot()
 
-        # ## The toolpaths
-        # Index first and last points in paths
-        def get_pts(o):
-            return [o.coords[0], o.coords[-1]]
+        # Change origin to bottom left
+        # h = float(svg_root.get('height'))
+        # w = float(svg_root.get('width'))
+        svg_parsed_dims = svgparselength(svg_root.get('height'))
+        h = svg_parsed_dims[0]  # TODO: No units support yet
+        svg_units = svg_parsed_dims[1]
+        if svg_units in ['em', 'ex', 'pt', 'px']:
+            self.app.log.error("camlib.Geometry.import_svg(). SVG units not supported: %s" % svg_units)
+            self.app.inform.emit("[ERROR_NOTCL] %s" % _("Failed."))
+            return
 
-        geom_elems = AppRTreeStorage()
-        geom_elems.get_points = get_pts
+        units = self.app.app_units if units is None else units
+        res = self.app.options['geometry_circle_steps']
+        factor = svgparse_viewbox(svg_root)
 
-        # Path margin
-        path_margin = polygon_to_clear.buffer(-tooldia / 2, int(steps_per_circle))
-        path_margin = flatten_shapely_geometry(path_margin, simplify_tolerance=simplify_tol)
-        path_margin = MultiPolygon(path_margin)
+        if svg_units == 'cm':
+            factor *= 10
 
-        if path_margin.is_empty or path_margin is None:
-            return None
+        geos = getsvggeo(svg_root, object_type, units=units, res=res, factor=factor, app=self.app)
+        if geos is None:
+            return 'fail'
 
-        # Estimate good seedpoint if not provided.
-        if seedpoint is None:
-            seedpoint = path_margin.representative_point()
+        self.app.log.debug("camlib.Geometry.import_svg(). Finished parsing the SVG geometry.")
 
-        # Grow from seed until outside the box. The polygons will
-        # never have an interior, so take the exterior LinearRing.
-        while True:
-            if self.app.abort_flag:
-                # graceful abort requested by the user
-                raise grace
+        if flip:
+            geos = [translate(scale(g, 1.0, -1.0, origin=(0, 0)), yoff=h) for g in geos]
+            self.app.log.debug("camlib.Geometry.import_svg(). SVG geometry was flipped.")
+
+        # trying to optimize the resulting geometry by merging contiguous lines
+        geos = list(self.flatten_list(geos))
+        geos_polys = []
+        geos_lines = []
+        for g in geos:
+            if isinstance(g, Polygon):
+                geos_polys.append(g)
+            else:
+                geos_lines.append(g)
+
+        try:
+            merged_lines = linemerge(geos_lines)
+        except Exception:
+            merged_lines = geos_lines
+            self.app.log.error(
+                'camlib.Geometry.import_svg(). Could not merge the lines, working with the original SVG geometry.')
 
-            # provide the app with a way to process the GUI events when in a blocking loop
-            QtWidgets.QApplication.processEvents()
+        geos = geos_polys
+        try:
+            w_geo = merged_lines.geoms if isinstance(merged_lines, (MultiPolygon, MultiLineString)) else merged_lines
+            for ml in w_geo:
+                geos.append(ml)
+        except TypeError:
+            geos.append(merged_lines)
 
-            path = Point(seedpoint).buffer(radius, int(steps_per_circle)).exterior
-            path = path.simplify(simplify_tol)
-            path = path.intersection(path_margin)
+        # Add to object
+        if self.solid_geometry is None:
+            self.solid_geometry = []
 
-            # Touches polygon?
-            if path.is_empty:
-                break
+        if type(self.solid_geometry) is list:
+            if type(geos) is list:
+                self.solid_geometry += geos
+            else:
+                self.solid_geometry.append(geos)
+        else:  # It's shapely geometry
+            self.solid_geometry = [self.solid_geometry, geos]
 
-            # path can be a collection of paths.
-            path_geometry = flatten_shapely_geometry(path, simplify_tolerance=simplify_tol)
-            for p in path_geometry:
-                geom_elems.insert(p)
-                if prog_plot:
-                    self.plot_temp_shapes(p)
+        # flatten the self.solid_geometry list for import_svg() to import SVG as Gerber
+        self.solid_geometry = list(self.flatten_list(self.solid_geometry))
 
-            if prog_plot:
-                self.temp_shapes.redraw()
+        geos_text = getsvgtext(svg_root, object_type, app=self.app, units=units)
 
-            radius += tooldia * (1 - overlap)
+        if geos_text is not None:
+            self.app.log.debug("camlib.Geometry.import_svg(). Processing SVG text.")
+            geos_text_f = []
+            if flip:
+                # Change origin to bottom left
+                for i in geos_text:
+                    __, minimy, __, maximy = i.bounds
+                    h2 = (maximy - minimy) * 0.5
+                    geos_text_f.append(translate(scale(i, 1.0, -1.0, origin=(0, 0)), yoff=(h + h2)))
+            if geos_text_f:
+                self.solid_geometry = self.solid_geometry + geos_text_f
 
-        # Clean inside edges (contours) of the original polygon
-        if contour:
-            buffered_poly = autolist(polygon_to_clear.buffer(-tooldia / 2, int(steps_per_circle)))
-            buffered_poly = [x.simplify(simplify_tol) for x in buffered_poly]
-            outer_edges = [x.exterior for x in buffered_poly]
+        tooldia = float(self.app.options["tools_mill_tooldia"])
+        tooldia = float('%.*f' % (self.decimals, tooldia))
 
-            inner_edges = []
-            # Over resulting polygons
-            for x in buffered_poly:
-                for y in x.interiors:  # Over interiors of each polygon
-                    inner_edges.append(y)
+        new_data = {k: v for k, v in self.obj_options.items()}
 
-            for g in outer_edges + inner_edges:
-                if g and not g.is_empty:
-                    geom_elems.insert(g)
-                    if prog_plot:
-                        self.plot_temp_shapes(g)
+        self.tools.update({
+            1: {
+                'tooldia': tooldia,
+                'offset': 'Path',
+                'offset_value': 0.0,
+                'type': 'Rough',
+                'tool_type': 'C1',
+                'data': deepcopy(new_data),
+                'solid_geometry': self.solid_geometry
+            }
+        })
 
-        if prog_plot:
-            self.temp_shapes.redraw()
+        self.tools[1]['data']['name'] = self.obj_options['name']
 
-        # Optimization connect touching paths
-        # log.debug("Connecting paths...")
-        # geom_elems = Geometry.path_connect(geom_elems)
+    def import_dxf_as_geo(self, filename, units='MM'):
+        """
+        Imports shapes from an DXF file into the object's geometry.
 
-        # Optimization: Reduce lifts
-        if connect:
-            # log.debug("Reducing tool lifts...")
-            self.app.inform_no_echo.emit(_("Connect: reducing tool lifts. This may take a while, please wait..."))
-            self.app.proc_container.update_view_text(' %s' % _("Connecting..."), clear=True)
-            geoms_conn = Geometry.paint_connect(geom_elems, polygon_to_clear, tooldia, steps_per_circle)
-            if geoms_conn:
-                return geoms_conn
+        :param filename:    Path to the DXF file.
+        :type filename:     str
+        :param units:       Application units
+        :return: None
+        """
+        self.app.log.debug("Parsing DXF file geometry into a Geometry object solid geometry.")
 
-        return geom_elems
+        # Multi-geo Geometry Object
+        self.multigeo = True
 
-    def clear_polygon_lines(self, polygon, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True,
-                            simplify_tol=0.0, prog_plot=False):
-        """
-        Creates geometry inside a polygon for a tool to cover
-        the whole area.
+        # Parse into list of shapely objects
+        dxf = ezdxf.readfile(filename)
+        geos = getdxfgeo(dxf, tolerance=arc_tolerance(self.app, units))
 
-        This algorithm draws horizontal lines inside the polygon.
+        # trying to optimize the resulting geometry by merging contiguous lines
+        geos = list(self.flatten_list(geos))
+        geos_polys = []
+        geos_lines = []
+        for g in geos:
+            if isinstance(g, (Polygon, MultiPolygon)):
+                geos_polys.append(g)
+            else:
+                geos_lines.append(g)
 
-        :param polygon:             The polygon being painted.
-        :type polygon:              shapely.geometry.Polygon
-        :param tooldia:             Tool diameter.
-        :param steps_per_circle:    how many linear segments to use to approximate a circle
-        :param overlap:             Tool path overlap percentage.
-        :param connect:             Connect lines to avoid tool lifts.
-        :param contour:             Paint around the edges.
-        :param prog_plot:           boolean; if to use the progressive plotting
-        :return:
-        """
+        merged_lines = linemerge(geos_lines)
+        geos = geos_polys
 
-        # log.debug("camlib.clear_polygon_lines()")
-        if not isinstance(polygon, Polygon):
-            self.app.log.debug("camlib.Geometry.clear_polygon_lines() --> Not a Polygon but %s" % str(type(polygon)))
-            return None
+        try:
+            w_geo = merged_lines.geoms if isinstance(merged_lines, MultiLineString) else merged_lines
+            for ml in w_geo:
+                geos.append(ml)
+        except TypeError:
+            geos.append(merged_lines)
 
-        # The toolpaths
-        # Index first and last points in paths
-        def get_pts(o):
-            return [o.coords[0], o.coords[-1]]
+        # Add to object
+        if self.solid_geometry is None:
+            self.solid_geometry = []
 
-        geoms = AppRTreeStorage()
-        geoms.get_points = get_pts
+        if type(self.solid_geometry) is list:
+            if type(geos) is list:
+                self.solid_geometry += geos
+            else:
+                self.solid_geometry.append(geos)
+        else:  # It's shapely geometry
+            self.solid_geometry = [self.solid_geometry, geos]
 
-        lines_trimmed = []
+        tooldia = float(self.app.options["tools_mill_tooldia"])
+        tooldia = float('%.*f' % (self.decimals, tooldia))
 
-        # Bounding box
-        left, bot, right, top = polygon.bounds
+        new_data = {k: v for k, v in self.obj_options.items()}
 
-        try:
-            margin_poly = polygon.buffer(-tooldia / 1.99999999, (int(steps_per_circle)))
-            margin_poly = margin_poly.simplify(simplify_tol)
-        except Exception:
-            self.app.log.debug("camlib.Geometry.clear_polygon_lines() --> Could not buffer the Polygon")
-            return None
+        self.tools.update({
+            1: {
+                'tooldia': tooldia,
+                'offset': 'Path',
+                'offset_value': 0.0,
+                'type': 'Rough',
+                'tool_type': 'C1',
+                'data': deepcopy(new_data),
+                'solid_geometry': self.solid_geometry
+            }
+        })
 
-        # decide the direction of the lines
-        if abs(left - right) >= abs(top - bot):
-            # First line
-            try:
-                y = top - tooldia / 1.99999999
-                while y > bot + tooldia / 1.999999999:
-                    if self.app.abort_flag:
-                        # graceful abort requested by the user
-                        raise grace
+        self.tools[1]['data']['name'] = self.obj_options['name']
 
-                    # provide the app with a way to process the GUI events when in a blocking loop
-                    QtWidgets.QApplication.processEvents()
+        # commented until this function is ready
+        # geos_text = getdxftext(dxf, object_type, units=units)
+        # if geos_text is not None:
+        #     geos_text_f = []
+        #     self.solid_geometry = [self.solid_geometry, geos_text_f]
 
-                    line = LineString([(left, y), (right, y)])
-                    line = line.intersection(margin_poly)
-                    line = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
-                    lines_trimmed += line
-                    y -= tooldia * (1 - overlap)
-                    if prog_plot:
-                        self.plot_temp_shapes(line)
-                        self.temp_shapes.redraw()
+    def size(self):
+        """
+        Returns (width, height) of rectangular
+        bounds of geometry.
+        """
+        if self.solid_geometry is None:
+            log.warning("Solid_geometry not computed yet.")
+            return 0
+        bounds = self.bounds()
+        return bounds[2] - bounds[0], bounds[3] - bounds[1]
 
-                # Last line
-                y = bot + tooldia / 2
-                line = LineString([(left, y), (right, y)])
-                line = line.intersection(margin_poly)
+    def get_empty_area(self, boundary=None):
+        """
+        Returns the complement of self.solid_geometry within
+        the given boundary polygon. If not specified, it defaults to
+        the rectangular bounding box of self.solid_geometry.
+        """
+        if boundary is None:
+            boundary = self.solid_geometry.envelope
+        return boundary.difference(self.solid_geometry)
 
-                lines_geometry = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
-                for ll in lines_geometry:
-                    lines_trimmed.append(ll)
-                    if prog_plot:
-                        self.plot_temp_shapes(ll)
-            except Exception as e:
-                self.app.log.error('camlib.Geometry.clear_polygon_lines() Processing poly --> %s' % str(e))
-                return None
-        else:
-            # First line
-            try:
-                x = left + tooldia / 1.99999999
-                while x < right - tooldia / 1.999999999:
-                    if self.app.abort_flag:
-                        # graceful abort requested by the user
-                        raise grace
+    def polygon_clearing(self, prog_plot=False):
+        """
+        :param prog_plot:   boolean; if True use the progressive plotting
+        :return:            a PolygonClearing that reports to the app: it honors the abort requests, it keeps the GUI
+                            responsive and it plots the tool paths if prog_plot is True
+        :rtype:             PolygonClearing
+        """
+        def check_abort():
+            if self.app.abort_flag:
+                # graceful abort requested by the user
+                raise grace
+            # provide the app with a way to process the GUI events when in a blocking loop
+            QtWidgets.QApplication.processEvents()
 
-                    # provide the app with a way to process the GUI events when in a blocking loop
-                    QtWidgets.QApplication.processEvents()
+        def on_connect():
+            # log.debug("Reducing tool lifts...")
+            self.app.inform_no_echo.emit(_("Connect: reducing tool lifts. This may take a while, please wait..."))
+            self.app.proc_container.update_view_text(' %s' % _("Connecting..."), clear=True)
 
-                    line = LineString([(x, top), (x, bot)])
-                    line = line.intersection(margin_poly)
-                    line = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
-                    lines_trimmed += line
-                    x += tooldia * (1 - overlap)
-                    if prog_plot:
-                        self.plot_temp_shapes(line)
-                        self.temp_shapes.redraw()
+        return PolygonClearing(check_abort=check_abort,
+                               plot=self.plot_temp_shapes if prog_plot else None,
+                               redraw=self.temp_shapes.redraw if prog_plot else None,
+                               on_connect=on_connect)
 
-                # Last line
-                x = right + tooldia / 2
-                line = LineString([(x, top), (x, bot)])
-                line = line.intersection(margin_poly)
+    def clear_polygon_shrink(self, polygon, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True,
+                             prog_plot=False):
+        """
+        Creates geometry inside a polygon for a tool to cover
+        the whole area.
 
-                lines_geometry = flatten_shapely_geometry(line, simplify_tolerance=simplify_tol)
-                for ll in lines_geometry:
-                    lines_trimmed.append(ll)
-                    if prog_plot:
-                        self.plot_temp_shapes(ll)
-            except Exception as e:
-                self.app.log.error('camlib.Geometry.clear_polygon_lines() Processing poly --> %s' % str(e))
-                return None
+        This algorithm shrinks the edges of the polygon and takes
+        the resulting edges as toolpaths.
 
-        if prog_plot:
-            self.temp_shapes.redraw()
+        :param polygon:             Polygon to clear.
+        :param tooldia:             Diameter of the tool.
+        :param steps_per_circle:    number of linear segments to be used to approximate a circle
+        :param overlap:             Overlap of toolpasses.
+        :param connect:             Draw lines between disjoint segments to
+                                    minimize tool lifts.
+        :param contour:             Paint around the edges. Inconsequential in
+                                    this painting method.
+        :param prog_plot:           boolean; if Ture use the progressive plotting
+        :return:
+        """
+        return self.polygon_clearing(prog_plot).shrink(polygon, tooldia, steps_per_circle, overlap=overlap,
+                                                       connect=connect, contour=contour)
 
-        lines_trimmed = unary_union(lines_trimmed)
+    def clear_polygon_seed(self, polygon_to_clear, tooldia, steps_per_circle, seedpoint=None, overlap=0.15,
+                           connect=True, contour=True, simplify_tol=0.0, prog_plot=False):
+        """
+        Creates geometry inside a polygon for a tool to cover
+        the whole area.
 
-        # Add lines to storage
-        lines_t_geo = flatten_shapely_geometry(lines_trimmed, simplify_tolerance=simplify_tol)
-        for line in lines_t_geo:
-            if isinstance(line, LineString) or isinstance(line, LinearRing):
-                if not line.is_empty:
-                    geoms.insert(line)
-            else:
-                self.app.log.debug("camlib.Geometry.clear_polygon_lines(). Not a line: %s" % str(type(line)))
+        This algorithm starts with a seed point inside the polygon
+        and draws circles around it. Arcs inside the polygons are
+        valid cuts. Finalizes by cutting around the inside edge of
+        the polygon.
 
-        # Add margin (contour) to storage
-        if contour:
-            margin_poly_geo = flatten_shapely_geometry(margin_poly, simplify_tolerance=simplify_tol)
-            for poly in margin_poly_geo:
-                if isinstance(poly, Polygon) and not poly.is_empty:
-                    geoms.insert(poly.exterior)
-                    if prog_plot:
-                        self.plot_temp_shapes(poly.exterior)
-                    for ints in poly.interiors:
-                        geoms.insert(ints)
-                        if prog_plot:
-                            self.plot_temp_shapes(ints)
+        :param polygon_to_clear:    Shapely.geometry.Polygon
+        :param steps_per_circle:    how many linear segments to use to approximate a circle
+        :param tooldia:             Diameter of the tool
+        :param seedpoint:           Shapely.geometry.Point or None
+        :param overlap:             Tool fraction overlap between passes
+        :param connect:             Connect disjoint segment to minimize tool lifts
+        :param contour:             Cut contour inside the polygon.
+        :param prog_plot:           boolean; if True use the progressive plotting
+        :return:                    List of toolpaths covering polygon.
+        :rtype:                     AppRTreeStorage | None
+        """
+        return self.polygon_clearing(prog_plot).seed(polygon_to_clear, tooldia, steps_per_circle,
+                                                     seedpoint=seedpoint, overlap=overlap, connect=connect,
+                                                     contour=contour, simplify_tol=simplify_tol)
 
-        if prog_plot:
-            self.temp_shapes.redraw()
+    def clear_polygon_lines(self, polygon, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True,
+                            simplify_tol=0.0, prog_plot=False):
+        """
+        Creates geometry inside a polygon for a tool to cover
+        the whole area.
 
-        # Optimization: Reduce lifts
-        if connect:
-            # log.debug("Reducing tool lifts...")
-            self.app.inform_no_echo.emit(_("Connect: reducing tool lifts. This may take a while, please wait..."))
-            self.app.proc_container.update_view_text(' %s' % _("Connecting..."), clear=True)
-            geoms_conn = Geometry.paint_connect(geoms, polygon, tooldia, steps_per_circle)
-            if geoms_conn:
-                return geoms_conn
+        This algorithm draws horizontal lines inside the polygon.
 
-        return geoms
+        :param polygon:             The polygon being painted.
+        :type polygon:              shapely.geometry.Polygon
+        :param tooldia:             Tool diameter.
+        :param steps_per_circle:    how many linear segments to use to approximate a circle
+        :param overlap:             Tool path overlap percentage.
+        :param connect:             Connect lines to avoid tool lifts.
+        :param contour:             Paint around the edges.
+        :param prog_plot:           boolean; if to use the progressive plotting
+        :return:
+        """
+        return self.polygon_clearing(prog_plot).lines(polygon, tooldia, steps_per_circle, overlap=overlap,
+                                                      connect=connect, contour=contour, simplify_tol=simplify_tol)
 
     def fill_with_lines(self, line, aperture_size, tooldia, steps_per_circle, overlap=0.15, connect=True, contour=True,
                         prog_plot=False):
@@ -2432,6 +2698,41 @@ class Geometry(object):
         svg_elem = geom.svg(scale_factor=scale_stroke_factor)
         return svg_elem
 
+    def affine_transform(self, transform):
+        """
+        Transforms all the object's geometry with an affine transformation. All the geometry elements are transformed
+        at once, therefore a number of consecutive transformations should be fused into one before calling this.
+
+        :param transform:   The transformation
+        :type transform:    AffineTransform
+        :return:            None
+        """
+        self.buffer_cache.invalidate()
+        self.ncc_rest_cache = None
+
+        if self.multigeo is True:
+            tools_geo = [self.tools[tool]['solid_geometry'] for tool in self.tools]
+        else:
+            tools_geo = []
+
+        self.solid_geometry, tools_geo = transform.apply(self.solid_geometry, tools_geo,
+                                                         progress=self.transform_progress)
+        for tool, tool_geo in zip(self.tools if self.multigeo is True else [], tools_geo):
+            self.tools[tool]['solid_geometry'] = tool_geo
+
+    def transform_progress(self, percentage):
+        """
+        Displays the percentage of the work done while transforming the geometry.
+
+        :param percentage:  An int from 0 to 100
+        :type percentage:   int
+        :return:            None
+        """
+        try:
+            self.app.proc_container.update_view_text(' %d%%' % percentage)
+        except AttributeError:
+            pass
+
     def mirror(self, axis, point):
         """
         Mirrors the object around a specified axis passign through
@@ -2445,51 +2746,8 @@ class Geometry(object):
         """
         self.app.log.debug("camlib.Geometry.mirror()")
 
-        px, py = point
-        xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
-
-        def mirror_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(mirror_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.scale(obj, xscale, yscale, origin=(px, py))
-                except AttributeError:
-                    return obj
-
         try:
-            if self.multigeo is True:
-                for tool in self.tools:
-                    # variables to display the percentage of work done
-                    self.geo_len = 0
-                    try:
-                        self.geo_len = len(self.tools[tool]['solid_geometry'])
-                    except TypeError:
-                        self.geo_len = 1
-                    self.old_disp_number = 0
-                    self.el_count = 0
-
-                    self.tools[tool]['solid_geometry'] = mirror_geom(self.tools[tool]['solid_geometry'])
-            else:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(self.solid_geometry)
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.solid_geometry = mirror_geom(self.solid_geometry)
+            self.affine_transform(AffineTransform().mirror(axis, origin=point))
             self.app.inform.emit('[success] %s...' % _('Object was mirrored'))
         except AttributeError:
             self.app.inform.emit('[ERROR_NOTCL] %s %s' % (_("Failed."), _("No object is selected.")))
@@ -2505,64 +2763,14 @@ class Geometry(object):
         counter-clockwise and negative are clockwise rotations.
 
         :param point:
-        The point of origin can be a keyword 'center' for the bounding box
-        center (default), 'centroid' for the geometry's centroid, a Point object
-        or a coordinate tuple (x0, y0).
+        A coordinate tuple (x0, y0), the point of origin for the rotation.
 
         See shapely manual for more information: http://toblerity.org/shapely/manual.html#affine-transformations
         """
         self.app.log.debug("camlib.Geometry.rotate()")
 
-        px, py = point
-
-        def rotate_geom(obj):
-            try:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(rotate_geom(g))
-                return new_obj
-            except TypeError:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.rotate(obj, angle, origin=(px, py))
-                except AttributeError:
-                    return obj
-
         try:
-            if self.multigeo is True:
-                for tool in self.tools:
-                    # variables to display the percentage of work done
-                    self.geo_len = 0
-                    try:
-                        work_geo = self.tools[tool]['solid_geometry']
-                        self.geo_len = len(
-                            work_geo.geoms if isinstance(work_geo, (MultiPolygon, MultiLineString)) else work_geo
-                        )
-                    except TypeError:
-                        self.geo_len = 1
-                    self.old_disp_number = 0
-                    self.el_count = 0
-
-                    self.tools[tool]['solid_geometry'] = rotate_geom(self.tools[tool]['solid_geometry'])
-            else:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    work_geo = self.solid_geometry
-                    self.geo_len = len(
-                        work_geo.geoms if isinstance(work_geo, (MultiPolygon, MultiLineString)) else work_geo
-                    )
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.solid_geometry = rotate_geom(self.solid_geometry)
+            self.affine_transform(AffineTransform().rotate(angle, origin=point))
             self.app.inform.emit('[success] %s...' % _('Object was rotated'))
         except AttributeError:
             self.app.inform.emit('[ERROR_NOTCL] %s %s' % (_("Failed."), _("No object is selected.")))
@@ -2587,63 +2795,14 @@ class Geometry(object):
         """
         self.app.log.debug("camlib.Geometry.skew()")
 
-        px, py = point
-
-        def skew_geom(obj):
-            try:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(skew_geom(g))
-                return new_obj
-            except TypeError:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.skew(obj, angle_x, angle_y, origin=(px, py))
-                except AttributeError:
-                    return obj
-
         try:
-            if self.multigeo is True:
-                for tool in self.tools:
-                    # variables to display the percentage of work done
-                    self.geo_len = 0
-                    try:
-                        self.geo_len = len(self.tools[tool]['solid_geometry'])
-                    except TypeError:
-                        self.geo_len = 1
-                    self.old_disp_number = 0
-                    self.el_count = 0
-
-                    self.tools[tool]['solid_geometry'] = skew_geom(self.tools[tool]['solid_geometry'])
-            else:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(self.solid_geometry)
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.solid_geometry = skew_geom(self.solid_geometry)
+            self.affine_transform(AffineTransform().skew(angle_x, angle_y, origin=point))
             self.app.inform.emit('[success] %s...' % _('Object was skewed'))
         except AttributeError:
             self.app.inform.emit('[ERROR_NOTCL] %s %s' % (_("Failed."), _("No object is selected.")))
 
         self.app.proc_container.new_text = ''
 
-        # if type(self.solid_geometry) == list:
-        #     self.solid_geometry = [affinity.skew(g, angle_x, angle_y, origin=(px, py))
-        #                            for g in self.solid_geometry]
-        # else:
-        #     self.solid_geometry = affinity.skew(self.solid_geometry, angle_x, angle_y,
-        #                                         origin=(px, py))
-
     def buffer(self, distance, join, factor, only_exterior=False, muted=False):
         """
 
@@ -2660,6 +2819,9 @@ class Geometry(object):
         if distance == 0:
             return
 
+        self.buffer_cache.invalidate()
+        self.ncc_rest_cache = None
+
         def buffer_geom(obj):
             new_obj = []
             try:
@@ -2804,6 +2966,8 @@ class CNCjob(Geometry):
 
         self.gcode = ""
         self.gcode_parsed = None
+        # record array of the parsed G-Code moves, see gcode_tokenize()
+        self.gcode_moves = None
 
         self.pp_geometry_name = pp_geometry_name
         self.pp_geometry = self.app.preprocessors[self.pp_geometry_name]
@@ -2945,6 +3109,33 @@ class CNCjob(Geometry):
             self.app.log.error('Exception occurred within a preprocessor: ' + traceback.format_exc())
             return ''
 
+    def doformat_linear(self, pp, coords, **kwargs):
+        """
+        Will format a series of linear motions in one go by calling the linear_code_batch() method of the preprocessor,
+        instead of calling doformat() for each point. The preprocessor parameters are built only once.
+
+        :param pp:      The preprocessor object (an instance of the PreProc class)
+        :type pp:       PreProc
+        :param coords:  The coordinates of the points where the linear motions end
+        :type coords:   list
+        :param kwargs:  keyword args which will update attributes of the current class
+        :type kwargs:   dict
+        :return:        A list of Gcode lines, each one terminated by a newline
+        :rtype:         list
+        """
+        if len(coords) == 0:
+            return []
+
+        attributes = AttrDict()
+        attributes.update(self.postdata)
+        attributes.update(kwargs)
+        try:
+            return pp.linear_code_batch(attributes, coords)
+        except Exception:
+            self.app.log.error('Exception occurred within a preprocessor batch method: ' + traceback.format_exc())
+            # fallback to formatting point by point
+            return [self.doformat(pp.linear_code, x=pt[0], y=pt[1], **kwargs) for pt in coords]
+
     def parse_custom_toolchange_code(self, data):
         """
         Will parse a text and get a toolchange sequence in text format suitable to be included in a Gcode file.
@@ -3257,6 +3448,76 @@ class CNCjob(Geometry):
 
         return locations
 
+    def check_abort(self):
+        if self.app.abort_flag:
+            # graceful abort requested by the user
+            raise grace
+
+    def geo_optimized_greedy(self, geometry, opt_time=0):
+        """
+        Path optimization using the vectorized greedy ordering engine with an optional 2-opt refinement.
+
+        :param geometry:    a list of LineString/LinearRing or a MultiLineString
+        :param opt_time:    time in seconds for the 2-opt refinement; 0 disables the refinement
+        :type opt_time:     float
+        :return:            a list of tuples (entry point, geometry) in the order they should be traveled or 'fail'
+        :rtype:             list | str
+        """
+        self.app.log.debug("Ordering geometry before generating G-Code...")
+        self.app.inform.emit(_("Indexing geometry before generating G-Code..."))
+
+        work_geo = geometry.geoms if isinstance(geometry, (MultiPolygon, MultiLineString)) else geometry
+        paths = []
+        starts = []
+        ends = []
+        for geo_shape in work_geo:
+            if geo_shape is None or geo_shape.is_empty:
+                continue
+            try:
+                starts.append(geo_shape.coords[0])
+                ends.append(geo_shape.coords[-1])
+            except Exception:
+                continue
+            paths.append(geo_shape)
+
+        # if there are no locations then go to the next tool
+        if not paths:
+            return 'fail'
+
+        engine = PathOrderingEngine(starts=starts, ends=ends, check_abort=self.check_abort)
+        order, reverse = engine.order(origin=(0, 0), refine_time=float(opt_time))
+        self.app.log.debug("Greedy path optimization - travel distance: initial = %.4f, optimized = %.4f" %
+                           (engine.travel_length(), engine.travel_length(order, reverse)))
+
+        return [(ends[p] if rev else starts[p], paths[p]) for p, rev in zip(order.tolist(), reverse.tolist())]
+
+    def exc_optimized_greedy(self, geometry, opt_time=0):
+        """
+        Drill path optimization using the vectorized greedy ordering engine with an optional 2-opt refinement.
+
+        :param geometry:    a list of drill Points
+        :param opt_time:    time in seconds for the 2-opt refinement; 0 disables the refinement
+        :type opt_time:     float
+        :return:            a list of tuples ((x, y), Point) in the order they should be drilled or 'fail'
+        :rtype:             list | str
+        """
+        self.app.log.debug("Ordering drills before generating G-Code...")
+        self.app.inform.emit(_("Indexing geometry before generating G-Code..."))
+
+        drills = [geo_shape for geo_shape in geometry if geo_shape is not None and not geo_shape.is_empty]
+
+        # if there are no locations then go to the next tool
+        if not drills:
+            return 'fail'
+
+        locations = shapely.get_coordinates(drills)
+        engine = PathOrderingEngine(starts=locations, check_abort=self.check_abort)
+        order, __ = engine.order(origin=(0, 0), refine_time=float(opt_time))
+        self.app.log.debug("Greedy drill path optimization - travel distance: initial = %.4f, optimized = %.4f" %
+                           (engine.travel_length(), engine.travel_length(order)))
+
+        return [((locations[p][0], locations[p][1]), drills[p]) for p in order.tolist()]
+
     def check_zcut(self, zcut):
         if zcut > 0:
             self.app.inform.emit('[WARNING] %s' %
@@ -3323,7 +3584,7 @@ class CNCjob(Geometry):
         self.exc_tools = deepcopy(tools)
         self.tool = str(tool)
 
-        t_gcode = ''
+        t_gcode = []
 
         # holds the temporary coordinates of the processed drill point
         locx, locy = first_pt
@@ -3346,6 +3607,8 @@ class CNCjob(Geometry):
             self.app.log.debug("Using Travelling Salesman drill path optimization.")
         elif opt_type == 'R':
             self.app.log.debug("Using RTree path optimization.")
+        elif opt_type == 'G':
+            self.app.log.debug("Using Greedy path optimization.")
         else:
             self.app.log.debug("Using no path optimization.")
 
@@ -3477,6 +3740,11 @@ class CNCjob(Geometry):
             optimized_path = self.exc_optimized_rtree(points)
             if optimized_path == 'fail':
                 return 'fail'
+        elif opt_type == 'G':
+            opt_time = self.app.options["excellon_search_time"]
+            optimized_path = self.exc_optimized_greedy(points, opt_time=opt_time)
+            if optimized_path == 'fail':
+                return 'fail'
         else:
             # it's actually not optimized path but here we build a list of (x,y) coordinates
             # out of the tool's drills
@@ -3501,23 +3769,23 @@ class CNCjob(Geometry):
         start_gcode = ''
         if is_first:
             start_gcode = self.doformat(p.start_code)
-            # t_gcode += start_gcode
+            # t_gcode.append(start_gcode)
 
         # do the ToolChange event
-        t_gcode += self.doformat(p.z_feedrate_code)
+        t_gcode.append(self.doformat(p.z_feedrate_code))
         if toolchange:
-            t_gcode += self.doformat(p.toolchange_code, toolchangexy=(temp_locx, temp_locy))
-            t_gcode += self.doformat(p.z_feedrate_code)
+            t_gcode.append(self.doformat(p.toolchange_code, toolchangexy=(temp_locx, temp_locy)))
+            t_gcode.append(self.doformat(p.z_feedrate_code))
         else:
             if self.startz is None or 'laser' in self.pp_excellon_name.lower():
-                t_gcode += self.doformat(p.lift_code)
-            t_gcode += self.doformat(p.startz_code)
+                t_gcode.append(self.doformat(p.lift_code))
+            t_gcode.append(self.doformat(p.startz_code))
 
         # Spindle start
-        t_gcode += self.doformat(p.spindle_code)
+        t_gcode.append(self.doformat(p.spindle_code))
         # Dwell time
         if self.dwell is True:
-            t_gcode += self.doformat(p.dwell_code)
+            t_gcode.append(self.doformat(p.dwell_code))
 
         current_tooldia = self.app.dec_format(float(tools[tool]["tooldia"]), self.decimals)
         self.app.inform.emit(
@@ -3555,7 +3823,7 @@ class CNCjob(Geometry):
                 if opt_type == 'T':
                     locx = point[0]
                     locy = point[1]
-                elif opt_type == 'R':
+                elif opt_type in ['R', 'G']:
                     locx = point[0][0]
                     locy = point[0][1]
                 else:
@@ -3572,31 +3840,31 @@ class CNCjob(Geometry):
 
                     if travel[0] is not None:
                         # move to next point
-                        t_gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                         # raise to safe Z (travel[0]) each time because safe Z may be different
                         self.z_move = travel[0]
-                        t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                         # restore z_move
                         self.z_move = tool_dict['tools_drill_travelz']
                     else:
                         if prev_z is not None:
                             # move to next point
-                            t_gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                            t_gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                             # we assume that previously the z_move was altered therefore raise to
                             # the travel_z (z_move)
                             self.z_move = tool_dict['tools_drill_travelz']
-                            t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                            t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                         else:
                             # move to next point
-                            t_gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                            t_gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # store prev_z
                     prev_z = travel[0]
 
-                # t_gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                # t_gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                 # test if the self.z_cut >= 0, in that case we do not use the up_to_zero feature
                 cancel_up2zero = False
@@ -3606,17 +3874,17 @@ class CNCjob(Geometry):
                 for depth in depths_list:
                     self.z_cut = depth
 
-                    t_gcode += self.doformat(p.down_code, x=locx, y=locy)
+                    t_gcode.append(self.doformat(p.down_code, x=locx, y=locy))
                     self.measured_down_distance += abs(self.z_cut) + abs(self.z_move)
 
                     if self.f_retract is False and cancel_up2zero is False:
-                        t_gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                         self.measured_up_to_zero_distance += abs(self.z_cut)
                         self.measured_lift_distance += abs(self.z_move)
                     else:
                         self.measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
 
-                    t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                 # if self.multidepth and abs(self.z_cut) > abs(self.z_depthpercut):
                 #     doc = deepcopy(self.z_cut)
@@ -3628,32 +3896,32 @@ class CNCjob(Geometry):
                 #         if abs(doc) < abs(self.z_cut) < (abs(doc) + self.z_depthpercut):
                 #             self.z_cut = doc
                 #         # Move down the drill bit
-                #         t_gcode += self.doformat(p.down_code, x=locx, y=locy)
+                #         t_gcode.append(self.doformat(p.down_code, x=locx, y=locy))
                 #
                 #         # Update the distance travelled down with the current one
                 #         self.measured_down_distance += abs(self.z_cut) + abs(self.z_move)
                 #
                 #         if self.f_retract is False:
-                #             t_gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                #             t_gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                 #             self.measured_up_to_zero_distance += abs(self.z_cut)
                 #             self.measured_lift_distance += abs(self.z_move)
                 #         else:
                 #             self.measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
                 #
-                #         t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                #         t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                 # else:
-                #     t_gcode += self.doformat(p.down_code, x=locx, y=locy)
+                #     t_gcode.append(self.doformat(p.down_code, x=locx, y=locy))
                 #
                 #     self.measured_down_distance += abs(self.z_cut) + abs(self.z_move)
                 #
                 #     if self.f_retract is False:
-                #         t_gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                #         t_gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                 #         self.measured_up_to_zero_distance += abs(self.z_cut)
                 #         self.measured_lift_distance += abs(self.z_move)
                 #     else:
                 #         self.measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
                 #
-                #     t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                #     t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                 self.measured_distance += abs(distance_euclidian(locx, locy, temp_locx, temp_locy))
                 temp_locx = locx
@@ -3673,13 +3941,13 @@ class CNCjob(Geometry):
         self.z_cut = deepcopy(old_zcut)
 
         if is_last:
-            t_gcode += self.doformat(p.spindle_stop_code)
+            t_gcode.append(self.doformat(p.spindle_stop_code))
             # Move to End position
-            t_gcode += self.doformat(p.end_code, x=0, y=0)
+            t_gcode.append(self.doformat(p.end_code, x=0, y=0))
 
         self.app.inform.emit('%s %s' % (_("Finished G-Code generation for tool:"), str(tool)))
 
-        return t_gcode, (locx, locy), start_gcode
+        return ''.join(t_gcode), (locx, locy), start_gcode
 
     # used in Geometry (and in Tool Milling)
     def geometry_tool_gcode_gen(self, tool, tools, first_pt, last_pt, tolerance, is_first=False, is_last=False,
@@ -3712,7 +3980,7 @@ class CNCjob(Geometry):
 
         self.app.log.debug("camlib.CNCJob.geometry_tool_gcode_gen() -> Generating GCode for tool: %s" % str(tool))
 
-        t_gcode = ''
+        t_gcode = []
         temp_solid_geometry = []
 
         # The Geometry from which we create GCode
@@ -3732,7 +4000,7 @@ class CNCjob(Geometry):
 
         # Optimization type. Can be: 'M', 'B', 'T', 'R', 'No'
         opt_type = tool_dict['tools_mill_optimization_type']
-        if not HAS_ORTOOLS:
+        if not HAS_ORTOOLS and opt_type in ['M', 'B']:
             opt_type = 'R'
 
         opt_time = tool_dict['tools_mill_search_time'] if 'tools_mill_search_time' in tool_dict else 1.0
@@ -3745,6 +4013,8 @@ class CNCjob(Geometry):
             self.app.log.debug("Using Travelling Salesman path optimization.")
         elif opt_type == 'R':
             self.app.log.debug("Using RTree path optimization.")
+        elif opt_type == 'G':
+            self.app.log.debug("Using Greedy path optimization.")
         else:
             self.app.log.debug("Using no path optimization.")
 
@@ -3970,6 +4240,10 @@ class CNCjob(Geometry):
             optimized_path = self.geo_optimized_rtree(temp_solid_geometry)
             if optimized_path == 'fail':
                 return 'fail'
+        elif opt_type == 'G':
+            optimized_path = self.geo_optimized_greedy(temp_solid_geometry, opt_time=opt_time)
+            if optimized_path == 'fail':
+                return 'fail'
         elif opt_type == 'N':
             optimized_path = [(k , v) for k, v in geo_storage.items()]
             if not optimized_path:
@@ -4015,29 +4289,29 @@ class CNCjob(Geometry):
         start_gcode = ''
         if is_first:
             start_gcode = self.doformat(p.start_code)
-            # t_gcode += start_gcode
+            # t_gcode.append(start_gcode)
 
         # ToolChange code
-        t_gcode += self.doformat(p.feedrate_code)  # sets the feed rate
+        t_gcode.append(self.doformat(p.feedrate_code))  # sets the feed rate
         if toolchange:
-            t_gcode += self.doformat(p.toolchange_code)
+            t_gcode.append(self.doformat(p.toolchange_code))
         else:
             if self.startz is None or 'laser' in self.pp_geometry_name.lower():
-                t_gcode += self.doformat(p.lift_code, x=0, y=0)
-            t_gcode += self.doformat(p.startz_code, x=0, y=0)
+                t_gcode.append(self.doformat(p.lift_code, x=0, y=0))
+            t_gcode.append(self.doformat(p.startz_code, x=0, y=0))
 
         # Spindle start
         if 'laser' not in self.pp_geometry_name.lower():
-            t_gcode += self.doformat(p.spindle_code)
+            t_gcode.append(self.doformat(p.spindle_code))
         else:
             # for laser this will disable the laser
-            t_gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
+            t_gcode.append(self.doformat(p.lift_code, x=self.oldx, y=self.oldy))  # Move (up) to travel height
         # Dwell time
         if self.dwell:
-            t_gcode += self.doformat(p.dwell_code)
+            t_gcode.append(self.doformat(p.dwell_code))
 
         # Feed rate set
-        t_gcode += self.doformat(p.feedrate_code)
+        t_gcode.append(self.doformat(p.feedrate_code))
 
         # Iterate over geometry paths getting the nearest each time.
         path_count = 0
@@ -4065,9 +4339,9 @@ class CNCjob(Geometry):
                 # calculate the cut distance
                 total_cut = total_cut + geo.length
 
-                t_gcode += self.create_gcode_single_pass(geo, current_tooldia, self.extracut,
-                                                         self.extracut_length, self.tolerance,
-                                                         z_move=self.z_move, old_point=current_pt)
+                t_gcode.append(self.create_gcode_single_pass(geo, current_tooldia, self.extracut,
+                                                             self.extracut_length, self.tolerance,
+                                                             z_move=self.z_move, old_point=current_pt))
 
             # --------- Multi-pass ---------
             else:
@@ -4084,7 +4358,7 @@ class CNCjob(Geometry):
                 gc, geo = self.create_gcode_multi_pass(geo, current_tooldia, self.extracut,
                                                        self.extracut_length, self.tolerance,
                                                        z_move=self.z_move, postproc=p, old_point=current_pt)
-                t_gcode += gc
+                t_gcode.append(gc)
 
             # calculate the total distance
             total_travel = total_travel + abs(distance(pt1=current_pt, pt2=pt))
@@ -4105,11 +4379,11 @@ class CNCjob(Geometry):
         # Finish
         if is_last:
             if 'laser' not in self.pp_geometry_name.lower():
-                t_gcode += self.doformat(p.spindle_stop_code)
-                t_gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
+                t_gcode.append(self.doformat(p.spindle_stop_code))
+                t_gcode.append(self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1]))
             else:
-                t_gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
-                t_gcode += self.doformat(p.spindle_stop_code)
+                t_gcode.append(self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1]))
+                t_gcode.append(self.doformat(p.spindle_stop_code))
 
             if isinstance(self.xy_end, (tuple, list)):
                 endx = self.xy_end[0]
@@ -4122,12 +4396,12 @@ class CNCjob(Geometry):
                     endx = 0.0
                     endy = 0.0
 
-            t_gcode += self.doformat(p.end_code, x=endx, y=endy)
+            t_gcode.append(self.doformat(p.end_code, x=endx, y=endy))
             self.app.inform.emit(
                 '%s... %s %s.' % (_("Finished G-Code generation"), str(path_count), _("paths traced"))
             )
 
-        self.gcode = t_gcode
+        self.gcode = ''.join(t_gcode)
         return self.gcode, start_gcode
 
     def tcl_gcode_from_excellon_by_tool(self, exobj, tools="all", order='fwd', is_first=False):
@@ -4298,12 +4572,10 @@ class CNCjob(Geometry):
         # check if there are drill points in the exclusion areas.
         # If we find any within the exclusion areas return 'fail'
         for tool in points:
-            for pt in points[tool]:
-                for area in self.app.exc_areas.exclusion_areas_storage:
-                    pt_buf = pt.buffer(self.exc_tools[tool]['tooldia'] / 2.0)
-                    if pt_buf.within(area['shape']) or pt_buf.intersects(area['shape']):
-                        self.app.inform.emit("[ERROR_NOTCL] %s" % _("Failed. Drill points inside the exclusion zones."))
-                        return 'fail'
+            tool_radius = float(self.exc_tools[tool]['tooldia']) / 2.0
+            if len(self.app.exc_areas.points_in_areas(points[tool], distance=tool_radius)):
+                self.app.inform.emit("[ERROR_NOTCL] %s" % _("Failed. Drill points inside the exclusion zones."))
+                return 'fail'
 
         # this holds the resulting GCode
         self.gcode = ''
@@ -4362,7 +4634,7 @@ class CNCjob(Geometry):
         else:
             used_excellon_optimization_type = 'R'
 
-        if not HAS_ORTOOLS:
+        if not HAS_ORTOOLS and used_excellon_optimization_type in ['M', 'B']:
             used_excellon_optimization_type = 'R'
 
         # #############################################################################################################
@@ -4378,6 +4650,8 @@ class CNCjob(Geometry):
             self.app.log.debug("Using Travelling Salesman drill path optimization.")
         elif used_excellon_optimization_type == 'R':
             self.app.log.debug("Using RTree drill path optimization.")
+        elif used_excellon_optimization_type == 'G':
+            self.app.log.debug("Using Greedy drill path optimization.")
         else:
             self.app.log.debug("Using no path optimization.")
 
@@ -4428,6 +4702,11 @@ class CNCjob(Geometry):
                     optimized_path = self.exc_optimized_rtree(points[tool])
                     if optimized_path == 'fail':
                         return 'fail'
+                elif used_excellon_optimization_type == 'G':
+                    opt_time = self.app.options["excellon_search_time"]
+                    optimized_path = self.exc_optimized_greedy(points[tool], opt_time=opt_time)
+                    if optimized_path == 'fail':
+                        return 'fail'
                 else:
                     # it's actually not optimized path but here we build a list of (x,y) coordinates
                     # out of the tool's drills
@@ -4502,7 +4781,7 @@ class CNCjob(Geometry):
                         if used_excellon_optimization_type == 'T':
                             locx = point[0]
                             locy = point[1]
-                        elif used_excellon_optimization_type == 'R':
+                        elif used_excellon_optimization_type in ['R', 'G']:
                             locx = point[0][0]
                             locy = point[0][1]
                         else:
@@ -4667,6 +4946,9 @@ class CNCjob(Geometry):
                 optimized_path = self.optimized_travelling_salesman(altPoints)
             elif used_excellon_optimization_type == 'R':
                 optimized_path = self.exc_optimized_rtree(all_points)
+            elif used_excellon_optimization_type == 'G':
+                opt_time = self.app.options["excellon_search_time"]
+                optimized_path = self.exc_optimized_greedy(all_points, opt_time=opt_time)
             else:
                 # it's actually not optimized path but here we build a list of (x,y) coordinates
                 # out of the tool's drills
@@ -4735,7 +5017,7 @@ class CNCjob(Geometry):
                     if used_excellon_optimization_type == 'T':
                         locx = point[0]
                         locy = point[1]
-                    elif used_excellon_optimization_type == 'R':
+                    elif used_excellon_optimization_type in ['R', 'G']:
                         locx = point[0][0]
                         locy = point[0][1]
                     else:
@@ -4867,6 +5149,8 @@ class CNCjob(Geometry):
                 "The total travel distance with Travelling Salesman Algorithm is: %s" % str(measured_distance))
         elif used_excellon_optimization_type == 'R':
             self.app.log.debug("The total travel distance with Rtree Algorithm is: %s" % str(measured_distance))
+        elif used_excellon_optimization_type == 'G':
+            self.app.log.debug("The total travel distance with Greedy Algorithm is: %s" % str(measured_distance))
         else:
             self.app.log.debug("The total travel distance with with no optimization is: %s" % str(measured_distance))
 
@@ -5505,7 +5789,7 @@ class CNCjob(Geometry):
         # ############ Create the data. ###########################################################################
         # #########################################################################################################
         opt_type = self.app.options["tools_mill_optimization_type"]
-        if not HAS_ORTOOLS:
+        if not HAS_ORTOOLS and opt_type in ['M', 'B']:
             opt_type = 'R'
 
         opt_time = int(self.app.options['tools_mill_search_time'])
@@ -5518,6 +5802,8 @@ class CNCjob(Geometry):
             self.app.log.debug("Using Travelling Salesman path optimization.")
         elif opt_type == 'R':
             self.app.log.debug("Using RTree path optimization.")
+        elif opt_type == 'G':
+            self.app.log.debug("Using Greedy path optimization.")
         else:
             self.app.log.debug("Using no path optimization.")
 
@@ -5555,6 +5841,10 @@ class CNCjob(Geometry):
             optimized_path = self.geo_optimized_rtree(temp_solid_geometry)
             if optimized_path == 'fail':
                 return 'fail'
+        elif opt_type == 'G':
+            optimized_path = self.geo_optimized_greedy(temp_solid_geometry, opt_time=opt_time)
+            if optimized_path == 'fail':
+                return 'fail'
         elif opt_type == 'N':
             optimized_path = [(k, v) for k, v in geo_storage.items()]
             if not optimized_path:
@@ -5973,7 +6263,7 @@ class CNCjob(Geometry):
         """
         p = postproc
 
-        gcode_multi_pass = ''
+        gcode_multi_pass = []
 
         if isinstance(self.z_cut, Decimal):
             z_cut = self.z_cut
@@ -6000,16 +6290,16 @@ class CNCjob(Geometry):
             # is inconsequential.
             if isinstance(geometry, LineString) or isinstance(geometry, LinearRing):
                 if extracut is False or not geometry.is_ring:
-                    gcode_multi_pass += self.linear2gcode(geometry, cdia, tolerance=tolerance, z_cut=depth, up=False,
-                                                          z_move=z_move, old_point=old_point)
+                    gcode_multi_pass.append(self.linear2gcode(geometry, cdia, tolerance=tolerance, z_cut=depth,
+                                                              up=False, z_move=z_move, old_point=old_point))
                 else:
-                    gcode_multi_pass += self.linear2gcode_extra(geometry, cdia, extracut_length, tolerance=tolerance,
-                                                                z_move=z_move, z_cut=depth, up=False,
-                                                                old_point=old_point)
+                    gcode_multi_pass.append(self.linear2gcode_extra(geometry, cdia, extracut_length,
+                                                                    tolerance=tolerance, z_move=z_move, z_cut=depth,
+                                                                    up=False, old_point=old_point))
 
             # Ignore multi-pass for points.
             elif isinstance(geometry, Point):
-                gcode_multi_pass += self.point2gcode(geometry, cdia, z_move=z_move, old_point=old_point)
+                gcode_multi_pass.append(self.point2gcode(geometry, cdia, z_move=z_move, old_point=old_point))
                 break  # Ignoring ...
             else:
                 self.app.log.warning("G-code generation not implemented for %s" % (str(type(geometry))))
@@ -6025,8 +6315,8 @@ class CNCjob(Geometry):
                 geometry = LineString(list(geometry.coords)[::-1])
 
         # Lift the tool
-        gcode_multi_pass += self.doformat(p.lift_code, x=old_point[0], y=old_point[1])
-        return gcode_multi_pass, geometry
+        gcode_multi_pass.append(self.doformat(p.lift_code, x=old_point[0], y=old_point[1]))
+        return ''.join(gcode_multi_pass), geometry
 
     def codes_split(self, gline):
         """
@@ -6111,12 +6401,266 @@ class CNCjob(Geometry):
                 match = re.search(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)', gline)
         return command
 
+    # structured record for one parsed G-Code line that has motion or modal information
+    gcode_move_dtype = np.dtype([
+        ('line', np.int64),         # line number in the G-Code program
+        ('g', np.int32),            # modal G motion code
+        ('x', np.float64),          # target X (modal)
+        ('y', np.float64),          # target Y (modal)
+        ('z', np.float64),          # Z after this line (modal)
+        ('i', np.float64),          # arc center X offset, NaN if not given
+        ('j', np.float64),          # arc center Y offset, NaN if not given
+        ('feed', np.float64),       # modal feedrate, NaN if not set yet
+        ('tool', np.int32),         # modal tool number, -1 if not set yet
+        ('move_xy', np.bool_),      # the line has X or Y words
+        ('move_z', np.bool_),       # the line has a Z word
+    ])
+
+    def gcode_tokenize(self, gcode, force_parsing=None):
+        """
+        Parses the G-Code program into a structured NumPy record array, one record for each line that has
+        motion or modal information. The modal values (position, Z, G code, feedrate and tool) are propagated
+        with array operations after the lines were tokenized.
+
+        The program is streamed line by line, it is not split in a list of lines.
+        If the units commands G20/G21 are found then self.units is updated.
+
+        :param gcode:           the G-Code program
+        :type gcode:            str
+        :param force_parsing:   if False or None then a program that has Gerber or HPGL signatures will fail
+        :type force_parsing:    bool
+        :return:                a record array of dtype self.gcode_move_dtype or 'fail'
+        :rtype:                 np.ndarray | str
+        """
+        special_dialect = \
+            'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name or \
+            'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name or \
+            'laser' in self.pp_excellon_name.lower() or 'laser' in self.pp_geometry_name.lower() or \
+            self.pp_solderpaste_name is not None
+
+        # the words are parsed only until the first character that does not belong to a word (e.g. a comment)
+        words_prefix_re = re.compile(r'(?:\s*[A-Z]\s*[+\-.\d\s]+)*')
+        word_re = re.compile(r'([A-Z])\s*([+\-.\d\s]+)')
+
+        used_codes = 'XYZGIJFT'
+        codes_rows = {c: [] for c in used_codes}
+        codes_vals = {c: [] for c in used_codes}
+        codes_append = {c: (codes_rows[c].append, codes_vals[c].append) for c in used_codes}
+        lines = []
+
+        check_signatures = force_parsing is False or force_parsing is None
+        line_nr = -1
+        for line_nr, line in enumerate(StringIO(gcode, newline=None)):
+            if check_signatures:
+                if '%' in line or 'MOIN' in line or 'MOMM' in line:
+                    return "fail"
+
+            if special_dialect:
+                gobj = self.codes_split(line.rstrip('\n'))
+            else:
+                gobj = {}
+                for code, val in word_re.findall(words_prefix_re.match(line).group(0)):
+                    try:
+                        gobj[code] = float(val.replace(" ", ""))
+                    except ValueError:
+                        pass
+
+            if not gobj:
+                continue
+
+            # ## Units
+            if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
+                self.units = {20.0: "IN", 21.0: "MM"}[gobj['G']]
+                continue
+
+            row = len(lines)
+            has_codes = False
+            for code, val in gobj.items():
+                appenders = codes_append.get(code)
+                if appenders is not None:
+                    appenders[0](row)
+                    appenders[1](val)
+                    has_codes = True
+            if has_codes:
+                lines.append(line_nr)
+
+        self.app.inform.emit('%s: %d' % (_("Parsing GCode file. Number of lines"), line_nr + 1))
+
+        nr_rows = len(lines)
+        moves = np.zeros(nr_rows, dtype=self.gcode_move_dtype)
+        moves['line'] = lines
+
+        def column(code):
+            col = np.full(nr_rows, np.nan)
+            col[codes_rows[code]] = codes_vals[code]
+            return col
+
+        def forward_fill(col, initial):
+            last_idx = np.where(np.isnan(col), -1, np.arange(nr_rows))
+            np.maximum.accumulate(last_idx, out=last_idx)
+            return np.where(last_idx >= 0, col[np.maximum(last_idx, 0)], initial)
+
+        x_col = column('X')
+        y_col = column('Y')
+        z_col = column('Z')
+
+        moves['move_xy'] = ~np.isnan(x_col) | ~np.isnan(y_col)
+        moves['move_z'] = ~np.isnan(z_col)
+        moves['x'] = forward_fill(x_col, 0.0)
+        moves['y'] = forward_fill(y_col, 0.0)
+        moves['z'] = forward_fill(z_col, 0.0)
+        moves['g'] = np.trunc(forward_fill(column('G'), 0.0)).astype(np.int32)
+        moves['i'] = column('I')
+        moves['j'] = column('J')
+        moves['feed'] = forward_fill(column('F'), np.nan)
+        moves['tool'] = np.trunc(forward_fill(column('T'), -1.0)).astype(np.int32)
+
+        return moves
+
+    def gcode_moves_geometry(self, moves, start_pt=(0, 0), drill_dia=None):
+        """
+        Creates the geometry of the parsed G-Code from the record array made by gcode_tokenize().
+        The tool path is broken in a new LineString each time the Z changes. The arcs are discretized all at once
+        and all the LineStrings are made with one call.
+
+        Will return a list of dict in the format:
+        {
+            "geom": LineString(path),
+            "kind": kind
+        }
+        where kind can be either ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
+
+        :param moves:       record array of dtype self.gcode_move_dtype
+        :type moves:        np.ndarray
+        :param start_pt:    the point coordinates from where to start the tool path
+        :type start_pt:     tuple | list
+        :param drill_dia:   if not None, a circle is added for each plunge (Z < 0) with this diameter. It can be a
+                            number or a dict keyed by the drill coordinates rounded to self.decimals
+        :type drill_dia:    float | dict | None
+        :return:            Geometry as a list of dictionaries
+        :rtype:             list
+        """
+        nr_rows = len(moves)
+        move_xy = moves['move_xy']
+        move_z = moves['move_z']
+        g_code = moves['g']
+
+        # position before each line
+        prev_x = np.concatenate(([0.0], moves['x']))[:-1]
+        prev_y = np.concatenate(([0.0], moves['y']))[:-1]
+        prev_z = np.concatenate(([0.0], moves['z']))[:-1]
+
+        if not ('Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name or
+                'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name or
+                'laser' in self.pp_excellon_name or 'laser' in self.pp_geometry_name or
+                self.pp_geometry_name == 'Line_xyz' or self.pp_excellon_name == 'Line_xyz'):
+            non_orthogonal = np.flatnonzero(move_xy & move_z & (moves['z'] != prev_z))
+            if len(non_orthogonal):
+                first = non_orthogonal[0]
+                self.app.log.warning("Non-orthogonal motion: %d moves. First on line %d: From X%s Y%s Z%s" % (
+                    len(non_orthogonal), moves['line'][first] + 1, prev_x[first], prev_y[first], prev_z[first]))
+
+        # ## Number of path points added by each line
+        is_line = move_xy & ((g_code == 0) | (g_code == 1))
+        is_arc = move_xy & ((g_code == 2) | (g_code == 3))
+        counts = is_line.astype(np.int64)
+
+        arc_rows = np.flatnonzero(is_arc)
+        arc_pts = np.empty((0, 2))
+        if len(arc_rows):
+            arc_i = np.nan_to_num(moves['i'][arc_rows])
+            arc_j = np.nan_to_num(moves['j'][arc_rows])
+            centers = np.column_stack((arc_i + prev_x[arc_rows], arc_j + prev_y[arc_rows]))
+            radii = np.sqrt(arc_i ** 2 + arc_j ** 2)
+            starts = np.arctan2(-arc_j, -arc_i)
+            stops = np.arctan2(-centers[:, 1] + moves['y'][arc_rows], -centers[:, 0] + moves['x'][arc_rows])
+            directions = np.where(g_code[arc_rows] == 2, 'cw', 'ccw')
+            arc_pts, arc_counts = arc_batch(centers, radii, starts, stops, directions, int(self.steps_per_circle),
+                                             tolerance=arc_tolerance(self.app, self.units))
+            counts[arc_rows] = arc_counts
+
+        # ## All the path points, starting with the start point
+        offsets = np.cumsum(counts) - counts + 1
+        points = np.empty((int(counts.sum()) + 1, 2))
+        points[0] = start_pt
+        line_rows = np.flatnonzero(is_line)
+        points[offsets[line_rows], 0] = moves['x'][line_rows]
+        points[offsets[line_rows], 1] = moves['y'][line_rows]
+        if len(arc_rows):
+            arc_counts = counts[arc_rows]
+            points[np.repeat(offsets[arc_rows], arc_counts) +
+                   np.arange(len(arc_pts)) - np.repeat(np.cumsum(arc_counts) - arc_counts, arc_counts)] = arc_pts
+
+        # kind of the motion made by each line: T=travel, C=cut, F=fast, S=slow
+        travel = moves['z'] > 0
+        slow = g_code > 0
+
+        # ## Break the tool path each time the Z changes
+        items = []
+        path_ranges = []
+        drills = []
+        path_start = 0
+        last_kind_row = -1
+        xy_rows = np.flatnonzero(move_xy)
+        for row in np.flatnonzero(move_z).tolist() + [nr_rows]:
+            # the Z is changed before the XY motion of the same line
+            path_end = int(offsets[row]) - 1 if row < nr_rows else len(points) - 1
+            if path_end > path_start:
+                pos = np.searchsorted(xy_rows, row) - 1
+                if pos >= 0 and xy_rows[pos] >= last_kind_row:
+                    kind_row = xy_rows[pos]
+                    kind = ['T' if travel[kind_row] else 'C', 'S' if slow[kind_row] else 'F']
+                else:
+                    kind = ['C', 'F']
+                items.append(('path', len(path_ranges), kind))
+                path_ranges.append((path_start, path_end))
+                path_start = path_end
+
+            if row < nr_rows and drill_dia is not None and moves['z'][row] < 0:
+                drill_pt = (
+                    float('%.*f' % (self.decimals, prev_x[row])),
+                    float('%.*f' % (self.decimals, prev_y[row]))
+                )
+                if isinstance(drill_dia, dict):
+                    dia = drill_dia.get(drill_pt)
+                else:
+                    dia = drill_dia
+                if dia is not None:
+                    items.append(('drill', len(drills), ['C', 'F']))
+                    drills.append((drill_pt, dia))
+                    last_kind_row = row
+
+        if path_ranges:
+            ranges = np.array(path_ranges, dtype=np.int64)
+            lengths = ranges[:, 1] - ranges[:, 0] + 1
+            pt_idx = np.repeat(ranges[:, 0], lengths) + np.arange(lengths.sum()) - \
+                np.repeat(np.cumsum(lengths) - lengths, lengths)
+            paths_geo = shapely.linestrings(points[pt_idx], indices=np.repeat(np.arange(len(lengths)), lengths))
+        else:
+            paths_geo = []
+
+        if drills:
+            drills_geo = shapely.get_exterior_ring(
+                shapely.buffer(shapely.points([d[0] for d in drills]), np.array([d[1] for d in drills]) / 2.0,
+                               quad_segs=16))
+        else:
+            drills_geo = []
+
+        geometry = []
+        for item_type, item_idx, kind in items:
+            geo = paths_geo[item_idx] if item_type == 'path' else drills_geo[item_idx]
+            geometry.append({"geom": geo, "kind": kind})
+        return geometry
+
     def gcode_parse(self, force_parsing=None, tool_data=None):
         """
         G-Code parser (from self.gcode). Generates dictionary with
         single-segment LineString's and "kind" indicating cut or travel,
         fast or feedrate speed.
 
+        The program is first parsed into a record array of moves (stored in self.gcode_moves)
+        and the geometry is made out of it.
+
         Will return a list of dict in the format:
         {
             "geom": LineString(path),
@@ -6132,14 +6676,6 @@ class CNCjob(Geometry):
         :rtype:                 list
         """
 
-        kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-        # Results go here
-        geometry = []
-
-        # Last known instruction
-        current = {'X': 0.0, 'Y': 0.0, 'Z': 0.0, 'G': 0}
-
         if tool_data is None:
             toolchange_xy_mill = self.app.options["tools_mill_toolchangexy"]
             toolchange_xy_drill = self.app.options["tools_drill_toolchangexy"]
@@ -6179,133 +6715,28 @@ class CNCjob(Geometry):
                     if len(pos_xy) != 2:
                         pos_xy = (0, 0)
 
-        path = [pos_xy]
-        # path = [(0, 0)]
-
-        gcode_lines_list = self.gcode.splitlines()
-        self.app.inform.emit('%s: %d' % (_("Parsing GCode file. Number of lines"), len(gcode_lines_list)))
-
-        # Process every instruction
-        for line in gcode_lines_list:
-            if force_parsing is False or force_parsing is None:
-                if '%MO' in line or '%' in line or 'MOIN' in line or 'MOMM' in line:
-                    return "fail"
-
-            gobj = self.codes_split(line)
-
-            # ## Units
-            if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
-                self.units = {20.0: "IN", 21.0: "MM"}[gobj['G']]
-                continue
-
-            # TODO take into consideration the tools and update the travel line thickness
-            if 'T' in gobj:
-                pass
-
-            # ## Changing height
-            if 'Z' in gobj:
-                if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-                    pass
-                elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-                    pass
-                elif 'laser' in self.pp_excellon_name or 'laser' in self.pp_geometry_name:
-                    pass
-                elif ('X' in gobj or 'Y' in gobj) and gobj['Z'] != current['Z']:
-                    if self.pp_geometry_name == 'Line_xyz' or self.pp_excellon_name == 'Line_xyz':
-                        pass
-                    else:
-                        self.app.log.warning("Non-orthogonal motion: From %s" % str(current))
-                        self.app.log.warning("  To: %s" % str(gobj))
-
-                current['Z'] = gobj['Z']
-                # Store the path into geometry and reset path
-                if len(path) > 1:
-                    geometry.append({"geom": LineString(path),
-                                     "kind": kind})
-                    path = [path[-1]]  # Start with the last point of last path.
-
-                # create the geometry for the holes created when drilling Excellon drills
-                if self.obj_options['type'].lower() == 'excellon':
-                    if current['Z'] < 0:
-                        current_drill_point_coords = (
-                            float('%.*f' % (self.decimals, current['X'])),
-                            float('%.*f' % (self.decimals, current['Y']))
+        moves = self.gcode_tokenize(self.gcode, force_parsing=force_parsing)
+        if isinstance(moves, str) and moves == 'fail':
+            return "fail"
+        self.gcode_moves = moves
+
+        # create the geometry for the holes created when drilling Excellon drills
+        # the drill diameter is found knowing the drill coordinates
+        drill_dia = None
+        if self.obj_options['type'].lower() == 'excellon':
+            drill_dia = {}
+            for tool, tool_dict in self.exc_tools.items():
+                if 'drills' in tool_dict:
+                    for drill_pt in tool_dict['drills']:
+                        point_in_dict_coords = (
+                            float('%.*f' % (self.decimals, drill_pt.x)),
+                            float('%.*f' % (self.decimals, drill_pt.y))
                         )
-
-                        # find the drill diameter knowing the drill coordinates
-                        break_loop = False
-                        for tool, tool_dict in self.exc_tools.items():
-                            if 'drills' in tool_dict:
-                                for drill_pt in tool_dict['drills']:
-                                    point_in_dict_coords = (
-                                        float('%.*f' % (self.decimals, drill_pt.x)),
-                                        float('%.*f' % (self.decimals, drill_pt.y))
-                                    )
-                                    if point_in_dict_coords == current_drill_point_coords:
-                                        dia = self.exc_tools[tool]['tooldia']
-                                        kind = ['C', 'F']
-                                        geometry.append(
-                                            {
-                                                "geom": Point(current_drill_point_coords).buffer(dia / 2.0).exterior,
-                                                "kind": kind
-                                            }
-                                        )
-                                        break_loop = True
-                                        break
-                                if break_loop:
-                                    break
-
-            if 'G' in gobj:
-                current['G'] = int(gobj['G'])
-
-            if 'X' in gobj or 'Y' in gobj:
-                if 'X' in gobj:
-                    x = gobj['X']
-                    # current['X'] = x
-                else:
-                    x = current['X']
-
-                if 'Y' in gobj:
-                    y = gobj['Y']
-                else:
-                    y = current['Y']
-
-                kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-                if current['Z'] > 0:
-                    kind[0] = 'T'
-                if current['G'] > 0:
-                    kind[1] = 'S'
-
-                if current['G'] in [0, 1]:  # line
-                    path.append((x, y))
-
-                arcdir = [None, None, "cw", "ccw"]
-                if current['G'] in [2, 3]:  # arc
-                    center = [gobj['I'] + current['X'], gobj['J'] + current['Y']]
-                    radius = np.sqrt(gobj['I'] ** 2 + gobj['J'] ** 2)
-                    start = np.arctan2(-gobj['J'], -gobj['I'])
-                    stop = np.arctan2(-center[1] + y, -center[0] + x)
-                    path += arc(center, radius, start, stop, arcdir[current['G']], int(self.steps_per_circle))
-
-                current['X'] = x
-                current['Y'] = y
-
-            # Update current instruction
-            for code in gobj:
-                current[code] = gobj[code]
+                        if point_in_dict_coords not in drill_dia:
+                            drill_dia[point_in_dict_coords] = self.exc_tools[tool]['tooldia']
 
         self.app.inform.emit('%s...' % _("Creating Geometry from the parsed GCode file. "))
-        # There might not be a change in height at the
-        # end, therefore, see here too if there is
-        # a final path.
-        if len(path) > 1:
-            geometry.append(
-                {
-                    "geom": LineString(path),
-                    "kind": kind
-                }
-            )
+        geometry = self.gcode_moves_geometry(moves, start_pt=pos_xy, drill_dia=drill_dia)
 
         self.gcode_parsed = geometry
         return geometry
@@ -6335,123 +6766,14 @@ class CNCjob(Geometry):
         :rtype:                 list
         """
 
-        kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-        # Results go here
-        geometry = []
-
-        # Last known instruction
-        current = {'X': 0.0, 'Y': 0.0, 'Z': 0.0, 'G': 0}
-
-        # Current path: temporary storage until tool is
-        # lifted or lowered.
-        pos_xy = start_pt
-
-        path = [pos_xy]
-        # path = [(0, 0)]
-
-        gcode_lines_list = gcode.splitlines()
-        self.app.inform.emit(
-            '%s: %s. %s: %d' % (_("Parsing GCode file for tool diameter"),
-                                str(dia), _("Number of lines"),
-                                len(gcode_lines_list))
-        )
-
-        # Process every instruction
-        for line in gcode_lines_list:
-            if force_parsing is False or force_parsing is None:
-                if '%MO' in line or '%' in line or 'MOIN' in line or 'MOMM' in line:
-                    return "fail"
-
-            gobj = self.codes_split(line)
-
-            # ## Units
-            if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
-                self.units = {20.0: "IN", 21.0: "MM"}[gobj['G']]
-                continue
-
-            # TODO take into consideration the tools and update the travel line thickness
-            if 'T' in gobj:
-                pass
-
-            # ## Changing height
-            if 'Z' in gobj:
-                if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-                    pass
-                elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-                    pass
-                elif 'laser' in self.pp_excellon_name or 'laser' in self.pp_geometry_name:
-                    pass
-                elif ('X' in gobj or 'Y' in gobj) and gobj['Z'] != current['Z']:
-                    if self.pp_geometry_name == 'Line_xyz' or self.pp_excellon_name == 'Line_xyz':
-                        pass
-                    else:
-                        self.app.log.warning("Non-orthogonal motion: From %s" % str(current))
-                        self.app.log.warning("  To: %s" % str(gobj))
-
-                current['Z'] = gobj['Z']
-                # Store the path into geometry and reset path
-                if len(path) > 1:
-                    geometry.append({"geom": LineString(path),
-                                     "kind": kind})
-                    path = [path[-1]]  # Start with the last point of last path.
-
-                # create the geometry for the holes created when drilling Excellon drills
-                if current['Z'] < 0:
-                    current_drill_point_coords = (
-                        float('%.*f' % (self.decimals, current['X'])),
-                        float('%.*f' % (self.decimals, current['Y']))
-                    )
-
-                    kind = ['C', 'F']
-                    geometry.append(
-                        {
-                            "geom": Point(current_drill_point_coords).buffer(dia/2.0).exterior,
-                            "kind": kind
-                        }
-                    )
-
-            if 'G' in gobj:
-                current['G'] = int(gobj['G'])
-
-            if 'X' in gobj or 'Y' in gobj:
-                x = gobj['X'] if 'X' in gobj else current['X']
-                y = gobj['Y'] if 'Y' in gobj else current['Y']
-
-                kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-                if current['Z'] > 0:
-                    kind[0] = 'T'
-                if current['G'] > 0:
-                    kind[1] = 'S'
-                if current['G'] in [0, 1]:  # line
-                    path.append((x, y))
+        self.app.inform.emit('%s: %s' % (_("Parsing GCode file for tool diameter"), str(dia)))
 
-                arcdir = [None, None, "cw", "ccw"]
-                if current['G'] in [2, 3]:  # arc
-                    center = [gobj['I'] + current['X'], gobj['J'] + current['Y']]
-                    radius = np.sqrt(gobj['I'] ** 2 + gobj['J'] ** 2)
-                    start = np.arctan2(-gobj['J'], -gobj['I'])
-                    stop = np.arctan2(-center[1] + y, -center[0] + x)
-                    path += arc(center, radius, start, stop, arcdir[current['G']], int(self.steps_per_circle))
-
-                current['X'] = x
-                current['Y'] = y
-
-            # Update current instruction
-            for code in gobj:
-                current[code] = gobj[code]
+        moves = self.gcode_tokenize(gcode, force_parsing=force_parsing)
+        if isinstance(moves, str) and moves == 'fail':
+            return "fail"
 
         self.app.inform.emit('%s: %s' % (_("Creating Geometry from the parsed GCode file for tool diameter"), str(dia)))
-        # There might not be a change in height at the end, therefore, see here too if there is a final path.
-        if len(path) > 1:
-            geometry.append(
-                {
-                    "geom": LineString(path),
-                    "kind": kind
-                }
-            )
-        return geometry
+        return self.gcode_moves_geometry(moves, start_pt=start_pt, drill_dia=dia)
 
     # def plot(self, tooldia=None, dpi=75, margin=0.1,
     #          color={"T": ["#F0E24D", "#B5AB3A"], "C": ["#5E6CFF", "#4650BD"]},
@@ -6546,40 +6868,21 @@ class CNCjob(Geometry):
                     if geo['kind'][0] == 'C':
                         obj.add_shape(shape=geo['geom'], color=color['C'][1], visible=visible)
         else:
-            path_num = 0
-
             self.coordinates_type = self.app.options["cncjob_coords_type"]
             if self.coordinates_type == "G90":
                 # For Absolute coordinates type G90
+                gcode_parsed = [geo for geo in gcode_parsed if geo]
+                self.add_travel_annotations(gcode_parsed, tooldia, obj)
+
+                if self.app.use_3d_engine and self.app.options["cncjob_fast_plot"]:
+                    self.plot_paths(gcode_parsed, tooldia, color, obj, visible=visible, kind=kind)
+                    return
+
                 for geo in gcode_parsed:
-                    if not geo:
+                    # the geometry that is not plotted is not buffered
+                    if (kind == 'travel' and geo['kind'][0] != 'T') or (kind == 'cut' and geo['kind'][0] != 'C'):
                         continue
 
-                    if geo['kind'][0] == 'T':
-                        start_position = geo['geom'].coords[0]
-
-                        if tooldia not in obj.annotations_dict:
-                            obj.annotations_dict[tooldia] = {
-                                'pos': [],
-                                'text': []
-                            }
-                        if start_position not in obj.annotations_dict[tooldia]['pos']:
-                            path_num += 1
-                            obj.annotations_dict[tooldia]['pos'].append(start_position)
-                            obj.annotations_dict[tooldia]['text'].append(str(path_num))
-
-                        end_position = geo['geom'].coords[-1]
-
-                        if tooldia not in obj.annotations_dict:
-                            obj.annotations_dict[tooldia] = {
-                                'pos': [],
-                                'text': []
-                            }
-                        if end_position not in obj.annotations_dict[tooldia]['pos']:
-                            path_num += 1
-                            obj.annotations_dict[tooldia]['pos'].append(end_position)
-                            obj.annotations_dict[tooldia]['text'].append(str(path_num))
-
                     # plot the geometry of Excellon objects
                     if self.obj_options['type'].lower() == 'excellon':
                         try:
@@ -6614,6 +6917,82 @@ class CNCjob(Geometry):
                 self.app.inform.emit('[ERROR_NOTCL] %s...' % _('G91 coordinates not implemented'))
                 return 'fail'
 
+    @staticmethod
+    def add_travel_annotations(gcode_parsed, tooldia, obj):
+        """
+        Adds to the object annotations the start and the end positions of the travel lines, numbered in order. The
+        positions that are already annotated for the tool diameter are not added again.
+
+        :param gcode_parsed:    Parsed Gcode; list of dicts with the 'geom' and 'kind' keys
+        :type gcode_parsed:     list
+        :param tooldia:         Tool diameter; the annotations are stored for each diameter
+        :type tooldia:          float
+        :param obj:             FlatCAM CNCJob object that holds the annotations
+        :return:                None
+        """
+        travel_geo = [geo['geom'] for geo in gcode_parsed if geo['kind'][0] == 'T']
+        if not travel_geo:
+            return
+
+        if tooldia not in obj.annotations_dict:
+            obj.annotations_dict[tooldia] = {
+                'pos': [],
+                'text': []
+            }
+        annotations = obj.annotations_dict[tooldia]
+
+        # a set is used for the membership test and a dict keeps the order of the new positions
+        known_pos = set(annotations['pos'])
+        new_pos = {}
+        for geo in travel_geo:
+            for position in (geo.coords[0], geo.coords[-1]):
+                if position not in known_pos:
+                    new_pos[position] = None
+
+        annotations['pos'] += list(new_pos)
+        annotations['text'] += [str(path_num) for path_num in range(1, len(new_pos) + 1)]
+
+    def plot_paths(self, gcode_parsed, tooldia, color, obj, visible=False, kind='all'):
+        """
+        Plots the G-code job as wide lines, made directly from the coordinates of all the segments at once, one shape
+        for the cut moves and one for the travel moves. The drill holes of the Excellon jobs are plotted filled. The
+        segments are not buffered, simplified or triangulated. Works only with the 3D graphic engine.
+
+        :param gcode_parsed:    Parsed Gcode; list of dicts with the 'geom' and 'kind' keys
+        :type gcode_parsed:     list
+        :param tooldia:         Tool diameter; the width of the lines
+        :type tooldia:          float
+        :param color:           Color specification: dict with the "T" and "C" keys and [fill, line] colors values
+        :type color:            dict
+        :param obj:             The object for which to plot
+        :param visible:         Visibility status
+        :type visible:          bool
+        :param kind:            Can be: "travel", "cut", "all"
+        :type kind:             str
+        :return:                None
+        """
+        is_excellon = self.obj_options['type'].lower() == 'excellon'
+
+        for geo_kind, layer in (('C', 1), ('T', 2)):
+            if (kind == 'travel' and geo_kind == 'C') or (kind == 'cut' and geo_kind == 'T'):
+                continue
+
+            geo_list = [geo['geom'] for geo in gcode_parsed if geo['kind'][0] == geo_kind]
+            if not geo_list:
+                continue
+
+            if is_excellon and geo_kind == 'C':
+                # the drill holes are closed rings plotted filled; the cut lines that can't make a polygon are skipped
+                # as in plot2()
+                geo_arr = np.empty(len(geo_list), dtype=object)
+                geo_arr[:] = geo_list
+                rings = geo_arr[shapely.get_num_coordinates(geo_arr) >= 3]
+                obj.add_paths(rings=rings, color=color[geo_kind][1], face_color=color[geo_kind][0],
+                              visible=visible, layer=layer)
+            else:
+                obj.add_paths(lines=geo_list, width=tooldia, color=color[geo_kind][1],
+                              face_color=color[geo_kind][0], visible=visible, layer=layer)
+
     def plot_annotations(self, obj, visible=True):
         """
         Plot annotations.
@@ -6808,7 +7187,7 @@ class CNCjob(Geometry):
         else:
             target_linear = linear
 
-        gcode = ""
+        gcode = []
 
         # path = list(target_linear.coords)
         path = self.segment(target_linear.coords)
@@ -6838,68 +7217,60 @@ class CNCjob(Geometry):
 
                 if travel[0] is not None:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # raise to safe Z (travel[0]) each time because safe Z may be different
                     self.z_move = travel[0]
-                    gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                     # restore z_move
                     self.z_move = z_move
                 else:
                     if prev_z is not None:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                         # we assume that previously the z_move was altered therefore raise to
                         # the travel_z (z_move)
                         self.z_move = z_move
-                        gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                     else:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                 # store prev_z
                 prev_z = travel[0]
 
-            # gcode += self.doformat(p.rapid_code, x=first_x, y=first_y)  # Move to first point
+            # gcode.append(self.doformat(p.rapid_code, x=first_x, y=first_y))  # Move to first point
 
         # Move down to cutting depth
         if down:
             # Different feedrate for vertical cut?
-            gcode += self.doformat(p.z_feedrate_code)
-            # gcode += self.doformat(p.feedrate_code)
-            gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut)
-            gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+            gcode.append(self.doformat(p.z_feedrate_code))
+            # gcode.append(self.doformat(p.feedrate_code))
+            gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut))
+            gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
 
         # Cutting...
+        if self.app.abort_flag:
+            # graceful abort requested by the user
+            raise grace
+
         prev_x = first_x
         prev_y = first_y
-        for pt in path[1:]:
-            if self.app.abort_flag:
-                # graceful abort requested by the user
-                raise grace
-
-            if self.coordinates_type == "G90":
-                # For Absolute coordinates type G90
-                next_x = pt[0]
-                next_y = pt[1]
-            else:
+        if len(path) > 1:
+            if self.coordinates_type != "G90":
                 # For Incremental coordinates type G91
-                # next_x = pt[0] - prev_x
-                # next_y = pt[1] - prev_y
                 self.app.inform.emit('[ERROR_NOTCL] %s...' % _('G91 coordinates not implemented'))
-                next_x = pt[0]
-                next_y = pt[1]
 
-            gcode += self.doformat(p.linear_code, x=next_x, y=next_y, z_cut=z_cut)  # Linear motion to point
-            prev_x = pt[0]
-            prev_y = pt[1]
+            gcode.extend(self.doformat_linear(p, path[1:], z_cut=z_cut))  # Linear motion to each point
+            prev_x = path[-1][0]
+            prev_y = path[-1][1]
 
         # Up to travelling height.
         if up:
-            gcode += self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move)  # Stop cutting
-        return gcode
+            gcode.append(self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move))  # Stop cutting
+        return ''.join(gcode)
 
     def linear2gcode_extra(self, linear, dia, extracut_length, tolerance=0, down=True, up=True,
                            z_cut=None, z_move=None, zdownrate=None,
@@ -6954,7 +7325,7 @@ class CNCjob(Geometry):
         else:
             target_linear = linear
 
-        gcode = ""
+        gcode = []
 
         # path = list(target_linear.coords)
         path = self.segment(target_linear.coords)
@@ -6983,67 +7354,58 @@ class CNCjob(Geometry):
 
                 if travel[0] is not None:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # raise to safe Z (travel[0]) each time because safe Z may be different
                     self.z_move = travel[0]
-                    gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                     # restore z_move
                     self.z_move = z_move
                 else:
                     if prev_z is not None:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                         # we assume that previously the z_move was altered therefore raise to
                         # the travel_z (z_move)
                         self.z_move = z_move
-                        gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                     else:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                 # store prev_z
                 prev_z = travel[0]
 
-            # gcode += self.doformat(p.rapid_code, x=first_x, y=first_y)  # Move to first point
+            # gcode.append(self.doformat(p.rapid_code, x=first_x, y=first_y))  # Move to first point
 
         # Move down to cutting depth
         if down:
             # Different feedrate for vertical cut?
             if self.z_feedrate is not None:
-                gcode += self.doformat(p.z_feedrate_code)
-                # gcode += self.doformat(p.feedrate_code)
-                gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut)
-                gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+                gcode.append(self.doformat(p.z_feedrate_code))
+                # gcode.append(self.doformat(p.feedrate_code))
+                gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut))
+                gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
             else:
-                gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut)  # Start cutting
+                gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut))  # Start cutting
 
         # Cutting...
+        if self.app.abort_flag:
+            # graceful abort requested by the user
+            raise grace
+
         prev_x = first_x
         prev_y = first_y
-        for pt in path[1:]:
-            if self.app.abort_flag:
-                # graceful abort requested by the user
-                raise grace
-
-            if self.coordinates_type == "G90":
-                # For Absolute coordinates type G90
-                next_x = pt[0]
-                next_y = pt[1]
-            else:
-                # For Incremental coordinates type G91
+        if len(path) > 1:
+            if self.coordinates_type != "G90":
                 # For Incremental coordinates type G91
-                # next_x = pt[0] - prev_x
-                # next_y = pt[1] - prev_y
                 self.app.inform.emit('[ERROR_NOTCL] %s...' % _('G91 coordinates not implemented'))
-                next_x = pt[0]
-                next_y = pt[1]
 
-            gcode += self.doformat(p.linear_code, x=next_x, y=next_y, z_cut=z_cut)  # Linear motion to point
-            prev_x = next_x
-            prev_y = next_y
+            gcode.extend(self.doformat_linear(p, path[1:], z_cut=z_cut))  # Linear motion to each point
+            prev_x = path[-1][0]
+            prev_y = path[-1][1]
 
         # this line is added to create an extra cut over the first point in patch
         # to make sure that we remove the copper leftovers
@@ -7056,7 +7418,7 @@ class CNCjob(Geometry):
         #     # For Incremental coordinates type G91
         #     last_x = path[1][0] - first_x
         #     last_y = path[1][1] - first_y
-        # gcode += self.doformat(p.linear_code, x=last_x, y=last_y)
+        # gcode.append(self.doformat(p.linear_code, x=last_x, y=last_y))
 
         # the first point for extracut is always mandatory if the extracut is enabled. But if the length of distance
         # between point 0 and point 1 is more than the distance we set for the extra cut then make an interpolation
@@ -7068,28 +7430,26 @@ class CNCjob(Geometry):
             new_y = extra_path[0][1]
 
             # this is an extra line therefore lift the milling bit
-            gcode += self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move)  # lift
+            gcode.append(self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move))  # lift
 
             # move fast to the new first point
-            gcode += self.doformat(p.rapid_code, x=new_x, y=new_y)
+            gcode.append(self.doformat(p.rapid_code, x=new_x, y=new_y))
 
             # lower the milling bit
             # Different feedrate for vertical cut?
             if self.z_feedrate is not None:
-                gcode += self.doformat(p.z_feedrate_code)
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)
-                gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+                gcode.append(self.doformat(p.z_feedrate_code))
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))
+                gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
             else:
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)  # Start cutting
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))  # Start cutting
 
             # start cutting the extra line
-            last_pt = extra_path[0]
-            for pt in extra_path[1:]:
-                gcode += self.doformat(p.linear_code, x=pt[0], y=pt[1])
-                last_pt = pt
+            gcode.extend(self.doformat_linear(p, extra_path[1:]))
+            last_pt = extra_path[-1]
 
             # go back to the original point
-            gcode += self.doformat(p.linear_code, x=path[0][0], y=path[0][1])
+            gcode.append(self.doformat(p.linear_code, x=path[0][0], y=path[0][1]))
             last_pt = path[0]
         else:
             # go to the point that is 5% in length before the end (therefore 95% length from start of the line),
@@ -7107,23 +7467,22 @@ class CNCjob(Geometry):
             new_y = extra_path[0][1]
 
             # this is an extra line therefore lift the milling bit
-            gcode += self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move)  # lift
+            gcode.append(self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move))  # lift
 
             # move fast to the new first point
-            gcode += self.doformat(p.rapid_code, x=new_x, y=new_y)
+            gcode.append(self.doformat(p.rapid_code, x=new_x, y=new_y))
 
             # lower the milling bit
             # Different feedrate for vertical cut?
             if self.z_feedrate is not None:
-                gcode += self.doformat(p.z_feedrate_code)
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)
-                gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+                gcode.append(self.doformat(p.z_feedrate_code))
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))
+                gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
             else:
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)  # Start cutting
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))  # Start cutting
 
             # start cutting the extra line
-            for pt in extra_path[1:]:
-                gcode += self.doformat(p.linear_code, x=pt[0], y=pt[1])
+            gcode.extend(self.doformat_linear(p, extra_path[1:]))
 
             # ---------------------------------------------
             # second half
@@ -7138,16 +7497,14 @@ class CNCjob(Geometry):
             extra_path = list(extra_line.coords)[::-1]
 
             # start cutting the extra line
-            last_pt = extra_path[0]
-            for pt in extra_path[1:]:
-                gcode += self.doformat(p.linear_code, x=pt[0], y=pt[1])
-                last_pt = pt
+            gcode.extend(self.doformat_linear(p, extra_path[1:]))
+            last_pt = extra_path[-1]
 
         # Up to travelling height.
         if up:
-            gcode += self.doformat(p.lift_code, x=last_pt[0], y=last_pt[1], z_move=z_move)  # Stop cutting
+            gcode.append(self.doformat(p.lift_code, x=last_pt[0], y=last_pt[1], z_move=z_move))  # Stop cutting
 
-        return gcode
+        return ''.join(gcode)
 
     def point2gcode(self, point, dia, z_move=None, old_point=(0, 0)):
         """
@@ -7163,7 +7520,7 @@ class CNCjob(Geometry):
         :return:                    G-code to cut on the Point feature.
         :rtype:                     str
         """
-        gcode = ""
+        gcode = []
 
         if self.app.abort_flag:
             # graceful abort requested by the user
@@ -7197,41 +7554,41 @@ class CNCjob(Geometry):
 
             if travel[0] is not None:
                 # move to next point
-                gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                 # raise to safe Z (travel[0]) each time because safe Z may be different
                 self.z_move = travel[0]
-                gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                 # restore z_move
                 self.z_move = z_move
             else:
                 if prev_z is not None:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # we assume that previously the z_move was altered therefore raise to
                     # the travel_z (z_move)
                     self.z_move = z_move
-                    gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                 else:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
             # store prev_z
             prev_z = travel[0]
 
-        # gcode += self.doformat(p.linear_code, x=first_x, y=first_y)  # Move to first point
+        # gcode.append(self.doformat(p.linear_code, x=first_x, y=first_y))  # Move to first point
 
         if self.z_feedrate is not None:
-            gcode += self.doformat(p.z_feedrate_code)
-            gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut)
-            gcode += self.doformat(p.feedrate_code)
+            gcode.append(self.doformat(p.z_feedrate_code))
+            gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut))
+            gcode.append(self.doformat(p.feedrate_code))
         else:
-            gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut)  # Start cutting
+            gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut))  # Start cutting
 
-        gcode += self.doformat(p.lift_code, x=first_x, y=first_y)  # Stop cutting
-        return gcode
+        gcode.append(self.doformat(p.lift_code, x=first_x, y=first_y))  # Stop cutting
+        return ''.join(gcode)
 
     def export_svg(self, scale_stroke_factor=0.00,
                    scale_factor_x=None, scale_factor_y=None,
@@ -7416,6 +7773,42 @@ class CNCjob(Geometry):
         return bounds_coords
 
     # TODO This function should be replaced at some point with a "real" function. Until then it's an ugly hack ...
+    def affine_transform(self, transform):
+        """
+        Transforms the geometry of the parsed GCode (of the object and of each tool) with an affine transformation.
+        The GCode itself is not changed.
+
+        :param transform:   The transformation
+        :type transform:    AffineTransform
+        :return:            None
+        """
+        parsed_lists = [self.gcode_parsed]
+        if self.multitool is True:
+            parsed_lists += [v['gcode_parsed'] for v in self.tools.values() if 'gcode_parsed' in v]
+
+        # the same parsed element may be found in more than one list (e.g. the Excellon based CNCJob's)
+        parsed = {}
+        for parsed_list in parsed_lists:
+            if parsed_list:
+                for geo in parsed_list:
+                    parsed[id(geo)] = geo
+        parsed = list(parsed.values())
+
+        new_geoms = transform.apply([geo['geom'] for geo in parsed], progress=self.transform_progress)
+        for geo, new_geom in zip(parsed, new_geoms):
+            geo['geom'] = new_geom
+
+        if self.multitool is True:
+            for v in self.tools.values():
+                if v.get('gcode_parsed'):
+                    # for the bounding box
+                    v['solid_geometry'] = unary_union([geo['geom'] for geo in v['gcode_parsed']])
+
+        if self.gcode_parsed:
+            self.create_geometry()
+        else:
+            self.solid_geometry = transform.apply(self.solid_geometry)
+
     def scale(self, xfactor, yfactor=None, point=None):
         """
         Scales all the geometry on the XY plane in the object by the
@@ -7544,62 +7937,16 @@ class CNCjob(Geometry):
             return temp_gcode
 
         if self.multitool is False:
-            # offset Gcode
+            # scale Gcode
             self.gcode = scale_g(self.gcode)
-
-            # variables to display the percentage of work done
-            self.geo_len = 0
-            try:
-                self.geo_len = len(self.gcode_parsed)
-            except TypeError:
-                self.geo_len = 1
-            self.old_disp_number = 0
-            self.el_count = 0
-
-            # scale geometry
-            for g in self.gcode_parsed:
-                try:
-                    g['geom'] = affinity.scale(g['geom'], xfactor, yfactor, origin=(px, py))
-                except AttributeError:
-                    return g['geom']
-
-                self.el_count += 1
-                disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                if self.old_disp_number < disp_number <= 100:
-                    self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                    self.old_disp_number = disp_number
-
-            self.create_geometry()
         else:
             # for CNCJob objects made from Geometry objects
             for k, v in self.tools.items():
                 # scale Gcode
                 v['gcode'] = scale_g(v['gcode'])
 
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(v['gcode_parsed'])
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                # scale gcode_parsed
-                for g in v['gcode_parsed']:
-                    try:
-                        g['geom'] = affinity.scale(g['geom'], xfactor, yfactor, origin=(px, py))
-                    except AttributeError:
-                        return g['geom']
-
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                v['solid_geometry'] = unary_union([geo['geom'] for geo in v['gcode_parsed']])
-        self.create_geometry()
+        # scale geometry
+        self.affine_transform(AffineTransform().scale(xfactor, yfactor, origin=(px, py)))
         self.app.proc_container.new_text = ''
 
     def offset(self, vect):
@@ -7655,61 +8002,14 @@ class CNCjob(Geometry):
         if self.multitool is False:
             # offset Gcode
             self.gcode = offset_g(self.gcode)
-
-            # variables to display the percentage of work done
-            self.geo_len = 0
-            try:
-                self.geo_len = len(self.gcode_parsed)
-            except TypeError:
-                self.geo_len = 1
-            self.old_disp_number = 0
-            self.el_count = 0
-
-            # offset geometry
-            for g in self.gcode_parsed:
-                try:
-                    g['geom'] = affinity.translate(g['geom'], xoff=dx, yoff=dy)
-                except AttributeError:
-                    return g['geom']
-
-                self.el_count += 1
-                disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                if self.old_disp_number < disp_number <= 100:
-                    self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                    self.old_disp_number = disp_number
-
-            self.create_geometry()
         else:
             # for CNCJob objects made from Gerber or Geometry objects
             for k, v in self.tools.items():
                 # offset Gcode
                 v['gcode'] = offset_g(v['gcode'])
 
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(v['gcode_parsed'])
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                # offset gcode_parsed
-                for g in v['gcode_parsed']:
-                    try:
-                        g['geom'] = affinity.translate(g['geom'], xoff=dx, yoff=dy)
-                    except AttributeError:
-                        return g['geom']
-
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                # for the bounding box
-                v['solid_geometry'] = unary_union([geo['geom'] for geo in v['gcode_parsed']])
-
+        # offset geometry
+        self.affine_transform(AffineTransform().translate(dx, dy))
         self.app.proc_container.new_text = ''
 
     def mirror(self, axis, point):
@@ -7722,31 +8022,7 @@ class CNCjob(Geometry):
         """
         self.app.log.debug("camlib.CNCJob.mirror()")
 
-        px, py = point
-        xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.gcode_parsed)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for g in self.gcode_parsed:
-            try:
-                g['geom'] = affinity.scale(g['geom'], xscale, yscale, origin=(px, py))
-            except AttributeError:
-                return g['geom']
-
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        self.create_geometry()
+        self.affine_transform(AffineTransform().mirror(axis, origin=point))
         self.app.proc_container.new_text = ''
 
     def skew(self, angle_x, angle_y, point):
@@ -7766,30 +8042,7 @@ class CNCjob(Geometry):
         """
         self.app.log.debug("camlib.CNCJob.skew()")
 
-        px, py = point
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.gcode_parsed)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for g in self.gcode_parsed:
-            try:
-                g['geom'] = affinity.skew(g['geom'], angle_x, angle_y, origin=(px, py))
-            except AttributeError:
-                return g['geom']
-
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        self.create_geometry()
+        self.affine_transform(AffineTransform().skew(angle_x, angle_y, origin=point))
         self.app.proc_container.new_text = ''
 
     def rotate(self, angle, point):
@@ -7802,30 +8055,7 @@ class CNCjob(Geometry):
         """
         self.app.log.debug("camlib.CNCJob.rotate()")
 
-        px, py = point
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.gcode_parsed)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for g in self.gcode_parsed:
-            try:
-                g['geom'] = affinity.rotate(g['geom'], angle, origin=(px, py))
-            except AttributeError:
-                return g['geom']
-
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        self.create_geometry()
+        self.affine_transform(AffineTransform().rotate(angle, origin=point))
         self.app.proc_container.new_text = ''
 
 
@@ -7880,7 +8110,7 @@ def get_bounds(geometry_list: list) -> list:
     return [xmin, ymin, xmax, ymax]
 
 
-def arc(center, radius, start, stop, direction, steps_per_circ):
+def arc(center, radius, start, stop, direction, steps_per_circ, tolerance=None):
     """
     Creates a list of point along the specified arc.
 
@@ -7897,34 +8127,68 @@ def arc(center, radius, start, stop, direction, steps_per_circ):
     :param steps_per_circ:  Number of straight line segments to
                             represent a circle.
     :type steps_per_circ:   int
+    :param tolerance:       Maximum distance between the arc and its segments (chord error), in the units of the
+                            coordinates. If given, the number of segments is chosen from it and not from steps_per_circ
+    :type tolerance:        float | None
     :return:                The desired arc, as list of tuples
     :rtype:                 list
     """
-    # TODO: Resolution should be established by maximum error from the exact arc.
-
-    da_sign = {"cw": -1.0, "ccw": 1.0}
-    points = []
+    direction = direction.lower()
     if direction == "ccw" and stop <= start:
         stop += 2 * np.pi
     if direction == "cw" and stop >= start:
         stop -= 2 * np.pi
 
-    angle = abs(stop - start)
+    sweep = stop - start
+    steps = int(arc_steps(sweep, radius, steps_per_circ, tolerance=tolerance))
+    theta = start + (sweep / steps) * np.arange(steps + 1)
+
+    return list(zip((center[0] + radius * np.cos(theta)).tolist(), (center[1] + radius * np.sin(theta)).tolist()))
+
+
+def arc_batch(centers, radii, starts, stops, directions, steps_per_circ, tolerance=None):
+    """
+    Vectorized version of arc(): creates the points of many arcs at once.
+
+    :param centers:         Coordinates of the centers, shape (N, 2)
+    :type centers:          np.ndarray | list
+    :param radii:           Radius of each arc
+    :type radii:            np.ndarray | list
+    :param starts:          Starting angle of each arc, in radians
+    :type starts:           np.ndarray | list
+    :param stops:           End angle of each arc, in radians
+    :type stops:            np.ndarray | list
+    :param directions:      Orientation of each arc, "cw" or "ccw"
+    :type directions:       np.ndarray | list
+    :param steps_per_circ:  Number of straight line segments to
+                            represent a circle.
+    :type steps_per_circ:   int
+    :param tolerance:       Maximum distance between the arcs and their segments (chord error), in the units of the
+                            coordinates. If given, the number of segments of each arc is chosen from it and from the
+                            arc radius, and not from steps_per_circ
+    :type tolerance:        float | None
+    :return:                The points of all arcs concatenated in a (M, 2) array and the number of points of
+                            each arc
+    :rtype:                 tuple
+    """
+    radii = np.asarray(radii, dtype=float)
+    starts = np.asarray(starts, dtype=float)
+    stops = np.asarray(stops, dtype=float)
+    ccw = np.char.lower(np.asarray(directions, dtype=str)) == 'ccw'
 
-    # angle = stop-start
-    steps = max([int(np.ceil(angle / (2 * np.pi) * steps_per_circ)), 2])
-    delta_angle = da_sign[direction] * angle * 1.0 / steps
-    for i in range(steps + 1):
-        theta = start + delta_angle * i
-        points.append((center[0] + radius * np.cos(theta), center[1] + radius * np.sin(theta)))
-    return points
+    stops = np.where(ccw & (stops <= starts), stops + 2 * np.pi, stops)
+    stops = np.where(~ccw & (stops >= starts), stops - 2 * np.pi, stops)
 
+    sweeps = stops - starts
+    steps = arc_steps(sweeps, radii, steps_per_circ, tolerance=tolerance)
+    return arc_points(centers, radii, starts, sweeps, steps)
 
-def arc2(p1, p2, center, direction, steps_per_circ):
+
+def arc2(p1, p2, center, direction, steps_per_circ, tolerance=None):
     r = np.sqrt((center[0] - p1[0]) ** 2 + (center[1] - p1[1]) ** 2)
     start = np.arctan2(p1[1] - center[1], p1[0] - center[0])
     stop = np.arctan2(p2[1] - center[1], p2[0] - center[0])
-    return arc(center, r, start, stop, direction, steps_per_circ)
+    return arc(center, r, start, stop, direction, steps_per_circ, tolerance=tolerance)
 
 
 def arc_angle(start, stop, direction):
@@ -8375,74 +8639,181 @@ class AppRTree(object):
     Indexes geometry (Any object with "coords" property containing
     a list of tuples with x, y values). Objects are indexed by
     all their points by default. To index by arbitrary points,
-    override self.points2obj.
+    override self.get_points.
+
+    The points are kept in contiguous NumPy arrays. The RTree index is built
+    lazily, with the rtree stream bulk loader, before the first query that follows
+    a batch of insertions. Removal only marks the object points as dead (tombstones)
+    and the index is compacted once the dead points pass a threshold.
     """
 
+    # the index is rebuilt instead of updated when the points not yet indexed are more than
+    # this fraction of the indexed ones
+    rebuild_ratio = 0.25
+
+    # the index is compacted when the dead points are more than this fraction of the stored points
+    compact_ratio = 0.5
+    compact_min = 1024
+
     def __init__(self):
         # Python RTree Index
         self.rti = rtindex.Index()
 
         # ## Track object-point relationship
-        # Each is list of points in object.
-        self.obj2points = []
+        # Key is the object id, value is the (start, stop) range of its points in the point arrays
+        self.obj2points = {}
 
-        # Index is index in rtree, value is index of
-        # object in obj2points.
-        self.points2obj = []
+        # Point arrays. For each point: coordinates, the id of the object owning it, and if it is alive
+        self._coords = np.empty((64, 2), dtype=float)
+        self.points2obj = np.empty(64, dtype=np.int64)
+        self._alive = np.zeros(64, dtype=bool)
+
+        # number of used point slots
+        self._size = 0
+        # the point slots in the range [0, self._indexed) are in the RTree index
+        self._indexed = 0
+        self._dead = 0
 
         self.get_points = lambda go: go.coords
 
-    def grow_obj2points(self, idx):
+    def _grow(self, needed):
+        capacity = len(self._coords)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        coords = np.empty((capacity, 2), dtype=float)
+        coords[:self._size] = self._coords[:self._size]
+        owners = np.empty(capacity, dtype=np.int64)
+        owners[:self._size] = self.points2obj[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+
+        self._coords = coords
+        self.points2obj = owners
+        self._alive = alive
+
+    def insert(self, objid, obj):
+        if objid in self.obj2points:
+            self.remove_obj(objid, obj)
+
+        pts = [(pt[0], pt[1]) for pt in self.get_points(obj)]
+        if not pts:
+            self.obj2points[objid] = (self._size, self._size)
+            return
+
+        start = self._size
+        stop = start + len(pts)
+        self._grow(stop)
+        self._coords[start:stop] = pts
+        self.points2obj[start:stop] = objid
+        self._alive[start:stop] = True
+        self._size = stop
+        self.obj2points[objid] = (start, stop)
+
+    def remove_obj(self, objid, obj=None):
+        try:
+            start, stop = self.obj2points.pop(objid)
+        except KeyError:
+            return
+        self._dead += int(np.count_nonzero(self._alive[start:stop]))
+        self._alive[start:stop] = False
+
+    def _compact(self):
         """
-        Increases the size of self.obj2points to fit
-        idx + 1 items.
+        Drop the dead points from the point arrays and rebuild the RTree index with the stream bulk loader.
 
-        :param idx: Index to fit into list.
         :return: None
         """
-        if len(self.obj2points) > idx:
-            # len == 2, idx == 1, ok.
-            return
+        alive = self._alive[:self._size]
+        new_pos = np.cumsum(alive) - 1
+        for objid, (start, stop) in self.obj2points.items():
+            if stop > start:
+                new_start = int(new_pos[start])
+                self.obj2points[objid] = (new_start, new_start + stop - start)
+            else:
+                self.obj2points[objid] = (0, 0)
+
+        keep = np.flatnonzero(alive)
+        size = len(keep)
+        self._coords[:size] = self._coords[keep]
+        self.points2obj[:size] = self.points2obj[keep]
+        self._alive[:size] = True
+        self._alive[size:] = False
+        self._size = size
+        self._dead = 0
+
+        if size:
+            coords = self._coords[:size]
+            self.rti = rtindex.Index(((int(i), (x, y, x, y), None) for i, (x, y) in enumerate(coords.tolist())))
         else:
-            # len == 2, idx == 2, need 1 more.
-            # range(2, 3)
-            for i in range(len(self.obj2points), idx + 1):
-                self.obj2points.append([])
+            self.rti = rtindex.Index()
+        self._indexed = size
 
-    def insert(self, objid, obj):
-        self.grow_obj2points(objid)
-        self.obj2points[objid] = []
+    def _sync(self):
+        """
+        Make sure that the RTree index holds all the stored points. The points added since the last query
+        are inserted one by one if they are few, otherwise the whole index is rebuilt.
+
+        :return: None
+        """
+        pending = self._size - self._indexed
+        if self._dead > max(self.compact_min, self.compact_ratio * self._size) or \
+                pending > max(self.rebuild_ratio * self._indexed, 64):
+            self._compact()
+            return
 
-        for pt in self.get_points(obj):
-            self.rti.insert(len(self.points2obj), (pt[0], pt[1], pt[0], pt[1]), obj=objid)
-            self.obj2points[objid].append(len(self.points2obj))
-            self.points2obj.append(objid)
+        if pending:
+            for i in range(self._indexed, self._size):
+                if self._alive[i]:
+                    x, y = self._coords[i]
+                    self.rti.insert(i, (x, y, x, y))
+            self._indexed = self._size
 
-    def remove_obj(self, objid, obj):
-        # Use all ptids to delete from index
-        for i, pt in enumerate(self.get_points(obj)):
-            try:
-                self.rti.delete(self.obj2points[objid][i], (pt[0], pt[1], pt[0], pt[1]))
-            except IndexError:
-                pass
+    def _first_alive(self, query):
+        """
+        :param query:   a callable that takes the number of results and returns an iterable of point ids
+        :return:        the id of the first point that is alive in the query results
+        :rtype:         int
+        """
+        num_results = 1
+        while True:
+            found = 0
+            for found, i in enumerate(query(num_results), start=1):
+                if self._alive[i]:
+                    return i
+            if found < num_results:
+                raise StopIteration
+            num_results *= 4
 
     def nearest(self, pt):
         """
         Will raise StopIteration if no items are found.
 
-        :param pt:
-        :return:
+        :param pt:  Query point
+        :return:    (match_x, match_y), id of the object owner of matching point
+        :rtype:     tuple
         """
-        return next(self.rti.nearest(pt, objects=True))
+        self._sync()
+        bbox = (pt[0], pt[1], pt[0], pt[1])
+        i = self._first_alive(lambda num: self.rti.nearest(bbox, num_results=num))
+        return (float(self._coords[i][0]), float(self._coords[i][1])), int(self.points2obj[i])
 
     def intersection(self, pt):
         """
         Will raise StopIteration if no items are found.
 
-        :param pt:
-        :return:
+        :param pt:  Query point or bounding box
+        :return:    (match_x, match_y), id of the object owner of matching point
+        :rtype:     tuple
         """
-        return next(self.rti.intersection(pt, objects=True))
+        self._sync()
+        bbox = (pt[0], pt[1], pt[0], pt[1]) if len(pt) == 2 else pt
+        for i in self.rti.intersection(bbox):
+            if self._alive[i]:
+                return (float(self._coords[i][0]), float(self._coords[i][1])), int(self.points2obj[i])
+        raise StopIteration
 
 
 class AppRTreeStorage(AppRTree):
@@ -8501,8 +8872,8 @@ class AppRTreeStorage(AppRTree):
           matching point.
         :rtype: tuple
         """
-        tidx = super(AppRTreeStorage, self).nearest(pt)
-        return (tidx.bbox[0], tidx.bbox[1]), self.objects[tidx.object]
+        match_pt, objidx = super(AppRTreeStorage, self).nearest(pt)
+        return match_pt, self.objects[objidx]
 
 # class myO:
 #     def __init__(self, coords):
@@ -77,6 +77,7 @@ class AppDefaults:
         "units_precision": 4,
         "global_graphic_engine": '3D',
         "global_graphic_engine_3d_no_mp": False,
+        "global_graphic_engine_tess_cache": 256,
         "global_app_level": 'b',
 
         "global_log_verbose": 2,
@@ -93,7 +94,9 @@ class AppDefaults:
         "global_worker_number": int((os.cpu_count()) / 2) if os.cpu_count() > 4 else 1,
         "global_process_number": int((os.cpu_count()) / 4) if os.cpu_count() > 4 else 1,
         "global_tolerance": 0.005,
+        "global_arc_tolerance": 0.01,
 
+        "global_save_archive": False,
         "global_save_compressed": True,
         "global_compression_level": 3,
         "global_autosave": False,
@@ -246,6 +249,7 @@ class AppDefaults:
         "excellon_multicolored": False,
         "excellon_color": None,
         "excellon_merge_fuse_tools": True,
+        "excellon_lightweight_drills": False,
         "excellon_format_upper_in": 2,
         "excellon_format_lower_in": 4,
         "excellon_format_upper_mm": 3,
@@ -358,6 +362,7 @@ class AppDefaults:
         # CNC Job Options
         "cncjob_plot_kind": 'all',
         "cncjob_annotation": True,
+        "cncjob_fast_plot": False,
 
         # CNC Job Advanced Options
         "cncjob_annotation_fontsize": 9,
@@ -250,6 +250,22 @@ G00 Z{z_toolchange}
         # It is a horizontal move in the X-Y CNC plane.
         return ('G01 ' + self.position_code(p)).format(**p)
 
+    def linear_code_batch(self, p, coords):
+        # the same output as calling linear_code() for each point, but the line format and the bed parameters are
+        # solved only once for the whole series of linear motions
+        line_format = 'G01 X' + self.coordinate_format + ' Y' + self.coordinate_format + '\n'
+        decimals = p.coords_decimals
+        offset_x, offset_y = p._bed_offset_x, p._bed_offset_y
+        skew_x, skew_y = p._bed_skew_x, p._bed_skew_y
+
+        lines = []
+        for pt in coords:
+            x, y = pt[0], pt[1]
+            x_pos = x + offset_x if skew_x == 0 else (x + offset_x) + ((y / p._bed_limit_y) * skew_x)
+            y_pos = y + offset_y if skew_y == 0 else (y + offset_y) + ((x / p._bed_limit_x) * skew_y)
+            lines.append(line_format % (decimals, x_pos, decimals, y_pos))
+        return lines
+
     def end_code(self, p):
         # a final move at the end of the CNC job. First it moves to a safe parking Z height followed by an X-Y move
         # to the parking location.
@@ -0,0 +1,109 @@
+from tclCommands.TclCommand import *
+
+
+class TclCommandQRCodeBatch(TclCommandSignaled):
+    """
+    Tcl shell command to create a Gerber object with many QRCodes.
+    """
+
+    # array of all command aliases, to be able use  old names for backward compatibility (add_poly, add_polygon)
+    aliases = ['qrcode_batch']
+
+    description = '%s %s' % ("--", "Creates a Gerber object with many QRCodes (e.g. serial numbers on a panel).")
+
+    # dictionary of types from Tcl command, needs to be ordered
+    arg_names = collections.OrderedDict([
+        ('name', str)
+    ])
+
+    # dictionary of types from Tcl command, needs to be ordered , this  is  for options  like -optionname value
+    option_types = collections.OrderedDict([
+        ('data_file', str),
+        ('version', int),
+        ('error', str),
+        ('box_size', int),
+        ('border', int),
+        ('polarity', str),
+        ('rounded', str)
+    ])
+
+    # array of mandatory options for current Tcl command: required = {'name','outname'}
+    required = ['name']
+
+    # structured help for current command, args needs to be ordered
+    help = {
+        'main': "Creates a Gerber object with many QRCodes (e.g. serial numbers on a panel).",
+        'args': collections.OrderedDict([
+            ('name', 'Name of the new Gerber object. Required.'),
+            ('xi yi datai', 'The lower left corner of a QRCode (the border included) and the QRCode data. '
+                            'If spaces are used in the data then enclose it with quotes.'),
+            ('data_file', 'Path to a text file with one QRCode per line, in the format: X, Y, QRCode data.'),
+            ('version', 'QRCode version, from 1 to 40. Integer.'),
+            ('error', 'Error correction: L, M, Q or H.'),
+            ('box_size', 'Size of a QRCode box in tenths of a millimeter. Integer.'),
+            ('border', 'How many boxes thick is the border. Integer.'),
+            ('polarity', 'pos (the boxes are opaque) or neg (the boxes are clear).'),
+            ('rounded', 'The bounding box for the neg polarity: r (rounded) or s (square).')
+        ]),
+        'examples': [
+            'qrcode_batch <name> <x0> <y0> <data0> [x1 y1 data1 [...]]',
+            'qrcode_batch serials 10 10 SN0001 60 10 SN0002 -box_size 3 -polarity pos',
+            'qrcode_batch serials -data_file "/path/to/serials.txt" -error H'
+        ]
+    }
+
+    def execute(self, args, unnamed_args):
+        """
+        execute current TCL shell command
+
+        :param args: array of known named arguments and options
+        :param unnamed_args: array of other values which were passed into command
+            without -somename and  we do not have them in known arg_names
+        :return: None or exception
+        """
+
+        name = args['name']
+
+        if len(unnamed_args) % 3 != 0:
+            self.raise_tcl_error("Incomplete QRCode data. Expected: x y data.")
+
+        items = []
+        try:
+            for i in range(len(unnamed_args) // 3):
+                x, y, data = unnamed_args[3 * i:3 * i + 3]
+                items.append((str(data), (float(x), float(y))))
+        except ValueError as err:
+            self.raise_tcl_error("Wrong coordinates: %s" % str(err))
+
+        if 'data_file' in args:
+            try:
+                with open(args['data_file'], 'r') as f:
+                    items += self.app.qrcode_tool.parse_batch_data(f.read())
+            except (OSError, ValueError) as err:
+                self.raise_tcl_error(str(err))
+
+        if not items:
+            self.raise_tcl_error("There is no QRCode data.")
+
+        error = str(args.get('error', self.app.options["tools_qrcode_error"])).upper()
+        if error not in ['L', 'M', 'Q', 'H']:
+            self.raise_tcl_error("Expected error correction L, M, Q or H, got %s." % error)
+
+        polarity = str(args.get('polarity', self.app.options["tools_qrcode_polarity"])).lower()
+        rounded = str(args.get('rounded', self.app.options["tools_qrcode_rounded"])).lower()
+
+        ret = self.app.qrcode_tool.make_batch(
+            items, outname=name,
+            version=int(args.get('version', self.app.options["tools_qrcode_version"])),
+            error=error,
+            box_size=int(args.get('box_size', self.app.options["tools_qrcode_box_size"])),
+            border=int(args.get('border', self.app.options["tools_qrcode_border_size"])),
+            polarity='neg' if polarity == 'neg' else 'pos',
+            rounded='s' if rounded == 's' else 'r',
+            plot=False,
+            run_threaded=False)
+        if ret == 'fail':
+            self.raise_tcl_error("Could not create the QRCodes.")
+        if ret:
+            self.raise_tcl_error("Could not create %d QRCodes (the others are in %s): %s" %
+                                 (len(ret), name, ', '.join(ret)))
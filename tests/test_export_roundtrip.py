@@ -0,0 +1,168 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# File Author: Marius Adrian Stanciu (c)                   #
+# Date: 10/17/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+# Round trip of the Gerber export: the Gerber code made by GerberObject.export_gerber() (with the coordinates
+# formatted by appCommon.CoordinateFormat) is parsed back with Gerber.parse_file() and the parsed geometry is
+# compared with the exported one.
+
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from shapely import Point, LineString, Polygon
+from shapely.ops import unary_union
+
+from appCommon.CoordinateFormat import CoordinateFormatter
+
+# (whole digits, fractional digits)
+FORMATS = [(2, 4), (3, 5)]
+ZEROS = ['L', 'T']
+
+
+def decode(text, whole, fract, zeros):
+    """
+    Decodes a fixed point number the way the Gerber and the Excellon readers do.
+    """
+    sign = -1 if text.startswith('-') else 1
+    digits = text.lstrip('+-')
+    if zeros == 'T':
+        # the trailing zeros may be omitted, the number is padded on the right
+        digits = digits.ljust(whole + fract, '0')
+    return sign * int(digits) / 10 ** fract
+
+
+@pytest.mark.parametrize('zeros', ZEROS)
+@pytest.mark.parametrize('whole, fract', FORMATS)
+def test_formatter_roundtrip(whole, fract, zeros):
+    values = np.array([0.0, 1.5, -1.5, 0.0001, -0.0001, 12.34567, -45.00001, 10 ** (whole - 1) - 0.5])
+    formatter = CoordinateFormatter(whole, fract, pad_whole=zeros == 'T')
+    strings = formatter.format(values)
+
+    for value, text in zip(values, strings):
+        assert len(text.lstrip('-')) <= whole + fract
+        assert decode(text, whole, fract, zeros) == pytest.approx(round(value, fract), abs=0.5 * 10 ** -fract)
+
+
+def test_formatter_xy_negative():
+    formatter = CoordinateFormatter(2, 4, pad_whole=True)
+    assert formatter.xy([[-1.5, 2.25]]).tolist() == ['X-015000Y022500']
+
+    formatter = CoordinateFormatter(2, 4, pad_whole=False)
+    assert formatter.xy([[-1.5, 2.25]]).tolist() == ['X-15000Y22500']
+
+
+# #####################################################################################################################
+# Export -> parse round trip; it needs the application modules (PyQt6 and the others in requirements.txt)
+# #####################################################################################################################
+
+APERTURE_DIA = 0.5
+CIRCLE_STEPS = 16
+
+
+@pytest.fixture
+def gerber_classes(monkeypatch):
+    pytest.importorskip('PyQt6')
+    from appParsers.ParseGerber import Gerber
+    from appObjects.GerberObject import GerberObject
+
+    options = {
+        "gerber_buffering": "full",
+        "gerber_circle_steps": CIRCLE_STEPS,
+        "gerber_simp_tolerance": 0.0005,
+        "gerber_use_buffer_for_union": True,
+        "global_process_number": 1,
+        "gerber_clean_apertures": True,
+        "gerber_def_units": 'MM',
+        "gerber_def_zeros": 'L',
+        "gerber_extra_buffering": False,
+        "gerber_simplification": False,
+    }
+    app = SimpleNamespace(
+        options=options, decimals=4, app_units='MM', abort_flag=False, pool=None,
+        log=logging.getLogger('test'),
+        inform=SimpleNamespace(emit=lambda *args: None),
+        proc_container=SimpleNamespace(new_text=''),
+        use_3d_engine=True,
+        plotcanvas=SimpleNamespace(new_shape_collection=lambda **kwargs: None)
+    )
+    monkeypatch.setattr(Gerber, 'app', app, raising=False)
+
+    class ExportSource:
+        """
+        Holds the apertures of a Gerber object and uses the Gerber export of GerberObject.
+        """
+        export_gerber = GerberObject.export_gerber
+        export_gerber_batch = GerberObject.__dict__['export_gerber_batch']
+        export_gerber_region = GerberObject.__dict__['export_gerber_region']
+        export_gerber_paths = GerberObject.__dict__['export_gerber_paths']
+
+        def __init__(self, tools):
+            self.app = app
+            self.tools = tools
+
+    return Gerber, ExportSource
+
+
+def make_tools(dx, dy):
+    """
+    A region with a hole, flashes and a track, moved by (dx, dy).
+    """
+    def move(coords):
+        return [(x + dx, y + dy) for x, y in coords]
+
+    region = Polygon(move([(0, 0), (10, 0), (10, 6), (0, 6)]), [move([(2, 2), (4, 2), (4, 4), (2, 4)])])
+    flashes = [Point(move([(13.25, 1.5)])[0]), Point(move([(15.125, 1.5)])[0]), Point(move([(17.0625, 1.5)])[0])]
+    track = LineString(move([(12, 4), (18, 4), (18, 8.5)]))
+
+    radius = APERTURE_DIA / 2
+    return {
+        0: {
+            'type': 'REG', 'size': 0.0,
+            'geometry': [{'solid': region, 'follow': region.exterior}]
+        },
+        10: {
+            'type': 'C', 'size': APERTURE_DIA,
+            'geometry': [{'solid': pt.buffer(radius, CIRCLE_STEPS), 'follow': pt} for pt in flashes] +
+                        [{'solid': track.buffer(radius, CIRCLE_STEPS), 'follow': track}]
+        }
+    }
+
+
+def export_and_parse(gerber_classes, tmp_path, tools, whole, fract, zeros):
+    gerber_cls, source_cls = gerber_classes
+
+    body = source_cls(tools).export_gerber(whole, fract, g_zeros=zeros, factor=1)
+    header = '%%FS%sAX%s%sY%s%s*%%\n' % (zeros, whole, fract, whole, fract)
+    header += '%MOMM*%\n'
+    header += '%%ADD10C,%s*%%\n' % str(APERTURE_DIA)
+    header += 'G01*\n%LPD*%\n'
+
+    filename = tmp_path / ('roundtrip_%s_%d_%d.gbr' % (zeros, whole, fract))
+    filename.write_text(header + body + 'M02*\n')
+
+    parsed = gerber_cls(steps_per_circle=CIRCLE_STEPS)
+    assert parsed.parse_file(str(filename)) not in ('fail', 'defective')
+    return unary_union(parsed.solid_geometry)
+
+
+@pytest.mark.parametrize('zeros', ZEROS)
+@pytest.mark.parametrize('whole, fract', FORMATS)
+@pytest.mark.parametrize('dx, dy', [(1.0, 2.0), (-25.5, -12.25)], ids=['positive', 'negative'])
+def test_gerber_export_roundtrip(gerber_classes, tmp_path, whole, fract, zeros, dx, dy):
+    tools = make_tools(dx, dy)
+    expected = unary_union([geo_el['solid'] for ap in tools.values() for geo_el in ap['geometry']])
+
+    parsed = export_and_parse(gerber_classes, tmp_path, tools, whole, fract, zeros)
+
+    assert not parsed.is_empty
+    # the parser approximates the round ends a bit differently, this is more than the coordinates rounding
+    assert parsed.bounds == pytest.approx(expected.bounds, abs=1e-3)
+    assert parsed.area == pytest.approx(expected.area, rel=1e-3)
+    # the hole of the region is kept
+    assert not parsed.contains(Point(3 + dx, 3 + dy))
+    assert parsed.symmetric_difference(expected).area < 1e-3 * expected.area